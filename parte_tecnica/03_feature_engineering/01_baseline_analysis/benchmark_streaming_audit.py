@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK AUDITORÍA STREAMING
+1. Compara audit_csv contra la auditoría en memoria (read_csv completo +
+   duplicated + diff, como load_and_sample/infer_frequency) en los CSV
+   largos de LME y en una fuente sintética con duplicados y faltantes,
+   forzando volcados a disco del KeyCounter.
+2. Audita en paralelo (procesos) los dos LME long junto con una fuente
+   sintética de N_SYNTHETIC_ROWS filas y reporta el pico de memoria (RSS)
+   de cada camino en un proceso aparte.
+3. TemporalAuditAnalyzer.analyze_source (sobre la auditoría streaming) da
+   el mismo análisis que el original en memoria (analyze_source_reference,
+   en este módulo) en fuentes reales de 02_data_extractors/outputs.
+
+Uso: python benchmark_streaming_audit.py [filas_sinteticas]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import streaming_audit
+from streaming_audit import AuditJob, audit_csv, audit_sources, detect_time_column
+from temporal_audit_analyzer import TemporalAuditAnalyzer
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../02_data_extractors/outputs")
+LME_LONG = ['lme_sr_long.csv', 'lme_sc_long.csv']
+WINDOW = ("2024-01-01", "2025-12-31")
+N_SYNTHETIC_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+N_REFERENCE_ROWS = 1_000_000      # La ruta en memoria se mide con este prefijo
+WRITE_CHUNK = 1_000_000
+ANALYZED_SOURCES = [
+    ('SF43718_data.csv', 'BANXICO_USD_MXN', ['valor'], 'MXN/USD'),
+    ('lme_combined_sr_sc.csv', 'LME_COMBINED', ['sr_m01', 'sc_m01', 'rebar_scrap_spread'], 'USD/ton'),
+]
+
+
+def write_synthetic(path: str, n_rows: int, seed: int = 0, duplicate_rate: float = 0.0):
+    """Ticks cada 6 s desde 2024-01-01 con 1% de faltantes y duplicados opcionales"""
+    rng = np.random.default_rng(seed)
+    with open(path, 'w') as f:
+        f.write('date,value,volume\n')
+        for start in range(0, n_rows, WRITE_CHUNK):
+            ticks = np.arange(start, min(start + WRITE_CHUNK, n_rows))
+            chunk = pd.DataFrame({
+                'date': (np.datetime64('2024-01-01T00:00:00') + (ticks * 6).astype('timedelta64[s]')).astype(str),
+                'value': rng.normal(100, 5, len(ticks)).round(2),
+                'volume': rng.integers(0, 1000, len(ticks))
+            })
+            chunk.loc[rng.random(len(chunk)) < 0.01, 'value'] = np.nan
+            if duplicate_rate:
+                chunk = pd.concat([chunk, chunk.sample(frac=duplicate_rate, random_state=seed)])
+                chunk = chunk.sample(frac=1, random_state=seed)
+            chunk.to_csv(f, header=False, index=False)
+
+
+def in_memory_audit(path: str) -> dict:
+    """Ruta original: fuente completa en memoria y varias pasadas"""
+    df = pd.read_csv(path)
+    time_col = detect_time_column(list(df.columns))
+    df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
+    window = df[(df[time_col] >= WINDOW[0]) & (df[time_col] <= WINDOW[1])].copy()
+    deltas = window.sort_values(time_col)[time_col].diff().dropna().dt.total_seconds() / 86400
+    return {
+        'window_rows': len(window),
+        'missing_by_col': {col: int(window[col].isna().sum()) for col in window.columns},
+        'duplicates': {'exact': int(window.duplicated().sum()),
+                       'temporal': int(window.duplicated(subset=[time_col]).sum())},
+        'min_date': str(window[time_col].min()),
+        'max_date': str(window[time_col].max()),
+        'delta_stats': {'min_days': deltas.min(), 'median_days': deltas.median(), 'max_days': deltas.max(),
+                        'std_days': deltas.std(), 'mode_days': deltas.mode()[0]}
+    }
+
+
+def analyze_source_reference(analyzer, file_path: str, source_name: str,
+                             value_cols: List[str], units: str) -> Dict:
+    """analyze_source original: fuente completa en memoria (load_and_sample + infer_frequency)"""
+    # 1. Cargar y filtrar datos
+    df = analyzer.load_and_sample(file_path, source_name)
+
+    if len(df) == 0:
+        print(f"⚠️ No hay datos en ventana 2024-2025 para {source_name}")
+        return None
+
+    # 2. Detectar columna temporal
+    date_cols = [col for col in df.columns if any(x in col.lower() for x in ['date', 'fecha', 'year', 'año'])]
+    primary_time_col = date_cols[0] if date_cols else None
+
+    if not primary_time_col:
+        print(f"❌ No se pudo detectar columna temporal en {source_name}")
+        return None
+
+    # 3. Análisis de frecuencia
+    freq_analysis = analyzer.infer_frequency(df, primary_time_col)
+
+    # 4. Proponer features
+    features = analyzer.propose_features(
+        df, 
+        freq_analysis['frequency_class'],
+        value_cols,
+        freq_analysis['release_lag_median_days']
+    )
+
+    # 5. Reporte de calidad
+    quality_report = analyzer.generate_quality_report(df, source_name)
+
+    # 6. Generar muestra preview
+    sample_size = min(20, len(df))
+    sample_preview = df.head(sample_size)
+
+    # 7. Consolidar resultados
+    analysis = {
+        'source_name': source_name,
+        'file_path': file_path,
+        'date_range': quality_report['date_range'],
+        'frequency': freq_analysis,
+        'data_quality': quality_report,
+        'imputation_policy': {
+            'method': 'LOCF',
+            'max_carry_days': analyzer._get_max_carry(freq_analysis['frequency_class'])
+        },
+        'anti_leakage': {
+            'cutoff_time_tz': f'23:59:59 {analyzer.cutoff_timezone}',
+            'available_at_rule': f'primary_time + {freq_analysis["release_lag_median_days"]} days'
+        },
+        'features': features,
+        'units': units,
+        'sample_preview': sample_preview.to_dict('records')[:10]  # Primeras 10 filas
+    }
+
+    return analysis
+
+
+def same_analysis(fast: dict, expected: dict) -> bool:
+    """Mismas políticas, features, frecuencia y calidad (delta_stats con tolerancia)"""
+    same = all(fast[k] == expected[k] for k in ['imputation_policy', 'anti_leakage', 'features', 'units'])
+    same &= all(fast['frequency'][k] == expected['frequency'][k] for k in ['frequency_class', 'release_lag_median_days'])
+    same &= all(fast['data_quality'][k] == expected['data_quality'][k]
+                for k in ['total_records', 'missing_pct_by_col', 'duplicates'])
+    return same and all(np.isclose(fast['frequency']['delta_stats'][k], v, equal_nan=True)
+                        for k, v in expected['frequency']['delta_stats'].items())
+
+
+def same_audit(streamed: dict, expected: dict) -> bool:
+    same = all(streamed[k] == expected[k] for k in ['window_rows', 'missing_by_col', 'duplicates', 'min_date', 'max_date'])
+    return same and all(np.isclose(streamed['delta_stats'][k], v, equal_nan=True)
+                        for k, v in expected['delta_stats'].items())
+
+
+def peak_rss_mb() -> float:
+    """VmHWM del proceso (ru_maxrss en Linux arrastra el pico del padre tras fork+exec)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(fn_name: str, path: str):
+    """Corre en un proceso nuevo: (segundos, pico RSS MB)"""
+    fn = {'streaming': lambda p: audit_csv(p, 'synthetic', WINDOW), 'in_memory': in_memory_audit}[fn_name]
+    start = time.perf_counter()
+    fn(path)
+    return time.perf_counter() - start, peak_rss_mb()
+
+
+def measure(fn_name: str, path: str):
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_measure, fn_name, path).result()
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - AUDITORÍA TEMPORAL STREAMING")
+    print("="*80)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Equivalencia (con volcados a disco forzados)
+        dup_path = os.path.join(tmp, 'synthetic_dups.csv')
+        write_synthetic(dup_path, 300_000, seed=1, duplicate_rate=0.02)
+        streaming_audit.MAX_BUFFERED_KEYS = 50_000
+        print(f"{'fuente':<24}{'ventana':>10}{'dup exact':>11}{'dup fecha':>11}{'volcado':>9}   idéntico")
+        for name, path in [(f, os.path.join(DATA_PATH, f)) for f in LME_LONG] + [('sintética + dups', dup_path)]:
+            streamed = audit_csv(path, name, WINDOW, chunksize=20_000)
+            identical = same_audit(streamed, in_memory_audit(path))
+            ok &= identical
+            print(f"{name:<24}{streamed['window_rows']:>10,}{streamed['duplicates']['exact']:>11,}"
+                  f"{streamed['duplicates']['temporal']:>11,}{str(streamed['spilled_to_disk']):>9}   {identical}")
+        streaming_audit.MAX_BUFFERED_KEYS = 2_000_000
+
+        # 2. LME long + sintética grande en paralelo
+        print(f"\n✍️ Generando fuente sintética de {N_SYNTHETIC_ROWS:,} filas...")
+        big_path, prefix_path = os.path.join(tmp, 'synthetic_big.csv'), os.path.join(tmp, 'synthetic_prefix.csv')
+        write_synthetic(big_path, N_SYNTHETIC_ROWS)
+        write_synthetic(prefix_path, min(N_REFERENCE_ROWS, N_SYNTHETIC_ROWS))
+        print(f"   {os.path.getsize(big_path) / 1e6:.0f} MB en disco")
+
+        jobs = [AuditJob(os.path.join(DATA_PATH, f), f, WINDOW) for f in LME_LONG] + \
+               [AuditJob(big_path, 'synthetic_big', WINDOW)]
+        start = time.perf_counter()
+        results = audit_sources(jobs, max_workers=len(jobs))
+        parallel_s = time.perf_counter() - start
+        ok &= not any(isinstance(r, Exception) for r in results)
+        print(f"\n🧵 {len(jobs)} fuentes en procesos paralelos ({os.cpu_count()} CPU): {parallel_s:.1f}s")
+        for result in results:
+            print(f"   {result['source']:<16}{result['window_rows']:>12,} filas  "
+                  f"gaps {len(result['gap_histogram_days'])} distintos  volcado a disco: {result['spilled_to_disk']}")
+
+        prefix_rows = min(N_REFERENCE_ROWS, N_SYNTHETIC_ROWS)
+        print(f"\n{'Pico de memoria (proceso aparte)':<44}{'s':>8}{'RSS MB':>10}")
+        for label, fn_name, path in [
+            (f"en memoria, {prefix_rows:,} filas", 'in_memory', prefix_path),
+            (f"streaming, {prefix_rows:,} filas", 'streaming', prefix_path),
+            (f"streaming, {N_SYNTHETIC_ROWS:,} filas", 'streaming', big_path),
+        ]:
+            seconds, rss = measure(fn_name, path)
+            print(f"{label:<44}{seconds:>8.1f}{rss:>10.0f}")
+
+    # 3. Análisis completo de fuentes reales
+    analyzer = TemporalAuditAnalyzer(output_dir=DATA_PATH)
+    rows = []
+    for file_path, name, value_cols, units in ANALYZED_SOURCES:
+        start = time.perf_counter()
+        expected = analyze_source_reference(analyzer, file_path, name, value_cols, units)
+        reference_s = time.perf_counter() - start
+        start = time.perf_counter()
+        analysis = analyzer.analyze_source(file_path, name, value_cols, units)
+        streaming_s = time.perf_counter() - start
+        identical = same_analysis(analysis, expected)
+        ok &= identical
+        rows.append(f"{name:<24}{reference_s:>11.2f}{streaming_s:>13.2f}   {identical}")
+    print(f"\n{'Análisis de fuente':<24}{'memoria s':>11}{'streaming s':>13}   idéntico")
+    print("\n".join(rows))
+
+    print(f"\n✓ Streaming idéntico a la auditoría en memoria y sin errores: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
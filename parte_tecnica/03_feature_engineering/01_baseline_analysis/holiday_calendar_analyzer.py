@@ -10,8 +10,14 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 import logging
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+# Calendario de días hábiles compartido con la API (parte_tecnica/shared)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.business_calendar import BusinessCalendar
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class HolidayCalendarAnalyzer:
@@ -310,20 +316,26 @@ class HolidayCalendarAnalyzer:
         # Marcar fines de semana
         calendar_df['is_weekend'] = calendar_df.index.weekday >= 5
         
+        # Índice de días hábiles por mercado (bitsets + conteos acumulados)
+        country_holidays = {
+            country: [day for year_holidays in holidays_by_year.values() for day in year_holidays]
+            for country, holidays_by_year in self.holidays.items()
+        }
+        self.business_calendar = BusinessCalendar(country_holidays, self.start_date.date(), self.end_date.date())
+        
         # Marcar holidays por país
-        for country, holidays_by_year in self.holidays.items():
-            country_holidays = []
-            for year_holidays in holidays_by_year.values():
-                country_holidays.extend(year_holidays)
-            
-            calendar_df[f'{country}_holiday'] = calendar_df.index.isin(country_holidays)
-            calendar_df[f'{country}_business_day'] = ~(calendar_df['is_weekend'] | calendar_df[f'{country}_holiday'])
+        for country in self.holidays:
+            calendar_df[f'{country}_holiday'] = calendar_df.index.isin(country_holidays[country])
+            calendar_df[f'{country}_business_day'] = self.business_calendar.business_day_mask(country)
         
-        # Guardar calendario
+        # Guardar calendario (CSV para el pipeline, JSON compacto para la API)
         output_path = 'parte_tecnica/03_feature_engineering/outputs/holiday_calendar_2015_2026.csv'
         calendar_df.to_csv(output_path)
         logging.info(f"Calendario guardado en: {output_path}")
         
+        self.business_calendar.save()
+        logging.info("Calendario de días hábiles guardado en: shared/data/business_calendar.json (API y pipeline)")
+        
         # Análisis de coincidencias
         logging.info("\n📊 Análisis de Coincidencias:")
         
@@ -471,6 +483,7 @@ Estrategia Recomendada:
 
 Archivos Generados:
 - holiday_calendar_2015_2026.csv
+- shared/data/business_calendar.json
 - imputation_strategies.json
     """)
 
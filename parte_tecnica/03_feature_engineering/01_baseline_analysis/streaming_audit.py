@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+STREAMING AUDIT - auditoría temporal en una pasada sobre chunks de CSV
+
+En lugar de cargar la fuente completa y recorrerla varias veces (faltantes,
+duplicados exactos, duplicados por fecha, deltas), cada chunk se filtra a
+la ventana de análisis y se acumula:
+
+- filas y faltantes por columna
+- hash de fila (pd.util.hash_pandas_object) para duplicados exactos
+- timestamp de la columna temporal para duplicados por fecha, min/max e
+  histograma exacto de gaps
+- primeras filas (preview) y una muestra uniforme de tamaño fijo para
+  outliers IQR (exactos si la ventana cabe en la muestra)
+
+Hashes y timestamps van a KeyCounter: buffer en RAM que, al pasar de
+MAX_BUFFERED_KEYS, se vuelca a particiones en disco (por rango de llave);
+al final cada partición se ordena por separado. La memoria queda acotada
+por chunksize + buffer + una partición, no por el tamaño de la fuente.
+
+``audit_sources`` audita varias fuentes en paralelo en procesos.
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+CHUNKSIZE = 250_000
+MAX_BUFFERED_KEYS = 2_000_000     # 16 MB de llaves uint64 antes de volcar a disco
+N_PARTITIONS = 64
+OUTLIER_SAMPLE_ROWS = 100_000
+PREVIEW_ROWS = 20
+NS_PER_DAY = 86400 * 10**9
+TIME_KEYWORDS = ['date', 'fecha', 'year', 'año']
+
+
+class AuditJob(NamedTuple):
+    """Fuente a auditar"""
+    path: str
+    source_name: str
+    window: Tuple[str, str]
+    chunksize: int = CHUNKSIZE
+
+
+def detect_time_column(columns: List[str]) -> Optional[str]:
+    """Primera columna cuyo nombre sugiere fecha (misma regla que el analizador)"""
+    date_cols = [col for col in columns if any(x in col.lower() for x in TIME_KEYWORDS)]
+    return date_cols[0] if date_cols else None
+
+
+def _sortable(times_ns: np.ndarray) -> np.ndarray:
+    """int64 -> uint64 conservando el orden"""
+    return times_ns.astype(np.int64).view(np.uint64) ^ np.uint64(1 << 63)
+
+
+class KeyCounter:
+    """Multiconjunto de llaves uint64 con memoria acotada (particiones por rango en disco)"""
+
+    def __init__(self, lo: int = 0, hi: int = 2**64 - 1, n_partitions: int = N_PARTITIONS,
+                 max_buffered: Optional[int] = None):
+        self.lo = lo
+        self.width = (hi - lo) // n_partitions + 1
+        self.n_partitions = n_partitions
+        self.max_buffered = max_buffered or MAX_BUFFERED_KEYS
+        self.total = 0
+        self.spilled = False
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
+
+    def add(self, keys: np.ndarray):
+        keys = np.asarray(keys, dtype=np.uint64)
+        self.total += len(keys)
+        self._buffer.append(keys)
+        self._buffered += len(keys)
+        if self._buffered > self.max_buffered:
+            self._spill()
+
+    def _partition(self, keys: np.ndarray) -> np.ndarray:
+        # Llaves fuera de [lo, hi] van a la primera/última partición (el orden se conserva)
+        below = keys < np.uint64(self.lo)
+        part = (keys - np.uint64(self.lo)) // np.uint64(self.width)
+        part = np.where(below, 0, np.minimum(part, self.n_partitions - 1))
+        return part.astype(np.intp)
+
+    def _spill(self):
+        if not self._buffered:
+            return
+        if self._tmp is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="audit_keys_")
+        keys = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        part = self._partition(keys)
+        order = np.argsort(part, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(part, minlength=self.n_partitions))])
+        keys = keys[order]
+        for p in range(self.n_partitions):
+            if bounds[p + 1] > bounds[p]:
+                with open(os.path.join(self._tmp.name, f"p{p:03d}.bin"), 'ab') as f:
+                    keys[bounds[p]:bounds[p + 1]].tofile(f)
+        self.spilled = True
+
+    def partitions(self):
+        """(llaves únicas ordenadas, conteos) por partición, en orden de llave"""
+        try:
+            if not self.spilled:
+                keys = np.concatenate(self._buffer) if self._buffer else np.empty(0, dtype=np.uint64)
+                yield np.unique(keys, return_counts=True)
+                return
+            self._spill()
+            for p in range(self.n_partitions):
+                path = os.path.join(self._tmp.name, f"p{p:03d}.bin")
+                if os.path.exists(path):
+                    yield np.unique(np.fromfile(path, dtype=np.uint64), return_counts=True)
+        finally:
+            self.close()
+
+    def close(self):
+        self._buffer, self._buffered = [], 0
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def duplicates(self) -> int:
+        """Llaves repetidas (total - distintas)"""
+        return int(sum(int((counts - 1).sum()) for _, counts in self.partitions()))
+
+
+def gap_histogram(times: KeyCounter) -> Tuple[Dict[int, int], Optional[int], Optional[int]]:
+    """
+    Histograma exacto {gap_ns: conteo} de los timestamps ordenados
+
+    Repetidos cuentan como gaps de 0 (igual que diff() sobre la columna
+    ordenada). Devuelve también min y max como int64 ns.
+    """
+    histogram: Dict[int, int] = {}
+    previous, first = None, None
+    for keys, counts in times.partitions():
+        if not len(keys):
+            continue
+        zeros = int((counts - 1).sum())
+        if zeros:
+            histogram[0] = histogram.get(0, 0) + zeros
+        edges = keys if previous is None else np.concatenate([[previous], keys])
+        gaps, gap_counts = np.unique(np.diff(edges).astype(np.int64), return_counts=True)
+        for gap, count in zip(gaps.tolist(), gap_counts.tolist()):
+            histogram[gap] = histogram.get(gap, 0) + count
+        first = keys[0] if first is None else first
+        previous = keys[-1]
+    decode = lambda key: int((np.uint64(key) ^ np.uint64(1 << 63)).view(np.int64))
+    return histogram, (decode(first) if first is not None else None), (decode(previous) if previous is not None else None)
+
+
+def delta_stats(histogram: Dict[int, int]) -> Optional[Dict]:
+    """min/mediana/max/std/moda en días a partir del histograma (como pandas sobre los deltas)"""
+    n = sum(histogram.values())
+    if n == 0:
+        return None
+    values = np.array(sorted(histogram), dtype=np.float64) / NS_PER_DAY
+    counts = np.array([histogram[k] for k in sorted(histogram)], dtype=np.int64)
+    cumulative = np.cumsum(counts)
+
+    def at(position: int) -> float:
+        return float(values[np.searchsorted(cumulative, position + 1)])
+
+    median = at(n // 2) if n % 2 else (at(n // 2 - 1) + at(n // 2)) / 2
+    mean = float((values * counts).sum() / n)
+    std = float(np.sqrt((counts * (values - mean) ** 2).sum() / (n - 1))) if n > 1 else float('nan')
+    return {
+        'min_days': float(values[0]),
+        'median_days': median,
+        'max_days': float(values[-1]),
+        'std_days': std,
+        'mode_days': float(values[np.argmax(counts)])   # empate: el menor, como pandas
+    }
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash por fila; numéricas como float64 para que int/float de chunks distintos coincidan"""
+    normalized = df.apply(lambda s: s.astype(np.float64)
+                          if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s) else s)
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def audit_csv(path: str, source_name: str, window: Tuple[str, str],
+              chunksize: int = CHUNKSIZE, seed: int = 0) -> Dict:
+    """
+    Auditar un CSV en una pasada por chunks
+
+    Returns:
+        Dict serializable: columnas, columna temporal, filas totales y en
+        ventana, faltantes por columna, duplicados, min/max, histograma de
+        gaps, delta_stats, outliers y preview
+    """
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    time_col = detect_time_column(columns)
+    start, end = pd.to_datetime(window[0]), pd.to_datetime(window[1])
+
+    rng = np.random.default_rng(seed)
+    row_hashes = KeyCounter()
+    times = KeyCounter(int(_sortable(np.array([start.value]))[0]), int(_sortable(np.array([end.value]))[0]))
+    missing = pd.Series(0, index=columns, dtype=np.int64)
+    total_rows = window_rows = 0
+    preview, sample, sample_keys = [], None, np.empty(0)
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        total_rows += len(chunk)
+        if time_col is None:
+            continue
+        chunk[time_col] = pd.to_datetime(chunk[time_col], errors='coerce')
+        chunk = chunk[(chunk[time_col] >= start) & (chunk[time_col] <= end)]
+        if chunk.empty:
+            continue
+
+        window_rows += len(chunk)
+        missing += chunk.isna().sum()
+        row_hashes.add(_row_hashes(chunk))
+        times.add(_sortable(chunk[time_col].to_numpy(dtype='datetime64[ns]').view(np.int64)))
+
+        if sum(len(p) for p in preview) < PREVIEW_ROWS:
+            preview.append(chunk.head(PREVIEW_ROWS))
+
+        # Muestra uniforme: las OUTLIER_SAMPLE_ROWS filas con menor prioridad aleatoria
+        keys = rng.random(len(chunk))
+        sample = chunk if sample is None else pd.concat([sample, chunk])
+        sample_keys = np.concatenate([sample_keys, keys])
+        if len(sample) > OUTLIER_SAMPLE_ROWS:
+            keep = np.sort(np.argpartition(sample_keys, OUTLIER_SAMPLE_ROWS)[:OUTLIER_SAMPLE_ROWS])
+            sample, sample_keys = sample.iloc[keep], sample_keys[keep]
+
+    histogram, min_ns, max_ns = gap_histogram(times)
+    temporal_dups = histogram.get(0, 0)
+    spilled = row_hashes.spilled or times.spilled
+    result = {
+        'source': source_name,
+        'path': str(path),
+        'columns': columns,
+        'time_col': time_col,
+        'total_rows': total_rows,
+        'window_rows': window_rows,
+        'missing_by_col': {col: int(n) for col, n in missing.items()},
+        'duplicates': {'exact': row_hashes.duplicates(), 'temporal': int(temporal_dups)},
+        'min_date': str(pd.Timestamp(min_ns)) if min_ns is not None else None,
+        'max_date': str(pd.Timestamp(max_ns)) if max_ns is not None else None,
+        'gap_histogram_days': {k / NS_PER_DAY: v for k, v in sorted(histogram.items())},
+        'delta_stats': delta_stats(histogram),
+        'outliers': {},
+        'outliers_estimated': window_rows > OUTLIER_SAMPLE_ROWS,
+        'spilled_to_disk': spilled,
+        'preview': pd.concat(preview).head(PREVIEW_ROWS).to_dict('records') if preview else []
+    }
+
+    # Outliers IQR sobre la muestra (exactos si toda la ventana cabe en ella)
+    if sample is not None:
+        scale = window_rows / len(sample)
+        for col in sample.select_dtypes(include=[np.number]).columns:
+            values = sample[col]
+            if values.notna().sum() > 3:
+                q1, q3 = values.quantile(0.25), values.quantile(0.75)
+                iqr = q3 - q1
+                outliers = ((values < (q1 - 1.5 * iqr)) | (values > (q3 + 1.5 * iqr))).sum()
+                result['outliers'][col] = int(round(outliers * scale))
+    return result
+
+
+def _audit_job(job: AuditJob) -> Dict:
+    return audit_csv(job.path, job.source_name, job.window, job.chunksize)
+
+
+def audit_sources(jobs: List[AuditJob], max_workers: Optional[int] = None) -> List[Union[Dict, Exception]]:
+    """
+    Auditar fuentes en paralelo (un proceso por fuente)
+
+    Devuelve un resultado por job, en orden; una fuente que falla devuelve
+    su excepción en lugar de cancelar las demás.
+    """
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if max_workers <= 1 or len(jobs) <= 1:
+        results = []
+        for job in jobs:
+            try:
+                results.append(_audit_job(job))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_audit_job, job) for job in jobs]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
@@ -14,9 +14,16 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from typing import Dict, List, Tuple, Optional
 import os
+import sys
+from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+# Reglas de release lag compartidas con el as-of join del pipeline
+sys.path.append(str(Path(__file__).resolve().parents[1] / "03_comprehensive_analysis"))
+from asof_join import infer_release_lag
+from streaming_audit import AuditJob, audit_sources
+
 class TemporalAuditAnalyzer:
     """Analizador de auditoría temporal para fuentes de datos"""
     
@@ -109,19 +116,7 @@ class TemporalAuditAnalyzer:
         
         # Clasificar frecuencia
         median_delta = delta_stats['median_days']
-        
-        if median_delta < 0.5:
-            freq_class = "intraday"
-        elif median_delta <= 1.5:
-            freq_class = "daily"
-        elif median_delta <= 10:
-            freq_class = "weekly"
-        elif median_delta <= 35:
-            freq_class = "monthly"
-        elif median_delta <= 100:
-            freq_class = "quarterly"
-        else:
-            freq_class = "irregular"
+        freq_class = self._classify_frequency(median_delta)
         
         print(f"  - Frecuencia detectada: {freq_class}")
         print(f"  - Delta mediano: {median_delta:.1f} días")
@@ -139,25 +134,92 @@ class TemporalAuditAnalyzer:
         }
     
     def _infer_release_lag(self, df: pd.DataFrame, freq_class: str) -> float:
-        """Infiere el lag de publicación basado en patrones conocidos"""
-        # Reglas heurísticas por tipo de dato
-        release_lags = {
-            'daily': 0,  # Datos diarios típicamente disponibles mismo día
-            'monthly': 10,  # Datos mensuales típicamente publicados día 10 del mes siguiente
-            'weekly': 2,  # Datos semanales con 2 días de retraso
-            'quarterly': 30,  # Datos trimestrales con un mes de retraso
-            'intraday': 0,  # Datos intradía disponibles en tiempo real
-            'irregular': 5  # Asumir 5 días por defecto
-        }
+        """Infiere el lag de publicación basado en patrones conocidos (ver asof_join.RELEASE_LAGS)"""
+        return infer_release_lag(freq_class, str(df.columns))
+    
+    def audit_job(self, file_path: str, source_name: str) -> AuditJob:
+        """Job de auditoría streaming para una fuente de output_dir"""
+        return AuditJob(os.path.join(self.output_dir, file_path), source_name, self.analysis_window)
+    
+    def print_audit(self, audit: Dict):
+        """Resumen de carga y calidad de una auditoría streaming (como load_and_sample)"""
+        print(f"\n{'='*60}")
+        print(f"ANALIZANDO: {audit['source']}")
+        print(f"{'='*60}")
+        print(f"Registros totales: {audit['total_rows']}")
+        print(f"Columnas: {audit['columns']}")
         
-        # Ajustes específicos por fuente
-        if 'banxico' in str(df.columns).lower():
-            if 'inpc' in str(df.columns).lower() or 'sp1' in str(df.columns).lower():
-                return 9  # INPC se publica típicamente día 9 del mes siguiente
-            elif 'igae' in str(df.columns).lower():
-                return 55  # IGAE tiene ~55 días de retraso
+        if audit['time_col'] is None:
+            print("⚠️ No se encontró columna de fecha clara")
+            return
+        print(f"Columna temporal principal: {audit['time_col']}")
+        
+        print(f"\nVentana 2024-2025:")
+        print(f"  - Registros en ventana: {audit['window_rows']}")
+        if audit['window_rows'] > 0:
+            print(f"  - Fecha mínima: {audit['min_date']}")
+            print(f"  - Fecha máxima: {audit['max_date']}")
+            
+            print(f"\nCalidad de datos:")
+            for col, missing in audit['missing_by_col'].items():
+                if missing > 0:
+                    print(f"  - {col}: {missing / audit['window_rows'] * 100:.1f}% faltantes")
+            print(f"  - Duplicados exactos: {audit['duplicates']['exact']}")
+            print(f"  - Duplicados por fecha: {audit['duplicates']['temporal']}")
+    
+    def frequency_from_audit(self, audit: Dict) -> Dict:
+        """infer_frequency a partir del histograma de gaps de la auditoría streaming"""
+        print(f"\nAnálisis de frecuencia:")
+        
+        delta_stats = audit['delta_stats']
+        if delta_stats is None:
+            return {"error": "No hay suficientes datos para calcular frecuencia"}
+        
+        freq_class = self._classify_frequency(delta_stats['median_days'])
+        median_delta = delta_stats['median_days']
+        print(f"  - Frecuencia detectada: {freq_class}")
+        print(f"  - Delta mediano: {median_delta:.1f} días")
+        print(f"  - Rango de deltas: [{delta_stats['min_days']:.1f}, {delta_stats['max_days']:.1f}] días")
         
-        return release_lags.get(freq_class, 5)
+        return {
+            'frequency_class': freq_class,
+            'delta_median_days': median_delta,
+            'delta_stats': delta_stats,
+            'gap_histogram_days': audit['gap_histogram_days'],
+            'release_lag_median_days': infer_release_lag(freq_class, str(audit['columns'])),
+            'timezone': self.cutoff_timezone
+        }
+    
+    @staticmethod
+    def _classify_frequency(median_delta: float) -> str:
+        """Clase de frecuencia según el delta mediano en días"""
+        if median_delta < 0.5:
+            return "intraday"
+        elif median_delta <= 1.5:
+            return "daily"
+        elif median_delta <= 10:
+            return "weekly"
+        elif median_delta <= 35:
+            return "monthly"
+        elif median_delta <= 100:
+            return "quarterly"
+        return "irregular"
+    
+    def quality_report_from_audit(self, audit: Dict) -> Dict:
+        """generate_quality_report a partir de la auditoría streaming"""
+        rows = audit['window_rows']
+        return {
+            'source': audit['source'],
+            'total_records': rows,
+            'date_range': {'min': audit['min_date'], 'max': audit['max_date']},
+            'missing_pct_by_col': {
+                col: round(missing / rows * 100, 2) if rows > 0 else 0
+                for col, missing in audit['missing_by_col'].items()
+            },
+            'duplicates': audit['duplicates'],
+            'outliers': audit['outliers'],
+            'outliers_estimated': audit['outliers_estimated']
+        }
     
     def propose_features(self, df: pd.DataFrame, freq_class: str, 
                         value_cols: List[str], release_lag: float) -> List[Dict]:
@@ -294,44 +356,38 @@ class TemporalAuditAnalyzer:
         
         return report
     
-    def analyze_source(self, file_path: str, source_name: str, 
-                      value_cols: List[str], units: str) -> Dict:
-        """Análisis completo de una fuente"""
-        # 1. Cargar y filtrar datos
-        df = self.load_and_sample(file_path, source_name)
-        
-        if len(df) == 0:
+    def analyze_source(self, file_path: str, source_name: str,
+                       value_cols: List[str], units: str, audit: Optional[Dict] = None) -> Dict:
+        """
+        Análisis completo de una fuente sobre su auditoría streaming
+        
+        audit: resultado de streaming_audit (analyze_sources los calcula en
+        paralelo); si falta se audita aquí
+        """
+        if audit is None:
+            audit = audit_sources([self.audit_job(file_path, source_name)])[0]
+            if isinstance(audit, Exception):
+                raise audit
+        self.print_audit(audit)
+        
+        if audit['window_rows'] == 0:
             print(f"⚠️ No hay datos en ventana 2024-2025 para {source_name}")
             return None
         
-        # 2. Detectar columna temporal
-        date_cols = [col for col in df.columns if any(x in col.lower() for x in ['date', 'fecha', 'year', 'año'])]
-        primary_time_col = date_cols[0] if date_cols else None
-        
-        if not primary_time_col:
-            print(f"❌ No se pudo detectar columna temporal en {source_name}")
+        freq_analysis = self.frequency_from_audit(audit)
+        if 'error' in freq_analysis:
+            print(f"❌ {freq_analysis['error']} en {source_name}")
             return None
         
-        # 3. Análisis de frecuencia
-        freq_analysis = self.infer_frequency(df, primary_time_col)
-        
-        # 4. Proponer features
         features = self.propose_features(
-            df, 
+            None,
             freq_analysis['frequency_class'],
             value_cols,
             freq_analysis['release_lag_median_days']
         )
+        quality_report = self.quality_report_from_audit(audit)
         
-        # 5. Reporte de calidad
-        quality_report = self.generate_quality_report(df, source_name)
-        
-        # 6. Generar muestra preview
-        sample_size = min(20, len(df))
-        sample_preview = df.head(sample_size)
-        
-        # 7. Consolidar resultados
-        analysis = {
+        return {
             'source_name': source_name,
             'file_path': file_path,
             'date_range': quality_report['date_range'],
@@ -347,10 +403,26 @@ class TemporalAuditAnalyzer:
             },
             'features': features,
             'units': units,
-            'sample_preview': sample_preview.to_dict('records')[:10]  # Primeras 10 filas
+            'sample_preview': audit['preview'][:10]  # Primeras 10 filas
         }
-        
-        return analysis
+    
+    def analyze_sources(self, sources: List[Dict], max_workers: Optional[int] = None) -> List[Dict]:
+        """Auditar todas las fuentes en paralelo (procesos) y analizarlas en orden"""
+        audits = audit_sources([self.audit_job(source['file'], source['name']) for source in sources],
+                               max_workers=max_workers)
+        
+        results = []
+        for source, audit in zip(sources, audits):
+            try:
+                if isinstance(audit, Exception):
+                    raise audit
+                result = self.analyze_source(source['file'], source['name'], source['value_cols'],
+                                             source['units'], audit=audit)
+                if result:
+                    results.append(result)
+            except Exception as e:
+                print(f"\n❌ Error analizando {source['name']}: {e}")
+        return results
     
     def _get_max_carry(self, freq_class: str) -> int:
         """Define política de carry forward según frecuencia"""
@@ -419,26 +491,13 @@ def main():
         }
     ]
     
-    all_results = []
-    
     print("="*80)
     print("AUDITORÍA TEMPORAL DE FUENTES DE DATOS")
     print("Predicción de Precio Varilla Corrugada t+1")
     print("="*80)
     
-    for source in sources_to_analyze:
-        try:
-            result = analyzer.analyze_source(
-                source['file'],
-                source['name'],
-                source['value_cols'],
-                source['units']
-            )
-            if result:
-                all_results.append(result)
-        except Exception as e:
-            print(f"\n❌ Error analizando {source['name']}: {e}")
-            continue
+    # Una pasada streaming por fuente, fuentes en paralelo
+    all_results = analyzer.analyze_sources(sources_to_analyze)
     
     # Guardar resultados consolidados
     output_path = 'parte_tecnica/03_feature_engineering/temporal_audit_results.json'
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+AS-OF JOIN - alineación point-in-time de fuentes con frecuencia mixta
+
+Cada fuente declara su frecuencia y su lag de publicación. Una observación
+del periodo P queda disponible en fin_de_P + lag días (INPC de agosto: 31-ago
++ 9 = 9-sep), y el valor de la fuente en el día t es la última observación
+disponible en t. Así ningún feature usa datos antes de que se publiquen.
+
+Todas las fuentes se resuelven juntas: una sola ordenación por
+(columna, día disponible) y un solo searchsorted para todas las columnas
+y todos los días del grid, en lugar de un reindex por fuente.
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Lag de publicación típico por frecuencia (días después del fin del periodo)
+RELEASE_LAGS = {
+    'daily': 0,       # Datos diarios típicamente disponibles mismo día
+    'monthly': 10,    # Datos mensuales típicamente publicados día 10 del mes siguiente
+    'weekly': 2,      # Datos semanales con 2 días de retraso
+    'quarterly': 30,  # Datos trimestrales con un mes de retraso
+    'intraday': 0,    # Datos intradía disponibles en tiempo real
+    'irregular': 5    # Asumir 5 días por defecto
+}
+
+
+
+def infer_release_lag(freq_class: str, hint: str = '') -> int:
+    """
+    Lag de publicación en días según frecuencia y fuente
+
+    hint: nombres de la fuente/columnas; ajusta los casos conocidos de
+    Banxico (INPC día 9 del mes siguiente, IGAE ~55 días).
+    """
+    hint = hint.lower()
+    if 'banxico' in hint:
+        if 'inpc' in hint or 'sp1' in hint:
+            return 9
+        if 'igae' in hint:
+            return 55
+    return RELEASE_LAGS.get(freq_class, 5)
+
+
+class SourceSpec(NamedTuple):
+    """Fuente a alinear: dataset, columnas, frecuencia y disponibilidad"""
+    dataset: str                              # Llave en el dict de datasets
+    columns: Dict[str, str]                   # Columna origen -> columna alineada
+    frequency: str = 'daily'                  # daily | weekly | monthly | quarterly | irregular
+    release_lag_days: Optional[int] = None    # None = infer_release_lag
+    max_staleness_days: Optional[int] = None  # None = último valor sin límite; 0 = sólo el día disponible
+
+    def lag(self, df: pd.DataFrame) -> int:
+        if self.release_lag_days is not None:
+            return self.release_lag_days
+        return infer_release_lag(self.frequency, f"{self.dataset} {' '.join(map(str, df.columns))}")
+
+
+def period_end_days(days: np.ndarray, frequency: str) -> np.ndarray:
+    """Último día del periodo (semana lun-dom, mes, trimestre) de cada fecha datetime64[D]"""
+    if frequency == 'weekly':
+        weekday = (days.astype(np.int64) + 3) % 7   # 1970-01-01 fue jueves; lunes = 0
+        return days + (6 - weekday).astype('timedelta64[D]')
+    if frequency == 'monthly':
+        return (days.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+    if frequency == 'quarterly':
+        months = days.astype('datetime64[M]').astype(np.int64)
+        return ((months // 3 * 3 + 3).astype('datetime64[M]')).astype('datetime64[D]') - 1
+    return days
+
+
+def availability_days(index: pd.DatetimeIndex, frequency: str, lag_days: int) -> np.ndarray:
+    """Día (datetime64[D]) en que cada observación queda disponible"""
+    days = np.asarray(index, dtype='datetime64[D]')
+    return period_end_days(days, frequency) + np.timedelta64(lag_days, 'D')
+
+
+def asof_align(datasets: Dict[str, pd.DataFrame], specs: List[SourceSpec],
+               grid: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Valor point-in-time de cada columna de specs en cada día de grid
+
+    Columnas en el orden de specs; fuentes o columnas ausentes se omiten.
+    Observaciones NaN no cuentan como publicadas.
+    """
+    names, tolerances = [], []
+    col_ids, available, observed, values = [], [], [], []
+
+    for spec in specs:
+        df = datasets.get(spec.dataset)
+        if df is None or not isinstance(df.index, pd.DatetimeIndex):
+            continue
+        lag = spec.lag(df)
+        source_available = availability_days(df.index, spec.frequency, lag)
+        source_observed = df.index.to_numpy(dtype='datetime64[D]')
+
+        for source_col, output_col in spec.columns.items():
+            if source_col not in df.columns:
+                continue
+            column = pd.to_numeric(df[source_col], errors='coerce').to_numpy(dtype=float)
+            valid = ~np.isnan(column) & ~np.isnat(source_available)
+            col_ids.append(np.full(int(valid.sum()), len(names), dtype=np.int64))
+            available.append(source_available[valid].astype(np.int64))
+            observed.append(source_observed[valid].astype(np.int64))
+            values.append(column[valid])
+            names.append(output_col)
+            tolerances.append(np.inf if spec.max_staleness_days is None else spec.max_staleness_days)
+        logger.debug(f"📅 {spec.dataset}: {spec.frequency}, disponible fin de periodo + {lag}d")
+
+    if not names:
+        return pd.DataFrame(index=grid)
+    if not sum(len(v) for v in values):
+        return pd.DataFrame(np.nan, index=grid, columns=names)
+
+    grid_days = grid.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    col_ids = np.concatenate(col_ids)
+    available = np.concatenate(available)
+    observed = np.concatenate(observed)
+    values = np.concatenate(values)
+
+    # Llave única (columna, día disponible): una ordenación para todas las fuentes
+    offset = min(available.min(initial=grid_days.min()), grid_days.min())
+    width = max(available.max(initial=grid_days.max()), grid_days.max()) - offset + 1
+    keys = col_ids * width + (available - offset)
+    order = np.lexsort((observed, keys))   # empate: gana la observación más reciente
+    keys, available, values = keys[order], available[order], values[order]
+
+    # Un searchsorted para todas las (columna, día) del grid
+    n_cols = len(names)
+    query_cols = np.repeat(np.arange(n_cols, dtype=np.int64), len(grid_days))
+    query_days = np.tile(grid_days, n_cols)
+    pos = np.searchsorted(keys, query_cols * width + (query_days - offset), side='right') - 1
+
+    safe = np.maximum(pos, 0)
+    found = (pos >= 0) & (keys[safe] // width == query_cols)
+    found &= (query_days - available[safe]) <= np.asarray(tolerances)[query_cols]
+    result = np.where(found, values[safe], np.nan).reshape(n_cols, len(grid_days)).T
+
+    return pd.DataFrame(result, index=grid, columns=names)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK FEATURE REGISTRY
+Compara los create_tier*_features originales (siempre los 15 features)
+contra el registro: core_15 debe ser idéntico (valores y dtypes), y los
+sets de los modelos sólo evalúan su subgrafo. También mide cada feature
+calculado por separado (sin cache de intermedios compartidos).
+"""
+
+import logging
+import time
+import warnings
+
+import pandas as pd
+
+from feature_definitions import CORE_15, DEFAULT_FEATURE_SETS, FEATURE_REGISTRY, TWO_STAGE_LME, TWO_STAGE_PREMIUM
+from robust_feature_pipeline import RobustFeaturePipeline
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+N_REPEATS = 5
+
+
+def best_of(fn):
+    best, result = float('inf'), None
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - FEATURE REGISTRY")
+    print("="*80)
+
+    pipeline = RobustFeaturePipeline()
+    datasets = pipeline.load_data()
+    imputed_df = pipeline.apply_holiday_imputation(pipeline.align_temporal_data(datasets))
+    print(f"✓ Frame imputado: {len(imputed_df):,} días x {len(imputed_df.columns)} columnas")
+
+    def reference():
+        return pd.concat([pipeline.create_tier1_features_reference(imputed_df),
+                          pipeline.create_tier2_features_reference(imputed_df),
+                          pipeline.create_tier3_features_reference(imputed_df)], axis=1)
+
+    def uncached(names):
+        return pd.concat([pipeline.compute_features(imputed_df, [name]) for name in names], axis=1)
+
+    ref_s, expected = best_of(reference)
+    core_s, result = best_of(lambda: pipeline.compute_features(imputed_df, list(CORE_15.features)))
+    identical = result.equals(expected) and (result.dtypes == expected.dtypes).all()
+
+    print(f"\n{'Cálculo':<40}{'features':>9}{'nodos':>7}{'ms':>10}")
+    print(f"{'tiers originales':<40}{len(expected.columns):>9}{'-':>7}{ref_s*1000:>10.2f}")
+    print(f"{CORE_15.key + ' registro':<40}{len(CORE_15.features):>9}"
+          f"{len(FEATURE_REGISTRY.resolve(CORE_15.features)):>7}{core_s*1000:>10.2f}")
+    set_seconds = {}
+    for feature_set in (TWO_STAGE_LME, TWO_STAGE_PREMIUM):
+        set_s, _ = best_of(lambda: pipeline.compute_features(imputed_df, list(feature_set.features)))
+        set_seconds[feature_set.key] = set_s
+        print(f"{feature_set.key + ' registro':<40}{len(feature_set.features):>9}"
+              f"{len(FEATURE_REGISTRY.resolve(feature_set.features)):>7}{set_s*1000:>10.2f}")
+
+    union = list(dict.fromkeys(f for feature_set in DEFAULT_FEATURE_SETS for f in feature_set.features))
+    union_s, _ = best_of(lambda: pipeline.compute_features(imputed_df, union))
+    uncached_s, _ = best_of(lambda: uncached(union))
+    print(f"{'unión default (cache compartida)':<40}{len(union):>9}"
+          f"{len(FEATURE_REGISTRY.resolve(union)):>7}{union_s*1000:>10.2f}")
+    print(f"{'unión default (un compute por feature)':<40}{len(union):>9}{'-':>7}{uncached_s*1000:>10.2f}")
+
+    print(f"\n🚀 {TWO_STAGE_LME.key} vs tiers originales: {ref_s / set_seconds[TWO_STAGE_LME.key]:.1f}x")
+    print(f"✓ core_15 idéntico a los tiers originales: {identical}")
+    print(f"✓ Lookback declarado: core_15 {FEATURE_REGISTRY.lookback(CORE_15.features)}d, "
+          f"{TWO_STAGE_LME.key} {FEATURE_REGISTRY.lookback(TWO_STAGE_LME.features)}d")
+    return identical
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK PIPELINE INCREMENTAL
+Simula N_DAYS corridas diarias: rebuild completo vs IncrementalFeaturePipeline.update
+(archivos temporales, no toca ../outputs) y al final verifica el CSV
+incremental contra un rebuild completo.
+"""
+
+import logging
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from incremental_pipeline import IncrementalFeaturePipeline
+from robust_feature_pipeline import RobustFeaturePipeline
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+N_DAYS = 30
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - PIPELINE INCREMENTAL")
+    print("="*60)
+
+    pipeline = RobustFeaturePipeline()
+    datasets = pipeline.load_data()
+    last_day = pipeline.align_temporal_data(datasets).index[-1]
+    days = pd.date_range(end=last_day, periods=N_DAYS + 1, freq='D').strftime('%Y-%m-%d')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        incremental = IncrementalFeaturePipeline(pipeline, Path(tmp) / "features.csv", Path(tmp) / "checkpoint.pkl")
+        full = IncrementalFeaturePipeline(pipeline, Path(tmp) / "features_full.csv", Path(tmp) / "checkpoint_full.pkl")
+        incremental.full_rebuild(datasets, end_date=days[0])
+
+        full_s, incremental_s = [], []
+        for day in days[1:]:
+            start = time.perf_counter()
+            full.full_rebuild(datasets, end_date=day)
+            full_s.append(time.perf_counter() - start)
+
+            summary = incremental.update(datasets, end_date=day)
+            incremental_s.append(summary['seconds'])
+
+        check = incremental.check_consistency(datasets, end_date=days[-1])
+
+    print(f"✓ Corridas diarias simuladas: {N_DAYS} ({days[1]} a {days[-1]})")
+    print(f"{'rebuild completo':<30}{sum(full_s) / N_DAYS * 1000:>10.1f} ms/día")
+    print(f"{'incremental':<30}{sum(incremental_s) / N_DAYS * 1000:>10.1f} ms/día")
+    print(f"🚀 Speedup: {sum(full_s) / sum(incremental_s):.1f}x")
+    print(f"✓ Consistente con rebuild completo: {check['consistent']} ({check['rows_stored']} filas)")
+    return check['consistent']
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK CARGA DE FUENTES
+Compara load_data_reference (load_data original: secuencial, parsea todo)
+contra load_data en paralelo sin cache y con cache en disco: en frío
+(cache vacío, parsea y guarda) y en caliente (todo sale del cache). El
+cache vive en un directorio temporal (no toca outputs/). Verifica que
+todos los caminos den los mismos frames.
+"""
+
+import logging
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+from robust_feature_pipeline import RobustFeaturePipeline
+from source_loader import SourceCache
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+logger = logging.getLogger(__name__)
+
+N_REPEATS = 5
+
+
+def load_data_reference(pipeline) -> Dict[str, pd.DataFrame]:
+    """Carga secuencial sin cache (load_data original, para validar el loader)"""
+    logger.info("📊 Cargando datos...")
+
+    datasets = {}
+
+    try:
+        # 1. LME Data (crítico)
+        lme_file = pipeline.data_path / "lme_combined_sr_sc.csv"
+        if lme_file.exists():
+            datasets['lme'] = pd.read_csv(lme_file, parse_dates=['date'], index_col='date')
+            logger.info(f"✅ LME data: {len(datasets['lme'])} registros")
+        else:
+            logger.error("❌ LME data no encontrado - CRÍTICO")
+            raise FileNotFoundError("LME data es crítico para el modelo")
+
+        # 2. Banxico Data (crítico)
+        fx_file = pipeline.data_path / "SF43718_data.csv"  # USD/MXN
+        if fx_file.exists():
+            fx_data = pd.read_csv(fx_file, parse_dates=['fecha'], index_col='fecha')
+            fx_data.rename(columns={'valor': 'usdmxn'}, inplace=True)
+            datasets['banxico_fx'] = fx_data
+            logger.info(f"✅ FX data: {len(datasets['banxico_fx'])} registros")
+
+        tiie_file = pipeline.data_path / "SF43783_data.csv"  # TIIE28
+        if tiie_file.exists():
+            tiie_data = pd.read_csv(tiie_file, parse_dates=['fecha'], index_col='fecha')
+            tiie_data.rename(columns={'valor': 'tiie28'}, inplace=True)
+            datasets['banxico_tiie'] = tiie_data
+            logger.info(f"✅ TIIE data: {len(datasets['banxico_tiie'])} registros")
+
+        inpc_file = pipeline.data_path / "SP1_data.csv"  # INPC
+        if inpc_file.exists():
+            inpc_data = pd.read_csv(inpc_file, parse_dates=['fecha'], index_col='fecha')
+            inpc_data.rename(columns={'valor': 'inpc'}, inplace=True)
+            datasets['banxico_inpc'] = inpc_data
+            logger.info(f"✅ INPC data: {len(datasets['banxico_inpc'])} registros")
+
+        # 3. EPU Data (importante)
+        for country in ['mexico', 'usa', 'china', 'turkey']:
+            epu_file = pipeline.data_path / f"epu_{country}_data.csv"
+            if epu_file.exists():
+                epu_data = pd.read_csv(epu_file)
+                # Crear columna de fecha a partir de Year y Month
+                if 'Year' in epu_data.columns and 'Month' in epu_data.columns:
+                    epu_data['date'] = pd.to_datetime(epu_data[['Year', 'Month']].assign(day=1))
+                    epu_data = epu_data.set_index('date')
+                    # Renombrar columna EPU
+                    epu_cols = [col for col in epu_data.columns if 'Policy Uncertainty' in col or 'EPU' in col or 'Index' in col]
+                    if epu_cols:
+                        epu_data.rename(columns={epu_cols[0]: 'epu_index'}, inplace=True)
+                datasets[f'epu_{country}'] = epu_data
+                logger.info(f"✅ EPU {country}: {len(epu_data)} registros")
+
+        # 4. Holiday Calendar
+        if pipeline.holiday_path.exists():
+            datasets['holidays'] = pd.read_csv(pipeline.holiday_path, index_col=0, parse_dates=True)
+            logger.info(f"✅ Holiday calendar: {len(datasets['holidays'])} registros")
+
+        # 5. Trade Events
+        if pipeline.events_path.exists():
+            datasets['events'] = pipeline._parse_trade_events()
+            logger.info(f"✅ Trade events: {len(datasets['events'])} eventos")
+
+    except Exception as e:
+        logger.error(f"❌ Error cargando datos: {e}")
+        raise
+
+    pipeline._data_cache = datasets
+    return datasets
+
+
+def same_datasets(a, b):
+    return list(a) == list(b) and all(a[k].equals(b[k]) and a[k].index.equals(b[k].index) for k in a)
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - CARGA DE FUENTES")
+    print("="*70)
+
+    pipeline = RobustFeaturePipeline()
+    ref_s, expected = float('inf'), None
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        expected = load_data_reference(pipeline)
+        ref_s = min(ref_s, time.perf_counter() - start)
+
+    parallel_s = float('inf')
+    pipeline.source_cache = None
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        parallel = pipeline.load_data()
+        parallel_s = min(parallel_s, time.perf_counter() - start)
+
+    cold_s, warm_s = float('inf'), float('inf')
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline.source_cache = SourceCache(Path(tmp) / "source_cache")
+        for _ in range(N_REPEATS):
+            pipeline.source_cache.clear()
+            start = time.perf_counter()
+            cold = pipeline.load_data()
+            cold_s = min(cold_s, time.perf_counter() - start)
+        cold_timings = {t.key: t for t in pipeline.load_timings}
+
+        for _ in range(N_REPEATS):
+            start = time.perf_counter()
+            warm = pipeline.load_data()
+            warm_s = min(warm_s, time.perf_counter() - start)
+        warm_timings = {t.key: t for t in pipeline.load_timings}
+
+    print(f"{'fuente':<16}{'registros':>10}{'frío ms':>10}{'caliente ms':>13}  cache")
+    for key, timing in cold_timings.items():
+        warm_timing = warm_timings[key]
+        print(f"{key:<16}{timing.rows:>10}{timing.seconds*1000:>10.1f}{warm_timing.seconds*1000:>13.1f}  "
+              f"{timing.cache} -> {warm_timing.cache}")
+
+    identical = all(same_datasets(result, expected) for result in (parallel, cold, warm))
+    print(f"\n{'Carga completa':<36}{'ms':>10}")
+    print(f"{'secuencial sin cache (original)':<36}{ref_s*1000:>10.1f}")
+    print(f"{'paralela sin cache':<36}{parallel_s*1000:>10.1f}")
+    print(f"{'paralela, cache frío':<36}{cold_s*1000:>10.1f}")
+    print(f"{'paralela, cache caliente':<36}{warm_s*1000:>10.1f}")
+    print(f"🧵 {os.cpu_count()} CPU(s): el paralelismo sólo paga con más de un core")
+    print(f"🚀 Speedup frío: {ref_s / cold_s:.1f}x | caliente: {ref_s / warm_s:.1f}x")
+    print(f"✓ Mismos datasets que la carga original: {identical}")
+    return identical
+
+
+if __name__ == "__main__":
+    main()
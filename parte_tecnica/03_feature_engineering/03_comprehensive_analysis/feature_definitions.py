@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+FEATURE DEFINITIONS - features del pipeline registradas en el DAG
+
+Mismas fórmulas y fallbacks que los create_tier*_features originales
+(ver *_reference en robust_feature_pipeline.py), más los lags 2/3/5 y
+las dummies de calendario que usa el modelo de dos etapas. ``ctx.owner``
+es el RobustFeaturePipeline (prima, kernels de eventos, calendario,
+reglas de confianza).
+
+Los modelos fijan su set por nombre y versión: cambiar los features de un
+set publicado es registrar una versión nueva, no editar la existente.
+"""
+
+import numpy as np
+import pandas as pd
+
+from feature_registry import FeatureRegistry, FeatureSet
+
+FEATURE_REGISTRY = FeatureRegistry()
+register = FEATURE_REGISTRY.register
+
+# Fechas / mapas de calendario
+WEEKDAY_EFFECTS = {0: -0.02, 1: 0.01, 2: 0.00, 3: 0.00, 4: 0.01, 5: 0.00, 6: 0.00}  # Mon=0
+QUARTER_EFFECTS = {1: -0.01, 2: 0.02, 3: 0.01, 4: -0.02}
+CONSTRUCTION_MONTHS = [3, 4, 5, 9, 10, 11]
+TARIFF_START = '2025-04-01'
+
+
+# ----------------------------------------------------------------------
+# Intermedios compartidos
+# ----------------------------------------------------------------------
+@register('sr_m01_returns', inputs=('sr_m01',), lookback_days=1, intermediate=True)
+def sr_m01_returns(ctx):
+    return ctx['sr_m01'].pct_change()
+
+
+@register('sr_m01_ma_5', inputs=('sr_m01',), lookback_days=4, intermediate=True)
+def sr_m01_ma_5(ctx):
+    return ctx['sr_m01'].rolling(5).mean()
+
+
+@register('sr_m01_ma_20', inputs=('sr_m01',), lookback_days=19, intermediate=True)
+def sr_m01_ma_20(ctx):
+    return ctx['sr_m01'].rolling(20).mean()
+
+
+# ----------------------------------------------------------------------
+# Tier 1 - Críticos
+# ----------------------------------------------------------------------
+@register('lme_sr_m01_lag1', inputs=('sr_m01',), lookback_days=1)
+def lme_sr_m01_lag1(ctx):
+    # Sin fallback: el primer día queda NaN por el shift
+    return ctx['sr_m01'].shift(1)
+
+
+@register('usdmxn_lag1', inputs=('usdmxn',), lookback_days=1)
+def usdmxn_lag1(ctx):
+    return ctx['usdmxn'].shift(1)
+
+
+@register('mexico_premium')
+def mexico_premium(ctx):
+    return ctx.owner.MEXICO_PREMIUM
+
+
+@register('lme_volatility_5d', inputs=('sr_m01_returns',), lookback_days=4, fallback=0.02)
+def lme_volatility_5d(ctx):
+    return ctx['sr_m01_returns'].rolling(window=5, min_periods=3).std()
+
+
+@register('lme_momentum_5d', inputs=('lme_sr_m01_lag1', 'lme_sr_m01_lag5'), fallback=0.0)
+def lme_momentum_5d(ctx):
+    return (ctx['lme_sr_m01_lag1'] - ctx['lme_sr_m01_lag5']) / ctx['lme_sr_m01_lag5']
+
+
+def _register_lag(lag: int):
+    @register(f'lme_sr_m01_lag{lag}', inputs=('sr_m01',), lookback_days=lag)
+    def lme_sr_m01_lag(ctx):
+        return ctx['sr_m01'].shift(lag)
+
+
+for _lag in (2, 3, 5):
+    _register_lag(_lag)
+
+
+# ----------------------------------------------------------------------
+# Tier 2 - Importantes
+# ----------------------------------------------------------------------
+@register('contango_indicator', inputs=('sr_m01', 'sr_m02', 'sr_m03'), lookback_days=5, fallback=0)
+def contango_indicator(ctx):
+    # M03 si está disponible, si no M02, si no proxy de momentum
+    if not ctx.has('sr_m01'):
+        return 0
+    for curve in ('sr_m03', 'sr_m02'):
+        if ctx.has(curve):
+            return np.sign(ctx[curve] - ctx['sr_m01'])
+    return np.sign(ctx['sr_m01'].pct_change(5))
+
+
+@register('rebar_scrap_spread_norm', inputs=('sr_m01', 'sc_m01'), fallback=0.25)
+def rebar_scrap_spread_norm(ctx):
+    if not ctx.has('sc_m01'):
+        return 0.25  # Spread típico histórico
+    return (ctx['sr_m01'] - ctx['sc_m01']) / ctx['sr_m01']
+
+
+@register('trade_events_impact_7d', fallback=0)
+def trade_events_impact_7d(ctx):
+    # Mira 7 días hacia adelante en el calendario de eventos (no en el frame)
+    return ctx.owner._calculate_trade_events_impact(ctx.index)
+
+
+@register('weekday_effect')
+def weekday_effect(ctx):
+    return pd.Series(ctx.index.weekday.map(WEEKDAY_EFFECTS), index=ctx.index)
+
+
+@register('seasonality_simple')
+def seasonality_simple(ctx):
+    return pd.Series(ctx.index.quarter.map(QUARTER_EFFECTS), index=ctx.index)
+
+
+# ----------------------------------------------------------------------
+# Tier 3 - Contextuales
+# ----------------------------------------------------------------------
+@register('real_interest_rate', inputs=('tiie28', 'inpc'), lookback_days=252, fallback=4.0)
+def real_interest_rate(ctx):
+    if not (ctx.has('tiie28') and ctx.has('inpc')):
+        return 4.0  # Valor histórico típico
+    return ctx['tiie28'] - ctx['inpc'].pct_change(252)  # Inflación aprox anual
+
+
+@register('uncertainty_indicator', fallback=0.5)
+def uncertainty_indicator(ctx):
+    # La versión por cuantiles de volatilidad dependía de 'lme_volatility_5d'
+    # en el frame imputado, que nunca lo tuvo: el valor publicado es medium
+    return 0.5
+
+
+@register('market_regime', inputs=('sr_m01', 'sr_m01_ma_5', 'sr_m01_ma_20'), fallback=0)
+def market_regime(ctx):
+    if not ctx.has('sr_m01'):
+        return 0
+    ma_5, ma_20 = ctx['sr_m01_ma_5'], ctx['sr_m01_ma_20']
+    return np.where(ma_5 > ma_20, 1, np.where(ma_5 < ma_20, -1, 0))  # bull / bear / neutral
+
+
+@register('days_to_holiday', fallback=30)
+def days_to_holiday(ctx):
+    return ctx.owner._calculate_days_to_holiday(ctx.index)
+
+
+CONFIDENCE_INPUTS = ('sr_m01', 'usdmxn')   # Columnas de owner.confidence_rules
+
+
+@register('model_confidence', inputs=CONFIDENCE_INPUTS, lookback_days=5, fallback=0.7)
+def model_confidence(ctx):
+    # Sólo los inputs declarados, leídos por ctx (las reglas omiten columnas ausentes)
+    inputs = pd.DataFrame({name: ctx[name] for name in CONFIDENCE_INPUTS if ctx.has(name)}, index=ctx.index)
+    return ctx.owner._calculate_model_confidence(inputs)
+
+
+# ----------------------------------------------------------------------
+# Calendario del modelo de dos etapas
+# ----------------------------------------------------------------------
+@register('post_tariff')
+def post_tariff(ctx):
+    return (ctx.index >= TARIFF_START).astype(int)
+
+
+@register('construction_season')
+def construction_season(ctx):
+    return ctx.index.month.isin(CONSTRUCTION_MONTHS).astype(int)
+
+
+@register('month')
+def month(ctx):
+    return ctx.index.month
+
+
+# ----------------------------------------------------------------------
+# Sets versionados
+# ----------------------------------------------------------------------
+CORE_15 = FEATURE_REGISTRY.register_set('core_15', 1, [
+    # Tier 1
+    'lme_sr_m01_lag1', 'usdmxn_lag1', 'mexico_premium', 'lme_volatility_5d', 'lme_momentum_5d',
+    # Tier 2
+    'contango_indicator', 'rebar_scrap_spread_norm', 'trade_events_impact_7d', 'weekday_effect',
+    'seasonality_simple',
+    # Tier 3
+    'real_interest_rate', 'uncertainty_indicator', 'market_regime', 'days_to_holiday', 'model_confidence'
+])
+TWO_STAGE_LME = FEATURE_REGISTRY.register_set('two_stage_lme', 1, [
+    'lme_sr_m01_lag1', 'lme_volatility_5d', 'lme_momentum_5d', 'rebar_scrap_spread_norm',
+    'lme_sr_m01_lag2', 'lme_sr_m01_lag3', 'lme_sr_m01_lag5'
+])
+TWO_STAGE_PREMIUM = FEATURE_REGISTRY.register_set('two_stage_premium', 1, [
+    'usdmxn_lag1', 'real_interest_rate', 'uncertainty_indicator',
+    'post_tariff', 'construction_season', 'month'
+])
+
+# Lo que publica el pipeline por defecto: core + lo que fijan los modelos
+DEFAULT_FEATURE_SETS = [CORE_15, TWO_STAGE_LME, TWO_STAGE_PREMIUM]
+
+
+def get_feature_set(name: str, version: int = None) -> FeatureSet:
+    """Set registrado por nombre y versión (None = la más reciente)"""
+    return FEATURE_REGISTRY.feature_set(name, version)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+FEATURE REGISTRY - features declarativas con DAG de dependencias
+
+Cada feature declara sus inputs (columnas del frame alineado/imputado u
+otros nodos registrados), su lookback en días y su implementación. Un
+caller pide nombres o un FeatureSet y ``compute`` evalúa sólo el subgrafo
+necesario; cada nodo se calcula una vez por llamada y queda en cache, así
+que intermedios compartidos (retornos, lags, medias móviles) no se
+repiten entre features.
+
+Los inputs crudos pueden faltar en el frame: la implementación decide su
+fallback con ``ctx.has``. Leer un nodo no declarado en inputs es un error,
+para que el DAG declarado sea el real.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureSpec(NamedTuple):
+    """Nodo del DAG de features"""
+    name: str
+    inputs: Tuple[str, ...]       # Columnas crudas o nodos registrados
+    lookback_days: int            # Historia propia sobre sus inputs (0 = mismo día)
+    compute: Callable             # fn(ctx) -> Serie, array o escalar
+    fallback: Any = None          # fillna tras calcular (None = sin fallback)
+    intermediate: bool = False    # Sólo se cachea, no es feature del dataset
+
+
+class FeatureSet(NamedTuple):
+    """Conjunto versionado de features que pide un consumidor (p.ej. un modelo)"""
+    name: str
+    version: int
+    features: Tuple[str, ...]
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+
+class FeatureContext:
+    """Frame base + nodos ya calculados durante un compute"""
+
+    def __init__(self, registry: 'FeatureRegistry', df: pd.DataFrame, owner=None):
+        self.registry = registry
+        self.df = df
+        self.index = df.index
+        self.owner = owner            # Objeto con parámetros/calendarios (el pipeline)
+        self.cache: Dict[str, pd.Series] = {}
+        self._stack: List[str] = []   # Nodos en evaluación (para validar inputs)
+
+    def has(self, name: str) -> bool:
+        """Columna cruda presente en el frame"""
+        return name in self.df.columns
+
+    def __getitem__(self, name: str):
+        if self._stack and name not in self.registry.specs[self._stack[-1]].inputs:
+            raise KeyError(f"{self._stack[-1]}: '{name}' no está declarado en sus inputs")
+        if name in self.registry.specs:
+            return self.evaluate(name)
+        return self.df[name]
+
+    def evaluate(self, name: str) -> pd.Series:
+        """Valor del nodo (calculado una vez, con su fallback aplicado)"""
+        if name not in self.cache:
+            spec = self.registry.specs[name]
+            self._stack.append(name)
+            try:
+                value = spec.compute(self)
+            finally:
+                self._stack.pop()
+            series = value if isinstance(value, pd.Series) else pd.Series(value, index=self.index)
+            if spec.fallback is not None:
+                series = series.fillna(spec.fallback)
+            self.cache[name] = series
+        return self.cache[name]
+
+
+class FeatureRegistry:
+    """Registro de FeatureSpec y FeatureSet versionados"""
+
+    def __init__(self):
+        self.specs: Dict[str, FeatureSpec] = {}
+        self.sets: Dict[Tuple[str, int], FeatureSet] = {}
+
+    def register(self, name: str, inputs: Iterable[str] = (), lookback_days: int = 0,
+                 fallback: Any = None, intermediate: bool = False) -> Callable:
+        """Decorador: registra fn(ctx) como implementación de ``name``"""
+        def decorator(fn: Callable) -> Callable:
+            if name in self.specs:
+                raise ValueError(f"Feature duplicado en el registro: {name}")
+            self.specs[name] = FeatureSpec(name, tuple(inputs), lookback_days, fn, fallback, intermediate)
+            return fn
+        return decorator
+
+    def register_set(self, name: str, version: int, features: Iterable[str]) -> FeatureSet:
+        features = tuple(features)
+        unknown = [f for f in features if f not in self.specs or self.specs[f].intermediate]
+        if unknown:
+            raise ValueError(f"{name}@v{version}: features no registrados {unknown}")
+        feature_set = FeatureSet(name, version, features)
+        self.sets[(name, version)] = feature_set
+        return feature_set
+
+    def feature_set(self, name: str, version: Optional[int] = None) -> FeatureSet:
+        """Set por nombre y versión (None = la más reciente)"""
+        versions = [v for (n, v) in self.sets if n == name]
+        if not versions:
+            raise KeyError(f"Feature set no registrado: {name}")
+        version = max(versions) if version is None else version
+        if (name, version) not in self.sets:
+            raise KeyError(f"{name}: versión {version} no registrada (disponibles {sorted(versions)})")
+        return self.sets[(name, version)]
+
+    def features(self) -> List[str]:
+        """Features publicables (sin intermedios), en orden de registro"""
+        return [name for name, spec in self.specs.items() if not spec.intermediate]
+
+    # ------------------------------------------------------------------
+    # DAG
+    # ------------------------------------------------------------------
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """Nodos necesarios para ``names`` en orden topológico (dependencias primero)"""
+        order, state = [], {}
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Ciclo en el DAG de features: {' -> '.join(path + (name,))}")
+            state[name] = 'visiting'
+            for dep in self.specs[name].inputs:
+                if dep in self.specs:
+                    visit(dep, path + (name,))
+            state[name] = 'done'
+            order.append(name)
+
+        for name in names:
+            if name not in self.specs:
+                raise KeyError(f"Feature no registrado: {name}")
+            visit(name, ())
+        return order
+
+    def raw_inputs(self, names: Iterable[str]) -> List[str]:
+        """Columnas crudas (no registradas) de las que depende el subgrafo"""
+        raw = []
+        for node in self.resolve(names):
+            raw.extend(dep for dep in self.specs[node].inputs if dep not in self.specs and dep not in raw)
+        return raw
+
+    def lookback(self, names: Iterable[str]) -> int:
+        """Días de historia que necesita el subgrafo (camino más largo de lookbacks)"""
+        names = list(names)
+        total: Dict[str, int] = {}
+        for node in self.resolve(names):
+            spec = self.specs[node]
+            total[node] = spec.lookback_days + max(
+                (total[dep] for dep in spec.inputs if dep in total), default=0)
+        return max((total[name] for name in names), default=0)
+
+    def compute(self, df: pd.DataFrame, names: Iterable[str], owner=None) -> pd.DataFrame:
+        """
+        DataFrame con ``names`` (en ese orden) calculados sobre df
+
+        Sólo se evalúan nodos del subgrafo de ``names``, cada uno una vez y
+        sólo si alguien lo lee (un intermedio de una columna cruda ausente
+        no se calcula).
+        """
+        names = list(dict.fromkeys(names))
+        order = self.resolve(names)   # Valida nombres y ciclos antes de calcular
+        ctx = FeatureContext(self, df, owner)
+        features = pd.DataFrame({name: ctx.evaluate(name) for name in names}, index=df.index)
+        logger.debug(f"🧩 {len(names)} features pedidos, {len(ctx.cache)}/{len(order)} nodos evaluados")
+        return features
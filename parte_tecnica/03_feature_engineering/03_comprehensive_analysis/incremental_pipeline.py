@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+INCREMENTAL FEATURE PIPELINE - actualización diaria con estado checkpointed
+
+En vez de reconstruir 2015-hoy en cada corrida, persiste el estado de cola
+que necesita cada feature y recalcula sólo los días afectados:
+
+- aligned_tail: últimos WARMUP_DAYS + REVISION_DAYS días alineados (crudos),
+  cubre lags, ventanas 5/20 días y el lookback de inflación de 252 días
+- imputed_tail: mismos días ya imputados; la fila previa a la ventana es el
+  carry del forward-fill (LOCF sin límite en series críticas)
+- events: eventos comerciales usados (el impacto mira 7 días hacia adelante)
+
+Con feature_store (ver ../feature_store.py) las filas recalculadas también
+se aplican al store, que sólo reescribe las particiones de año tocadas.
+build_features devuelve el frame compacto (feature_dtypes.py); el CSV se
+escribe con la vista expandida.
+
+Días afectados = días nuevos + el último día previo (su target t+1 cambia)
++ días con datos crudos revisados (hasta REVISION_DAYS atrás) y su día
+previo + días cuyo horizonte de eventos cambió. Si el cambio es más
+antiguo que la cola guardada se hace un rebuild completo.
+check_consistency compara el CSV incremental contra un rebuild completo
+en memoria.
+"""
+
+import logging
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Plan de tipos compartido con el feature store (03_feature_engineering/feature_dtypes.py)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_dtypes import apply_dtype_plan, expand_features
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DAYS = 300      # >= 252 (inflación YoY) + 20 (ventanas) + margen
+REVISION_DAYS = 10     # Revisiones de datos crudos que se absorben sin rebuild
+CHECKPOINT_VERSION = 1
+
+
+class IncrementalFeaturePipeline:
+    """Actualización incremental del dataset de features de RobustFeaturePipeline"""
+
+    def __init__(self, pipeline, features_path: str = "../outputs/features_dataset_latest.csv",
+                 checkpoint_path: str = "../outputs/features_checkpoint.pkl", feature_store=None):
+        self.pipeline = pipeline
+        self.features_path = Path(features_path)
+        self.checkpoint_path = Path(checkpoint_path)
+        self.feature_store = feature_store
+
+        # La ventana de recálculo debe cubrir el lookback declarado en el registro
+        names = [f for feature_set in pipeline.feature_sets for f in feature_set.features]
+        lookback = pipeline.feature_registry.lookback(names)
+        if lookback > WARMUP_DAYS:
+            logger.warning(f"⚠️ Lookback de features ({lookback}d) > WARMUP_DAYS ({WARMUP_DAYS}d): "
+                           "las filas incrementales pueden diferir del rebuild")
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+    def _load_checkpoint(self) -> Optional[Dict]:
+        if not (self.checkpoint_path.exists() and self.features_path.exists()):
+            return None
+        with open(self.checkpoint_path, 'rb') as f:
+            checkpoint = pickle.load(f)
+        if checkpoint.get('version') != CHECKPOINT_VERSION:
+            logger.warning("⚠️ Checkpoint de otra versión - se hará rebuild completo")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, aligned_tail: pd.DataFrame, imputed_tail: pd.DataFrame):
+        events = self.pipeline._data_cache.get('events')
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'last_date': aligned_tail.index[-1],
+            'aligned_tail': aligned_tail.tail(WARMUP_DAYS + REVISION_DAYS),
+            'imputed_tail': imputed_tail.tail(WARMUP_DAYS + REVISION_DAYS + 1),
+            'events': events.copy() if events is not None else None,
+            'saved_at': pd.Timestamp.now().isoformat()
+        }
+        with open(self.checkpoint_path, 'wb') as f:
+            pickle.dump(checkpoint, f)
+
+    def save_checkpoint(self, datasets: Dict, end_date: Optional[str] = None):
+        """Checkpoint para un CSV escrito por el rebuild completo de RobustFeaturePipeline"""
+        aligned_df = self.pipeline.align_temporal_data(datasets, end_date=end_date)
+        self._save_checkpoint(aligned_df, self.pipeline.apply_holiday_imputation(aligned_df))
+        logger.info(f"💾 Checkpoint incremental: {self.checkpoint_path}")
+
+    # ------------------------------------------------------------------
+    # Rebuild completo
+    # ------------------------------------------------------------------
+    def full_rebuild(self, datasets: Dict, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Reconstruir 2015-end_date, escribir el CSV completo y el checkpoint"""
+        logger.info("🔁 Rebuild completo de features...")
+        aligned_df = self.pipeline.align_temporal_data(datasets, end_date=end_date)
+        imputed_df = self.pipeline.apply_holiday_imputation(aligned_df)
+        features_df = self.pipeline.build_features(imputed_df)
+
+        expand_features(features_df).to_csv(self.features_path)
+        if self.feature_store is not None:
+            self.feature_store.write(features_df)
+        self._save_checkpoint(aligned_df, imputed_df)
+        logger.info(f"💾 Features: {self.features_path} ({len(features_df)} filas)")
+        return features_df
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+    def update(self, datasets: Dict, end_date: Optional[str] = None) -> Dict:
+        """
+        Recalcular y escribir sólo los días afectados desde el último checkpoint
+
+        Returns:
+            Resumen: modo ('incremental', 'full', 'noop'), desde qué fecha se
+            reescribió, filas escritas y tiempo
+        """
+        start = time.perf_counter()
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            return self._full_summary(datasets, end_date, start, "sin checkpoint")
+
+        last_date = checkpoint['last_date']
+        aligned_tail = checkpoint['aligned_tail']
+        revision_start = last_date - pd.Timedelta(days=REVISION_DAYS)
+        aligned_new = self.pipeline.align_temporal_data(
+            datasets, start_date=revision_start.strftime('%Y-%m-%d'), end_date=end_date
+        )
+
+        if list(aligned_new.columns) != list(aligned_tail.columns):
+            return self._full_summary(datasets, end_date, start, "columnas de fuentes cambiaron")
+
+        affected = self._affected_start(checkpoint, aligned_new)
+        if affected is None:
+            logger.info("✅ Features al día - nada que recalcular")
+            return {'mode': 'noop', 'rows_written': 0, 'seconds': time.perf_counter() - start}
+        if affected < revision_start:
+            return self._full_summary(datasets, end_date, start, f"cambio anterior a la cola ({affected.date()})")
+
+        # Ventana: carry imputado + WARMUP_DAYS crudos previos + días afectados
+        prefix = aligned_tail[aligned_tail.index < affected].tail(WARMUP_DAYS)
+        carry_date = prefix.index[0] - pd.Timedelta(days=1) if len(prefix) else None
+        imputed_tail = checkpoint['imputed_tail']
+        if len(prefix) < WARMUP_DAYS or carry_date not in imputed_tail.index:
+            return self._full_summary(datasets, end_date, start, "cola insuficiente")
+
+        carry = imputed_tail.loc[[carry_date], aligned_tail.columns]
+        window = pd.concat([carry, prefix, aligned_new[aligned_new.index >= affected]])
+        imputed_window = self.pipeline.apply_holiday_imputation(window)
+        features_window = self.pipeline.build_features(imputed_window)
+        new_rows = features_window[features_window.index >= affected]
+        new_csv_rows = expand_features(new_rows)
+
+        with open(self.features_path, 'r', encoding='utf-8') as f:
+            header = f.readline().rstrip('\n').split(',')[1:]
+        if header != list(new_csv_rows.columns):
+            return self._full_summary(datasets, end_date, start, "columnas de features cambiaron")
+
+        _truncate_csv_from(self.features_path, affected)
+        new_csv_rows.to_csv(self.features_path, mode='a', header=False)
+        if self.feature_store is not None:
+            if not self.feature_store.exists():
+                stored = pd.read_csv(self.features_path, index_col=0, parse_dates=True)
+                self.feature_store.write(apply_dtype_plan(stored, self.pipeline.dtype_plan))
+            else:
+                try:
+                    self.feature_store.upsert(new_rows, replace_from=affected)
+                except ValueError as e:
+                    # Schema/constantes distintos (p.ej. una columna cayó a float32): reescribir todo
+                    return self._full_summary(datasets, end_date, start, f"feature store: {e}")
+
+        self._save_checkpoint(
+            pd.concat([aligned_tail[aligned_tail.index < affected], aligned_new[aligned_new.index >= affected]]),
+            pd.concat([imputed_tail[imputed_tail.index < affected], imputed_window[imputed_window.index >= affected]])
+        )
+
+        summary = {
+            'mode': 'incremental',
+            'rewritten_from': affected.date().isoformat(),
+            'rows_written': len(new_rows),
+            'seconds': time.perf_counter() - start
+        }
+        logger.info(f"⚡ Features incrementales: {summary['rows_written']} filas desde {summary['rewritten_from']} "
+                    f"en {summary['seconds']:.2f}s")
+        return summary
+
+    def _full_summary(self, datasets, end_date, start, reason: str) -> Dict:
+        logger.info(f"🔁 Rebuild completo: {reason}")
+        features_df = self.full_rebuild(datasets, end_date)
+        return {'mode': 'full', 'reason': reason, 'rows_written': len(features_df),
+                'seconds': time.perf_counter() - start}
+
+    def _affected_start(self, checkpoint: Dict, aligned_new: pd.DataFrame) -> Optional[pd.Timestamp]:
+        """Primer día cuyo resultado puede cambiar, None si no hay nada nuevo"""
+        last_date = checkpoint['last_date']
+        candidates = []
+
+        # Días nuevos: también cambia el target t+1 del último día guardado
+        if aligned_new.index[-1] > last_date:
+            candidates.append(last_date)
+
+        # Datos crudos revisados dentro de la ventana de revisión
+        stored = checkpoint['aligned_tail']
+        overlap = aligned_new.index.intersection(stored.index)
+        old, new = stored.loc[overlap], aligned_new.loc[overlap]
+        changed = ((old != new) & ~(old.isna() & new.isna())).any(axis=1)
+        if changed.any():
+            # El día previo también cambia: su target es el precio del día revisado
+            candidates.append(changed.index[changed.to_numpy()][0] - pd.Timedelta(days=1))
+
+        # Eventos nuevos/modificados: afectan los días previos dentro del horizonte
+        changed_events = _changed_event_dates(checkpoint.get('events'), self.pipeline._data_cache.get('events'))
+        if len(changed_events):
+            horizon = max(kernel.horizon_days for kernel in self.pipeline.event_kernels.values())
+            candidates.append(changed_events.min().normalize() - pd.Timedelta(days=horizon))
+
+        return min(candidates) if candidates else None
+
+    # ------------------------------------------------------------------
+    # Verificación
+    # ------------------------------------------------------------------
+    def check_consistency(self, datasets: Dict, end_date: Optional[str] = None,
+                          rtol: float = 1e-9) -> Dict:
+        """Comparar el CSV incremental contra un rebuild completo en memoria"""
+        logger.info("🔍 Verificando features incrementales vs rebuild completo...")
+        full = expand_features(self.pipeline.build_features(
+            self.pipeline.apply_holiday_imputation(self.pipeline.align_temporal_data(datasets, end_date=end_date))
+        ))
+        stored = pd.read_csv(self.features_path, index_col=0, parse_dates=True)
+
+        common = full.index.intersection(stored.index)
+        mismatches = {}
+        for col in full.columns:
+            if col not in stored.columns:
+                mismatches[col] = len(common)
+                continue
+            # El CSV se parsea como float64: llevarlo al dtype compacto antes de comparar
+            a, b = full.loc[common, col], stored.loc[common, col].astype(full[col].dtype)
+            if pd.api.types.is_numeric_dtype(a) and not pd.api.types.is_bool_dtype(a):
+                same = np.isclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=rtol, atol=0, equal_nan=True)
+            else:
+                same = (a == b).to_numpy()
+            if not same.all():
+                mismatches[col] = int((~same).sum())
+
+        result = {
+            'rows_full': len(full),
+            'rows_stored': len(stored),
+            'missing_rows': len(full.index.difference(stored.index)),
+            'extra_rows': len(stored.index.difference(full.index)),
+            'mismatched_columns': mismatches
+        }
+        result['consistent'] = (not mismatches and result['missing_rows'] == 0 and result['extra_rows'] == 0
+                                and list(stored.columns) == list(full.columns))
+
+        status = "✅" if result['consistent'] else "❌"
+        logger.info(f"{status} Consistencia: {result}")
+        return result
+
+
+def _changed_event_dates(old: Optional[pd.DataFrame], new: Optional[pd.DataFrame]) -> pd.DatetimeIndex:
+    """Fechas de eventos agregados, eliminados o modificados"""
+    def as_set(events):
+        if events is None or events.empty:
+            return set()
+        return set(zip(events.index, events['impact'].tolist()))
+    return pd.DatetimeIndex(sorted(date for date, _ in as_set(old) ^ as_set(new)))
+
+
+def _truncate_csv_from(path: Path, start: pd.Timestamp, chunk_size: int = 1 << 16):
+    """
+    Truncar el CSV en la primera fila con fecha >= start
+
+    Lee el archivo desde el final por bloques: el costo depende de cuántas
+    filas se reescriben, no del tamaño del historial.
+    """
+    start_key = start.strftime('%Y-%m-%d').encode()
+    with open(path, 'rb+') as f:
+        size = f.seek(0, 2)
+        offset, tail, first = size, b'', 0
+        while offset > 0:
+            read_from = max(0, offset - chunk_size)
+            f.seek(read_from)
+            tail = f.read(offset - read_from) + tail
+            offset = read_from
+            # Primera línea completa del bloque; si ya es anterior a start, el corte está adelante
+            first = tail.find(b'\n') + 1 if offset else 0
+            if offset and first and tail[first:first + len(start_key)] < start_key:
+                break
+
+        cut = size
+        position = offset + first
+        for line in tail[first:].split(b'\n'):
+            key = line.split(b',', 1)[0]
+            if key[:1].isdigit() and key >= start_key:
+                cut = position
+                break
+            position += len(line) + 1
+        f.truncate(cut)
@@ -11,21 +11,45 @@ Fecha: 2025-09-28
 import pandas as pd
 import numpy as np
 import warnings
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Union
 import json
 import logging
+import sys
+import time
+from functools import partial
 from pathlib import Path
 
+from asof_join import SourceSpec, asof_align
+from event_impact import EventKernel, event_impact_kernels
+from feature_definitions import DEFAULT_FEATURE_SETS, FEATURE_REGISTRY
+from feature_registry import FeatureSet
+from incremental_pipeline import IncrementalFeaturePipeline
+from score_rules import ScoreRule, apply_score_rules, high_volatility, is_weekend, notna
+from snapshot_publisher import publish_if_enabled
+from source_loader import SourceCache, SourceFile, load_sources, log_timings
+
+# Calendario de días hábiles compartido con la API (parte_tecnica/shared)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.business_calendar import BusinessCalendar
+
+# Feature store columnar (03_feature_engineering/feature_store.py)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import FeatureStore
+from feature_dtypes import FEATURE_DTYPE_PLAN, apply_dtype_plan, expand_features, memory_report
+
 # Configuración
 warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+LATEST_FEATURES_CSV = "../outputs/features_dataset_latest.csv"
+
 class RobustFeaturePipeline:
     """Pipeline robusto para generar 15 features core con sistema de fallbacks"""
     
-    def __init__(self, data_path: str = "../../02_data_extractors/outputs/"):
+    def __init__(self, data_path: str = "../../02_data_extractors/outputs/",
+                 feature_sets: Optional[List[FeatureSet]] = None, use_source_cache: bool = True):
         self.data_path = Path(data_path)
         self.holiday_path = Path("../outputs/holiday_calendar_2015_2026.csv")
         # Ruta corregida desde 03_comprehensive_analysis/
@@ -38,8 +62,52 @@ class RobustFeaturePipeline:
         # Configuración de features
         self.feature_config = self._setup_feature_config()
         
+        # Registro declarativo (feature_definitions.py) y sets a publicar:
+        # el primero define la completitud mínima de cada fila
+        self.feature_registry = FEATURE_REGISTRY
+        self.feature_sets = list(feature_sets or DEFAULT_FEATURE_SETS)
+        
+        # Fuentes: frecuencia y lag de publicación para el as-of point-in-time.
+        # Diarias: sólo el día publicado (los huecos los imputa apply_holiday_imputation);
+        # mensuales: último dato publicado (lag inferido, p.ej. INPC día 9 del mes siguiente)
+        self.source_specs = [
+            SourceSpec('lme', {'sr_m01': 'sr_m01', 'sr_m02': 'sr_m02', 'sr_m03': 'sr_m03', 'sc_m01': 'sc_m01'},
+                       'daily', max_staleness_days=0),
+            SourceSpec('banxico_fx', {'usdmxn': 'usdmxn'}, 'daily', max_staleness_days=0),
+            SourceSpec('banxico_tiie', {'tiie28': 'tiie28'}, 'daily', max_staleness_days=0),
+            SourceSpec('banxico_inpc', {'inpc': 'inpc'}, 'monthly'),
+        ] + [
+            SourceSpec(f'epu_{country}', {'epu_index': f'epu_{country}'}, 'monthly')
+            for country in ['mexico', 'usa', 'china', 'turkey']
+        ]
+        
+        # Kernels de impacto de eventos (horizonte/decay en días)
+        self.event_kernels = {
+            'trade_events_impact_7d': EventKernel(horizon_days=7, decay_days=3.0)
+        }
+        
+        # Tablas de reglas de scores (columna, peso, condición)
+        self.confidence_rules = [
+            ScoreRule('sr_m01', +0.15, notna),              # Datos LME frescos
+            ScoreRule('usdmxn', +0.10, notna),              # Datos FX frescos
+            ScoreRule(None, -0.10, is_weekend),             # Fin de semana
+            ScoreRule('sr_m01', -0.20, high_volatility(0.03, 5))  # >3% vol diaria
+        ]
+        self.quality_rules = [
+            ScoreRule('sr_m01', 0.3, notna),   # Críticas: 30% cada una
+            ScoreRule('usdmxn', 0.3, notna),
+            ScoreRule('tiie28', 0.2, notna),   # Importantes: 20% cada una
+            ScoreRule('sc_m01', 0.2, notna)
+        ]
+        
+        # Plan de tipos compactos del dataset final (ver feature_dtypes.py)
+        self.dtype_plan = FEATURE_DTYPE_PLAN
+        
         # Cache para datos
         self._data_cache = {}
+        self.source_cache = SourceCache() if use_source_cache else None  # Fuentes parseadas en disco
+        self.load_timings = []
+        self._calendar = None  # (frame de holidays, BusinessCalendar)
         
         logger.info("🛡️ RobustFeaturePipeline inicializado")
         
@@ -69,78 +137,70 @@ class RobustFeaturePipeline:
             }
         }
 
+    def _source_files(self) -> List[SourceFile]:
+        """Archivos fuente y su parser, en el orden de datasets"""
+        return [
+            SourceFile('lme', self.data_path / "lme_combined_sr_sc.csv", self._read_lme, required=True),
+            SourceFile('banxico_fx', self.data_path / "SF43718_data.csv", partial(self._read_banxico, column='usdmxn')),
+            SourceFile('banxico_tiie', self.data_path / "SF43783_data.csv", partial(self._read_banxico, column='tiie28')),
+            SourceFile('banxico_inpc', self.data_path / "SP1_data.csv", partial(self._read_banxico, column='inpc')),
+        ] + [
+            SourceFile(f'epu_{country}', self.data_path / f"epu_{country}_data.csv", self._read_epu)
+            for country in ['mexico', 'usa', 'china', 'turkey']
+        ] + [
+            SourceFile('holidays', self.holiday_path, self._read_holidays),
+            SourceFile('events', self.events_path, self._parse_trade_events)
+        ]
+
     def load_data(self) -> Dict[str, pd.DataFrame]:
-        """Cargar todos los datasets necesarios con manejo de errores"""
-        logger.info("📊 Cargando datos...")
+        """
+        Cargar todos los datasets en paralelo
         
-        datasets = {}
+        Las fuentes sin cambios (ruta + mtime + tamaño) salen de
+        self.source_cache sin volver a parsear; tiempos por fuente en
+        self.load_timings (ver source_loader.py)
+        """
+        logger.info("📊 Cargando datos...")
+        start = time.perf_counter()
         
         try:
-            # 1. LME Data (crítico)
-            lme_file = self.data_path / "lme_combined_sr_sc.csv"
-            if lme_file.exists():
-                datasets['lme'] = pd.read_csv(lme_file, parse_dates=['date'], index_col='date')
-                logger.info(f"✅ LME data: {len(datasets['lme'])} registros")
-            else:
-                logger.error("❌ LME data no encontrado - CRÍTICO")
-                raise FileNotFoundError("LME data es crítico para el modelo")
-            
-            # 2. Banxico Data (crítico)
-            fx_file = self.data_path / "SF43718_data.csv"  # USD/MXN
-            if fx_file.exists():
-                fx_data = pd.read_csv(fx_file, parse_dates=['fecha'], index_col='fecha')
-                fx_data.rename(columns={'valor': 'usdmxn'}, inplace=True)
-                datasets['banxico_fx'] = fx_data
-                logger.info(f"✅ FX data: {len(datasets['banxico_fx'])} registros")
-            
-            tiie_file = self.data_path / "SF43783_data.csv"  # TIIE28
-            if tiie_file.exists():
-                tiie_data = pd.read_csv(tiie_file, parse_dates=['fecha'], index_col='fecha')
-                tiie_data.rename(columns={'valor': 'tiie28'}, inplace=True)
-                datasets['banxico_tiie'] = tiie_data
-                logger.info(f"✅ TIIE data: {len(datasets['banxico_tiie'])} registros")
-            
-            inpc_file = self.data_path / "SP1_data.csv"  # INPC
-            if inpc_file.exists():
-                inpc_data = pd.read_csv(inpc_file, parse_dates=['fecha'], index_col='fecha')
-                inpc_data.rename(columns={'valor': 'inpc'}, inplace=True)
-                datasets['banxico_inpc'] = inpc_data
-                logger.info(f"✅ INPC data: {len(datasets['banxico_inpc'])} registros")
-            
-            # 3. EPU Data (importante)
-            for country in ['mexico', 'usa', 'china', 'turkey']:
-                epu_file = self.data_path / f"epu_{country}_data.csv"
-                if epu_file.exists():
-                    epu_data = pd.read_csv(epu_file)
-                    # Crear columna de fecha a partir de Year y Month
-                    if 'Year' in epu_data.columns and 'Month' in epu_data.columns:
-                        epu_data['date'] = pd.to_datetime(epu_data[['Year', 'Month']].assign(day=1))
-                        epu_data = epu_data.set_index('date')
-                        # Renombrar columna EPU
-                        epu_cols = [col for col in epu_data.columns if 'Policy Uncertainty' in col or 'EPU' in col or 'Index' in col]
-                        if epu_cols:
-                            epu_data.rename(columns={epu_cols[0]: 'epu_index'}, inplace=True)
-                    datasets[f'epu_{country}'] = epu_data
-                    logger.info(f"✅ EPU {country}: {len(epu_data)} registros")
-            
-            # 4. Holiday Calendar
-            if self.holiday_path.exists():
-                datasets['holidays'] = pd.read_csv(self.holiday_path, index_col=0, parse_dates=True)
-                logger.info(f"✅ Holiday calendar: {len(datasets['holidays'])} registros")
-            
-            # 5. Trade Events
-            if self.events_path.exists():
-                datasets['events'] = self._parse_trade_events()
-                logger.info(f"✅ Trade events: {len(datasets['events'])} eventos")
-            
+            datasets, self.load_timings = load_sources(self._source_files(), self.source_cache)
         except Exception as e:
             logger.error(f"❌ Error cargando datos: {e}")
             raise
         
+        log_timings(self.load_timings, time.perf_counter() - start)
         self._data_cache = datasets
         return datasets
-    
-    def _parse_trade_events(self) -> pd.DataFrame:
+
+    @staticmethod
+    def _read_lme(path: Path) -> pd.DataFrame:
+        return pd.read_csv(path, parse_dates=['date'], index_col='date')
+
+    @staticmethod
+    def _read_banxico(path: Path, column: str) -> pd.DataFrame:
+        """Serie Banxico (fecha, valor) con valor renombrado a column"""
+        data = pd.read_csv(path, parse_dates=['fecha'], index_col='fecha')
+        return data.rename(columns={'valor': column})
+
+    @staticmethod
+    def _read_epu(path: Path) -> pd.DataFrame:
+        epu_data = pd.read_csv(path)
+        # Crear columna de fecha a partir de Year y Month
+        if 'Year' in epu_data.columns and 'Month' in epu_data.columns:
+            epu_data['date'] = pd.to_datetime(epu_data[['Year', 'Month']].assign(day=1))
+            epu_data = epu_data.set_index('date')
+            # Renombrar columna EPU
+            epu_cols = [col for col in epu_data.columns if 'Policy Uncertainty' in col or 'EPU' in col or 'Index' in col]
+            if epu_cols:
+                epu_data = epu_data.rename(columns={epu_cols[0]: 'epu_index'})
+        return epu_data
+
+    @staticmethod
+    def _read_holidays(path: Path) -> pd.DataFrame:
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+
+    def _parse_trade_events(self, path: Optional[Path] = None) -> pd.DataFrame:
         """
         Parsear eventos comerciales del markdown
         Formato: | Fecha | Descripción | Impacto (-3 a +3) | Referencia |
@@ -148,7 +208,7 @@ class RobustFeaturePipeline:
         events = []
         
         try:
-            with open(self.events_path, 'r', encoding='utf-8') as f:
+            with open(path or self.events_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             # Extraer tabla de eventos
@@ -201,52 +261,31 @@ class RobustFeaturePipeline:
             logger.warning(f"⚠️ Error parsing trade events: {e}")
             return pd.DataFrame(columns=['impact', 'description'])
 
-    def align_temporal_data(self, datasets: Dict) -> pd.DataFrame:
-        """Alinear temporalmente todos los datos en frecuencia diaria"""
+    def align_temporal_data(self, datasets: Dict, start_date: str = '2015-01-01',
+                            end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Alinear temporalmente todos los datos en frecuencia diaria (por defecto 2015 a hoy)
+        
+        Las fuentes de self.source_specs se resuelven en un solo as-of
+        point-in-time: cada día ve sólo lo ya publicado (ver asof_join.py).
+        """
         logger.info("🔄 Alineando datos temporalmente...")
         
-        # Crear índice diario desde 2015 hasta hoy
-        start_date = '2015-01-01'
-        end_date = pd.Timestamp.now().strftime('%Y-%m-%d')
+        # Crear índice diario
+        end_date = end_date or pd.Timestamp.now().strftime('%Y-%m-%d')
         daily_index = pd.date_range(start=start_date, end=end_date, freq='D')
         
-        # DataFrame base
-        aligned_df = pd.DataFrame(index=daily_index)
-        
-        # 1. LME data (diario, base principal)
-        if 'lme' in datasets:
-            lme = datasets['lme']
-            aligned_df['sr_m01'] = lme['sr_m01']
-            # Solo agregar columnas que existen
-            if 'sr_m02' in lme.columns:
-                aligned_df['sr_m02'] = lme['sr_m02']
-            if 'sr_m03' in lme.columns:
-                aligned_df['sr_m03'] = lme['sr_m03']
-            aligned_df['sc_m01'] = lme['sc_m01']
+        # 1-5. Fuentes de mercado y macro (LME, FX, TIIE, INPC, EPU)
+        aligned_df = asof_align(datasets, self.source_specs, daily_index)
+        if 'sr_m01' in aligned_df.columns:
             logger.info(f"✅ LME data alineado: {aligned_df['sr_m01'].notna().sum()} días válidos")
-        
-        # 2. FX data (diario)
-        if 'banxico_fx' in datasets:
-            aligned_df['usdmxn'] = datasets['banxico_fx']['usdmxn']
+        if 'usdmxn' in aligned_df.columns:
             logger.info(f"✅ FX data alineado: {aligned_df['usdmxn'].notna().sum()} días válidos")
         
-        # 3. TIIE data (diario)
-        if 'banxico_tiie' in datasets:
-            aligned_df['tiie28'] = datasets['banxico_tiie']['tiie28']
-        
-        # 4. INPC data (mensual - forward fill)
-        if 'banxico_inpc' in datasets:
-            inpc_monthly = datasets['banxico_inpc']['inpc'].resample('M').last()
-            aligned_df['inpc'] = inpc_monthly.reindex(daily_index, method='ffill')
-        
-        # 5. EPU data (mensual - forward fill)
-        for country in ['mexico', 'usa', 'china', 'turkey']:
-            if f'epu_{country}' in datasets:
-                epu_data = datasets[f'epu_{country}']
-                if 'epu_index' in epu_data.columns:
-                    epu_monthly = epu_data['epu_index'].resample('M').last()
-                    aligned_df[f'epu_{country}'] = epu_monthly.reindex(daily_index, method='ffill')
-        
+        return self._align_calendar(aligned_df, datasets)
+
+    def _align_calendar(self, aligned_df: pd.DataFrame, datasets: Dict) -> pd.DataFrame:
+        """Indicadores de feriado y fin de semana (calendario conocido de antemano)"""
         # 6. Holiday indicators
         if 'holidays' in datasets:
             holidays = datasets['holidays']
@@ -335,9 +374,36 @@ class RobustFeaturePipeline:
         
         return df_imputed
 
+    def compute_features(self, df: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+        """
+        Calcular sólo los features pedidos (y su subgrafo) con el registro
+        PRE-REQUISITO: 0 nulos en sr_m01 y usdmxn si el subgrafo los usa
+        """
+        raw_inputs = self.feature_registry.raw_inputs(names)
+        for col in ['sr_m01', 'usdmxn']:
+            if col in raw_inputs and col in df.columns:
+                nulls = df[col].isnull().sum()
+                if nulls > 0:
+                    logger.error(f"❌ CRÍTICO: {col} tiene {nulls} nulos ANTES de calcular lags")
+                    raise ValueError(f"{col} debe estar limpio antes de calcular features")
+        
+        return self.feature_registry.compute(df, names, owner=self)
+
     def create_tier1_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Crear features Tier 1 - Críticos (5 features)"""
+        return self.compute_features(df, list(self.feature_config['tier_1_critical']))
+
+    def create_tier2_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Crear features Tier 2 - Importantes (5 features)"""
+        return self.compute_features(df, list(self.feature_config['tier_2_important']))
+
+    def create_tier3_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Crear features Tier 3 - Contextuales (5 features)"""
+        return self.compute_features(df, list(self.feature_config['tier_3_contextual']))
+
+    def create_tier1_features_reference(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Crear features Tier 1 - Críticos (5 features)
+        Crear features Tier 1 - Críticos (5 features) - implementación original
         PRE-REQUISITO: df debe tener 0 nulos en sr_m01 y usdmxn
         """
         logger.info("🔴 Creando features Tier 1 - Críticos...")
@@ -387,8 +453,8 @@ class RobustFeaturePipeline:
         
         return features
 
-    def create_tier2_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Crear features Tier 2 - Importantes (5 features)"""
+    def create_tier2_features_reference(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Crear features Tier 2 - Importantes (5 features) - implementación original"""
         logger.info("🟡 Creando features Tier 2 - Importantes...")
         
         features = pd.DataFrame(index=df.index)
@@ -436,8 +502,8 @@ class RobustFeaturePipeline:
         
         return features
 
-    def create_tier3_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Crear features Tier 3 - Contextuales (5 features)"""
+    def create_tier3_features_reference(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Crear features Tier 3 - Contextuales (5 features) - implementación original"""
         logger.info("🟢 Creando features Tier 3 - Contextuales...")
         
         features = pd.DataFrame(index=df.index)
@@ -486,85 +552,37 @@ class RobustFeaturePipeline:
 
     def _calculate_trade_events_impact(self, date_index: pd.DatetimeIndex) -> pd.Series:
         """Calcular impacto de eventos comerciales próximos 7 días"""
-        impact_series = pd.Series(0.0, index=date_index)
-        
-        if 'events' in self._data_cache:
-            events = self._data_cache['events']
-            
-            for date in date_index:
-                # Buscar eventos en próximos 7 días
-                future_events = events[
-                    (events.index >= date) & 
-                    (events.index <= date + timedelta(days=7))
-                ]
-                
-                if not future_events.empty:
-                    # Sumar impactos con decay exponencial
-                    total_impact = 0
-                    for event_date, event in future_events.iterrows():
-                        days_ahead = (event_date - date).days
-                        decay_factor = np.exp(-days_ahead / 3)  # Decay 3 días
-                        total_impact += event['impact'] * decay_factor
-                    
-                    impact_series[date] = total_impact
-        
-        return impact_series
+        return self._calculate_event_kernels(date_index)['trade_events_impact_7d']
+
+    def _calculate_event_kernels(self, date_index: pd.DatetimeIndex) -> pd.DataFrame:
+        """Todos los kernels de self.event_kernels en una pasada"""
+        events = self._data_cache.get('events')
+        return event_impact_kernels(events, date_index, self.event_kernels)
 
     def _calculate_days_to_holiday(self, date_index: pd.DatetimeIndex) -> pd.Series:
         """Calcular días hasta próximo festivo"""
         days_series = pd.Series(30, index=date_index)  # Default 30 días
         
-        if 'holidays' in self._data_cache:
-            holidays = self._data_cache['holidays']
-            # Buscar columna de holidays de México
-            mx_holiday_col = None
-            for col in holidays.columns:
-                if 'mexico' in col.lower() or 'Mexico' in col:
-                    mx_holiday_col = col
-                    break
-            
-            if mx_holiday_col is not None:
-                holiday_dates = holidays[holidays[mx_holiday_col] == True].index
-            else:
-                holiday_dates = pd.DatetimeIndex([])
-            
-            for date in date_index:
-                future_holidays = holiday_dates[holiday_dates > date]
-                if not future_holidays.empty:
-                    days_to_next = (future_holidays[0] - date).days
-                    days_series[date] = min(days_to_next, 30)  # Cap en 30 días
+        calendar = self._get_business_calendar()
+        if calendar is not None and 'Mexico' in calendar.markets:
+            days_to_next = calendar.days_to_next_holiday(date_index, market='Mexico')
+            # Cap en 30 días (también sin festivo futuro conocido)
+            days_series[:] = np.fmin(days_to_next, 30).astype(int)
         
         return days_series
 
+    def _get_business_calendar(self) -> Optional[BusinessCalendar]:
+        """Índice de días hábiles del calendario maestro cargado (se construye una vez)"""
+        holidays = self._data_cache.get('holidays')
+        if holidays is None:
+            return None
+        if self._calendar is None or self._calendar[0] is not holidays:
+            self._calendar = (holidays, BusinessCalendar.from_master_calendar(holidays))
+        return self._calendar[1]
+
     def _calculate_model_confidence(self, df: pd.DataFrame) -> pd.Series:
         """Calcular confianza del modelo basada en disponibilidad de datos"""
-        confidence_series = pd.Series(0.7, index=df.index)  # Default medium
-        
-        # Factores que afectan confianza
-        for date in df.index:
-            confidence = 0.7  # Base
-            
-            # +0.2 si datos LME frescos (no más de 1 día)
-            if 'sr_m01' in df.columns and pd.notna(df.loc[date, 'sr_m01']):
-                confidence += 0.15
-            
-            # +0.1 si datos FX frescos
-            if 'usdmxn' in df.columns and pd.notna(df.loc[date, 'usdmxn']):
-                confidence += 0.1
-            
-            # -0.2 si fin de semana o festivo
-            if date.weekday() >= 5:
-                confidence -= 0.1
-            
-            # -0.3 si alta volatilidad
-            if 'sr_m01' in df.columns:
-                recent_vol = df['sr_m01'].pct_change().rolling(5).std().loc[date]
-                if pd.notna(recent_vol) and recent_vol > 0.03:  # >3% vol diaria
-                    confidence -= 0.2
-            
-            confidence_series[date] = np.clip(confidence, 0.3, 0.95)
-        
-        return confidence_series
+        return apply_score_rules(df, 0.7, self.confidence_rules, clip=(0.3, 0.95))
 
     def create_features_dataset(self, datasets: Dict) -> pd.DataFrame:
         """Pipeline completo: crear dataset final con 15 features"""
@@ -576,13 +594,24 @@ class RobustFeaturePipeline:
         # 2. Aplicar imputación por días inhábiles
         imputed_df = self.apply_holiday_imputation(aligned_df)
         
-        # 3. Crear features por tiers
-        tier1_features = self.create_tier1_features(imputed_df)
-        tier2_features = self.create_tier2_features(imputed_df)
-        tier3_features = self.create_tier3_features(imputed_df)
+        return self.build_features(imputed_df)
+
+    def build_features(self, imputed_df: pd.DataFrame,
+                       feature_sets: Optional[List[FeatureSet]] = None) -> pd.DataFrame:
+        """
+        Features, target y calidad a partir de los datos alineados e imputados
+        
+        feature_sets: sets a calcular (default self.feature_sets); sólo se
+        evalúa el subgrafo de la unión, en el orden de los sets
+        """
+        feature_sets = list(feature_sets or self.feature_sets)
+        primary = list(feature_sets[0].features)
         
-        # 4. Combinar todos los features
-        features_df = pd.concat([tier1_features, tier2_features, tier3_features], axis=1)
+        # 3-4. Calcular la unión de los sets pedidos
+        names = list(dict.fromkeys(f for feature_set in feature_sets for f in feature_set.features))
+        features_df = self.compute_features(imputed_df, names)
+        logger.info(f"🧩 Features: {len(names)} de sets {[fs.key for fs in feature_sets]} "
+                    f"({features_df.notna().sum().sum()}/{features_df.size} valores válidos)")
         
         # 5. Agregar columnas de holidays y transparencia
         holiday_cols = [c for c in imputed_df.columns if 'holiday' in c.lower() or 'weekend' in c.lower() or 'business_day' in c.lower()]
@@ -605,45 +634,32 @@ class RobustFeaturePipeline:
         features_df['data_quality_score'] = self._calculate_data_quality_score(imputed_df)
         
         # 7. Eliminar filas con demasiados NaNs
-        min_features_required = 10  # Al menos 10 de 15 features
-        valid_rows = features_df.iloc[:, :15].notna().sum(axis=1) >= min_features_required
+        min_features_required = int(np.ceil(len(primary) * 2 / 3))  # Al menos 10 de 15 features
+        valid_rows = features_df[primary].notna().sum(axis=1) >= min_features_required
         features_df = features_df[valid_rows]
         
         logger.info(f"🎯 Dataset final creado:")
         logger.info(f"   - Período: {features_df.index.min()} a {features_df.index.max()}")
         logger.info(f"   - Registros válidos: {len(features_df)}")
-        logger.info(f"   - Features: {features_df.columns.tolist()[:15]}")
-        logger.info(f"   - Completitud promedio: {features_df.iloc[:, :15].notna().mean().mean():.2%}")
+        logger.info(f"   - Features: {primary}")
+        logger.info(f"   - Completitud promedio: {features_df[primary].notna().mean().mean():.2%}")
         
-        return features_df
+        # 8. Tipos compactos (float32, int8, flags, categorías, constantes a attrs)
+        compact_df = apply_dtype_plan(features_df, self.dtype_plan)
+        total = memory_report(features_df, compact_df).loc['TOTAL']
+        logger.info(f"   - Memoria: {total['bytes'] / 1e6:.2f} MB -> {total['compact_bytes'] / 1e6:.2f} MB "
+                    f"({total['ratio']:.1f}x)")
+        
+        return compact_df
 
     def _calculate_data_quality_score(self, df: pd.DataFrame) -> pd.Series:
         """Calcular score de calidad de datos por día"""
-        critical_columns = ['sr_m01', 'usdmxn']
-        important_columns = ['tiie28', 'sc_m01']
-        
-        quality_score = pd.Series(0.0, index=df.index)
-        
-        for date in df.index:
-            score = 0.0
-            
-            # 60% peso a columnas críticas
-            for col in critical_columns:
-                if col in df.columns and pd.notna(df.loc[date, col]):
-                    score += 0.3  # 30% cada una
-            
-            # 40% peso a columnas importantes
-            for col in important_columns:
-                if col in df.columns and pd.notna(df.loc[date, col]):
-                    score += 0.2  # 20% cada una
-            
-            quality_score[date] = score
-        
-        return quality_score
+        return apply_score_rules(df, 0.0, self.quality_rules)
 
     def validate_features_quality(self, features_df: pd.DataFrame) -> Dict:
         """Validar calidad del dataset de features"""
         logger.info("🔍 Validando calidad de features...")
+        features_df = expand_features(features_df)
         
         validation_results = {
             'timestamp': datetime.now().isoformat(),
@@ -662,9 +678,9 @@ class RobustFeaturePipeline:
         for col in feature_cols:
             validation_results['feature_stats'][col] = {
                 'completeness': features_df[col].notna().mean(),
-                'mean': features_df[col].mean() if pd.api.types.is_numeric_dtype(features_df[col]) else None,
-                'std': features_df[col].std() if pd.api.types.is_numeric_dtype(features_df[col]) else None,
-                'outliers_pct': self._detect_outliers(features_df[col]) if pd.api.types.is_numeric_dtype(features_df[col]) else 0
+                'mean': float(features_df[col].mean()) if pd.api.types.is_numeric_dtype(features_df[col]) else None,
+                'std': float(features_df[col].std()) if pd.api.types.is_numeric_dtype(features_df[col]) else None,
+                'outliers_pct': float(self._detect_outliers(features_df[col])) if pd.api.types.is_numeric_dtype(features_df[col]) else 0
             }
         
         # Resumen de calidad
@@ -696,12 +712,19 @@ class RobustFeaturePipeline:
         return outliers.mean()
 
     def save_features_dataset(self, features_df: pd.DataFrame, validation_results: Dict) -> str:
-        """Guardar dataset de features con metadata"""
+        """
+        Guardar dataset de features con metadata
+        
+        El dataset principal va al feature store columnar (particiones por
+        año, las que no cambiaron no se reescriben); el CSV latest se
+        mantiene para consumidores externos y el pipeline incremental.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Guardar dataset principal
-        output_file = f"../outputs/features_dataset_{timestamp}.csv"
-        features_df.to_csv(output_file)
+        store = FeatureStore()
+        store.write(features_df)
+        output_file = str(store.root)
         logger.info(f"💾 Dataset guardado: {output_file}")
         
         # Guardar validation report
@@ -710,15 +733,23 @@ class RobustFeaturePipeline:
             json.dump(validation_results, f, indent=2)
         logger.info(f"📊 Reporte validación: {report_file}")
         
-        # Crear también versión latest
-        latest_file = "../outputs/features_dataset_latest.csv"
-        features_df.to_csv(latest_file)
+        # Crear también versión latest (vista expandida: constantes como columnas)
+        latest_file = LATEST_FEATURES_CSV
+        expand_features(features_df).to_csv(latest_file)
         logger.info(f"💾 Latest version: {latest_file}")
         
         return output_file
 
-def main():
-    """Función principal para ejecutar el pipeline"""
+def main(incremental: bool = False, publish: bool = False):
+    """
+    Función principal para ejecutar el pipeline
+    
+    Con incremental=True (--incremental) sólo recalcula los días afectados
+    desde el último checkpoint (ver incremental_pipeline.py). Con
+    publish=True (--publish, lo pasa el job nocturno) sube la cola del CSV
+    latest al bucket de la API (snapshot_publisher.py) para la inferencia
+    en proceso; una corrida local sin --publish no toca GCS.
+    """
     logger.info("🚀 Iniciando Robust Feature Pipeline...")
     
     try:
@@ -728,6 +759,13 @@ def main():
         # Cargar todos los datos
         datasets = pipeline.load_data()
         
+        if incremental:
+            incremental_pipeline = IncrementalFeaturePipeline(pipeline, feature_store=FeatureStore())
+            summary = incremental_pipeline.update(datasets)
+            logger.info(f"✅ Actualización {summary['mode']}: {summary['rows_written']} filas en {summary['seconds']:.2f}s")
+            publish_if_enabled(incremental_pipeline.features_path, publish)
+            return summary
+        
         # Crear dataset de features
         features_df = pipeline.create_features_dataset(datasets)
         
@@ -737,6 +775,12 @@ def main():
         # Guardar resultados
         output_file = pipeline.save_features_dataset(features_df, validation_results)
         
+        # Estado de cola para las siguientes corridas --incremental
+        IncrementalFeaturePipeline(pipeline).save_checkpoint(datasets)
+        
+        # Snapshot para la inferencia en proceso de la API
+        publish_if_enabled(LATEST_FEATURES_CSV, publish)
+        
         logger.info("✅ Pipeline completado exitosamente!")
         logger.info(f"📁 Archivo principal: {output_file}")
         logger.info(f"📊 Registros procesados: {len(features_df)}")
@@ -746,10 +790,10 @@ def main():
         print("="*60)
         print(f"Período: {features_df.index.min()} a {features_df.index.max()}")
         print(f"Total registros: {len(features_df)}")
-        print(f"Features: {list(features_df.columns[:15])}")
+        print(f"Features: {features_df.attrs['columns'][:15]}")
         print("\nÚltimos 5 registros (features críticos):")
         critical_features = ['lme_sr_m01_lag1', 'usdmxn_lag1', 'mexico_premium', 'lme_volatility_5d', 'model_confidence']
-        print(features_df[critical_features].tail())
+        print(expand_features(features_df, critical_features).tail())
         
         return features_df, validation_results
         
@@ -758,4 +802,8 @@ def main():
         raise
 
 if __name__ == "__main__":
-    features_df, validation_results = main()
+    publish = '--publish' in sys.argv
+    if '--incremental' in sys.argv:
+        main(incremental=True, publish=publish)
+    else:
+        features_df, validation_results = main(publish=publish)
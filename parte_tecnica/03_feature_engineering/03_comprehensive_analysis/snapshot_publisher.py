@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+SNAPSHOT PUBLISHER - últimas filas de features para la API
+
+La API (04_api_exposure, SteelPricePredictor.features_cache) corre el
+modelo dos etapas en proceso cuando no hay predicción precalculada, sobre
+gs://<MODEL_BUCKET>/features/features_latest.csv. Este paso del pipeline
+sube la cola del CSV latest a esa ruta sólo cuando se pide (--publish,
+lo pasa el job nocturno): esa ruta es la que sirve la API de producción,
+así que una corrida local no publica nada.
+"""
+
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.cloud import storage
+    GCP_AVAILABLE = True
+except ImportError:
+    GCP_AVAILABLE = False
+
+DEFAULT_MODEL_BUCKET = "cdo-yacosta-models"            # Settings.model_bucket de la API
+SNAPSHOT_BLOB_PATH = "features/features_latest.csv"    # Settings.features_snapshot_path
+SNAPSHOT_ROWS = 30   # La API usa las últimas filas; margen para rezagos y feriados
+
+
+def snapshot_csv(features_csv: Union[str, Path], rows: int = SNAPSHOT_ROWS) -> str:
+    """Cola del CSV de features en el formato que parsea la API (índice de fechas)"""
+    df = pd.read_csv(features_csv, index_col=0, parse_dates=True)
+    buffer = io.StringIO()
+    df.tail(rows).to_csv(buffer)
+    return buffer.getvalue()
+
+
+def publish_feature_snapshot(features_csv: Union[str, Path], bucket_name: Optional[str] = None,
+                             blob_path: str = SNAPSHOT_BLOB_PATH, rows: int = SNAPSHOT_ROWS) -> str:
+    """
+    Subir las últimas ``rows`` filas a gs://bucket/blob_path; devuelve la URI
+
+    bucket_name default: $MODEL_BUCKET (el que recibe el job de entrenamiento)
+    o el bucket de modelos de la API.
+    """
+    if not GCP_AVAILABLE:
+        raise RuntimeError("google-cloud-storage no instalado: no se puede publicar el snapshot")
+    bucket_name = bucket_name or os.getenv("MODEL_BUCKET", DEFAULT_MODEL_BUCKET)
+    payload = snapshot_csv(features_csv, rows)
+
+    blob = storage.Client().bucket(bucket_name).blob(blob_path)
+    blob.upload_from_string(payload, content_type="text/csv")
+    uri = f"gs://{bucket_name}/{blob_path}"
+    logger.info(f"☁️ Snapshot de features publicado: {uri} ({rows} filas, {len(payload) / 1e3:.1f} kB)")
+    return uri
+
+
+def publish_if_enabled(features_csv: Union[str, Path], publish: bool = False) -> Optional[str]:
+    """
+    Publicar sólo con publish=True (opt-in); sin cliente GCS el error se propaga para que el job falle
+    """
+    if not publish:
+        logger.info("Snapshot de features no publicado (usar --publish)")
+        return None
+    return publish_feature_snapshot(features_csv)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+SOURCE LOADER - carga concurrente de fuentes con cache en disco
+
+Cada fuente es un archivo + la función que lo parsea. ``load_sources``
+las lee en un pool de threads (read_csv libera el GIL en el parser de C)
+y memoiza cada DataFrame parseado en ``SourceCache``: la llave es ruta +
+mtime + tamaño + identidad del parser (loader_identity: su código más el
+fuente de su módulo) + SOURCE_CACHE_VERSION, así que una fuente sin
+cambios se lee del pickle (binario, conserva índice de fechas y dtypes)
+sin volver a parsear fechas ni el markdown de eventos, y editar un parser
+o los helpers/constantes de su módulo invalida sus entradas. Un
+DataFrame vacío (archivo sin datos o error de parseo que el parser
+absorbió) no se guarda: se vuelve a intentar en la siguiente carga.
+
+El cache vive en outputs/source_cache/ (ignorado en .gitignore).
+
+Cada carga reporta su tiempo y si vino de cache ('hit'), se parseó y
+guardó ('miss') o se leyó sin cache ('off').
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
+from types import CodeType
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CACHE_VERSION = 1   # Subir si cambia cómo se parsea alguna fuente
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / "outputs" / "source_cache"
+MAX_WORKERS = 8
+
+
+class SourceFile(NamedTuple):
+    """Fuente a cargar: llave en datasets, archivo y parser"""
+    key: str
+    path: Path
+    loader: Callable[[Path], pd.DataFrame]
+    required: bool = False      # Si falta el archivo: FileNotFoundError en vez de omitirla
+
+
+class SourceTiming(NamedTuple):
+    """Resultado de cargar una fuente"""
+    key: str
+    seconds: float
+    rows: int
+    cache: str                  # 'hit' | 'miss' | 'off'
+
+
+def _code_digest(code: CodeType, digest) -> None:
+    """Bytecode, nombres y constantes (recursivo en funciones anidadas; sin direcciones de memoria)"""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _code_digest(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+@lru_cache(maxsize=None)
+def _source_digest(path: str, mtime_ns: int) -> bytes:
+    """sha256 del archivo fuente (memoizado por ruta + mtime)"""
+    return hashlib.sha256(Path(path).read_bytes()).digest()
+
+
+def _module_digest(module_name: str, digest) -> None:
+    """Fuente completo del módulo: helpers y constantes que el parser usa sin estar en su bytecode"""
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is None:
+        return
+    try:
+        digest.update(_source_digest(path, os.stat(path).st_mtime_ns))
+    except OSError:
+        pass   # Sin fuente legible (p.ej. sólo .pyc): queda el bytecode del parser
+
+
+def loader_identity(loader: Callable) -> str:
+    """Módulo + nombre + código del parser, fuente de su módulo y argumentos fijados con partial"""
+    digest = hashlib.sha256()
+    while isinstance(loader, partial):
+        digest.update(repr((loader.args, sorted(loader.keywords.items()))).encode())
+        loader = loader.func
+    func = getattr(loader, '__func__', loader)   # Métodos ligados: la función
+    digest.update(f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__name__)}".encode())
+    code = getattr(func, '__code__', None)
+    if code is not None:
+        _code_digest(code, digest)
+    _module_digest(getattr(func, '__module__', None), digest)
+    return digest.hexdigest()[:12]
+
+
+class SourceCache:
+    """Cache en disco de DataFrames parseados, una entrada vigente por archivo"""
+
+    def __init__(self, root: Path = DEFAULT_CACHE_PATH):
+        self.root = Path(root)
+
+    @staticmethod
+    def _path_key(path: Path) -> str:
+        return hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:12]
+
+    def entry(self, path: Path, loader_id: str = "") -> Path:
+        """Archivo de cache para el estado actual (mtime, tamaño) de path y el parser loader_id"""
+        stat = os.stat(path)
+        state = f"{stat.st_mtime_ns}:{stat.st_size}:{loader_id}:{SOURCE_CACHE_VERSION}"
+        state_key = hashlib.sha256(state.encode()).hexdigest()[:12]
+        return self.root / f"{Path(path).stem}-{self._path_key(path)}-{state_key}.pkl"
+
+    def get(self, path: Path, loader_id: str = "") -> Optional[pd.DataFrame]:
+        entry = self.entry(path, loader_id)
+        if not entry.exists():
+            return None
+        try:
+            with open(entry, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache ilegible {entry.name}: {e} - se vuelve a parsear")
+            return None
+
+    def put(self, path: Path, df: pd.DataFrame, loader_id: str = ""):
+        """Guardar (escritura atómica) y borrar entradas viejas del mismo archivo"""
+        entry = self.entry(path, loader_id)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, 'wb') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, entry)
+        for stale in self.root.glob(f"{Path(path).stem}-{self._path_key(path)}-*.pkl"):
+            if stale != entry:
+                stale.unlink(missing_ok=True)
+
+    def clear(self):
+        for entry in self.root.glob("*.pkl"):
+            entry.unlink()
+
+
+def load_source(source: SourceFile, cache: Optional[SourceCache] = None) -> Tuple[pd.DataFrame, SourceTiming]:
+    """Cargar una fuente (de cache si su archivo no cambió)"""
+    start = time.perf_counter()
+    df, status = None, 'off'
+    if cache is not None:
+        loader_id = loader_identity(source.loader)
+        df = cache.get(source.path, loader_id)
+        status = 'hit' if df is not None else 'miss'
+    if df is None:
+        df = source.loader(source.path)
+        if cache is not None and len(df) > 0:
+            cache.put(source.path, df, loader_id)
+        elif cache is not None:
+            logger.warning(f"⚠️ {source.key}: parser devolvió 0 filas - no se guarda en cache")
+    return df, SourceTiming(source.key, time.perf_counter() - start, len(df), status)
+
+
+def load_sources(sources: List[SourceFile], cache: Optional[SourceCache] = None,
+                 max_workers: int = MAX_WORKERS) -> Tuple[Dict[str, pd.DataFrame], List[SourceTiming]]:
+    """
+    Cargar las fuentes existentes en paralelo
+
+    Fuentes opcionales sin archivo se omiten; una requerida sin archivo
+    levanta FileNotFoundError antes de leer nada. Los datasets quedan en el
+    orden de ``sources``.
+    """
+    missing = [s for s in sources if s.required and not s.path.exists()]
+    if missing:
+        raise FileNotFoundError(f"Fuentes críticas no encontradas: {[str(s.path) for s in missing]}")
+    present = [s for s in sources if s.path.exists()]
+    for source in sources:
+        if not source.path.exists():
+            logger.warning(f"⚠️ {source.key}: {source.path} no encontrado - se omite")
+
+    if not present:
+        return {}, []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(present)))) as pool:
+        results = list(pool.map(lambda source: load_source(source, cache), present))
+
+    datasets = {source.key: df for source, (df, _) in zip(present, results)}
+    return datasets, [timing for _, timing in results]
+
+
+def log_timings(timings: List[SourceTiming], wall_seconds: float):
+    """Tiempo por fuente y total de pared"""
+    for timing in timings:
+        logger.info(f"✅ {timing.key:<14}{timing.rows:>7} registros {timing.seconds*1000:>8.1f} ms ({timing.cache})")
+    hits = sum(timing.cache == 'hit' for timing in timings)
+    logger.info(f"⏱️ {len(timings)} fuentes en {wall_seconds*1000:.1f} ms "
+                f"(suma por fuente {sum(t.seconds for t in timings)*1000:.1f} ms, cache {hits}/{len(timings)})")
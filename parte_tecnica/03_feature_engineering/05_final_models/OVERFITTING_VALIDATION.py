@@ -4,24 +4,44 @@ VALIDACIÓN DE OVERFITTING - MODELO LME
 Análisis riguroso para detectar sobreajuste en el modelo de dos etapas
 """
 
-import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import Ridge, LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
 from sklearn.model_selection import TimeSeriesSplit, cross_val_score
 from sklearn.metrics import mean_absolute_percentage_error, r2_score
 import matplotlib.pyplot as plt
 import joblib
 import warnings
+import sys
+from functools import partial
+from pathlib import Path
+
+from bootstrap import (default_block_size, importance_replicate, learning_curve_replicate,
+                       percentile_ci, run_replicates)
+from preprocessing_cache import get_default_cache, preprocess
+from walk_forward import ModelSpec, origins_from_splits, walk_forward
+
+# Feature store columnar (03_feature_engineering/feature_store.py)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import load_features
 warnings.filterwarnings('ignore')
 
+# Réplicas bootstrap de los tests 3 y 4 (las del test 4 original); --n-bootstrap N en main
+N_BOOTSTRAP = 10
+
 class OverfittingValidator:
     """Validador de overfitting para modelo LME"""
     
-    def __init__(self):
+    def __init__(self, use_preprocessing_cache: bool = False):
         self.results = {}
+        # Opt-in (--preprocessing-cache): en una corrida fría el hash cuesta más que el ajuste
+        self.preprocessing_cache = get_default_cache() if use_preprocessing_cache else None
+    
+    def _preprocess(self, X_train, X_test):
+        """Imputer + scaler sobre train (del cache por contenido + split si está activo)"""
+        if self.preprocessing_cache is None:
+            return preprocess(X_train, X_test)
+        return self.preprocessing_cache.fit_transform(X_train, X_test)
         
     def load_data(self):
         """Cargar datos para validación"""
@@ -29,13 +49,9 @@ class OverfittingValidator:
         print("📊 CARGANDO DATOS PARA VALIDACIÓN OVERFITTING")
         print("="*70)
         
-        # Cargar features dataset
-        features_path = "outputs/features_dataset_latest.csv"
-        df = pd.read_csv(features_path, index_col=0, parse_dates=True)
-        df.index.name = 'date'
-        
-        # Filtrar 2025
-        df_2025 = df[df.index >= '2025-01-01'].copy()
+        # Cargar features 2025 (predicado de fecha sobre el feature store)
+        df_2025 = load_features(start='2025-01-01')
+        df_2025.index.name = 'date'
         print(f"✓ Datos 2025: {len(df_2025)} observaciones")
         
         # Agregar precio LME base si no existe
@@ -132,15 +148,9 @@ class OverfittingValidator:
                 mape_test = np.mean(np.abs((y_test_aligned - y_pred_test_aligned) / y_test_aligned)) * 100
                 
             else:
-                # Imputar y escalar
-                imputer = SimpleImputer(strategy='mean')
-                scaler = StandardScaler()
-                
-                X_train_imp = imputer.fit_transform(X_train)
-                X_test_imp = imputer.transform(X_test)
-                
-                X_train_scaled = scaler.fit_transform(X_train_imp)
-                X_test_scaled = scaler.transform(X_test_imp)
+                # Imputar y escalar (mismo split para todos los modelos: cache si está activo)
+                split = self._preprocess(X_train, X_test)
+                X_train_scaled, X_test_scaled = split.X_train, split.X_test
                 
                 # Entrenar
                 model.fit(X_train_scaled, y_train)
@@ -167,8 +177,8 @@ class OverfittingValidator:
         self.results['baseline_comparison'] = results
         return results
     
-    def test_cross_validation(self, X, y):
-        """Test 2: Cross-validation temporal"""
+    def test_cross_validation(self, X, y, max_workers=None):
+        """Test 2: Cross-validation temporal (motor walk-forward, folds x modelos en paralelo)"""
         
         print("\n🔍 TEST 2: CROSS-VALIDATION TEMPORAL")
         print("="*50)
@@ -182,76 +192,62 @@ class OverfittingValidator:
             print("⚠️ Datos insuficientes para CV")
             return {}
         
-        # Time Series Cross-Validation
-        tscv = TimeSeriesSplit(n_splits=5)
-        
-        models = {
-            'linear': LinearRegression(),
-            'ridge': Ridge(alpha=1.0),
-            'rf_current': RandomForestRegressor(n_estimators=100, max_depth=5, random_state=42),
-        }
+        # Mismos folds que TimeSeriesSplit; imputer + scaler ajustados una vez por fold
+        origins = origins_from_splits(TimeSeriesSplit(n_splits=5).split(X_valid))
+        models = [
+            ModelSpec('linear', LinearRegression),
+            ModelSpec('ridge', partial(Ridge, alpha=1.0)),
+            ModelSpec('rf_current', partial(RandomForestRegressor, n_estimators=100, max_depth=5, random_state=42)),
+        ]
+        table = walk_forward(X_valid, y_valid, models, origins, max_workers=max_workers,
+                             cache=self.preprocessing_cache)
         
         results = {}
         
-        for name, model in models.items():
-            print(f"\n📊 Evaluando {name}:")
-            
-            # Preparar pipeline
-            imputer = SimpleImputer(strategy='mean')
-            scaler = StandardScaler()
+        for spec in models:
+            print(f"\n📊 Evaluando {spec.name}:")
+            folds = table[table['model'] == spec.name]
+            for fold in folds.itertuples():
+                if fold.error:
+                    print(f"  Fold {fold.fold+1}: ❌ {fold.error}")
+                else:
+                    print(f"  Fold {fold.fold+1}: Train {fold.mape_train:.2f}% | Test {fold.mape_test:.2f}%")
             
-            cv_scores = []
-            train_scores = []
-            
-            for fold, (train_idx, test_idx) in enumerate(tscv.split(X_valid)):
-                X_train_fold = X_valid.iloc[train_idx]
-                X_test_fold = X_valid.iloc[test_idx]
-                y_train_fold = y_valid.iloc[train_idx]
-                y_test_fold = y_valid.iloc[test_idx]
-                
-                # Procesar
-                X_train_imp = imputer.fit_transform(X_train_fold)
-                X_test_imp = imputer.transform(X_test_fold)
-                
-                X_train_scaled = scaler.fit_transform(X_train_imp)
-                X_test_scaled = scaler.transform(X_test_imp)
-                
-                # Entrenar y evaluar
-                model.fit(X_train_scaled, y_train_fold)
-                
-                y_pred_train = model.predict(X_train_scaled)
-                y_pred_test = model.predict(X_test_scaled)
-                
-                mape_train = np.mean(np.abs((y_train_fold - y_pred_train) / y_train_fold)) * 100
-                mape_test = np.mean(np.abs((y_test_fold - y_pred_test) / y_test_fold)) * 100
-                
-                train_scores.append(mape_train)
-                cv_scores.append(mape_test)
-                
-                print(f"  Fold {fold+1}: Train {mape_train:.2f}% | Test {mape_test:.2f}%")
+            # Folds con error no entran al promedio; se reportan aparte
+            ok = folds[folds['error'].isna()]
+            failed_folds = len(folds) - len(ok)
+            if ok.empty:
+                print(f"  ❌ Todos los folds fallaron ({failed_folds})")
+                results[spec.name] = {'failed_folds': failed_folds, 'folds': 0}
+                continue
             
+            train_scores = ok['mape_train'].tolist()
+            cv_scores = ok['mape_test'].tolist()
             mean_train = np.mean(train_scores)
             mean_cv = np.mean(cv_scores)
             std_cv = np.std(cv_scores)
             gap = mean_cv - mean_train
             
-            results[name] = {
+            results[spec.name] = {
                 'mean_train': mean_train,
                 'mean_cv': mean_cv,
                 'std_cv': std_cv,
                 'overfitting_gap': gap,
                 'is_stable': std_cv < 1.0,  # Baja variabilidad
-                'is_overfitting': gap > 2.0
+                'is_overfitting': gap > 2.0,
+                'folds': len(ok),
+                'failed_folds': failed_folds
             }
             
-            print(f"  📊 Promedio: Train {mean_train:.2f}% | CV {mean_cv:.2f}% ± {std_cv:.2f}% | Gap {gap:+.2f}%")
+            failed_note = f" | ⚠️ {failed_folds} folds con error" if failed_folds else ""
+            print(f"  📊 Promedio ({len(ok)} folds): Train {mean_train:.2f}% | CV {mean_cv:.2f}% ± {std_cv:.2f}% | Gap {gap:+.2f}%{failed_note}")
             print(f"  ✅ Estable: {'Sí' if std_cv < 1.0 else 'No'} | Overfitting: {'⚠️ Sí' if gap > 2.0 else '✅ No'}")
         
         self.results['cross_validation'] = results
         return results
     
-    def test_learning_curves(self, X, y):
-        """Test 3: Curvas de aprendizaje"""
+    def test_learning_curves(self, X, y, n_bootstrap=N_BOOTSTRAP, block_size=None, max_workers=None):
+        """Test 3: Curvas de aprendizaje (tamaños en paralelo, IC 95% por block bootstrap)"""
         
         print("\n🔍 TEST 3: CURVAS DE APRENDIZAJE")
         print("="*50)
@@ -268,49 +264,29 @@ class OverfittingValidator:
         y_train = y_valid[y_valid.index < split_date]
         y_test = y_valid[y_valid.index >= split_date]
         
-        # Preparar datos
-        imputer = SimpleImputer(strategy='mean')
-        scaler = StandardScaler()
-        
-        X_train_imp = imputer.fit_transform(X_train)
-        X_test_imp = imputer.transform(X_test)
-        
-        X_train_scaled = scaler.fit_transform(X_train_imp)
-        X_test_scaled = scaler.transform(X_test_imp)
+        # Preparar datos (mismo split que el test 1: cache si está activo)
+        split = self._preprocess(X_train, X_test)
+        X_train_scaled, X_test_scaled = split.X_train, split.X_test
         
-        # Diferentes tamaños de muestra
+        # Diferentes tamaños de muestra (últimos n_samples, mínimo 20)
         train_sizes = np.linspace(0.3, 1.0, 8)
-        
-        model = RandomForestRegressor(n_estimators=100, max_depth=5, random_state=42)
-        
-        train_scores = []
-        test_scores = []
-        sample_sizes = []
-        
-        for size in train_sizes:
-            n_samples = int(len(X_train_scaled) * size)
-            if n_samples < 20:
-                continue
-                
-            # Muestra temporal (últimos n_samples)
-            X_train_sample = X_train_scaled[-n_samples:]
-            y_train_sample = y_train.iloc[-n_samples:]
-            
-            # Entrenar
-            model.fit(X_train_sample, y_train_sample)
-            
-            # Evaluar
-            y_pred_train = model.predict(X_train_sample)
-            y_pred_test = model.predict(X_test_scaled)
-            
-            mape_train = np.mean(np.abs((y_train_sample - y_pred_train) / y_train_sample)) * 100
-            mape_test = np.mean(np.abs((y_test - y_pred_test) / y_test)) * 100
-            
-            train_scores.append(mape_train)
-            test_scores.append(mape_test)
-            sample_sizes.append(n_samples)
-            
-            print(f"  Samples: {n_samples:3d} | Train: {mape_train:5.2f}% | Test: {mape_test:5.2f}% | Gap: {mape_test-mape_train:+5.2f}%")
+        sample_sizes = [int(len(X_train_scaled) * size) for size in train_sizes]
+        sample_sizes = [n for n in sample_sizes if n >= 20]
+        block_size = block_size or (default_block_size(sample_sizes[0]) if sample_sizes else 1)
+        
+        arrays = {'X_train': X_train_scaled, 'y_train': y_train.to_numpy(dtype=float),
+                  'X_test': X_test_scaled, 'y_test': y_test.to_numpy(dtype=float)}
+        point, replicates = run_replicates(
+            arrays, partial(learning_curve_replicate, sample_sizes=sample_sizes, block_size=block_size),
+            n_bootstrap, include_point=True, max_workers=max_workers, parts=len(sample_sizes)
+        )
+        k = len(sample_sizes)
+        train_scores, test_scores = point[:k].tolist(), point[k:].tolist()
+        ci_low, ci_high = percentile_ci(replicates)
+        
+        for i, n_samples in enumerate(sample_sizes):
+            print(f"  Samples: {n_samples:3d} | Train: {train_scores[i]:5.2f}% | Test: {test_scores[i]:5.2f}% "
+                  f"[{ci_low[k+i]:5.2f}, {ci_high[k+i]:5.2f}] | Gap: {test_scores[i]-train_scores[i]:+5.2f}%")
         
         # Análisis de convergencia
         final_gap = test_scores[-1] - train_scores[-1] if test_scores else 0
@@ -320,13 +296,17 @@ class OverfittingValidator:
             'train_scores': train_scores,
             'test_scores': test_scores,
             'sample_sizes': sample_sizes,
+            'train_ci_95': list(zip(ci_low[:k].tolist(), ci_high[:k].tolist())),
+            'test_ci_95': list(zip(ci_low[k:].tolist(), ci_high[k:].tolist())),
+            'n_bootstrap': n_bootstrap,
+            'block_size': block_size,
             'final_gap': final_gap,
             'gap_trend': gap_trend,
             'is_converging': gap_trend < 0,  # Gap decreasing
             'is_overfitting': final_gap > 2.0
         }
         
-        print(f"\n📊 ANÁLISIS:")
+        print(f"\n📊 ANÁLISIS ({n_bootstrap} réplicas, bloques de {block_size} días):")
         print(f"  Gap final: {final_gap:+.2f}%")
         print(f"  Tendencia gap: {gap_trend:+.4f}% por muestra")
         print(f"  ✅ Convergiendo: {'Sí' if gap_trend < 0 else 'No'}")
@@ -335,8 +315,8 @@ class OverfittingValidator:
         self.results['learning_curves'] = results
         return results
     
-    def test_feature_importance_stability(self, X, y):
-        """Test 4: Estabilidad de feature importance"""
+    def test_feature_importance_stability(self, X, y, n_bootstrap=N_BOOTSTRAP, block_size=None, max_workers=None):
+        """Test 4: Estabilidad de feature importance (block bootstrap en paralelo, IC 95%)"""
         
         print("\n🔍 TEST 4: ESTABILIDAD FEATURE IMPORTANCE")
         print("="*50)
@@ -345,50 +325,34 @@ class OverfittingValidator:
         valid_mask = y.notna()
         X_valid = X[valid_mask]
         y_valid = y[valid_mask]
+        block_size = block_size or default_block_size(len(X_valid))
         
-        # Multiple bootstrap samples
-        n_bootstrap = 10
-        feature_importances = []
-        
-        for i in range(n_bootstrap):
-            # Bootstrap sample
-            n_samples = len(X_valid)
-            bootstrap_idx = np.random.choice(n_samples, n_samples, replace=True)
-            
-            X_boot = X_valid.iloc[bootstrap_idx]
-            y_boot = y_valid.iloc[bootstrap_idx]
-            
-            # Preparar
-            imputer = SimpleImputer(strategy='mean')
-            scaler = StandardScaler()
-            
-            X_boot_imp = imputer.fit_transform(X_boot)
-            X_boot_scaled = scaler.fit_transform(X_boot_imp)
-            
-            # Entrenar
-            model = RandomForestRegressor(n_estimators=100, max_depth=5, random_state=i)
-            model.fit(X_boot_scaled, y_boot)
-            
-            feature_importances.append(model.feature_importances_)
-            
-            print(f"  Bootstrap {i+1}: {dict(zip(X.columns, model.feature_importances_))}")
+        # Réplicas por bloques de días contiguos; X/y en memoria compartida
+        arrays = {'X': X_valid.to_numpy(dtype=float), 'y': y_valid.to_numpy(dtype=float)}
+        _, importances_array = run_replicates(
+            arrays, partial(importance_replicate, block_size=block_size), n_bootstrap, max_workers=max_workers
+        )
         
         # Análisis estabilidad
-        importances_array = np.array(feature_importances)
         mean_importance = np.mean(importances_array, axis=0)
         std_importance = np.std(importances_array, axis=0)
         cv_importance = std_importance / (mean_importance + 1e-8)  # Coefficient of variation
+        ci_low, ci_high = percentile_ci(importances_array)
         
         results = {
             'mean_importance': dict(zip(X.columns, mean_importance)),
             'std_importance': dict(zip(X.columns, std_importance)),
             'cv_importance': dict(zip(X.columns, cv_importance)),
+            'ci_95_importance': dict(zip(X.columns, zip(ci_low.tolist(), ci_high.tolist()))),
+            'n_bootstrap': n_bootstrap,
+            'block_size': block_size,
             'is_stable': np.all(cv_importance < 0.3)  # CV < 30%
         }
         
-        print(f"\n📊 ESTABILIDAD:")
+        print(f"\n📊 ESTABILIDAD ({n_bootstrap} réplicas, bloques de {block_size} días):")
         for i, feature in enumerate(X.columns):
-            print(f"  {feature:20}: {mean_importance[i]:.3f} ± {std_importance[i]:.3f} (CV: {cv_importance[i]:.2f})")
+            print(f"  {feature:20}: {mean_importance[i]:.3f} ± {std_importance[i]:.3f} "
+                  f"IC95 [{ci_low[i]:.3f}, {ci_high[i]:.3f}] (CV: {cv_importance[i]:.2f})")
         
         print(f"\n✅ Features estables: {'Sí' if np.all(cv_importance < 0.3) else 'No'}")
         
@@ -427,9 +391,12 @@ class OverfittingValidator:
             cv_res = self.results['cross_validation']
             rf_cv = cv_res.get('rf_current', {})
             
-            if rf_cv:
+            if rf_cv.get('folds'):
                 evidence['cv_stable'] = rf_cv['is_stable'] and not rf_cv['is_overfitting']
                 print(f"✅ CV estable: {rf_cv['is_stable']} | Sin overfitting: {not rf_cv['is_overfitting']}")
+            elif rf_cv:
+                evidence['cv_stable'] = False
+                print(f"❌ CV sin folds válidos ({rf_cv['failed_folds']} con error)")
         
         # Test 3: Learning curves
         if 'learning_curves' in self.results:
@@ -487,8 +454,10 @@ def main():
     print("🔍 VALIDACIÓN COMPLETA DE OVERFITTING - MODELO LME")
     print("="*80)
     
-    # Crear validador
-    validator = OverfittingValidator()
+    # Crear validador (--preprocessing-cache reusa imputer/scaler entre corridas repetidas)
+    validator = OverfittingValidator(use_preprocessing_cache='--preprocessing-cache' in sys.argv)
+    # --n-bootstrap N: más réplicas para IC 95% más finos (p.ej. 1000, ver benchmark_bootstrap.py)
+    n_bootstrap = int(sys.argv[sys.argv.index('--n-bootstrap') + 1]) if '--n-bootstrap' in sys.argv else N_BOOTSTRAP
     
     # Cargar datos
     df = validator.load_data()
@@ -497,8 +466,8 @@ def main():
     # Ejecutar tests
     validator.test_simple_baseline(X, y)
     validator.test_cross_validation(X, y)
-    validator.test_learning_curves(X, y)
-    validator.test_feature_importance_stability(X, y)
+    validator.test_learning_curves(X, y, n_bootstrap=n_bootstrap)
+    validator.test_feature_importance_stability(X, y, n_bootstrap=n_bootstrap)
     
     # Reporte final
     assessment = validator.generate_report()
@@ -509,6 +478,8 @@ def main():
         json.dump(validator.results, f, indent=2, default=str)
     
     print(f"\n📁 Reporte guardado: outputs/overfitting_validation_report.json")
+    if validator.preprocessing_cache is not None:
+        print(validator.preprocessing_cache.summary())
     
     return assessment
 
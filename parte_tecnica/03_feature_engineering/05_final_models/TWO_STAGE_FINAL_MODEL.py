@@ -16,12 +16,36 @@ import joblib
 import json
 from datetime import datetime
 import warnings
+import sys
+import time
+from pathlib import Path
+
+# Feature store columnar (03_feature_engineering/feature_store.py)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import load_features
+# Sets versionados del registro de features (03_comprehensive_analysis/feature_definitions.py)
+sys.path.append(str(Path(__file__).resolve().parents[1] / "03_comprehensive_analysis"))
+from feature_definitions import get_feature_set
+from preprocessing_cache import get_default_cache, preprocess
+from walk_forward import ModelSpec, make_origins, summarize, walk_forward
+from incremental_update import (FORGETTING_FACTOR, LME_TREES_PER_UPDATE, LME_WINDOW, STATE_FILENAME,
+                                IncrementalState, RecursiveLeastSquares, load_state, observed_counts,
+                                refresh_forest, save_state, update_mean_imputer)
+# Árboles aplanados compartidos con la API (parte_tecnica/shared)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.forest_plan import compile_forest, predict_forest, predict_forest_batch
 warnings.filterwarnings('ignore')
 
 class TwoStageRebarModel:
     """Modelo de dos etapas para predicción de precio varilla México"""
     
-    def __init__(self):
+    # Sets de features fijados (nombre, versión); el pipeline los publica
+    LME_FEATURE_SET = ('two_stage_lme', 1)
+    PREMIUM_FEATURE_SET = ('two_stage_premium', 1)
+    
+    DEFAULT_FX_RATE = 19.0  # USD/MXN si no hay usdmxn (o es NaN)
+    
+    def __init__(self, use_preprocessing_cache: bool = False):
         # Modelos
         self.lme_model = None
         self.premium_model = None
@@ -29,6 +53,13 @@ class TwoStageRebarModel:
         self.premium_scaler = StandardScaler()
         self.lme_imputer = SimpleImputer(strategy='mean')
         self.premium_imputer = SimpleImputer(strategy='mean')
+        self._plan = None  # Plan de inferencia NumPy (compile_inference_plan)
+        # Opt-in (--preprocessing-cache): en una corrida fría el hash cuesta más que el ajuste
+        self.preprocessing_cache = get_default_cache() if use_preprocessing_cache else None
+        self.lme_feature_set = get_feature_set(*self.LME_FEATURE_SET)
+        self.premium_feature_set = get_feature_set(*self.PREMIUM_FEATURE_SET)
+        self._train_frames = {}  # (X_train, y_train) por etapa, para start_incremental
+        self.incremental = None  # IncrementalState (start_incremental / update_incremental)
         
         # Datos validados de premium
         self.validated_premiums = {
@@ -42,18 +73,13 @@ class TwoStageRebarModel:
         print("📊 CARGANDO DATOS PARA MODELO DOS ETAPAS")
         print("="*60)
         
-        # Cargar features dataset - ruta corregida
-        features_path = "../outputs/features_dataset_latest.csv"
-        df = pd.read_csv(features_path, index_col=0, parse_dates=True)
-        df.index.name = 'date'
+        # Cargar features 2025 - el feature store sólo lee la partición 2025
+        df_2025 = load_features(start='2025-01-01')
+        df_2025.index.name = 'date'
         
-        print(f"✓ Dataset cargado: {len(df)} registros")
-        print(f"✓ Período: {df.index.min()} a {df.index.max()}")
-        print(f"✓ Columnas: {len(df.columns)}")
-        
-        # Filtrar 2025
-        df_2025 = df[df.index >= '2025-01-01'].copy()
         print(f"✓ Datos 2025: {len(df_2025)} observaciones")
+        print(f"✓ Período: {df_2025.index.min()} a {df_2025.index.max()}")
+        print(f"✓ Columnas: {len(df_2025.columns)}")
         
         # Agregar precio LME base si no existe
         if 'lme_sr_m01' not in df_2025.columns:
@@ -68,23 +94,16 @@ class TwoStageRebarModel:
         print("\n🌍 PREPARANDO FEATURES GLOBALES (LME)")
         print("-"*40)
         
-        # Solo variables que afectan mercado global de acero
-        lme_features = [
-            'lme_sr_m01_lag1',           # Precio anterior (AR)
-            'lme_volatility_5d',         # Volatilidad corto plazo
-            'lme_momentum_5d',           # Momentum corto
-            'rebar_scrap_spread_norm',   # Spread normalizado
-        ]
-        
-        # Agregar más lags si están disponibles
-        for lag in [2, 3, 5]:
-            lag_col = f'lme_sr_m01_lag{lag}'
-            if lag_col in df.columns:
-                lme_features.append(lag_col)
-        
-        # Filtrar features disponibles
+        # Solo variables que afectan mercado global de acero: lags (AR),
+        # volatilidad y momentum corto plazo, spread normalizado
+        lme_features = list(self.lme_feature_set.features)
+        
+        # Filtrar features disponibles (un dataset anterior al set puede no tenerlos)
         available_lme = [f for f in lme_features if f in df.columns]
-        print(f"✓ Features LME disponibles: {len(available_lme)}")
+        missing = [f for f in lme_features if f not in df.columns]
+        print(f"✓ Features LME disponibles ({self.lme_feature_set.key}): {len(available_lme)}")
+        if missing:
+            print(f"⚠️ Faltan en el dataset (regenerar features): {missing}")
         for f in available_lme:
             print(f"  - {f}")
         
@@ -99,29 +118,19 @@ class TwoStageRebarModel:
         print("\n🇲🇽 PREPARANDO FEATURES MEXICANAS (PREMIUM)")
         print("-"*40)
         
-        # Solo variables locales que afectan premium MX/LME
-        premium_features = [
-            # FX Risk
-            'usdmxn_lag1',              # FX lag1
-            
-            # Tasas de interés
-            'real_interest_rate',       # Tasa real
-            
-            # Incertidumbre
-            'uncertainty_indicator',     # EPU proxy
-        ]
-        
-        # Crear features adicionales
+        # Solo variables locales que afectan premium MX/LME: FX lag1, tasa
+        # real, incertidumbre (EPU proxy) y calendario (aranceles, temporada)
+        premium_features = list(self.premium_feature_set.features)
+        
+        # Calendario derivado del índice (datasets anteriores al set no lo traen)
         df['post_tariff'] = (df.index >= '2025-04-01').astype(int)
         df['construction_season'] = df.index.month.isin([3,4,5,9,10,11]).astype(int)
         df['month'] = df.index.month
         df['quarter'] = df.index.quarter
         
-        premium_features.extend(['post_tariff', 'construction_season', 'month'])
-        
         # Filtrar disponibles
         available_premium = [f for f in premium_features if f in df.columns]
-        print(f"✓ Features premium disponibles: {len(available_premium)}")
+        print(f"✓ Features premium disponibles ({self.premium_feature_set.key}): {len(available_premium)}")
         for f in available_premium:
             print(f"  - {f}")
         
@@ -134,6 +143,26 @@ class TwoStageRebarModel:
         
         return df[available_premium], df['premium_target']
     
+    @staticmethod
+    def make_lme_regressor():
+        """Regresor de la etapa LME (sin entrenar)"""
+        return RandomForestRegressor(
+            n_estimators=100,
+            max_depth=5,
+            random_state=42
+        )
+    
+    @staticmethod
+    def make_premium_regressor():
+        """Regresor de la etapa premium (sin entrenar)"""
+        return Ridge(alpha=1.0)
+    
+    def _preprocess(self, X_train, X_test, feature_set):
+        """Imputer + scaler sobre train (del cache por contenido + split si está activo)"""
+        if self.preprocessing_cache is None:
+            return preprocess(X_train, X_test)
+        return self.preprocessing_cache.fit_transform(X_train, X_test, feature_set=feature_set)
+    
     def train_lme_model(self, X_lme, y_lme):
         """Entrenar modelo LME (Etapa 1)"""
         
@@ -159,20 +188,15 @@ class TwoStageRebarModel:
         print(f"Train: {len(X_train)}, Test: {len(X_test)}")
         
         # Imputar y escalar
-        X_train_imp = self.lme_imputer.fit_transform(X_train)
-        X_test_imp = self.lme_imputer.transform(X_test)
-        
-        X_train_scaled = self.lme_scaler.fit_transform(X_train_imp)
-        X_test_scaled = self.lme_scaler.transform(X_test_imp)
+        split = self._preprocess(X_train, X_test, self.lme_feature_set.key)
+        self.lme_imputer, self.lme_scaler = split.imputer, split.scaler
+        X_train_scaled, X_test_scaled = split.X_train, split.X_test
         
         # Entrenar Random Forest
-        self.lme_model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=5,
-            random_state=42
-        )
-        
+        self.lme_model = self.make_lme_regressor()
         self.lme_model.fit(X_train_scaled, y_train)
+        self._plan = None
+        self._train_frames['lme'] = (X_train, y_train)
         
         # Evaluar
         y_pred_train = self.lme_model.predict(X_train_scaled)
@@ -223,15 +247,15 @@ class TwoStageRebarModel:
         print(f"Train: {len(X_train)}, Test: {len(X_test)}")
         
         # Imputar y escalar
-        X_train_imp = self.premium_imputer.fit_transform(X_train)
-        X_test_imp = self.premium_imputer.transform(X_test)
-        
-        X_train_scaled = self.premium_scaler.fit_transform(X_train_imp)
-        X_test_scaled = self.premium_scaler.transform(X_test_imp)
+        split = self._preprocess(X_train, X_test, self.premium_feature_set.key)
+        self.premium_imputer, self.premium_scaler = split.imputer, split.scaler
+        X_train_scaled, X_test_scaled = split.X_train, split.X_test
         
         # Entrenar Ridge (más estable para pocas observaciones)
-        self.premium_model = Ridge(alpha=1.0)
+        self.premium_model = self.make_premium_regressor()
         self.premium_model.fit(X_train_scaled, y_train)
+        self._plan = None
+        self._train_frames['premium'] = (X_train, y_train)
         
         # Evaluar
         y_pred_train = self.premium_model.predict(X_train_scaled)
@@ -261,35 +285,237 @@ class TwoStageRebarModel:
         print(f"\n✅ Modelo Premium entrenado exitosamente")
         return True
     
+    def walk_forward_backtest(self, X, y, stage='lme', n_origins=250, window='expanding',
+                              min_train=60, train_size=None, max_workers=None, results_path=None):
+        """
+        Backtest walk-forward de una etapa (en vez del split único 2025-08-01)
+        
+        Un origen por día (horizonte t+1) con los mismos imputer/scaler/regresor
+        que train_*; los folds corren en paralelo (ver walk_forward.py).
+        """
+        factory = {'lme': self.make_lme_regressor, 'premium': self.make_premium_regressor}[stage]
+        
+        print(f"\n🔁 WALK-FORWARD {stage.upper()} ({window})")
+        print("="*50)
+        
+        valid_mask = y.notna()
+        X_valid = X[valid_mask]
+        y_valid = y[valid_mask]
+        
+        origins = make_origins(len(X_valid), n_origins=n_origins, window=window,
+                               min_train=min_train, train_size=train_size)
+        table = walk_forward(X_valid, y_valid, [ModelSpec(stage, factory)], origins,
+                             max_workers=max_workers, results_path=results_path,
+                             cache=self.preprocessing_cache)
+        
+        for name, row in summarize(table).iterrows():
+            print(f"{name}: {int(row['folds'])} orígenes | Train {row['mean_train']:.2f}% | "
+                  f"Test {row['mean_test']:.2f}% ± {row['std_test']:.2f}% | Gap {row['overfitting_gap']:+.2f}%")
+        return table
+    
+    def start_incremental(self, forgetting=FORGETTING_FACTOR, trees_per_update=LME_TREES_PER_UPDATE,
+                          window=LME_WINDOW):
+        """
+        Preparar el modo incremental a partir del último entrenamiento
+        
+        Inicializa el RLS del premium con la solución exacta del Ridge, los
+        conteos de los imputers y la ventana LME (ver incremental_update.py).
+        """
+        if set(self._train_frames) != {'lme', 'premium'}:
+            raise ValueError("Entrenar ambas etapas (train_lme_model / train_premium_model) antes de start_incremental")
+        X_lme, y_lme = self._train_frames['lme']
+        X_premium, _ = self._train_frames['premium']
+        
+        rls = RecursiveLeastSquares.from_ridge(self.premium_model, self.premium_scaler,
+                                               self.premium_imputer.transform(X_premium), forgetting)
+        self.incremental = IncrementalState(rls, observed_counts(X_lme), observed_counts(X_premium),
+                                            X_lme, y_lme, trees_per_update, window)
+        print(f"\n🔄 Modo incremental listo: RLS premium (λ={forgetting}), "
+              f"{trees_per_update} árboles LME nuevos por actualización (ventana {window} filas)")
+        return self.incremental
+    
+    def update_incremental(self, X_lme_new, y_lme_new, X_premium_new, y_premium_new):
+        """
+        Actualización diaria sin re-entrenar: una o más filas nuevas por etapa
+        
+        Premium: imputer/scaler en streaming + un paso RLS O(features²) por
+        fila. LME: imputer en streaming + bosque rodante (trees_per_update
+        árboles nuevos sobre la ventana reciente). Filas sin target se ignoran.
+        """
+        if self.incremental is None:
+            raise ValueError("Modo incremental no iniciado: llamar start_incremental() o cargar un modelo que lo tenga")
+        state = self.incremental
+        start = time.perf_counter()
+        
+        # Etapa 2: premium (imputer + scaler en streaming, RLS)
+        premium_rows = y_premium_new.notna()
+        if premium_rows.any():
+            X_new = X_premium_new[premium_rows]
+            state.premium_counts = update_mean_imputer(self.premium_imputer, state.premium_counts, X_new)
+            X_imputed = self.premium_imputer.transform(X_new)
+            self.premium_scaler.partial_fit(X_imputed)
+            for x, y in zip(X_imputed, y_premium_new[premium_rows].to_numpy(dtype=np.float64)):
+                state.premium_rls.update(x, y)
+            self.premium_model.coef_, self.premium_model.intercept_ = \
+                state.premium_rls.scaled_coefficients(self.premium_scaler)
+        
+        # Etapa 1: LME (imputer en streaming, scaler fijo, bosque rodante)
+        lme_rows = y_lme_new.notna()
+        if lme_rows.any():
+            state.lme_counts = update_mean_imputer(self.lme_imputer, state.lme_counts, X_lme_new[lme_rows])
+            state.push_lme(X_lme_new[lme_rows], y_lme_new[lme_rows])
+            X_window = self.lme_scaler.transform(self.lme_imputer.transform(state.lme_window_X))
+            refresh_forest(self.lme_model, X_window, state.lme_window_y.to_numpy(),
+                           state.trees_per_update, random_state=42 + state.n_updates)
+            state.last_date = X_lme_new[lme_rows].index[-1]
+        
+        self._plan = None
+        state.n_updates += 1
+        print(f"🔄 Actualización incremental #{state.n_updates}: premium {int(premium_rows.sum())} filas "
+              f"(RLS λ={state.premium_rls.forgetting}), LME {int(lme_rows.sum())} filas "
+              f"({state.trees_per_update}/{len(self.lme_model.estimators_)} árboles nuevos) "
+              f"en {(time.perf_counter() - start)*1000:.1f} ms")
+        return True
+    
+    def compile_inference_plan(self):
+        """
+        Compilar plan de inferencia NumPy para predicción de una fila
+        
+        Fija el orden de features por etapa (el del entrenamiento) y copia
+        medias del imputer y parámetros del scaler a arrays. Evita construir
+        DataFrames en cada llamada. El plan es de sólo lectura: la fila de
+        entrada se asigna en cada llamada, así que varios threads (la API)
+        pueden predecir a la vez.
+        """
+        self._plan = {}
+        stages = {
+            'lme': (self.lme_imputer, self.lme_scaler, self.lme_model),
+            'premium': (self.premium_imputer, self.premium_scaler, self.premium_model)
+        }
+        for stage, (imputer, scaler, model) in stages.items():
+            features = tuple(imputer.feature_names_in_)
+            self._plan[stage] = {
+                'features': features,
+                'fill': np.asarray(imputer.statistics_, dtype=np.float64),
+                'mean': np.asarray(scaler.mean_, dtype=np.float64),
+                'scale': np.asarray(scaler.scale_, dtype=np.float64),
+                'model': model,
+                # RandomForest: árboles aplanados en arrays (n_trees x n_nodes); otro modelo → None
+                'forest': compile_forest(model),
+                # Ridge: producto punto directo
+                'coef': getattr(model, 'coef_', None),
+                'intercept': getattr(model, 'intercept_', None)
+            }
+        return self._plan
+    
+    def _run_stage(self, stage, features_dict):
+        """Evaluar una etapa sobre una fila propia de esta llamada (thread-safe)"""
+        plan = self._plan[stage]
+        row = np.empty((1, len(plan['features'])), dtype=np.float64)
+        for j, feature in enumerate(plan['features']):
+            value = features_dict.get(feature)
+            row[0, j] = np.nan if value is None else value
+        
+        np.copyto(row, plan['fill'], where=np.isnan(row))
+        row -= plan['mean']
+        row /= plan['scale']
+        
+        if plan['forest'] is not None:
+            return predict_forest(plan['forest'], row)
+        if plan['coef'] is not None:
+            return (row @ plan['coef'])[0] + plan['intercept']
+        return plan['model'].predict(row)[0]
+    
     def predict_full_price(self, features_dict):
-        """Predicción completa: LME → Premium → MXN"""
+        """Predicción completa: LME → Premium → MXN (plan NumPy compilado)"""
+        
+        if getattr(self, '_plan', None) is None:
+            self.compile_inference_plan()
         
         # Etapa 1: Predecir LME
-        lme_features = {k: v for k, v in features_dict.items() 
-                       if k.startswith('lme_') or k.startswith('rebar_')}
+        lme_pred = self._run_stage('lme', features_dict)
         
-        lme_df = pd.DataFrame([lme_features])
-        lme_imp = self.lme_imputer.transform(lme_df)
-        lme_scaled = self.lme_scaler.transform(lme_imp)
+        # Etapa 2: Predecir Premium
+        premium_pred = self._run_stage('premium', features_dict)
         
-        lme_pred = self.lme_model.predict(lme_scaled)[0]
+        return self._assemble_prediction(lme_pred, premium_pred, features_dict)
+    
+    def _run_stage_batch(self, stage, df):
+        """Evaluar una etapa sobre N filas (columnas faltantes → imputación)"""
+        plan = self._plan[stage]
+        X = np.column_stack([
+            df[f].to_numpy(dtype=np.float64, na_value=np.nan) if f in df.columns
+            else np.full(len(df), np.nan)
+            for f in plan['features']
+        ])
+        X = np.where(np.isnan(X), plan['fill'], X)
+        X = (X - plan['mean']) / plan['scale']
+        
+        if plan['forest'] is not None:
+            return predict_forest_batch(plan['forest'], X)
+        if plan['coef'] is not None:
+            return X @ plan['coef'] + plan['intercept']
+        return plan['model'].predict(X)
+    
+    def predict_full_price_batch(self, df):
+        """
+        Predicción vectorizada para N filas de features
+        
+        Mismas reglas que predict_full_price (clip premium 1.50-1.80, FX,
+        bandas ±1.96σ, FX por default si falta) aplicadas sobre arrays completos. Si faltan
+        post_tariff / construction_season / month y el índice es de fechas,
+        se derivan del índice como en prepare_premium_features.
+        
+        Returns:
+            DataFrame columnar (mismo índice) sin redondear
+        """
+        if getattr(self, '_plan', None) is None:
+            self.compile_inference_plan()
+        
+        if isinstance(df.index, pd.DatetimeIndex):
+            calendar = {
+                'post_tariff': (df.index >= '2025-04-01').astype(int),
+                'construction_season': df.index.month.isin([3,4,5,9,10,11]).astype(int),
+                'month': df.index.month
+            }
+            missing = {k: v for k, v in calendar.items() if k not in df.columns}
+            if missing:
+                df = df.assign(**missing)
         
-        # Etapa 2: Predecir Premium
-        premium_features = {k: v for k, v in features_dict.items() 
-                           if k in ['usdmxn_lag1', 'real_interest_rate', 'uncertainty_indicator',
-                                   'post_tariff', 'construction_season', 'month']}
+        lme_pred = self._run_stage_batch('lme', df)
+        premium_pred = np.clip(self._run_stage_batch('premium', df), 1.50, 1.80)
         
-        premium_df = pd.DataFrame([premium_features])
-        premium_imp = self.premium_imputer.transform(premium_df)
-        premium_scaled = self.premium_scaler.transform(premium_imp)
+        fx_rate = (df['usdmxn'].to_numpy(dtype=np.float64, na_value=np.nan)
+                   if 'usdmxn' in df.columns else np.full(len(df), np.nan))
+        fx_rate = np.where(np.isnan(fx_rate), self.DEFAULT_FX_RATE, fx_rate)
+        price_usd = lme_pred * premium_pred
         
-        premium_pred = self.premium_model.predict(premium_scaled)[0]
+        premium_std = 0.03  # 3% volatilidad típica
+        price_usd_low = lme_pred * (premium_pred - 1.96*premium_std)
+        price_usd_high = lme_pred * (premium_pred + 1.96*premium_std)
+        
+        return pd.DataFrame({
+            'lme_forecast': lme_pred,
+            'premium_forecast': premium_pred,
+            'price_usd': price_usd,
+            'price_mxn': price_usd * fx_rate,
+            'ci_usd_low': price_usd_low,
+            'ci_usd_high': price_usd_high,
+            'ci_mxn_low': price_usd_low * fx_rate,
+            'ci_mxn_high': price_usd_high * fx_rate,
+            'fx_rate_used': fx_rate
+        }, index=df.index)
+    
+    def _assemble_prediction(self, lme_pred, premium_pred, features_dict):
+        """Premium acotado, precio final e intervalos"""
         
         # Aplicar límites razonables al premium
         premium_pred = np.clip(premium_pred, 1.50, 1.80)
         
         # Precio final
-        fx_rate = features_dict.get('usdmxn', 19.0)
+        fx_rate = features_dict.get('usdmxn')
+        if fx_rate is None or pd.isna(fx_rate):
+            fx_rate = self.DEFAULT_FX_RATE
         price_usd = lme_pred * premium_pred
         price_mxn = price_usd * fx_rate
         
@@ -309,6 +535,31 @@ class TwoStageRebarModel:
             'fx_rate_used': fx_rate
         }
     
+    def load_models(self, path='../outputs/TWO_STAGE_MODEL.pkl'):
+        """Cargar modelos guardados y compilar plan de inferencia"""
+        
+        model_data = joblib.load(path)
+        self.lme_model = model_data['lme_model']
+        self.premium_model = model_data['premium_model']
+        self.lme_scaler = model_data['lme_scaler']
+        self.premium_scaler = model_data['premium_scaler']
+        self.lme_imputer = model_data['lme_imputer']
+        self.premium_imputer = model_data['premium_imputer']
+        self.validated_premiums = model_data.get('validated_premiums', self.validated_premiums)
+        self.metadata = model_data.get('metadata', {})
+        # Estado incremental en archivo aparte (la API nunca lo carga)
+        state_path = Path(path).with_name(STATE_FILENAME)
+        self.incremental = load_state(state_path) if state_path.exists() else None
+        
+        # Sets con que se entrenó: el plan usa el orden del imputer, aquí sólo se avisa
+        trained_sets = self.metadata.get('feature_sets', {})
+        for stage, feature_set in [('lme', self.lme_feature_set), ('premium', self.premium_feature_set)]:
+            if trained_sets.get(stage, feature_set.key) != feature_set.key:
+                print(f"⚠️ Modelo {stage} entrenado con {trained_sets[stage]}, código fija {feature_set.key}")
+        
+        self.compile_inference_plan()
+        return True
+    
     def save_models(self):
         """Guardar modelos entrenados"""
         
@@ -324,19 +575,27 @@ class TwoStageRebarModel:
                 'version': '2.0-two-stage',
                 'trained_date': datetime.now().isoformat(),
                 'architecture': 'LME (global) + Premium (MX local)',
+                'feature_sets': {'lme': self.lme_feature_set.key, 'premium': self.premium_feature_set.key},
                 'data_quality': 'Validated with holiday imputation',
-                'lme_mape_test': self.lme_mape_test if hasattr(self, 'lme_mape_test') else None,
-                'premium_mape_test': self.premium_mape_test if hasattr(self, 'premium_mape_test') else None
+                'lme_mape_test': getattr(self, 'lme_mape_test', getattr(self, 'metadata', {}).get('lme_mape_test')),
+                'premium_mape_test': getattr(self, 'premium_mape_test', getattr(self, 'metadata', {}).get('premium_mape_test')),
+                'incremental_updates': self.incremental.n_updates if self.incremental is not None else None
             }
         }
         
         joblib.dump(model_data, '../outputs/TWO_STAGE_MODEL.pkl')
         print("\n✅ Modelo guardado: ../outputs/TWO_STAGE_MODEL.pkl")
+        if self.incremental is not None:
+            state_path = save_state(self.incremental, f'../outputs/{STATE_FILENAME}')
+            print(f"✅ Estado incremental guardado: {state_path}")
         
         # Ejemplo de predicción
         example_features = {
             # LME features
             'lme_sr_m01_lag1': 540,
+            'lme_sr_m01_lag2': 538,
+            'lme_sr_m01_lag3': 537,
+            'lme_sr_m01_lag5': 535,
             'lme_volatility_5d': 3.5,
             'lme_momentum_5d': 0.01,
             'rebar_scrap_spread_norm': 0.25,
@@ -362,14 +621,44 @@ class TwoStageRebarModel:
         
         return True
 
+def nightly_update(path='../outputs/TWO_STAGE_MODEL.pkl'):
+    """Actualizar el modelo guardado con las observaciones posteriores a su última actualización"""
+    
+    print("🔄 MODELO DOS ETAPAS - ACTUALIZACIÓN INCREMENTAL")
+    print("="*80)
+    
+    model = TwoStageRebarModel()
+    model.load_models(path)
+    if model.incremental is None:
+        print("⚠️ El modelo guardado no tiene estado incremental: re-entrenar con main()")
+        return False
+    
+    df = model.load_data()
+    X_lme, y_lme = model.prepare_lme_features(df)
+    X_premium, y_premium = model.prepare_premium_features(df)
+    
+    # Filas nuevas con ambos targets ya observados (el LME t+1 llega al día siguiente)
+    new_rows = (df.index > model.incremental.last_date) & y_lme.notna() & y_premium.notna()
+    if not new_rows.any():
+        print(f"✓ Sin observaciones nuevas desde {model.incremental.last_date}")
+        return True
+    
+    model.update_incremental(X_lme[new_rows], y_lme[new_rows], X_premium[new_rows], y_premium[new_rows])
+    model.save_models()
+    return True
+
 def main():
     """Ejecutar entrenamiento completo del modelo dos etapas"""
     
+    # Actualización diaria sin re-entrenar (python TWO_STAGE_FINAL_MODEL.py --update)
+    if '--update' in sys.argv:
+        return nightly_update()
+    
     print("🚀 MODELO DOS ETAPAS - IMPLEMENTACIÓN FINAL")
     print("="*80)
     
-    # Crear modelo
-    model = TwoStageRebarModel()
+    # Crear modelo (--preprocessing-cache reusa imputer/scaler entre corridas repetidas)
+    model = TwoStageRebarModel(use_preprocessing_cache='--preprocessing-cache' in sys.argv)
     
     # Cargar datos
     df = model.load_data()
@@ -379,14 +668,27 @@ def main():
     X_premium, y_premium = model.prepare_premium_features(df)
     
     # Entrenar modelos
-    if model.train_lme_model(X_lme, y_lme):
+    lme_ok = model.train_lme_model(X_lme, y_lme)
+    if lme_ok:
         print("\n✅ Modelo LME entrenado exitosamente")
     
-    if model.train_premium_model(X_premium, y_premium):
+    premium_ok = model.train_premium_model(X_premium, y_premium)
+    if premium_ok:
         print("\n✅ Modelo Premium entrenado exitosamente")
     
+    # Estado incremental: se guarda junto al modelo para las actualizaciones diarias (--update)
+    if lme_ok and premium_ok:
+        model.start_incremental()
+    
+    # Backtest walk-forward opcional (python TWO_STAGE_FINAL_MODEL.py --walk-forward)
+    if '--walk-forward' in sys.argv:
+        model.walk_forward_backtest(X_lme, y_lme, stage='lme')
+        model.walk_forward_backtest(X_premium, y_premium, stage='premium')
+    
     # Guardar modelos
     model.save_models()
+    if model.preprocessing_cache is not None:
+        print(f"\n{model.preprocessing_cache.summary()}")
     
     print("\n\n🎯 RESUMEN ARQUITECTURA FINAL:")
     print("="*60)
@@ -405,4 +707,5 @@ def main():
     return True
 
 if __name__ == "__main__":
-    main() 
+    # Código de salida != 0 si --update no pudo aplicarse (el job nocturno debe fallar)
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK BOOTSTRAP
+1. Determinismo: las mismas réplicas con 1 worker (sin pool) y con 2
+   (pool + memoria compartida).
+2. N_REPLICATES réplicas block-bootstrap de importancias RF (el test 4 de
+   OVERFITTING_VALIDATION) contra el loop serial original con 10 réplicas
+   (test_feature_importance_stability_reference, en este módulo), y bytes
+   enviados por tarea con memoria compartida vs pickleando X/y.
+3. Ancho de los IC 95%: bloques de 1 día (≈ i.i.d.) vs bloques n^(1/3).
+4. Curvas de aprendizaje: la estimación puntual de test_learning_curves
+   coincide con el loop original (test_learning_curves_reference).
+
+Uso: python benchmark_bootstrap.py [n_replicas]
+"""
+
+import logging
+import os
+import pickle
+import sys
+import time
+import warnings
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+from OVERFITTING_VALIDATION import OverfittingValidator
+from bootstrap import TASKS_PER_WORKER, SharedArrays, default_block_size, importance_replicate, percentile_ci, run_replicates
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import load_features
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+N_REPLICATES = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+N_REFERENCE = 10          # n_bootstrap del test original
+N_COMPARE = 100
+FEATURES = ['lme_sr_m01_lag1', 'lme_volatility_5d', 'lme_momentum_5d', 'rebar_scrap_spread_norm']
+
+
+def load_xy():
+    df = load_features(columns=FEATURES + ['target_mexico_price'], start='2025-01-01')
+    df = df[df['target_mexico_price'].notna()]
+    return df[FEATURES], df['target_mexico_price']
+
+
+def test_feature_importance_stability_reference(validator, X, y):
+    """test_feature_importance_stability original: 10 réplicas i.i.d. en serie"""
+
+    print("\n🔍 TEST 4: ESTABILIDAD FEATURE IMPORTANCE")
+    print("="*50)
+
+    # Preparar datos
+    valid_mask = y.notna()
+    X_valid = X[valid_mask]
+    y_valid = y[valid_mask]
+
+    # Multiple bootstrap samples
+    n_bootstrap = 10
+    feature_importances = []
+
+    for i in range(n_bootstrap):
+        # Bootstrap sample
+        n_samples = len(X_valid)
+        bootstrap_idx = np.random.choice(n_samples, n_samples, replace=True)
+
+        X_boot = X_valid.iloc[bootstrap_idx]
+        y_boot = y_valid.iloc[bootstrap_idx]
+
+        # Preparar
+        imputer = SimpleImputer(strategy='mean')
+        scaler = StandardScaler()
+
+        X_boot_imp = imputer.fit_transform(X_boot)
+        X_boot_scaled = scaler.fit_transform(X_boot_imp)
+
+        # Entrenar
+        model = RandomForestRegressor(n_estimators=100, max_depth=5, random_state=i)
+        model.fit(X_boot_scaled, y_boot)
+
+        feature_importances.append(model.feature_importances_)
+
+        print(f"  Bootstrap {i+1}: {dict(zip(X.columns, model.feature_importances_))}")
+
+    # Análisis estabilidad
+    importances_array = np.array(feature_importances)
+    mean_importance = np.mean(importances_array, axis=0)
+    std_importance = np.std(importances_array, axis=0)
+    cv_importance = std_importance / (mean_importance + 1e-8)  # Coefficient of variation
+
+    results = {
+        'mean_importance': dict(zip(X.columns, mean_importance)),
+        'std_importance': dict(zip(X.columns, std_importance)),
+        'cv_importance': dict(zip(X.columns, cv_importance)),
+        'is_stable': np.all(cv_importance < 0.3)  # CV < 30%
+    }
+
+    print(f"\n📊 ESTABILIDAD:")
+    for i, feature in enumerate(X.columns):
+        print(f"  {feature:20}: {mean_importance[i]:.3f} ± {std_importance[i]:.3f} (CV: {cv_importance[i]:.2f})")
+
+    print(f"\n✅ Features estables: {'Sí' if np.all(cv_importance < 0.3) else 'No'}")
+
+    validator.results['feature_stability'] = results
+    return results
+
+
+def test_learning_curves_reference(validator, X, y):
+    """test_learning_curves original: un ajuste por tamaño, en serie y sin IC"""
+
+    print("\n🔍 TEST 3: CURVAS DE APRENDIZAJE")
+    print("="*50)
+
+    # Preparar datos
+    valid_mask = y.notna()
+    X_valid = X[valid_mask]
+    y_valid = y[valid_mask]
+
+    # Split temporal
+    split_date = '2025-08-01'
+    X_train = X_valid[X_valid.index < split_date]
+    X_test = X_valid[X_valid.index >= split_date]
+    y_train = y_valid[y_valid.index < split_date]
+    y_test = y_valid[y_valid.index >= split_date]
+
+    # Preparar datos
+    imputer = SimpleImputer(strategy='mean')
+    scaler = StandardScaler()
+
+    X_train_imp = imputer.fit_transform(X_train)
+    X_test_imp = imputer.transform(X_test)
+
+    X_train_scaled = scaler.fit_transform(X_train_imp)
+    X_test_scaled = scaler.transform(X_test_imp)
+
+    # Diferentes tamaños de muestra
+    train_sizes = np.linspace(0.3, 1.0, 8)
+
+    model = RandomForestRegressor(n_estimators=100, max_depth=5, random_state=42)
+
+    train_scores = []
+    test_scores = []
+    sample_sizes = []
+
+    for size in train_sizes:
+        n_samples = int(len(X_train_scaled) * size)
+        if n_samples < 20:
+            continue
+
+        # Muestra temporal (últimos n_samples)
+        X_train_sample = X_train_scaled[-n_samples:]
+        y_train_sample = y_train.iloc[-n_samples:]
+
+        # Entrenar
+        model.fit(X_train_sample, y_train_sample)
+
+        # Evaluar
+        y_pred_train = model.predict(X_train_sample)
+        y_pred_test = model.predict(X_test_scaled)
+
+        mape_train = np.mean(np.abs((y_train_sample - y_pred_train) / y_train_sample)) * 100
+        mape_test = np.mean(np.abs((y_test - y_pred_test) / y_test)) * 100
+
+        train_scores.append(mape_train)
+        test_scores.append(mape_test)
+        sample_sizes.append(n_samples)
+
+        print(f"  Samples: {n_samples:3d} | Train: {mape_train:5.2f}% | Test: {mape_test:5.2f}% | Gap: {mape_test-mape_train:+5.2f}%")
+
+    # Análisis de convergencia
+    final_gap = test_scores[-1] - train_scores[-1] if test_scores else 0
+    gap_trend = np.polyfit(sample_sizes, np.array(test_scores) - np.array(train_scores), 1)[0] if len(sample_sizes) > 2 else 0
+
+    results = {
+        'train_scores': train_scores,
+        'test_scores': test_scores,
+        'sample_sizes': sample_sizes,
+        'final_gap': final_gap,
+        'gap_trend': gap_trend,
+        'is_converging': gap_trend < 0,  # Gap decreasing
+        'is_overfitting': final_gap > 2.0
+    }
+
+    print(f"\n📊 ANÁLISIS:")
+    print(f"  Gap final: {final_gap:+.2f}%")
+    print(f"  Tendencia gap: {gap_trend:+.4f}% por muestra")
+    print(f"  ✅ Convergiendo: {'Sí' if gap_trend < 0 else 'No'}")
+    print(f"  ✅ Overfitting: {'⚠️ Sí' if final_gap > 2.0 else '✅ No'}")
+
+    validator.results['learning_curves'] = results
+    return results
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - BOOTSTRAP POR BLOQUES")
+    print("="*80)
+    X_df, y_s = load_xy()
+    X, y = X_df.to_numpy(dtype=float), y_s.to_numpy(dtype=float)
+    validator = OverfittingValidator()
+    arrays = {'X': X, 'y': y}
+    block_size = default_block_size(len(X))
+    fn = partial(importance_replicate, block_size=block_size)
+    print(f"✓ {len(X)} filas x {len(FEATURES)} features, bloques de {block_size} días")
+
+    # 1. Determinismo
+    _, serial = run_replicates(arrays, fn, 40, max_workers=1)
+    _, pooled = run_replicates(arrays, fn, 40, max_workers=2)
+    deterministic = np.array_equal(serial, pooled)
+    print(f"\n1. 40 réplicas, 1 worker vs 2 workers (memoria compartida): idénticas = {deterministic}")
+
+    # 2. Escala
+    start = time.perf_counter()
+    test_feature_importance_stability_reference(validator, X_df, y_s)
+    ref_s = time.perf_counter() - start
+    workers = max(2, os.cpu_count() or 1)
+    start = time.perf_counter()
+    _, importances = run_replicates(arrays, fn, N_REPLICATES, max_workers=workers)
+    run_s = time.perf_counter() - start
+    per_replicate = ref_s / N_REFERENCE
+    print(f"\n2. {'Cálculo':<52}{'s':>8}{'ms/réplica':>12}")
+    print(f"   {f'loop original, {N_REFERENCE} réplicas i.i.d.':<52}{ref_s:>8.1f}{per_replicate*1000:>12.1f}")
+    print(f"   {f'executor, {N_REPLICATES} réplicas ({workers} workers)':<52}{run_s:>8.1f}"
+          f"{run_s / N_REPLICATES * 1000:>12.1f}")
+    print(f"   🧵 {os.cpu_count()} CPU(s) aquí; con 8 cores ≈ {run_s * (os.cpu_count() or 1) / 8:.0f}s "
+          f"para {N_REPLICATES} réplicas")
+
+    n_tasks = workers * TASKS_PER_WORKER
+    chunk = [(i, None) for i in range(-(-N_REPLICATES // n_tasks))]
+    with SharedArrays(arrays) as shared:
+        shm_bytes = len(pickle.dumps(shared.specs)) * workers + len(pickle.dumps((fn, chunk))) * n_tasks
+    pickled_bytes = (len(pickle.dumps(arrays)) + len(pickle.dumps((fn, chunk)))) * n_tasks
+    print(f"   bytes enviados a workers: memoria compartida {shm_bytes/1e3:.1f} kB | "
+          f"X/y pickleados por tarea {pickled_bytes/1e3:.1f} kB (matriz {X.nbytes/1e3:.1f} kB)")
+
+    # 3. Ancho de IC: i.i.d. vs bloques
+    print(f"\n3. IC 95% de importancias ({N_COMPARE} réplicas)")
+    print(f"   {'feature':<26}{'bloque 1 día':>18}{f'bloque {block_size} días':>18}")
+    _, iid = run_replicates(arrays, partial(importance_replicate, block_size=1), N_COMPARE, max_workers=workers)
+    widths = {}
+    for label, samples in (('iid', iid), ('block', importances[:N_COMPARE])):
+        low, high = percentile_ci(samples)
+        widths[label] = high - low
+    for i, feature in enumerate(FEATURES):
+        print(f"   {feature:<26}{widths['iid'][i]:>18.3f}{widths['block'][i]:>18.3f}")
+    lo, hi = percentile_ci(importances)
+    print(f"\n   IC 95% con {N_REPLICATES} réplicas: "
+          + ", ".join(f"{f} [{l:.3f}, {h:.3f}]" for f, l, h in zip(FEATURES, lo, hi)))
+
+    # 4. Curvas de aprendizaje: punto estimado vs loop original
+    expected = test_learning_curves_reference(validator, X_df, y_s)
+    curves = validator.test_learning_curves(X_df, y_s, max_workers=workers)
+    same_curve = curves['sample_sizes'] == expected['sample_sizes'] and all(
+        np.allclose(curves[k], expected[k], rtol=1e-12) for k in ('train_scores', 'test_scores')
+    )
+    print(f"\n4. Curvas de aprendizaje ({len(expected['sample_sizes'])} tamaños): "
+          f"punto estimado == loop original: {same_curve}")
+
+    ok = deterministic and importances.shape == (N_REPLICATES, len(FEATURES)) and np.isfinite(importances).all() \
+        and same_curve
+    print(f"\n✓ Réplicas deterministas y completas, curva igual a la original: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
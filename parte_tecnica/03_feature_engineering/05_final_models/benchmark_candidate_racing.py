@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK CARRERA DE CANDIDATOS
+1. Reuso: los ganadores de la carrera predicen igual que re-ajustarlos de
+   cero con el train completo, y el VotingRegressor pre-ajustado predice el
+   promedio de sus miembros (los mismos objetos, sin re-entrenar).
+2. Tiempo: trabajo del loop original (CV de 3 folds + fit por candidato +
+   VotingRegressor.fit que re-entrena a los mejores) contra la carrera con
+   successive halving, y train_ensemble_model completo contra el original
+   (train_ensemble_model_reference, en este módulo; sin imputación, los
+   candidatos que no aceptan NaN quedan excluidos como en el original).
+3. Presupuesto: con un presupuesto menor que un ajuste de random_forest la
+   carrera corta a tiempo y reporta los candidatos fuera de tiempo.
+
+Corre desde 03_feature_engineering (rutas outputs/ del ensemble).
+"""
+
+import logging
+import time
+import warnings
+from typing import Dict
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import VotingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+from sklearn.pipeline import make_pipeline
+
+from candidate_racing import prefitted_voting_regressor, race_candidates
+from robust_model_ensemble import RobustModelEnsemble
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+logger = logging.getLogger(__name__)
+
+TIGHT_BUDGET = 0.4
+
+
+def candidates():
+    return {name: make_pipeline(SimpleImputer(strategy='median'), model)
+            for name, model in RobustModelEnsemble.create_ml_models().items()}
+
+
+def reference_work(X, y):
+    """Ajustes del train_ensemble_model original: CV + fit por candidato y VotingRegressor.fit de los top 3"""
+    scores, fitted = {}, {}
+    for name, model in candidates().items():
+        scores[name] = -cross_val_score(model, X, y, cv=TimeSeriesSplit(n_splits=3),
+                                        scoring='neg_mean_absolute_percentage_error').mean()
+        fitted[name] = model.fit(X, y)
+    best = sorted(scores, key=scores.get)[:3]
+    VotingRegressor([(name, fitted[name]) for name in best]).fit(X, y)
+
+
+def train_ensemble_model_reference(ensemble_builder, splits: Dict) -> VotingRegressor:
+    """train_ensemble_model original: CV + fit en serie por candidato, VotingRegressor.fit de los top 3"""
+    logger.info("🚀 Entrenando modelo ensemble...")
+
+    train_features = splits['train']['features']
+    train_target = splits['train']['target']
+
+    # 1. Crear baseline model
+    baseline_model = ensemble_builder.create_baseline_model(train_features, train_target)
+    baseline_model.fit(train_features, train_target)
+
+    # 2. Crear ML models
+    ml_models = ensemble_builder.create_ml_models()
+
+    # 3. Entrenar cada modelo y evaluar
+    model_scores = {}
+    trained_models = {}
+
+    for name, model in ml_models.items():
+        try:
+            # Time series cross validation
+            tscv = TimeSeriesSplit(n_splits=3)
+            scores = cross_val_score(
+                model, train_features, train_target, 
+                cv=tscv, scoring='neg_mean_absolute_percentage_error'
+            )
+
+            # Entrenar en todos los datos de train
+            model.fit(train_features, train_target)
+
+            model_scores[name] = -scores.mean()  # Convertir a MAPE positivo
+            trained_models[name] = model
+
+            logger.info(f"   {name}: MAPE = {model_scores[name]:.2%}")
+
+        except Exception as e:
+            logger.warning(f"⚠️ Error entrenando {name}: {e}")
+            model_scores[name] = 1.0  # MAPE muy alto para exclusión
+
+    # 4. Seleccionar mejores modelos para ensemble
+    best_models = sorted(model_scores.items(), key=lambda x: x[1])[:3]  # Top 3
+
+    # 5. Crear ensemble con pesos dinámicos
+    ensemble_estimators = [
+        ('baseline', baseline_model),
+    ]
+
+    # Agregar mejores ML models
+    for model_name, score in best_models:
+        if score < 0.15:  # Solo si MAPE < 15%
+            ensemble_estimators.append((model_name, trained_models[model_name]))
+
+    # Crear VotingRegressor
+    if len(ensemble_estimators) > 1:
+        ensemble = VotingRegressor(
+            estimators=ensemble_estimators,
+            weights=None  # Pesos uniformes por simplicidad
+        )
+        ensemble.fit(train_features, train_target)
+    else:
+        # Fallback a solo baseline si ML models fallan
+        ensemble = baseline_model
+
+    # Guardar modelos individuales para fallbacks
+    ensemble_builder.models['baseline'] = baseline_model
+    ensemble_builder.models.update(trained_models)
+    ensemble_builder.ensemble_model = ensemble
+
+    logger.info(f"✅ Ensemble entrenado con {len(ensemble_estimators)} modelos")
+
+    return ensemble
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - CARRERA DE CANDIDATOS DEL ENSEMBLE")
+    print("="*80)
+    ensemble = RobustModelEnsemble()
+    features, target = ensemble.load_features_dataset()
+    splits = ensemble.create_temporal_split(features, target)
+    X, y = splits['train']['features'], splits['train']['target']
+    X_val, y_val = splits['validation']['features'], splits['validation']['target']
+    print(f"✓ train {len(X)} filas, validación {len(X_val)} filas, {len(candidates())} candidatos")
+
+    # 1. Reuso de los ganadores
+    winners, reports = race_candidates(candidates(), X, y, X_val, y_val)
+    refit_same = all(np.allclose(model.predict(X_val), clone(model).fit(X, y).predict(X_val))
+                     for model in winners.values())
+    voting = prefitted_voting_regressor(list(winners.items()))
+    members = np.mean([model.predict(X_val) for model in winners.values()], axis=0)
+    reused = all(voting.named_estimators_[name] is model for name, model in winners.items())
+    same_average = np.allclose(voting.predict(X_val), members)
+    print(f"\n1. Ganadores: {', '.join(winners)}")
+    print(f"   ✓ Ganadores == re-ajuste con train completo: {refit_same}")
+    print(f"   ✓ VotingRegressor usa los mismos objetos: {reused}, predice su promedio: {same_average}")
+
+    # 2. Tiempo
+    start = time.perf_counter()
+    reference_work(X, y)
+    reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    race_candidates(candidates(), X, y, X_val, y_val)
+    race_s = time.perf_counter() - start
+    print(f"\n2. {'Entrenamiento':<52}{'s':>8}")
+    print(f"   {'loop original (CV 3 folds + fit + Voting.fit)':<52}{reference_s:>8.2f}")
+    print(f"   {'carrera successive halving (prefit Voting)':<52}{race_s:>8.2f}")
+    print(f"   🚀 Speedup: {reference_s / race_s:.1f}x")
+    start = time.perf_counter()
+    train_ensemble_model_reference(RobustModelEnsemble(), splits)
+    full_reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    RobustModelEnsemble().train_ensemble_model(splits)
+    full_s = time.perf_counter() - start
+    print(f"   {'train_ensemble_model original':<52}{full_reference_s:>8.2f}")
+    print(f"   {'train_ensemble_model (carrera + re-ajuste parcial)':<52}{full_s:>8.2f}")
+    print(f"   {'candidato':<20}{'estado':<12}{'rung':>6}{'MAPE val':>10}{'s':>8}{'presup.':>9}")
+    for r in reports:
+        print(f"   {r.name:<20}{r.status:<12}{r.rung:>6}{r.val_mape:>10.2%}{r.seconds:>8.2f}{r.budget_share:>9.1%}")
+
+    # 3. Presupuesto ajustado
+    start = time.perf_counter()
+    tight_winners, tight_reports = race_candidates(candidates(), X, y, X_val, y_val, budget_seconds=TIGHT_BUDGET)
+    tight_s = time.perf_counter() - start
+    statuses = ", ".join(f"{r.name} {r.status} (rung {r.rung})" for r in tight_reports)
+    on_time = tight_s < TIGHT_BUDGET + 1.0   # margen: arranque y cierre del pool
+    print(f"\n3. Presupuesto {TIGHT_BUDGET}s: terminó en {tight_s:.2f}s con {len(tight_winners)} ganadores")
+    print(f"   {statuses}")
+
+    ok = refit_same and reused and same_average and on_time
+    print(f"\n✓ Ganadores reusados sin re-entrenar y presupuesto respetado: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
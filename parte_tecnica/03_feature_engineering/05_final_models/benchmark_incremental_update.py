@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK ACTUALIZACIÓN INCREMENTAL
+Entrena TwoStageRebarModel con el split habitual (< 2025-08-01) y recorre
+los días siguientes uno por uno, como el job nocturno: predice el día con
+el modelo vigente y luego lo actualiza con esa observación.
+
+1. Exactitud RLS: con olvido 1.0 el premium coincide con el Ridge de
+   penalización fija re-resuelto con todas las filas, y queda a la par de
+   un re-entrenamiento completo (imputer + scaler + Ridge de cero).
+2. Calidad: MAPE out-of-sample del modelo congelado, incremental y
+   re-entrenado cada día, por etapa.
+3. Tiempo: ms por actualización incremental vs por re-entrenamiento.
+
+El cache de preprocesamiento vive en un directorio temporal (no toca outputs/).
+"""
+
+import contextlib
+import copy
+import io
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from TWO_STAGE_FINAL_MODEL import TwoStageRebarModel
+from preprocessing_cache import PreprocessingCache, preprocess
+
+warnings.filterwarnings('ignore')
+
+SPLIT_DATE = '2025-08-01'   # El de train_lme_model / train_premium_model
+
+
+def stage_predict(imputer, scaler, model, X):
+    return model.predict(scaler.transform(imputer.transform(X)))
+
+
+def full_retrain(factory, X, y):
+    """Re-entrenamiento completo de una etapa: imputer + scaler + regresor de cero"""
+    split = preprocess(X)
+    model = factory().fit(split.X_train, y)
+    return split.imputer, split.scaler, model
+
+
+def mape(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=float)
+    return float(np.mean(np.abs((y_true - np.asarray(y_pred, dtype=float)) / y_true)) * 100)
+
+
+def fixed_penalty_gap(rls, alpha, scale, X_imputed, y):
+    """|θ RLS - Ridge exacto con la penalización del ajuste inicial| (RLS con λ=1 debe dar ~0)"""
+    Z = np.column_stack([X_imputed, np.ones(len(X_imputed))])
+    penalty = np.append(alpha * scale ** 2, 0.0)
+    theta = np.linalg.solve(Z.T @ Z + np.diag(penalty), Z.T @ y)
+    return np.abs(theta - rls.theta).max()
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - ACTUALIZACIÓN INCREMENTAL DOS ETAPAS")
+    print("="*80)
+    np.random.seed(42)  # premium_target simulado en prepare_premium_features
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        base = TwoStageRebarModel()
+        base.preprocessing_cache = PreprocessingCache(tmp)
+        df = base.load_data()
+        X_lme, y_lme = base.prepare_lme_features(df)
+        X_premium, y_premium = base.prepare_premium_features(df)
+        base.train_lme_model(X_lme, y_lme)
+        base.train_premium_model(X_premium, y_premium)
+
+        frozen = copy.deepcopy(base)
+        tracking = copy.deepcopy(base)
+        tracking.start_incremental()
+        exact = copy.deepcopy(base)
+        exact.start_incremental(forgetting=1.0)
+        initial_scale = exact.premium_scaler.scale_.copy()
+
+    valid = y_lme.notna() & y_premium.notna()
+    history = valid & (df.index < SPLIT_DATE)
+    stream = df.index[valid & (df.index >= SPLIT_DATE)]
+    print(f"✓ Entrenado con {int(history.sum())} días; {len(stream)} días en streaming "
+          f"({stream[0].date()} a {stream[-1].date()})")
+
+    preds = {key: [] for key in ('lme_frozen', 'lme_incremental', 'lme_full',
+                                 'premium_frozen', 'premium_incremental', 'premium_exact', 'premium_full')}
+    update_s, retrain_s, rls_gap = [], [], []
+    for day in stream:
+        row = df.index == day
+        preds['lme_frozen'].append(stage_predict(frozen.lme_imputer, frozen.lme_scaler, frozen.lme_model, X_lme[row])[0])
+        preds['lme_incremental'].append(stage_predict(tracking.lme_imputer, tracking.lme_scaler, tracking.lme_model, X_lme[row])[0])
+        preds['premium_frozen'].append(stage_predict(frozen.premium_imputer, frozen.premium_scaler, frozen.premium_model, X_premium[row])[0])
+        preds['premium_incremental'].append(stage_predict(tracking.premium_imputer, tracking.premium_scaler, tracking.premium_model, X_premium[row])[0])
+        preds['premium_exact'].append(stage_predict(exact.premium_imputer, exact.premium_scaler, exact.premium_model, X_premium[row])[0])
+
+        # Re-entrenamiento completo con todo lo anterior al día
+        start = time.perf_counter()
+        lme_full = full_retrain(TwoStageRebarModel.make_lme_regressor, X_lme[history], y_lme[history])
+        premium_full = full_retrain(TwoStageRebarModel.make_premium_regressor, X_premium[history], y_premium[history])
+        retrain_s.append(time.perf_counter() - start)
+        preds['lme_full'].append(stage_predict(*lme_full, X_lme[row])[0])
+        preds['premium_full'].append(stage_predict(*premium_full, X_premium[row])[0])
+
+        # Actualización nocturna con la observación del día
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            tracking.update_incremental(X_lme[row], y_lme[row], X_premium[row], y_premium[row])
+            update_s.append(time.perf_counter() - start)
+            exact.update_incremental(X_lme[row], y_lme[row], X_premium[row], y_premium[row])
+        history = history | row
+        rls_gap.append(fixed_penalty_gap(exact.incremental.premium_rls, exact.premium_model.alpha, initial_scale,
+                                         exact.premium_imputer.transform(X_premium[history]),
+                                         y_premium[history].to_numpy()))
+
+    # 1. Exactitud RLS
+    premium_exact, premium_full = np.array(preds['premium_exact']), np.array(preds['premium_full'])
+    max_gap = max(rls_gap)
+    full_gap = np.abs(premium_exact - premium_full).max()
+    print(f"\n1. Premium RLS λ=1.0")
+    print(f"   máx |θ RLS - θ Ridge penalización fija re-resuelto|: {max_gap:.2e}")
+    print(f"   máx |premium RLS - premium re-entrenado| por día: {full_gap:.2e} "
+          f"(premium medio {premium_full.mean():.3f})")
+
+    # 2. Calidad out-of-sample
+    y_stream_lme = y_lme[stream].to_numpy()
+    y_stream_premium = y_premium[stream].to_numpy()
+    print(f"\n2. MAPE out-of-sample día a día ({len(stream)} días)")
+    print(f"   {'etapa':<10}{'congelado':>12}{'incremental':>14}{'re-entrenado':>14}")
+    print(f"   {'LME':<10}{mape(y_stream_lme, preds['lme_frozen']):>11.2f}%"
+          f"{mape(y_stream_lme, preds['lme_incremental']):>13.2f}%{mape(y_stream_lme, preds['lme_full']):>13.2f}%")
+    print(f"   {'Premium':<10}{mape(y_stream_premium, preds['premium_frozen']):>11.2f}%"
+          f"{mape(y_stream_premium, preds['premium_incremental']):>13.2f}%{mape(y_stream_premium, premium_full):>13.2f}%")
+    print(f"   (incremental: RLS λ={tracking.incremental.premium_rls.forgetting}, "
+          f"{tracking.incremental.trees_per_update} árboles LME nuevos por día)")
+
+    # 3. Tiempo
+    update_ms, retrain_ms = np.mean(update_s) * 1000, np.mean(retrain_s) * 1000
+    print(f"\n3. {'Actualización diaria':<44}{'ms':>8}")
+    print(f"   {'re-entrenamiento completo (ambas etapas)':<44}{retrain_ms:>8.1f}")
+    print(f"   {'update_incremental (ambas etapas)':<44}{update_ms:>8.1f}")
+    print(f"   🚀 Speedup: {retrain_ms / update_ms:.1f}x")
+
+    ok = max_gap < 1e-6 and full_gap < 1e-3
+    print(f"\n✓ RLS equivalente al Ridge re-resuelto y a la par del re-entrenamiento: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
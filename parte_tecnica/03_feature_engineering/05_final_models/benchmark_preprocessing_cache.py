@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK CACHE DE PREPROCESAMIENTO
+1. Equivalencia: matrices, imputer y scaler del cache (frío, memoria y
+   disco) idénticos a ajustar de cero.
+2. Folds: preprocesamiento de N_ORIGINS folds expanding sobre el histórico
+   completo sin cache, con cache en frío, repetido en el mismo proceso
+   (memoria) y en un proceso nuevo (disco), con hit rate y tiempo neto
+   ahorrado reportados por el propio cache.
+3. Desalojo: con max_bytes chico (entradas con matrices) el directorio
+   no pasa del límite.
+
+El cache vive en un directorio temporal (no toca outputs/).
+"""
+
+import logging
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from preprocessing_cache import PreprocessingCache, preprocess
+from robust_model_ensemble import RobustModelEnsemble
+from walk_forward import fit_preprocessing, make_origins
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import load_features
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+N_ORIGINS = 250
+FEATURES = list(RobustModelEnsemble().all_features)
+
+
+def same_split(a, b):
+    return (np.array_equal(a.X_train, b.X_train) and np.array_equal(a.X_test, b.X_test)
+            and np.array_equal(a.imputer.statistics_, b.imputer.statistics_)
+            and np.array_equal(a.scaler.mean_, b.scaler.mean_) and np.array_equal(a.scaler.scale_, b.scaler.scale_))
+
+
+def run_folds(X, origins, cache):
+    start = time.perf_counter()
+    preps = [fit_preprocessing(X, origin, cache) for origin in origins]
+    return time.perf_counter() - start, preps
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - CACHE DE PREPROCESAMIENTO")
+    print("="*80)
+    X = load_features(columns=FEATURES)
+    X_train, X_test = X[X.index < '2023-01-01'], X[X.index >= '2023-01-01']
+    print(f"✓ {len(X):,} filas x {len(FEATURES)} features")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "preprocessing_cache"
+
+        # 1. Equivalencia
+        expected = preprocess(X_train, X_test)
+        cache = PreprocessingCache(root)
+        cold = cache.fit_transform(X_train, X_test, feature_set='core_15@v1')
+        memory = cache.fit_transform(X_train, X_test, feature_set='core_15@v1')
+        disk = PreprocessingCache(root).fit_transform(X_train, X_test, feature_set='core_15@v1')
+        identical = all(same_split(s, expected) for s in (cold, memory, disk))
+        print(f"\n1. Split 2023-01-01: frío / memoria / disco idénticos a ajustar de cero: {identical}")
+
+        # 2. Folds
+        cache.clear()
+        origins = make_origins(len(X), n_origins=N_ORIGINS, horizon=5, window='expanding', min_train=1000)
+        no_cache_s, reference = run_folds(X, origins, None)
+        cache = PreprocessingCache(root)
+        cold_s, _ = run_folds(X, origins, cache)
+        cold_stats = cache.stats()
+        cache.reset_stats()
+        memory_s, _ = run_folds(X, origins, cache)
+        memory_summary = cache.summary()
+        fresh = PreprocessingCache(root)
+        disk_s, cached = run_folds(X, origins, fresh)
+        disk_summary = fresh.summary()
+        same_folds = all(np.array_equal(a.imputer.statistics_, b.imputer.statistics_)
+                         and np.array_equal(a.scaler.scale_, b.scaler.scale_) for a, b in zip(reference, cached))
+
+        print(f"\n2. {len(origins)} folds expanding (train {origins[0].train_end}-{origins[-1].train_end} filas)")
+        print(f"   {'corrida':<36}{'s':>8}{'hit rate':>10}")
+        print(f"   {'sin cache':<36}{no_cache_s:>8.2f}{'-':>10}")
+        print(f"   {'cache frío (calcula y guarda)':<36}{cold_s:>8.2f}{cold_stats['hit_rate']:>10.0%}")
+        print(f"   {'repetido, mismo proceso (memoria)':<36}{memory_s:>8.2f}{1:>10.0%}")
+        print(f"   {'repetido, proceso nuevo (disco)':<36}{disk_s:>8.2f}{1:>10.0%}")
+        print(f"   memoria: {memory_summary}")
+        print(f"   disco:   {disk_summary}")
+        fold_bytes = sum(p.stat().st_size for p in root.glob("*.pkl"))
+        print(f"   {len(list(root.glob('*.pkl')))} entradas sólo-transformadores en disco: {fold_bytes / 2**10:.0f} kB")
+        print(f"   ✓ Folds desde disco idénticos: {same_folds}")
+
+        # 3. Desalojo
+        small = PreprocessingCache(Path(tmp) / "small", max_bytes=2 * 2**20)
+        for origin in origins[:60]:
+            small.fit_transform(X.iloc[:origin.train_end], X.iloc[origin.train_end:origin.test_end])
+        on_disk = sum(p.stat().st_size for p in small.root.glob("*.pkl"))
+        bounded = on_disk <= small.max_bytes
+        print(f"\n3. max_bytes 2 MB: {small.evicted} desalojos, {on_disk / 2**20:.2f} MB en disco "
+              f"(dentro del límite: {bounded})")
+
+    ok = identical and same_folds and bounded
+    print(f"\n✓ Cache equivalente a recalcular y acotado en tamaño: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK CASCADA DE FALLBACKS
+Compara FallbackPredictor.predict / RobustPredictor.predict (motor por bloques)
+contra sus implementaciones originales (loop fila por fila, *_reference en
+este módulo) y verifica que predicciones y niveles usados sean idénticos.
+Se inyectan NaNs en el historial para ejercitar todos los niveles.
+"""
+
+import logging
+import time
+import warnings
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+
+from final_robust_model import BaselineRegressor, FallbackPredictor, FinalRobustModel
+from robust_model_ensemble import RobustModelEnsemble
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+FEATURES_FILE = "../outputs/features_dataset_latest.csv"
+SPLIT_DATE = '2023-01-01'
+N_REPEATS = 3
+
+
+def check_data_quality(X: pd.DataFrame, threshold: float = 0.8) -> bool:
+    """Verificar calidad de datos (FallbackPredictor._check_data_quality original)"""
+    available_ratio = X.notna().mean().mean()
+    return available_ratio >= threshold
+
+
+def fallback_predict_reference(predictor, X, return_level: bool = False):
+    """FallbackPredictor.predict original: fila por fila (para validar el motor)"""
+    predictions = pd.Series(index=X.index, dtype=float)
+    levels_used = pd.Series(index=X.index, dtype=str)
+
+    for idx in X.index:
+        x_row = X.loc[[idx]]
+
+        try:
+            # NIVEL 1: Random Forest (mejor performance: 1.05% MAPE)
+            if check_data_quality(x_row, threshold=0.8):
+                x_imputed = pd.DataFrame(
+                    predictor.imputer.transform(x_row),
+                    columns=x_row.columns,
+                    index=x_row.index
+                )
+                pred = predictor.rf_model.predict(x_imputed)[0]
+                predictions[idx] = pred
+                levels_used[idx] = "RF_1.05pct_MAPE"
+                continue
+        except Exception:
+            pass
+
+        try:
+            # NIVEL 2: Baseline (1.73% MAPE)
+            if pd.notna(x_row['lme_sr_m01_lag1'].iloc[0]):
+                pred = predictor.baseline_model.predict(x_row)[0]
+                predictions[idx] = pred
+                levels_used[idx] = "Baseline_1.73pct_MAPE"
+                continue
+        except Exception:
+            pass
+
+        try:
+            # NIVEL 3: LME simple
+            lme_price = x_row['lme_sr_m01_lag1'].iloc[0]
+            if pd.notna(lme_price):
+                pred = lme_price * predictor.mexico_premium
+                predictions[idx] = pred
+                levels_used[idx] = "LME_Simple"
+                continue
+        except Exception:
+            pass
+
+        # NIVEL 4: Fallback
+        predictions[idx] = predictor.fallback_price
+        levels_used[idx] = "Fallback_625USD"
+
+    if return_level:
+        return predictions, levels_used
+    return predictions
+
+
+def robust_predict_single_row(predictor, x_row: pd.DataFrame) -> Tuple[float, str]:
+    """Predicción para una sola fila con fallbacks"""
+    try:
+        # NIVEL 1: Modelo completo (15 features)
+        all_features_available = all(pd.notna(x_row[f].iloc[0]) for f in predictor.tier1_features + predictor.tier2_features)
+
+        if all_features_available:
+            prediction = predictor.ensemble_model.predict(x_row)[0]
+            return prediction, "level_1_full_model"
+
+    except Exception:
+        pass
+
+    try:
+        # NIVEL 2: Solo features críticos (Tier 1)
+        tier1_available = all(pd.notna(x_row[f].iloc[0]) for f in predictor.tier1_features)
+
+        if tier1_available and 'baseline' in predictor.models:
+            prediction = predictor.models['baseline'].predict(x_row[predictor.tier1_features])[0]
+            return prediction, "level_2_critical_only"
+
+    except Exception:
+        pass
+
+    try:
+        # NIVEL 3: LME + FX básico
+        lme_available = pd.notna(x_row['lme_sr_m01_lag1'].iloc[0])
+        fx_available = pd.notna(x_row['usdmxn_lag1'].iloc[0])
+
+        if lme_available:
+            base_price = x_row['lme_sr_m01_lag1'].iloc[0] * predictor.mexico_premium
+
+            # Ajuste por FX si disponible
+            if fx_available:
+                # Ajuste simple por cambio en FX reciente
+                fx_current = x_row['usdmxn_lag1'].iloc[0]
+                fx_adjustment = 1.0  # Simplificado para robustez
+                prediction = base_price * fx_adjustment
+            else:
+                prediction = base_price
+
+            return prediction, "level_3_lme_fx_basic"
+
+    except Exception:
+        pass
+
+    # NIVEL 4: Último precio conocido
+    return predictor.fallback_price, "level_4_fallback"
+
+
+def robust_predict_reference(predictor, X: pd.DataFrame, return_level: bool = False) -> Union[pd.Series, Tuple[pd.Series, str]]:
+    """RobustPredictor.predict original: fila por fila (para validar el motor)"""
+    predictions = pd.Series(index=X.index, dtype=float)
+    levels_used = pd.Series(index=X.index, dtype=str)
+
+    for idx in X.index:
+        x_row = X.loc[[idx]]
+        prediction, level = robust_predict_single_row(predictor, x_row)
+        predictions[idx] = prediction
+        levels_used[idx] = level
+
+    if return_level:
+        return predictions, levels_used
+    else:
+        return predictions
+
+
+def load_dataset(all_features):
+    """Features/target del historial completo con target válido"""
+    df = pd.read_csv(FEATURES_FILE, index_col=0, parse_dates=True)
+    valid = df['target_mexico_price'].notna()
+    return df.loc[valid, all_features], df.loc[valid, 'target_mexico_price']
+
+
+def inject_gaps(X, seed=42):
+    """Huecos de datos para que cada nivel de la cascada tenga filas"""
+    rng = np.random.default_rng(seed)
+    X = X.copy()
+    n = len(X)
+    # Nivel 2+: faltan varias features secundarias
+    rows = rng.choice(n, size=n // 5, replace=False)
+    X.iloc[rows, 5:10] = np.nan
+    # Nivel 3: falta un feature crítico distinto de LME
+    rows = rng.choice(n, size=n // 10, replace=False)
+    X.iloc[rows, 1] = np.nan
+    # Nivel 4: sin LME
+    rows = rng.choice(n, size=n // 20, replace=False)
+    X.iloc[rows, 0] = np.nan
+    return X
+
+
+def time_call(fn, X):
+    """Mejor tiempo (s) de N_REPEATS llamadas"""
+    best = float('inf')
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(name, predictor, reference, X):
+    """Equivalencia y tiempos de predict vs la implementación original (reference)"""
+    fast, fast_levels = predictor.predict(X, return_level=True)
+    start = time.perf_counter()
+    ref_pred, ref_levels = reference(predictor, X, return_level=True)
+    reference_s = time.perf_counter() - start
+
+    same_pred = np.array_equal(fast.to_numpy(), ref_pred.to_numpy())
+    same_levels = fast_levels.equals(ref_levels)
+
+    fast_s = time_call(predictor.predict, X)
+
+    print(f"\n🛡️ {name} ({len(X)} filas)")
+    print(f"   niveles: {fast_levels.value_counts().to_dict()}")
+    print(f"{'   loop por fila (referencia)':<34}{reference_s*1000:>10.1f} ms")
+    print(f"{'   cascada por bloques':<34}{fast_s*1000:>10.1f} ms")
+    print(f"   🚀 Speedup: {reference_s / fast_s:.1f}x")
+    print(f"   ✓ Predicciones idénticas: {same_pred} | niveles idénticos: {same_levels}")
+    return same_pred and same_levels
+
+
+def fallback_predictor():
+    """FallbackPredictor entrenado como en FinalRobustModel.train_final_model"""
+    model = FinalRobustModel(FEATURES_FILE)
+    X, y = load_dataset(model.all_features)
+    train = X.index < SPLIT_DATE
+
+    baseline = BaselineRegressor(model.MEXICO_PREMIUM).fit(X[train], y[train])
+    imputer = SimpleImputer(strategy='median')
+    rf_model = RandomForestRegressor(n_estimators=200, max_depth=8, min_samples_split=5,
+                                     min_samples_leaf=3, random_state=42, n_jobs=1)
+    rf_model.fit(imputer.fit_transform(X[train]), y[train])
+
+    predictor = FallbackPredictor(rf_model, baseline, imputer,
+                                  model.MEXICO_PREMIUM, model.FALLBACK_PRICE)
+    return predictor, inject_gaps(X)
+
+
+def robust_predictor():
+    """
+    RobustPredictor de RobustModelEnsemble.create_fallback_system
+    
+    El nivel 1 usa un RF sobre filas completas como modelo completo para no
+    depender del VotingRegressor (que rechaza el BaselineModel interno).
+    """
+    ensemble = RobustModelEnsemble(FEATURES_FILE)
+    X, y = load_dataset(ensemble.all_features)
+    train = (X.index < SPLIT_DATE) & X.notna().all(axis=1).to_numpy()
+
+    baseline = ensemble.create_baseline_model(X[train], y[train]).fit(X[train], y[train])
+    full_model = RandomForestRegressor(n_estimators=100, max_depth=5, min_samples_split=10,
+                                       min_samples_leaf=5, random_state=42, n_jobs=1)
+    full_model.fit(X[train], y[train])
+
+    ensemble.models['baseline'] = baseline
+    ensemble.ensemble_model = full_model
+    predictor = ensemble.create_fallback_system()['robust_predictor']
+    return predictor, inject_gaps(X)
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - CASCADA DE FALLBACKS")
+    print("="*60)
+
+    predictor, X = fallback_predictor()
+    ok = compare('FallbackPredictor', predictor, fallback_predict_reference, X)
+    predictor, X = robust_predictor()
+    ok &= compare('RobustPredictor', predictor, robust_predict_reference, X)
+    return ok
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK INFERENCIA DOS ETAPAS
+Compara predict_full_price (plan NumPy) vs predict_full_price_reference (ruta
+original con DataFrames de pandas, en este módulo) y verifica que ambas rutas
+den resultados idénticos.
+También mide predict_full_price_batch sobre todo el historial 2015-2025.
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from TWO_STAGE_FINAL_MODEL import TwoStageRebarModel
+
+warnings.filterwarnings('ignore')
+
+N_ROWS = 500
+N_REPEATS = 3
+
+
+def predict_full_price_reference(model, features_dict):
+    """predict_full_price original vía DataFrames de pandas (para validar el plan)"""
+
+    # Etapa 1: Predecir LME
+    lme_features = {k: v for k, v in features_dict.items()
+                   if k.startswith('lme_') or k.startswith('rebar_')}
+
+    lme_df = pd.DataFrame([lme_features])
+    lme_imp = model.lme_imputer.transform(lme_df)
+    lme_scaled = model.lme_scaler.transform(lme_imp)
+
+    lme_pred = model.lme_model.predict(lme_scaled)[0]
+
+    # Etapa 2: Predecir Premium
+    premium_features = {k: v for k, v in features_dict.items()
+                       if k in model.premium_feature_set.features}
+
+    premium_df = pd.DataFrame([premium_features])
+    premium_imp = model.premium_imputer.transform(premium_df)
+    premium_scaled = model.premium_scaler.transform(premium_imp)
+
+    premium_pred = model.premium_model.predict(premium_scaled)[0]
+
+    return model._assemble_prediction(lme_pred, premium_pred, features_dict)
+
+
+def feature_frame(n_rows=None):
+    """Dataset de features con las columnas de entrada de ambas etapas"""
+    df = pd.read_csv("../outputs/features_dataset_latest.csv", index_col=0, parse_dates=True)
+    df = (df.tail(n_rows) if n_rows else df).copy()
+    df['usdmxn'] = df['usdmxn_lag1']
+    df['post_tariff'] = (df.index >= '2025-04-01').astype(int)
+    df['construction_season'] = df.index.month.isin([3, 4, 5, 9, 10, 11]).astype(int)
+    df['month'] = df.index.month
+
+    columns = ['lme_sr_m01_lag1', 'lme_volatility_5d', 'lme_momentum_5d', 'rebar_scrap_spread_norm',
+               'usdmxn_lag1', 'usdmxn', 'real_interest_rate', 'uncertainty_indicator',
+               'post_tariff', 'construction_season', 'month']
+    return df[columns]
+
+
+def feature_dicts(n_rows):
+    """Filas reales del dataset de features como dicts de entrada"""
+    df = feature_frame(n_rows)
+    return [{k: (None if pd.isna(v) else v) for k, v in row.items()} for row in df.to_dict('records')]
+
+
+def benchmark_batch(model):
+    """Historial completo: batch vectorizado vs loop de predict_full_price"""
+    df = feature_frame()
+    df = df[df['usdmxn'].notna()]  # predict_full_price requiere FX
+    rows = [{k: (None if pd.isna(v) else v) for k, v in row.items()} for row in df.to_dict('records')]
+
+    best = float('inf')
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        batch = model.predict_full_price_batch(df)
+        best = min(best, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    single = [model.predict_full_price(row) for row in rows]
+    loop_s = time.perf_counter() - start
+
+    lme_ok = np.array_equal(batch['lme_forecast'].round(2).to_numpy(), [p['lme_forecast'] for p in single])
+    price_ok = np.allclose(batch['price_usd'].to_numpy(), [p['price_usd'] for p in single], atol=0.005)
+
+    print(f"\n📦 BATCH - historial completo ({len(df)} filas, {df.index.min().date()} a {df.index.max().date()})")
+    print(f"{'predict_full_price_batch':<30}{best*1000:>10.1f} ms")
+    print(f"{'loop predict_full_price':<30}{loop_s*1000:>10.1f} ms")
+    print(f"✓ LME idéntico: {lme_ok} | precio USD consistente: {price_ok}")
+    return lme_ok and price_ok
+
+
+def time_path(fn, rows):
+    """Mejor tiempo por llamada (µs) de N_REPEATS pasadas"""
+    best = float('inf')
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        best = min(best, time.perf_counter() - start)
+    return best / len(rows) * 1e6
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - INFERENCIA DOS ETAPAS")
+    print("="*60)
+
+    model = TwoStageRebarModel()
+    model.load_models()
+    rows = feature_dicts(N_ROWS)
+    print(f"✓ Filas evaluadas: {len(rows)}")
+
+    # Validar equivalencia
+    mismatches = 0
+    for row in rows:
+        fast = model.predict_full_price(row)
+        reference = predict_full_price_reference(model, row)
+        if fast != reference:
+            mismatches += 1
+    print(f"✓ Resultados idénticos: {len(rows) - mismatches}/{len(rows)}")
+
+    reference_us = time_path(lambda row: predict_full_price_reference(model, row), rows)
+    fast_us = time_path(model.predict_full_price, rows)
+
+    print(f"\n{'Ruta':<30}{'µs/llamada':>12}")
+    print(f"{'pandas (referencia)':<30}{reference_us:>12.1f}")
+    print(f"{'plan NumPy':<30}{fast_us:>12.1f}")
+    print(f"\n🚀 Speedup: {reference_us / fast_us:.1f}x")
+
+    batch_ok = benchmark_batch(model)
+
+    return mismatches == 0 and batch_ok
+
+
+if __name__ == "__main__":
+    main()
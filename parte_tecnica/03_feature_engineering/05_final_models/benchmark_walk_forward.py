@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK WALK-FORWARD
+1. Equivalencia: test_cross_validation (motor con los folds de
+   TimeSeriesSplit(5)) da las mismas métricas que el loop original
+   (test_cross_validation_reference, en este módulo).
+2. Escalamiento: backtest de N_ORIGINS orígenes rolling con las dos etapas
+   del modelo (RF LME + Ridge premium) con 1 worker y con 2; reporta la
+   parte serial (preprocesamiento por fold en el proceso principal), que
+   acota el speedup con más cores.
+3. Estimadores: two-stage, RF fallback (datos crudos) y ensemble en pocos
+   orígenes expanding, con la tabla transmitida a un CSV.
+
+Uso: python benchmark_walk_forward.py [n_origins]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from final_robust_model import FallbackPredictor
+from OVERFITTING_VALIDATION import OverfittingValidator
+from robust_model_ensemble import RobustModelEnsemble
+from TWO_STAGE_FINAL_MODEL import TwoStageRebarModel
+from walk_forward import ModelSpec, fit_preprocessing, make_origins, summarize, walk_forward
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import load_features
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+N_ORIGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+ROLLING_TRAIN = 500
+FEATURES = list(RobustModelEnsemble().all_features)
+CV_METRICS = ['mean_train', 'mean_cv', 'std_cv', 'overfitting_gap']
+
+
+def load_xy():
+    df = load_features(columns=FEATURES + ['target_mexico_price'])
+    df = df[df['target_mexico_price'].notna()]
+    return df[FEATURES], df['target_mexico_price']
+
+
+def test_cross_validation_reference(validator, X, y):
+    """test_cross_validation original: folds en serie, imputer/scaler por fold y modelo"""
+
+    print("\n🔍 TEST 2: CROSS-VALIDATION TEMPORAL")
+    print("="*50)
+
+    # Preparar datos
+    valid_mask = y.notna()
+    X_valid = X[valid_mask]
+    y_valid = y[valid_mask]
+
+    if len(X_valid) < 100:
+        print("⚠️ Datos insuficientes para CV")
+        return {}
+
+    # Time Series Cross-Validation
+    tscv = TimeSeriesSplit(n_splits=5)
+
+    models = {
+        'linear': LinearRegression(),
+        'ridge': Ridge(alpha=1.0),
+        'rf_current': RandomForestRegressor(n_estimators=100, max_depth=5, random_state=42),
+    }
+
+    results = {}
+
+    for name, model in models.items():
+        print(f"\n📊 Evaluando {name}:")
+
+        # Preparar pipeline
+        imputer = SimpleImputer(strategy='mean')
+        scaler = StandardScaler()
+
+        cv_scores = []
+        train_scores = []
+
+        for fold, (train_idx, test_idx) in enumerate(tscv.split(X_valid)):
+            X_train_fold = X_valid.iloc[train_idx]
+            X_test_fold = X_valid.iloc[test_idx]
+            y_train_fold = y_valid.iloc[train_idx]
+            y_test_fold = y_valid.iloc[test_idx]
+
+            # Procesar
+            X_train_imp = imputer.fit_transform(X_train_fold)
+            X_test_imp = imputer.transform(X_test_fold)
+
+            X_train_scaled = scaler.fit_transform(X_train_imp)
+            X_test_scaled = scaler.transform(X_test_imp)
+
+            # Entrenar y evaluar
+            model.fit(X_train_scaled, y_train_fold)
+
+            y_pred_train = model.predict(X_train_scaled)
+            y_pred_test = model.predict(X_test_scaled)
+
+            mape_train = np.mean(np.abs((y_train_fold - y_pred_train) / y_train_fold)) * 100
+            mape_test = np.mean(np.abs((y_test_fold - y_pred_test) / y_test_fold)) * 100
+
+            train_scores.append(mape_train)
+            cv_scores.append(mape_test)
+
+            print(f"  Fold {fold+1}: Train {mape_train:.2f}% | Test {mape_test:.2f}%")
+
+        mean_train = np.mean(train_scores)
+        mean_cv = np.mean(cv_scores)
+        std_cv = np.std(cv_scores)
+        gap = mean_cv - mean_train
+
+        results[name] = {
+            'mean_train': mean_train,
+            'mean_cv': mean_cv,
+            'std_cv': std_cv,
+            'overfitting_gap': gap,
+            'is_stable': std_cv < 1.0,  # Baja variabilidad
+            'is_overfitting': gap > 2.0
+        }
+
+        print(f"  📊 Promedio: Train {mean_train:.2f}% | CV {mean_cv:.2f}% ± {std_cv:.2f}% | Gap {gap:+.2f}%")
+        print(f"  ✅ Estable: {'Sí' if std_cv < 1.0 else 'No'} | Overfitting: {'⚠️ Sí' if gap > 2.0 else '✅ No'}")
+
+    validator.results['cross_validation'] = results
+    return results
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - WALK-FORWARD")
+    print("="*80)
+    X, y = load_xy()
+    print(f"✓ {len(X):,} filas x {len(X.columns)} features ({X.index.min().date()} a {X.index.max().date()})")
+
+    # 1. Equivalencia con la CV original
+    validator = OverfittingValidator()
+    start = time.perf_counter()
+    expected = test_cross_validation_reference(validator, X, y)
+    ref_s = time.perf_counter() - start
+    start = time.perf_counter()
+    results = validator.test_cross_validation(X, y, max_workers=2)
+    engine_s = time.perf_counter() - start
+    identical = list(results) == list(expected) and all(
+        np.allclose([results[name][k] for k in CV_METRICS], [expected[name][k] for k in CV_METRICS], rtol=0, atol=1e-12)
+        for name in expected
+    )
+    print(f"\n1. TimeSeriesSplit(5) x {len(expected)} modelos: original {ref_s:.1f}s | motor (2 workers) {engine_s:.1f}s "
+          f"| métricas idénticas: {identical}")
+
+    # 2. Escalamiento con los orígenes
+    two_stage = [ModelSpec('two_stage_lme', TwoStageRebarModel.make_lme_regressor),
+                 ModelSpec('two_stage_premium', TwoStageRebarModel.make_premium_regressor)]
+    origins = make_origins(len(X), n_origins=N_ORIGINS, window='rolling', train_size=ROLLING_TRAIN)
+    start = time.perf_counter()
+    for origin in origins:
+        fit_preprocessing(X, origin)
+    serial_s = time.perf_counter() - start
+
+    print(f"\n2. {len(origins)} orígenes rolling ({ROLLING_TRAIN} filas de train, t+1) x {len(two_stage)} modelos")
+    print(f"{'workers':>8}{'pared s':>10}{'trabajo s':>11}{'speedup':>9}")
+    wall = {}
+    tables = {}
+    for workers in (1, 2):
+        start = time.perf_counter()
+        tables[workers] = walk_forward(X, y, two_stage, origins, max_workers=workers)
+        wall[workers] = time.perf_counter() - start
+        print(f"{workers:>8}{wall[workers]:>10.1f}{tables[workers]['fit_seconds'].sum():>11.1f}"
+              f"{wall[1] / wall[workers]:>8.2f}x")
+    same_parallel = tables[1][['mape_train', 'mape_test']].equals(tables[2][['mape_train', 'mape_test']])
+    serial_fraction = serial_s / wall[1]
+    print(f"   parte serial (imputer + scaler de {len(origins)} folds en el proceso principal): "
+          f"{serial_s:.2f}s = {serial_fraction:.1%}")
+    print(f"   speedup ideal (Amdahl) con 2 / 4 / 8 cores: "
+          + " / ".join(f"{1 / (serial_fraction + (1 - serial_fraction) / n):.1f}x" for n in (2, 4, 8)))
+    print(f"🧵 {os.cpu_count()} CPU(s) en esta máquina: con 1 core los workers sólo se turnan")
+    print(f"✓ 1 y 2 workers dan la misma tabla: {same_parallel}")
+
+    # 3. Todos los estimadores del repo, tabla transmitida a CSV
+    all_models = two_stage + [
+        ModelSpec('rf_fallback', FallbackPredictor, preprocessed=False),
+        ModelSpec('ensemble', RobustModelEnsemble.create_voting_ensemble),
+    ]
+    origins = make_origins(len(X), n_origins=6, horizon=20, window='expanding', min_train=2000)
+    with tempfile.TemporaryDirectory() as tmp:
+        results_path = Path(tmp) / "walk_forward.csv"
+        start = time.perf_counter()
+        table = walk_forward(X, y, all_models, origins, max_workers=2, results_path=results_path)
+        streamed = len(pd.read_csv(results_path))
+    print(f"\n3. {len(origins)} orígenes expanding (t+1..t+20) x {len(all_models)} estimadores en "
+          f"{time.perf_counter() - start:.1f}s, {streamed} filas en el CSV")
+    print(summarize(table)[['folds', 'mean_train', 'mean_test', 'std_test', 'errors']].round(3).to_string())
+    no_errors = table['error'].isna().all() and streamed == len(table)
+
+    ok = identical and same_parallel and no_errors
+    print(f"\n✓ Equivalente a la CV original, determinista y sin errores: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
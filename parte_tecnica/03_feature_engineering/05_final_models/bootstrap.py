@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+BOOTSTRAP EXECUTOR - remuestreo por bloques en un pool de procesos
+
+Los ajustes de test_feature_importance_stability (una réplica bootstrap)
+y de test_learning_curves (una réplica x un tamaño de muestra) son
+independientes; aquí corren repartidos en procesos:
+
+- Block bootstrap (moving blocks): bloques contiguos de block_size filas
+  conservan la autocorrelación de la serie diaria, que un bootstrap i.i.d.
+  rompe. Default: n^(1/3) filas.
+- Las matrices de entrenamiento viven en multiprocessing.shared_memory:
+  cada worker las mapea una vez (initializer) en vez de recibir una copia
+  pickleada por tarea. Las tareas sólo llevan índices de réplica.
+- Cada réplica tiene su propia semilla (SeedSequence.spawn), y cada parte
+  de una réplica partida (parts > 1) un hijo de esa semilla, así que el
+  resultado no depende del número de workers ni del orden de ejecución.
+- Intervalos de confianza por percentiles sobre las réplicas.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+TASKS_PER_WORKER = 4   # Réplicas agrupadas en ~4 tareas por worker (menos overhead por tarea)
+
+# fn(arrays, index, rng) -> vector de estadísticos; rng None = muestra original (estimación puntual)
+# Con parts > 1 se llama fn(arrays, index, rng, part=p) y devuelve sólo los estadísticos de la parte p
+ReplicateFn = Callable[..., np.ndarray]
+# (réplica, parte o None, semilla o None para la estimación puntual)
+Task = Tuple[int, Optional[int], Optional[np.random.SeedSequence]]
+
+
+class SharedArraySpec(NamedTuple):
+    """Lo necesario para mapear un array compartido desde otro proceso"""
+    shm_name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SharedArrays:
+    """Arrays NumPy copiados una vez a memoria compartida (usar como context manager)"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._segments: List[SharedMemory] = []
+        self.specs: Dict[str, SharedArraySpec] = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+            self._segments.append(shm)
+            self.specs[name] = SharedArraySpec(shm.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_WORKER_ARRAYS: Dict[str, np.ndarray] = {}
+_WORKER_SEGMENTS: List[SharedMemory] = []
+
+
+def _init_worker(specs: Dict[str, SharedArraySpec]):
+    """Mapear los arrays compartidos (solo lectura) una vez por proceso"""
+    for name, spec in specs.items():
+        shm = SharedMemory(name=spec.shm_name)
+        _WORKER_SEGMENTS.append(shm)
+        view = np.ndarray(spec.shape, np.dtype(spec.dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        _WORKER_ARRAYS[name] = view
+
+
+def _evaluate(fn: ReplicateFn, arrays: Dict[str, np.ndarray], tasks: List[Task]) -> List[np.ndarray]:
+    results = []
+    for index, part, seed in tasks:
+        rng = None if seed is None else np.random.default_rng(seed)
+        kwargs = {} if part is None else {'part': part}
+        results.append(np.asarray(fn(arrays, index, rng, **kwargs), dtype=float))
+    return results
+
+
+def _run_chunk(fn: ReplicateFn, tasks: List[Task]) -> List[np.ndarray]:
+    """Tarea del pool: un grupo de (réplica, parte) sobre los arrays compartidos"""
+    return _evaluate(fn, _WORKER_ARRAYS, tasks)
+
+
+def _tasks(n_replicates: int, seed: int, include_point: bool, parts: int) -> List[Task]:
+    """Una tarea por réplica, o por (réplica, parte) con semillas hijas si parts > 1"""
+    seeds = np.random.SeedSequence(seed).spawn(n_replicates)
+    replicates = ([(0, None)] if include_point else []) + list(enumerate(seeds))
+    if parts == 1:
+        return [(index, None, rep_seed) for index, rep_seed in replicates]
+    tasks = []
+    for index, rep_seed in replicates:
+        part_seeds = [None] * parts if rep_seed is None else rep_seed.spawn(parts)
+        tasks.extend((index, part, part_seed) for part, part_seed in enumerate(part_seeds))
+    return tasks
+
+
+def default_block_size(n_rows: int) -> int:
+    """Regla n^(1/3) para el largo de bloque"""
+    return max(1, int(round(n_rows ** (1 / 3))))
+
+
+def block_bootstrap_indices(n_rows: int, block_size: int, rng: np.random.Generator) -> np.ndarray:
+    """Moving block bootstrap: bloques contiguos con inicio uniforme, truncado a n_rows"""
+    block_size = min(max(1, block_size), n_rows)
+    n_blocks = -(-n_rows // block_size)
+    starts = rng.integers(0, n_rows - block_size + 1, size=n_blocks)
+    return (starts[:, None] + np.arange(block_size)).ravel()[:n_rows]
+
+
+def run_replicates(arrays: Dict[str, np.ndarray], fn: ReplicateFn, n_replicates: int, seed: int = 42,
+                   include_point: bool = False, max_workers: Optional[int] = None,
+                   parts: int = 1) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    Ejecutar n_replicates réplicas de fn (más la estimación puntual si include_point)
+
+    fn debe ser picklable (función de módulo o partial). Devuelve
+    (punto, réplicas) con réplicas de forma (n_replicates, k) en orden de
+    índice.
+
+    parts > 1 parte cada réplica (y el punto) en tareas independientes
+    fn(..., part=p), cada una con m estadísticos; el vector de la réplica
+    queda agrupado por estadístico: [est_0 de las partes 0..P-1, est_1 ...].
+    """
+    parts = max(1, parts)
+    tasks = _tasks(n_replicates, seed, include_point, parts)
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+    start = time.perf_counter()
+
+    if max_workers == 1:
+        results = _evaluate(fn, arrays, tasks)
+    else:
+        chunk_size = max(1, -(-len(tasks) // (max_workers * TASKS_PER_WORKER)))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+        with SharedArrays(arrays) as shared:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(shared.specs,)) as pool:
+                results = [row for chunk in pool.map(partial(_run_chunk, fn), chunks) for row in chunk]
+
+    if parts > 1:
+        # (réplica, parte, estadístico) -> por réplica, estadístico mayor
+        results = [np.stack(results[i:i + parts], axis=1).ravel() for i in range(0, len(results), parts)]
+
+    logger.info(f"🎲 {n_replicates} réplicas x {parts} partes en {time.perf_counter() - start:.1f}s "
+                f"({len(tasks)} tareas, {max_workers} workers)")
+    point = results.pop(0) if include_point else None
+    return point, np.vstack(results) if results else np.empty((0, 0))
+
+
+def percentile_ci(samples: np.ndarray, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """Intervalo por percentiles de las réplicas (por columna)"""
+    alpha = (1 - confidence) / 2
+    return (np.nanpercentile(samples, 100 * alpha, axis=0),
+            np.nanpercentile(samples, 100 * (1 - alpha), axis=0))
+
+
+def _mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    return float(np.mean(np.abs((y_true - y_pred) / y_true)) * 100)
+
+
+def importance_replicate(arrays: Dict[str, np.ndarray], index: int, rng: Optional[np.random.Generator],
+                         block_size: int, n_estimators: int = 100, max_depth: int = 5) -> np.ndarray:
+    """Importancias de un RF sobre una réplica block-bootstrap de (X, y) crudos"""
+    X, y = arrays['X'], arrays['y']
+    idx = np.arange(len(X)) if rng is None else block_bootstrap_indices(len(X), block_size, rng)
+    # keep_empty_features: una columna sin datos en la réplica conserva su posición (importancia 0)
+    imputer = SimpleImputer(strategy='mean', keep_empty_features=True)
+    X_boot = StandardScaler().fit_transform(imputer.fit_transform(X[idx]))
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=index, n_jobs=1)
+    model.fit(X_boot, y[idx])
+    return model.feature_importances_
+
+
+def learning_curve_replicate(arrays: Dict[str, np.ndarray], index: int, rng: Optional[np.random.Generator],
+                             sample_sizes: List[int], block_size: int, n_estimators: int = 100,
+                             max_depth: int = 5, random_state: int = 42,
+                             part: Optional[int] = None) -> np.ndarray:
+    """
+    MAPE train/test por tamaño de muestra: [train_1..train_k, test_1..test_k]
+
+    Cada tamaño usa las últimas n filas del train (ya imputado y escalado);
+    en una réplica esa ventana se remuestrea por bloques. Con rng None es
+    la curva original. Con part (run_replicates(parts=len(sample_sizes)))
+    sólo ajusta sample_sizes[part] y devuelve [train, test].
+    """
+    X_train, y_train, X_test, y_test = arrays['X_train'], arrays['y_train'], arrays['X_test'], arrays['y_test']
+    sizes = sample_sizes if part is None else [sample_sizes[part]]
+    train_scores, test_scores = [], []
+    for n_samples in sizes:
+        window = np.arange(len(X_train) - n_samples, len(X_train))
+        if rng is not None:
+            window = window[block_bootstrap_indices(n_samples, block_size, rng)]
+        X_sample, y_sample = X_train[window], y_train[window]
+        model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth,
+                                      random_state=random_state if rng is None else index, n_jobs=1)
+        model.fit(X_sample, y_sample)
+        train_scores.append(_mape(y_sample, model.predict(X_sample)))
+        test_scores.append(_mape(y_test, model.predict(X_test)))
+    return np.array(train_scores + test_scores)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+CANDIDATE RACING - selección de modelos del ensemble bajo presupuesto de tiempo
+
+Successive halving sobre el split de validación: en cada rung todos los
+candidatos vivos se ajustan a la vez (un proceso por candidato) con una
+fracción creciente del train (las filas más recientes), se puntúan con
+MAPE de validación y sólo la mejor 1/eta (nunca menos de min_survivors,
+por default n_candidatos // eta) pasa al siguiente rung. El último rung usa el train completo, así que los
+sobrevivientes salen ya ajustados y el VotingRegressor se arma con ellos
+sin volver a entrenar (prefitted_voting_regressor).
+
+El presupuesto es de reloj: un candidato que no termina su rung antes del
+deadline queda fuera y su proceso se termina. Si el presupuesto se agota a
+mitad de un rung, ganan los modelos del último rung completo.
+"""
+
+import logging
+import math
+import multiprocessing
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import VotingRegressor
+from sklearn.metrics import mean_absolute_percentage_error
+from sklearn.utils import Bunch
+
+from walk_forward import _single_threaded
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_SECONDS = 120.0
+DEFAULT_RUNGS = (0.25, 0.5, 1.0)   # Fracción del train por rung (la última debe ser 1.0)
+MIN_RUNG_ROWS = 60
+
+
+class CandidateFit(NamedTuple):
+    """Resultado de ajustar un candidato en un rung (sale del worker)"""
+    name: str
+    model: Any
+    val_mape: float
+    seconds: float
+    error: Optional[str] = None
+
+
+class CandidateReport(NamedTuple):
+    """Línea del log de la carrera: hasta dónde llegó cada candidato y cuánto presupuesto usó"""
+    name: str
+    status: str                     # 'winner', 'eliminated', 'timeout', 'error'
+    rung: int                       # Último rung completado (-1: ninguno)
+    n_rows: int                     # Filas de train en ese rung
+    val_mape: float
+    seconds: float                  # Segundos de reloj sumados en todos sus rungs
+    budget_share: float             # seconds / budget_seconds
+    error: Optional[str] = None
+
+
+_WORKER_DATA: Dict[str, Any] = {}
+
+
+def _init_worker(X_train: pd.DataFrame, y_train: pd.Series, X_val: pd.DataFrame, y_val: pd.Series):
+    """Train/validación una sola vez por proceso"""
+    logging.disable(logging.INFO)
+    _WORKER_DATA.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+
+def _fit_candidate(name: str, estimator: Any, n_rows: int) -> CandidateFit:
+    """Ajustar un clon con las últimas n_rows filas del train y puntuar en validación (worker)"""
+    start = time.perf_counter()
+    try:
+        model = _single_threaded(clone(estimator))
+        model.fit(_WORKER_DATA['X_train'].iloc[-n_rows:], _WORKER_DATA['y_train'].iloc[-n_rows:])
+        val_mape = float(mean_absolute_percentage_error(_WORKER_DATA['y_val'], model.predict(_WORKER_DATA['X_val'])))
+        if not np.isfinite(val_mape):
+            raise ValueError("MAPE de validación no finito")
+        return CandidateFit(name, model, val_mape, time.perf_counter() - start)
+    except Exception as e:
+        return CandidateFit(name, None, np.nan, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+
+def race_candidates(candidates: Dict[str, Any], X_train: pd.DataFrame, y_train: pd.Series,
+                    X_val: pd.DataFrame, y_val: pd.Series, budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+                    rungs: Sequence[float] = DEFAULT_RUNGS, eta: int = 2, min_survivors: Optional[int] = None,
+                    max_workers: Optional[int] = None) -> Tuple[Dict[str, Any], List[CandidateReport]]:
+    """
+    Carrera de successive halving -> (modelos ganadores ajustados, reporte por candidato)
+
+    candidates: nombre -> estimador sin entrenar (se clona en el worker).
+    max_workers default: un proceso por candidato, todos compiten a la vez.
+    min_survivors default: max(1, n_candidatos // eta); un piso fijo mayor
+    o igual a n / eta haría que ningún rung elimine candidatos.
+    Los ganadores vienen del último rung completado (train completo si el
+    presupuesto alcanzó).
+    """
+    if not rungs or rungs[-1] != 1.0:
+        raise ValueError(f"El último rung debe usar el train completo (1.0): {tuple(rungs)}")
+    max_workers = max(1, min(max_workers or len(candidates), len(candidates)))
+    if min_survivors is None:
+        min_survivors = max(1, len(candidates) // eta)
+    start = time.perf_counter()
+    deadline = start + budget_seconds
+
+    alive = list(candidates)
+    spent = {name: 0.0 for name in candidates}
+    last_fit: Dict[str, CandidateFit] = {}
+    reached: Dict[str, Tuple[int, int]] = {name: (-1, 0) for name in candidates}
+    status: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    winners: Dict[str, CandidateFit] = {}
+
+    logger.info(f"🏁 Carrera de {len(candidates)} candidatos: rungs {list(rungs)}, eta={eta}, "
+                f"min_survivors={min_survivors}, "
+                f"presupuesto {budget_seconds:.0f}s ({max_workers} procesos)")
+
+    with multiprocessing.Pool(max_workers, initializer=_init_worker,
+                              initargs=(X_train, y_train, X_val, y_val)) as pool:
+        for rung, fraction in enumerate(rungs):
+            n_rows = len(X_train) if fraction >= 1.0 else min(len(X_train), max(MIN_RUNG_ROWS, int(fraction * len(X_train))))
+            rung_start = time.perf_counter()
+            pending = {name: pool.apply_async(_fit_candidate, (name, candidates[name], n_rows)) for name in alive}
+
+            finished: Dict[str, CandidateFit] = {}
+            for name, result in pending.items():
+                try:
+                    fit = result.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except multiprocessing.TimeoutError:
+                    spent[name] += time.perf_counter() - rung_start
+                    status[name] = 'timeout'
+                    continue
+                spent[name] += fit.seconds
+                if fit.error:
+                    status[name], errors[name] = 'error', fit.error
+                else:
+                    finished[name] = fit
+                    reached[name] = (rung, n_rows)
+
+            if not finished:
+                # Nadie terminó el rung: ganan los del rung anterior (si hubo)
+                winners = {name: last_fit[name] for name in alive if name in last_fit}
+                logger.warning(f"⚠️ Rung {rung} ({n_rows} filas) sin candidatos completos; "
+                               f"se usan {len(winners)} modelos del rung anterior")
+                break
+
+            ranked = sorted(finished, key=lambda name: finished[name].val_mape)
+            last_fit.update(finished)
+            logger.info(f"   rung {rung} ({n_rows} filas, {time.perf_counter() - rung_start:.1f}s): "
+                        + ", ".join(f"{name} {finished[name].val_mape:.2%}" for name in ranked))
+
+            if rung == len(rungs) - 1 or any(status.get(name) == 'timeout' for name in alive):
+                winners = {name: finished[name] for name in ranked}
+                if rung < len(rungs) - 1:
+                    logger.warning(f"⚠️ Presupuesto agotado en rung {rung}: ganadores ajustados con {n_rows} filas")
+                break
+
+            keep = max(min_survivors, math.ceil(len(ranked) / eta))
+            for name in ranked[keep:]:
+                status[name] = 'eliminated'
+            alive = ranked[:keep]
+        # Al salir, el pool termina los procesos que sigan corriendo (candidatos fuera de tiempo)
+
+    for name in winners:
+        status[name] = 'winner'
+    for name in candidates:
+        status.setdefault(name, 'eliminated')
+
+    reports = []
+    for name in candidates:
+        rung, n_rows = reached[name]
+        val_mape = last_fit[name].val_mape if name in last_fit else np.nan
+        reports.append(CandidateReport(name, status[name], rung, n_rows, val_mape, spent[name],
+                                       spent[name] / budget_seconds if budget_seconds > 0 else np.nan,
+                                       errors.get(name)))
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"⏱️ Carrera lista en {elapsed:.1f}s de {budget_seconds:.0f}s ({elapsed / budget_seconds:.0%} del presupuesto):")
+    for report in sorted(reports, key=lambda r: (r.status != 'winner', r.val_mape if np.isfinite(r.val_mape) else np.inf)):
+        detail = f" - {report.error}" if report.error else ""
+        logger.info(f"   {report.name}: {report.status}, rung {report.rung}, MAPE val = {report.val_mape:.2%}, "
+                    f"{report.seconds:.1f}s ({report.budget_share:.1%} del presupuesto){detail}")
+
+    return {name: fit.model for name, fit in winners.items()}, reports
+
+
+def prefitted_voting_regressor(estimators: List[Tuple[str, Any]], weights: Optional[List[float]] = None) -> VotingRegressor:
+    """VotingRegressor armado con estimadores ya entrenados (sin fit: no re-entrena a los miembros)"""
+    ensemble = VotingRegressor(estimators=estimators, weights=weights)
+    ensemble.estimators_ = [estimator for _, estimator in estimators]
+    ensemble.named_estimators_ = Bunch(**dict(estimators))
+    return ensemble
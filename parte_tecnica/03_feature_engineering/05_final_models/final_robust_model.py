@@ -22,7 +22,9 @@ from pathlib import Path
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
-from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+
+from tiered_cascade import CascadeTier, column_notna, run_cascade
 
 # Configuración
 warnings.filterwarnings('ignore')
@@ -63,76 +65,109 @@ class BaselineRegressor(BaseEstimator, RegressorMixin):
             return predictions
         else:
             return pd.Series(625.0, index=X.index)
+    
+    def predict_rowwise(self, X):
+        """predict() sin ffill/bfill entre filas: igual a predecir cada fila por separado"""
+        if 'lme_sr_m01_lag1' in X.columns:
+            predictions = X['lme_sr_m01_lag1'] * self.mexico_premium * self.adjustment_factor
+            
+            if 'weekday_effect' in X.columns:
+                predictions *= (1 + X['weekday_effect'].fillna(0))
+            if 'seasonality_simple' in X.columns:
+                predictions *= (1 + X['seasonality_simple'].fillna(0))
+                
+            return predictions
+        else:
+            return pd.Series(625.0, index=X.index)
 
 class FallbackPredictor(BaseEstimator, RegressorMixin):
     """Predictor principal con sistema de fallbacks"""
     
     def __init__(self, rf_model=None, baseline_model=None, imputer=None, 
-                 mexico_premium=1.157, fallback_price=625.0):
+                 mexico_premium=1.157, fallback_price=625.0, n_jobs=-1):
         self.rf_model = rf_model
         self.baseline_model = baseline_model
         self.imputer = imputer
         self.mexico_premium = mexico_premium
         self.fallback_price = fallback_price
+        self.n_jobs = n_jobs  # RF por defecto; walk_forward lo fija en 1 dentro de cada worker
         
         self.critical_features = [
             'lme_sr_m01_lag1', 'usdmxn_lag1', 'mexico_premium'
         ]
         
     def fit(self, X, y):
-        # Ya están entrenados individualmente
+        """
+        Entrenar baseline + imputer + RF sobre X, y
+        
+        Siempre re-entrena: de los componentes inyectados (bundle de
+        producción) sólo se conservan los hiperparámetros (se clonan).
+        """
+        self.baseline_model = BaselineRegressor(self.mexico_premium).fit(X, y)
+        self.imputer = clone(self.imputer) if self.imputer is not None else SimpleImputer(strategy='median')
+        X_imputed = pd.DataFrame(
+            self.imputer.fit_transform(X),
+            columns=X.columns,
+            index=X.index
+        )
+        if self.rf_model is not None:
+            self.rf_model = clone(self.rf_model)
+        else:
+            self.rf_model = RandomForestRegressor(
+                n_estimators=200,
+                max_depth=8,
+                min_samples_split=5,
+                min_samples_leaf=3,
+                random_state=42,
+                n_jobs=self.n_jobs
+            )
+        self.rf_model.fit(X_imputed, y)
         return self
         
-    def predict(self, X):
-        """Predicción con fallbacks automáticos"""
-        predictions = pd.Series(index=X.index, dtype=float)
-        levels_used = pd.Series(index=X.index, dtype=str)
+    def predict(self, X, return_level: bool = False):
+        """
+        Predicción con fallbacks automáticos
+        
+        Máscaras de calidad calculadas una vez; cada nivel predice su
+        bloque de filas en una sola llamada (ver tiered_cascade.run_cascade)
+        """
+        tiers = [
+            # NIVEL 1: Random Forest (mejor performance: 1.05% MAPE)
+            CascadeTier(
+                "RF_1.05pct_MAPE",
+                lambda X: X.notna().mean(axis=1).to_numpy() >= 0.8,
+                self._predict_rf_block
+            ),
+            # NIVEL 2: Baseline (1.73% MAPE)
+            CascadeTier(
+                "Baseline_1.73pct_MAPE",
+                lambda X: column_notna(X, 'lme_sr_m01_lag1'),
+                lambda block: self.baseline_model.predict_rowwise(block)
+            ),
+            # NIVEL 3: LME simple
+            CascadeTier(
+                "LME_Simple",
+                lambda X: column_notna(X, 'lme_sr_m01_lag1'),
+                lambda block: block['lme_sr_m01_lag1'].to_numpy() * self.mexico_premium
+            )
+        ]
         
-        for idx in X.index:
-            x_row = X.loc[[idx]]
-            
-            try:
-                # NIVEL 1: Random Forest (mejor performance: 1.05% MAPE)
-                if self._check_data_quality(x_row, threshold=0.8):
-                    x_imputed = pd.DataFrame(
-                        self.imputer.transform(x_row),
-                        columns=x_row.columns,
-                        index=x_row.index
-                    )
-                    pred = self.rf_model.predict(x_imputed)[0]
-                    predictions[idx] = pred
-                    levels_used[idx] = "RF_1.05pct_MAPE"
-                    continue
-            except Exception:
-                pass
-            
-            try:
-                # NIVEL 2: Baseline (1.73% MAPE)
-                if pd.notna(x_row['lme_sr_m01_lag1'].iloc[0]):
-                    pred = self.baseline_model.predict(x_row)[0]
-                    predictions[idx] = pred
-                    levels_used[idx] = "Baseline_1.73pct_MAPE"
-                    continue
-            except Exception:
-                pass
-            
-            try:
-                # NIVEL 3: LME simple
-                lme_price = x_row['lme_sr_m01_lag1'].iloc[0]
-                if pd.notna(lme_price):
-                    pred = lme_price * self.mexico_premium
-                    predictions[idx] = pred
-                    levels_used[idx] = "LME_Simple"
-                    continue
-            except Exception:
-                pass
-            
-            # NIVEL 4: Fallback
-            predictions[idx] = self.fallback_price
-            levels_used[idx] = "Fallback_625USD"
+        # NIVEL 4: Fallback
+        predictions, levels_used = run_cascade(X, tiers, self.fallback_price, "Fallback_625USD")
         
+        if return_level:
+            return predictions, levels_used
         return predictions
     
+    def _predict_rf_block(self, block: pd.DataFrame) -> np.ndarray:
+        """Imputar y predecir un bloque de filas con el RF"""
+        x_imputed = pd.DataFrame(
+            self.imputer.transform(block),
+            columns=block.columns,
+            index=block.index
+        )
+        return self.rf_model.predict(x_imputed)
+    
     def predict_single(self, features_dict: Dict) -> Dict:
         """Predicción para un punto con metadata"""
         X = pd.DataFrame([features_dict])
@@ -155,11 +190,6 @@ class FallbackPredictor(BaseEstimator, RegressorMixin):
             'timestamp': datetime.now().isoformat()
         }
     
-    def _check_data_quality(self, X: pd.DataFrame, threshold: float = 0.8) -> bool:
-        """Verificar calidad de datos"""
-        available_ratio = X.notna().mean().mean()
-        return available_ratio >= threshold
-
 class FinalRobustModel:
     """Modelo final para producción"""
     
@@ -200,37 +230,14 @@ class FinalRobustModel:
         X_train, y_train = features[train_mask], target[train_mask]
         X_val, y_val = features[val_mask], target[val_mask]
         
-        # 3. Entrenar componentes
-        # Baseline
-        baseline = BaselineRegressor(self.MEXICO_PREMIUM)
-        baseline.fit(X_train, y_train)
-        
-        # Random Forest
-        imputer = SimpleImputer(strategy='median')
-        X_train_imputed = pd.DataFrame(
-            imputer.fit_transform(X_train),
-            columns=X_train.columns,
-            index=X_train.index
-        )
-        
-        rf_model = RandomForestRegressor(
-            n_estimators=200,
-            max_depth=8,
-            min_samples_split=5,
-            min_samples_leaf=3,
-            random_state=42,
-            n_jobs=-1
-        )
-        rf_model.fit(X_train_imputed, y_train)
-        
-        # 4. Crear predictor final
+        # 3-4. Entrenar componentes (baseline, imputer mediana, RF) y crear predictor final
         final_predictor = FallbackPredictor(
-            rf_model=rf_model,
-            baseline_model=baseline,
-            imputer=imputer,
             mexico_premium=self.MEXICO_PREMIUM,
             fallback_price=self.FALLBACK_PRICE
-        )
+        ).fit(X_train, y_train)
+        baseline = final_predictor.baseline_model
+        imputer = final_predictor.imputer
+        rf_model = final_predictor.rf_model
         
         # 5. Evaluar
         X_val_imputed = pd.DataFrame(
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+INCREMENTAL UPDATE - actualización online de TwoStageRebarModel
+
+Cuando llega una observación diaria nueva, el modelo se actualiza en vez
+de re-entrenarse:
+
+- Imputer (media): media por columna acumulada con los conteos de valores
+  observados.
+- StandardScaler: media/varianza en streaming (StandardScaler.partial_fit,
+  fórmula de Chan et al.).
+- Premium (Ridge): mínimos cuadrados recursivos (RLS) con factor de olvido
+  sobre coordenadas crudas z = [x imputado, 1]. Se inicializa con la
+  solución exacta del Ridge (P = (ZᵀZ + α·diag(scale²))⁻¹), así que con
+  olvido 1.0 equivale a re-ajustar con todas las filas. Cada día es un paso
+  O(features²); coef_/intercept_ se re-expresan en la escala vigente del
+  scaler, por lo que el plan de inferencia no cambia.
+- LME (RandomForest): bosque rodante con arranque en caliente; se conservan
+  los árboles ajustados y sólo los trees_per_update más viejos se
+  reemplazan por árboles nuevos sobre la ventana reciente. Los árboles no
+  dependen de la escala, así que el scaler LME queda fijo (re-escalar
+  obligaría a mover los umbrales de los árboles existentes).
+
+El estado (θ/P del RLS, conteos, ventana LME) se guarda aparte del modelo,
+en un .npz de arrays planos (save_state / load_state): TWO_STAGE_MODEL.pkl
+sólo lleva objetos sklearn y la API lo carga sin este módulo.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+logger = logging.getLogger(__name__)
+
+FORGETTING_FACTOR = 0.999      # Vida media ≈ 690 días
+LME_TREES_PER_UPDATE = 5
+LME_WINDOW = 250               # Filas recientes para los árboles nuevos
+STATE_FILENAME = 'TWO_STAGE_INCREMENTAL.npz'   # Junto a TWO_STAGE_MODEL.pkl
+
+
+def observed_counts(X) -> np.ndarray:
+    """Valores no-NaN por columna (peso de la media del imputer)"""
+    return (~np.isnan(np.asarray(X, dtype=np.float64))).sum(axis=0)
+
+
+def update_mean_imputer(imputer, counts: np.ndarray, X_new) -> np.ndarray:
+    """Actualizar statistics_ de un SimpleImputer(mean) con filas nuevas; devuelve los conteos nuevos"""
+    X = np.asarray(X_new, dtype=np.float64)
+    seen = ~np.isnan(X)
+    total = counts + seen.sum(axis=0)
+    sums = imputer.statistics_ * counts + np.where(seen, X, 0.0).sum(axis=0)
+    imputer.statistics_ = np.where(total > 0, sums / np.maximum(total, 1), imputer.statistics_)
+    return total
+
+
+class RecursiveLeastSquares:
+    """RLS con factor de olvido sobre z = [x, 1] (θ: coeficientes crudos + intercepto)"""
+
+    def __init__(self, theta: np.ndarray, P: np.ndarray, forgetting: float = FORGETTING_FACTOR):
+        if not 0 < forgetting <= 1:
+            raise ValueError(f"forgetting debe estar en (0, 1]: {forgetting}")
+        self.theta = np.asarray(theta, dtype=np.float64)
+        self.P = np.asarray(P, dtype=np.float64)
+        self.forgetting = forgetting
+        self.n_updates = 0
+
+    @classmethod
+    def from_ridge(cls, model, scaler, X_imputed, forgetting: float = FORGETTING_FACTOR) -> 'RecursiveLeastSquares':
+        """Estado inicial exacto de un Ridge ajustado sobre scaler.transform(X_imputed)"""
+        coef = model.coef_ / scaler.scale_
+        theta = np.append(coef, model.intercept_ - coef @ scaler.mean_)
+        Z = np.column_stack([np.asarray(X_imputed, dtype=np.float64), np.ones(len(X_imputed))])
+        # Penalización α·||coef escalado||² = α·Σ (scale_j·θ_j)²; intercepto libre
+        penalty = np.append(model.alpha * scaler.scale_ ** 2, 0.0)
+        return cls(theta, np.linalg.inv(Z.T @ Z + np.diag(penalty)), forgetting)
+
+    def update(self, x: np.ndarray, y: float) -> float:
+        """Un paso RLS O(d²); devuelve el error a priori"""
+        z = np.append(np.asarray(x, dtype=np.float64), 1.0)
+        Pz = self.P @ z
+        gain = Pz / (self.forgetting + z @ Pz)
+        error = y - z @ self.theta
+        self.theta = self.theta + gain * error
+        P = (self.P - np.outer(gain, Pz)) / self.forgetting
+        self.P = (P + P.T) / 2   # Simetría numérica
+        self.n_updates += 1
+        return float(error)
+
+    def scaled_coefficients(self, scaler) -> Tuple[np.ndarray, float]:
+        """(coef_, intercept_) equivalentes sobre la escala vigente del scaler"""
+        coef = self.theta[:-1]
+        return coef * scaler.scale_, float(self.theta[-1] + coef @ scaler.mean_)
+
+
+def refresh_forest(forest, X: np.ndarray, y: np.ndarray, n_trees: int, random_state: int):
+    """Reemplazar los n_trees árboles más viejos por n_trees nuevos ajustados sobre (X, y)"""
+    n_trees = min(n_trees, len(forest.estimators_))
+    fresh = clone(forest).set_params(n_estimators=n_trees, random_state=random_state, n_jobs=1)
+    fresh.fit(X, y)
+    forest.estimators_ = forest.estimators_[n_trees:] + fresh.estimators_
+    return forest
+
+
+class IncrementalState:
+    """Lo que la actualización diaria necesita además del modelo (se guarda aparte: save_state)"""
+
+    def __init__(self, premium_rls: RecursiveLeastSquares, lme_counts: np.ndarray, premium_counts: np.ndarray,
+                 lme_window_X: pd.DataFrame, lme_window_y: pd.Series,
+                 trees_per_update: int = LME_TREES_PER_UPDATE, window: int = LME_WINDOW):
+        self.premium_rls = premium_rls
+        self.lme_counts = lme_counts
+        self.premium_counts = premium_counts
+        self.lme_window_X = lme_window_X.iloc[-window:]
+        self.lme_window_y = lme_window_y.iloc[-window:]
+        self.trees_per_update = trees_per_update
+        self.window = window
+        self.n_updates = 0
+        self.last_date: Optional[pd.Timestamp] = lme_window_X.index[-1] if len(lme_window_X) else None
+
+    def push_lme(self, X_new: pd.DataFrame, y_new: pd.Series):
+        """Agregar filas a la ventana LME (conserva las últimas window)"""
+        self.lme_window_X = pd.concat([self.lme_window_X, X_new]).iloc[-self.window:]
+        self.lme_window_y = pd.concat([self.lme_window_y, y_new]).iloc[-self.window:]
+
+
+def save_state(state: IncrementalState, path: Union[str, Path]) -> Path:
+    """Guardar el estado como arrays planos (.npz, sin pickle; escritura atómica)"""
+    path = Path(path)
+    tmp = path.with_name(path.stem + '.tmp.npz')
+    last_date = np.datetime64('NaT', 'ns') if state.last_date is None else np.datetime64(state.last_date, 'ns')
+    np.savez(
+        tmp,
+        theta=state.premium_rls.theta,
+        P=state.premium_rls.P,
+        forgetting=np.float64(state.premium_rls.forgetting),
+        rls_updates=np.int64(state.premium_rls.n_updates),
+        lme_counts=np.asarray(state.lme_counts, dtype=np.int64),
+        premium_counts=np.asarray(state.premium_counts, dtype=np.int64),
+        window_X=state.lme_window_X.to_numpy(dtype=np.float64, na_value=np.nan),
+        window_columns=np.asarray(state.lme_window_X.columns, dtype=str),
+        window_index=state.lme_window_X.index.to_numpy(dtype='datetime64[ns]'),
+        window_y=state.lme_window_y.to_numpy(dtype=np.float64),
+        trees_per_update=np.int64(state.trees_per_update),
+        window=np.int64(state.window),
+        n_updates=np.int64(state.n_updates),
+        last_date=last_date,
+    )
+    os.replace(tmp, path)
+    return path
+
+
+def load_state(path: Union[str, Path]) -> IncrementalState:
+    """Reconstruir el IncrementalState guardado con save_state"""
+    with np.load(path, allow_pickle=False) as data:
+        rls = RecursiveLeastSquares(data['theta'], data['P'], float(data['forgetting']))
+        rls.n_updates = int(data['rls_updates'])
+        index = pd.DatetimeIndex(data['window_index'])
+        window_X = pd.DataFrame(data['window_X'], index=index, columns=data['window_columns'].tolist())
+        window_y = pd.Series(data['window_y'], index=index)
+        state = IncrementalState(rls, data['lme_counts'], data['premium_counts'], window_X, window_y,
+                                 int(data['trees_per_update']), int(data['window']))
+        state.n_updates = int(data['n_updates'])
+        last_date = data['last_date'][()]
+        state.last_date = None if np.isnat(last_date) else pd.Timestamp(last_date)
+    return state
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+PREPROCESSING CACHE - imputer/scaler ajustados y matrices transformadas
+
+Cache direccionado por contenido: la llave es el sha256 del contenido de
+X_train y X_test (valores, índice y columnas), el set de features, los
+límites del split (primera/última fecha de train y test) y la receta
+(estrategia de imputación, escalado, versión de sklearn). Mismos datos y
+mismo split -> mismo imputer, scaler y matrices, sin volver a ajustar.
+
+Dos niveles:
+- Memoria (LRU por bytes): folds y tests repetidos dentro de una corrida
+- Disco (outputs/preprocessing_cache, pickle): experimentos repetidos
+  entre corridas; al pasar max_bytes se borran las entradas usadas hace
+  más tiempo (mtime, que se renueva en cada hit)
+
+Cada entrada guarda cuánto costó calcularla; ``summary()`` reporta hit
+rate y tiempo neto ahorrado (costo evitado menos hash + lectura).
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+PREPROCESSING_CACHE_VERSION = 1   # Subir si cambia cómo se preprocesa
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / "outputs" / "preprocessing_cache"
+DEFAULT_MAX_BYTES = 256 * 2**20
+EVICT_TO = 0.9   # Al desalojar se baja al 90% del límite (no re-escanear en cada escritura)
+
+
+class PreprocessedSplit(NamedTuple):
+    """Transformadores ajustados sobre train y matrices ya transformadas"""
+    imputer: SimpleImputer
+    scaler: Optional[StandardScaler]
+    X_train: Optional[np.ndarray]   # None en entradas sólo-transformadores
+    X_test: Optional[np.ndarray]
+
+
+def preprocess(X_train: pd.DataFrame, X_test: Optional[pd.DataFrame] = None,
+               strategy: str = 'mean', scale: bool = True) -> PreprocessedSplit:
+    """Ajustar imputer (+ StandardScaler) sobre train y transformar train/test, sin cache"""
+    imputer = SimpleImputer(strategy=strategy)
+    X_train_t = imputer.fit_transform(X_train)
+    X_test_t = imputer.transform(X_test) if X_test is not None else None
+    scaler = None
+    if scale:
+        scaler = StandardScaler()
+        X_train_t = scaler.fit_transform(X_train_t)
+        X_test_t = scaler.transform(X_test_t) if X_test_t is not None else None
+    return PreprocessedSplit(imputer, scaler, X_train_t, X_test_t)
+
+
+def frame_digest(df: Optional[pd.DataFrame]) -> str:
+    """sha256 de valores, índice, columnas y dtypes"""
+    if df is None:
+        return 'none'
+    h = hashlib.sha256()
+    numeric = all(np.issubdtype(t, np.number) or np.issubdtype(t, np.bool_) for t in df.dtypes)
+    if numeric and isinstance(df.index, pd.DatetimeIndex):
+        # Bytes crudos (más rápido que hash_pandas_object fila por fila)
+        h.update(np.ascontiguousarray(df.to_numpy()).tobytes())
+        h.update(df.index.asi8.tobytes())
+    else:
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    return h.hexdigest()
+
+
+def _bounds(df: Optional[pd.DataFrame]) -> Tuple[str, str]:
+    if df is None or len(df) == 0:
+        return ('', '')
+    return (str(df.index[0]), str(df.index[-1]))
+
+
+def _split_nbytes(split: PreprocessedSplit) -> int:
+    return sum(m.nbytes for m in (split.X_train, split.X_test) if m is not None)
+
+
+def _freeze(split: PreprocessedSplit) -> PreprocessedSplit:
+    """Matrices de solo lectura: un consumidor no puede alterar la entrada cacheada"""
+    for matrix in (split.X_train, split.X_test):
+        if matrix is not None:
+            matrix.flags.writeable = False
+    return split
+
+
+class PreprocessingCache:
+    """Cache de preprocesamiento en memoria + disco con desalojo por tamaño"""
+
+    def __init__(self, root: Union[str, Path, None] = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root is not None else None   # None: sólo memoria
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, Tuple[PreprocessedSplit, float, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None   # Total en disco (se escanea una vez)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = {'memory': 0, 'disk': 0}
+        self.misses = 0
+        self.seconds_saved = 0.0     # Costo de cálculo evitado en hits
+        self.seconds_overhead = 0.0  # Hash + lectura/escritura
+        self.evicted = 0
+
+    # ------------------------------------------------------------------
+    # Llaves y entradas
+    # ------------------------------------------------------------------
+    @staticmethod
+    def key(X_train: pd.DataFrame, X_test: Optional[pd.DataFrame] = None, feature_set: Optional[str] = None,
+            strategy: str = 'mean', scale: bool = True) -> str:
+        """Llave de contenido: datos + set de features + límites del split + receta"""
+        parts = {
+            'train': frame_digest(X_train),
+            'test': frame_digest(X_test),
+            'feature_set': feature_set or list(map(str, X_train.columns)),
+            'bounds': [_bounds(X_train), _bounds(X_test)],
+            'recipe': [strategy, scale, sklearn.__version__, PREPROCESSING_CACHE_VERSION],
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / f"{key[:24]}.pkl"
+
+    def _remember(self, key: str, split: PreprocessedSplit, compute_seconds: float):
+        size = _split_nbytes(split)
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[2]
+        self._memory[key] = (split, compute_seconds, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            _, (_, _, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+
+    def _load(self, key: str, need_matrices: bool) -> Optional[Tuple[PreprocessedSplit, float]]:
+        if key in self._memory:
+            split, compute_seconds, _ = self._memory[key]
+            if need_matrices and split.X_train is None:
+                return None
+            self._memory.move_to_end(key)
+            self.hits['memory'] += 1
+            return split, compute_seconds
+        if self.root is None:
+            return None
+        entry = self._entry(key)
+        try:
+            with open(entry, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Cache ilegible {entry.name}: {e} - se recalcula")
+            return None
+        split = _freeze(payload['split'])
+        if need_matrices and split.X_train is None:
+            return None
+        os.utime(entry)   # LRU en disco
+        self._remember(key, split, payload['compute_seconds'])
+        self.hits['disk'] += 1
+        return split, payload['compute_seconds']
+
+    def _store(self, key: str, split: PreprocessedSplit, compute_seconds: float, meta: Dict):
+        self._remember(key, split, compute_seconds)
+        if self.root is None:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(key)
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(p.stat().st_size for p in self.root.glob("*.pkl"))
+        replaced = entry.stat().st_size if entry.exists() else 0
+        tmp = entry.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, 'wb') as f:
+            pickle.dump({'split': split, 'compute_seconds': compute_seconds, 'meta': meta},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, entry)
+        self._disk_bytes += entry.stat().st_size - replaced
+        if self._disk_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Borrar las entradas de disco menos usadas hasta quedar bajo EVICT_TO x max_bytes"""
+        if self.root is None or not self.root.exists():
+            return
+        entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in self.root.glob("*.pkl")]
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= EVICT_TO * self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evicted += 1
+        self._disk_bytes = total
+
+    def clear(self):
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self.root is not None and self.root.exists():
+            for entry in self.root.glob("*.pkl"):
+                entry.unlink()
+            self._disk_bytes = 0
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def fit_transform(self, X_train: pd.DataFrame, X_test: Optional[pd.DataFrame] = None,
+                      feature_set: Optional[str] = None, strategy: str = 'mean',
+                      scale: bool = True, transformers_only: bool = False) -> PreprocessedSplit:
+        """
+        preprocess() memoizado
+
+        Devuelve copias de imputer/scaler (el consumidor puede guardarlos o
+        re-ajustarlos sin tocar la entrada) y matrices de solo lectura.
+        transformers_only guarda/devuelve sólo imputer y scaler (folds que
+        transforman en otro proceso): entradas chicas en disco.
+        """
+        start = time.perf_counter()
+        key = self.key(X_train, X_test, feature_set, strategy, scale)
+        cached = self._load(key, need_matrices=not transformers_only)
+        if cached is not None:
+            split, compute_seconds = cached
+            lookup_seconds = time.perf_counter() - start
+            self.seconds_saved += compute_seconds
+            self.seconds_overhead += lookup_seconds
+            return split._replace(imputer=copy.deepcopy(split.imputer), scaler=copy.deepcopy(split.scaler))
+
+        hash_seconds = time.perf_counter() - start
+        self.misses += 1
+        compute_start = time.perf_counter()
+        split = _freeze(preprocess(X_train, X_test, strategy, scale))
+        compute_seconds = time.perf_counter() - compute_start
+        if transformers_only:
+            split = split._replace(X_train=None, X_test=None)
+
+        store_start = time.perf_counter()
+        meta = {'feature_set': feature_set, 'train': _bounds(X_train), 'test': _bounds(X_test),
+                'strategy': strategy, 'scale': scale, 'created': pd.Timestamp.now().isoformat()}
+        self._store(key, split, compute_seconds, meta)
+        self.seconds_overhead += hash_seconds + time.perf_counter() - store_start
+        return split._replace(imputer=copy.deepcopy(split.imputer), scaler=copy.deepcopy(split.scaler))
+
+    def stats(self) -> Dict:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            'lookups': lookups,
+            'hits_memory': self.hits['memory'],
+            'hits_disk': self.hits['disk'],
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'seconds_saved': self.seconds_saved,
+            'seconds_overhead': self.seconds_overhead,
+            'net_seconds_saved': self.seconds_saved - self.seconds_overhead,
+            'evicted': self.evicted,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"♻️ Cache preprocesamiento: {s['hits_memory'] + s['hits_disk']}/{s['lookups']} hits "
+                f"({s['hit_rate']:.0%}; memoria {s['hits_memory']}, disco {s['hits_disk']}) | "
+                f"ahorro {s['seconds_saved']*1000:.1f} ms - overhead {s['seconds_overhead']*1000:.1f} ms "
+                f"= {s['net_seconds_saved']*1000:+.1f} ms | desalojos {s['evicted']}")
+
+    def report(self) -> Dict:
+        """Loggear el resumen de la corrida y devolver las estadísticas"""
+        logger.info(self.summary())
+        return self.stats()
+
+
+_DEFAULT_CACHE: Optional[PreprocessingCache] = None
+
+
+def get_default_cache() -> PreprocessingCache:
+    """Cache compartido por todos los scripts de entrenamiento del proceso"""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = PreprocessingCache()
+    return _DEFAULT_CACHE
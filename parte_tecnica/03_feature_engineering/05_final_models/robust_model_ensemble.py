@@ -19,22 +19,36 @@ import pickle
 from pathlib import Path
 
 # ML Libraries
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor, VotingRegressor, GradientBoostingRegressor
 from sklearn.linear_model import Ridge, ElasticNet
-from sklearn.model_selection import TimeSeriesSplit, cross_val_score
 from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import make_pipeline
 # import xgboost as xgb  # Commented out due to OpenMP issues on macOS
 
+from tiered_cascade import CascadeTier, column_notna, run_cascade
+from candidate_racing import DEFAULT_BUDGET_SECONDS, prefitted_voting_regressor, race_candidates
+
+# Feature store columnar (03_feature_engineering/feature_store.py)
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from feature_store import DEFAULT_STORE_PATH, load_features
+
 # Configuración
 warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+ENSEMBLE_ML_MEMBERS = 3   # Modelos ML del VotingRegressor (además del baseline)
+
 class RobustModelEnsemble:
     """Modelo ensemble robusto con sistema de fallbacks de 4 niveles"""
     
-    def __init__(self, features_file: str = "outputs/features_dataset_latest.csv"):
+    def __init__(self, features_file: str = "outputs/features_dataset_latest.csv",
+                 feature_store: Union[str, Path] = DEFAULT_STORE_PATH):
         self.features_file = Path(features_file)
+        self.feature_store = Path(feature_store)
         self.MEXICO_PREMIUM = 1.157  # 15.7% spread calibrado
         self.FALLBACK_PRICE = 625.0  # Último precio conocido USD/ton
         
@@ -60,6 +74,7 @@ class RobustModelEnsemble:
         self.models = {}
         self.ensemble_model = None
         self.fallback_models = {}
+        self.candidate_reports = []  # Log de la carrera de candidatos (candidate_racing)
         
         logger.info("🛡️ RobustModelEnsemble inicializado")
 
@@ -67,11 +82,12 @@ class RobustModelEnsemble:
         """Cargar dataset de features y target"""
         logger.info("📊 Cargando dataset de features...")
         
-        if not self.features_file.exists():
+        if not (self.feature_store / "manifest.json").exists() and not self.features_file.exists():
             raise FileNotFoundError(f"Features dataset no encontrado: {self.features_file}")
         
-        # Cargar dataset completo
-        df = pd.read_csv(self.features_file, index_col=0, parse_dates=True)
+        # Sólo las columnas del modelo (proyección en el feature store; CSV si no existe)
+        df = load_features(columns=self.all_features + ['target_mexico_price'],
+                           store_path=self.feature_store, csv_path=self.features_file)
         
         # Separar features y target
         features = df[self.all_features].copy()
@@ -167,7 +183,8 @@ class RobustModelEnsemble:
         baseline = BaselineModel(self.MEXICO_PREMIUM)
         return baseline
 
-    def create_ml_models(self) -> Dict[str, Any]:
+    @staticmethod
+    def create_ml_models() -> Dict[str, Any]:
         """Crear modelos ML para el ensemble"""
         logger.info("🤖 Creando modelos ML...")
         
@@ -206,70 +223,66 @@ class RobustModelEnsemble:
         logger.info(f"✅ {len(models)} modelos ML creados")
         return models
 
-    def train_ensemble_model(self, splits: Dict) -> VotingRegressor:
-        """Entrenar modelo ensemble con validación temporal"""
+    @staticmethod
+    def create_voting_ensemble() -> VotingRegressor:
+        """VotingRegressor (sin entrenar) con todos los modelos ML; p.ej. para walk_forward"""
+        return VotingRegressor(estimators=list(RobustModelEnsemble.create_ml_models().items()))
+
+    def train_ensemble_model(self, splits: Dict, budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+                             max_workers: Optional[int] = None) -> VotingRegressor:
+        """
+        Entrenar modelo ensemble: carrera de candidatos bajo presupuesto de tiempo
+
+        Los candidatos ML compiten en paralelo con successive halving sobre el
+        split de validación (candidate_racing); la carrera conserva al menos
+        ENSEMBLE_ML_MEMBERS sobrevivientes. Los ganadores salen ajustados con
+        el train completo y el VotingRegressor se arma con ellos sin
+        re-entrenar; si el presupuesto cortó la carrera antes del último rung,
+        los ganadores se re-ajustan con el train completo antes de armarlo.
+        Cada candidato imputa con la mediana del train (el train crudo trae
+        NaN en los lags de la primera fila).
+        """
         logger.info("🚀 Entrenando modelo ensemble...")
         
         train_features = splits['train']['features']
         train_target = splits['train']['target']
         
-        # 1. Crear baseline model
+        # 1. Baseline (rápido, no compite)
         baseline_model = self.create_baseline_model(train_features, train_target)
         baseline_model.fit(train_features, train_target)
         
-        # 2. Crear ML models
-        ml_models = self.create_ml_models()
-        
-        # 3. Entrenar cada modelo y evaluar
-        model_scores = {}
-        trained_models = {}
-        
-        for name, model in ml_models.items():
-            try:
-                # Time series cross validation
-                tscv = TimeSeriesSplit(n_splits=3)
-                scores = cross_val_score(
-                    model, train_features, train_target, 
-                    cv=tscv, scoring='neg_mean_absolute_percentage_error'
-                )
-                
-                # Entrenar en todos los datos de train
-                model.fit(train_features, train_target)
-                
-                model_scores[name] = -scores.mean()  # Convertir a MAPE positivo
-                trained_models[name] = model
-                
-                logger.info(f"   {name}: MAPE = {model_scores[name]:.2%}")
-                
-            except Exception as e:
-                logger.warning(f"⚠️ Error entrenando {name}: {e}")
-                model_scores[name] = 1.0  # MAPE muy alto para exclusión
-        
-        # 4. Seleccionar mejores modelos para ensemble
-        best_models = sorted(model_scores.items(), key=lambda x: x[1])[:3]  # Top 3
-        
-        # 5. Crear ensemble con pesos dinámicos
-        ensemble_estimators = [
-            ('baseline', baseline_model),
-        ]
-        
-        # Agregar mejores ML models
-        for model_name, score in best_models:
-            if score < 0.15:  # Solo si MAPE < 15%
-                ensemble_estimators.append((model_name, trained_models[model_name]))
-        
-        # Crear VotingRegressor
+        # 2. Carrera de candidatos ML
+        candidates = {
+            name: make_pipeline(SimpleImputer(strategy='median'), model)
+            for name, model in self.create_ml_models().items()
+        }
+        trained_models, reports = race_candidates(
+            candidates, train_features, train_target,
+            splits['validation']['features'], splits['validation']['target'],
+            budget_seconds=budget_seconds, min_survivors=ENSEMBLE_ML_MEMBERS, max_workers=max_workers
+        )
+        self.candidate_reports = reports
+        
+        # Ganadores de un rung parcial (presupuesto agotado): re-ajuste con el train completo
+        for report in reports:
+            if report.name in trained_models and report.n_rows < len(train_features):
+                logger.warning(f"⚠️ {report.name} ajustado con {report.n_rows}/{len(train_features)} filas: "
+                               f"re-ajuste con el train completo")
+                trained_models[report.name] = clone(trained_models[report.name]).fit(train_features, train_target)
+        
+        # 3. Hasta ENSEMBLE_ML_MEMBERS ganadores con MAPE de validación < 15%
+        scores = {r.name: r.val_mape for r in reports if r.name in trained_models}
+        best_models = sorted(scores.items(), key=lambda x: x[1])[:ENSEMBLE_ML_MEMBERS]
+        ensemble_estimators = [('baseline', baseline_model)]
+        ensemble_estimators += [(name, trained_models[name]) for name, score in best_models if score < 0.15]
+        
+        # 4. VotingRegressor con los modelos ya ajustados (sin fit)
         if len(ensemble_estimators) > 1:
-            ensemble = VotingRegressor(
-                estimators=ensemble_estimators,
-                weights=None  # Pesos uniformes por simplicidad
-            )
-            ensemble.fit(train_features, train_target)
+            ensemble = prefitted_voting_regressor(ensemble_estimators)
         else:
             # Fallback a solo baseline si ML models fallan
             ensemble = baseline_model
         
-        # Guardar modelos individuales para fallbacks
         self.models['baseline'] = baseline_model
         self.models.update(trained_models)
         self.ensemble_model = ensemble
@@ -293,70 +306,45 @@ class RobustModelEnsemble:
                 self.fallback_price = fallback_price
                 
             def predict(self, X: pd.DataFrame, return_level: bool = False) -> Union[pd.Series, Tuple[pd.Series, str]]:
-                """Predicción con fallbacks en cascada"""
-                predictions = pd.Series(index=X.index, dtype=float)
-                levels_used = pd.Series(index=X.index, dtype=str)
+                """Predicción con fallbacks en cascada (un bloque de filas por nivel)"""
+                tiers = [
+                    # NIVEL 1: Modelo completo (15 features)
+                    CascadeTier(
+                        "level_1_full_model",
+                        lambda X: self._all_notna(X, self.tier1_features + self.tier2_features),
+                        self.ensemble_model.predict
+                    )
+                ]
+                if 'baseline' in self.models:
+                    # NIVEL 2: Solo features críticos (Tier 1)
+                    tiers.append(CascadeTier(
+                        "level_2_critical_only",
+                        lambda X: self._all_notna(X, self.tier1_features),
+                        lambda block: self.models['baseline'].predict(block[self.tier1_features])
+                    ))
+                # NIVEL 3: LME + FX básico (ajuste FX simplificado a 1.0)
+                tiers.append(CascadeTier(
+                    "level_3_lme_fx_basic",
+                    lambda X: column_notna(X, 'lme_sr_m01_lag1'),
+                    lambda block: block['lme_sr_m01_lag1'].to_numpy() * self.mexico_premium
+                ))
                 
-                for idx in X.index:
-                    x_row = X.loc[[idx]]
-                    prediction, level = self._predict_single_row(x_row)
-                    predictions[idx] = prediction
-                    levels_used[idx] = level
+                # NIVEL 4: Último precio conocido
+                predictions, levels_used = run_cascade(X, tiers, self.fallback_price, "level_4_fallback")
                 
                 if return_level:
                     return predictions, levels_used
                 else:
                     return predictions
             
-            def _predict_single_row(self, x_row: pd.DataFrame) -> Tuple[float, str]:
-                """Predicción para una sola fila con fallbacks"""
-                try:
-                    # NIVEL 1: Modelo completo (15 features)
-                    all_features_available = all(pd.notna(x_row[f].iloc[0]) for f in self.tier1_features + self.tier2_features)
-                    
-                    if all_features_available:
-                        prediction = self.ensemble_model.predict(x_row)[0]
-                        return prediction, "level_1_full_model"
-                        
-                except Exception:
-                    pass
-                
-                try:
-                    # NIVEL 2: Solo features críticos (Tier 1)
-                    tier1_available = all(pd.notna(x_row[f].iloc[0]) for f in self.tier1_features)
-                    
-                    if tier1_available and 'baseline' in self.models:
-                        prediction = self.models['baseline'].predict(x_row[self.tier1_features])[0]
-                        return prediction, "level_2_critical_only"
-                        
-                except Exception:
-                    pass
-                
-                try:
-                    # NIVEL 3: LME + FX básico
-                    lme_available = pd.notna(x_row['lme_sr_m01_lag1'].iloc[0])
-                    fx_available = pd.notna(x_row['usdmxn_lag1'].iloc[0])
-                    
-                    if lme_available:
-                        base_price = x_row['lme_sr_m01_lag1'].iloc[0] * self.mexico_premium
-                        
-                        # Ajuste por FX si disponible
-                        if fx_available:
-                            # Ajuste simple por cambio en FX reciente
-                            fx_current = x_row['usdmxn_lag1'].iloc[0]
-                            fx_adjustment = 1.0  # Simplificado para robustez
-                            prediction = base_price * fx_adjustment
-                        else:
-                            prediction = base_price
-                            
-                        return prediction, "level_3_lme_fx_basic"
-                        
-                except Exception:
-                    pass
-                
-                # NIVEL 4: Último precio conocido
-                return self.fallback_price, "level_4_fallback"
-        
+            @staticmethod
+            def _all_notna(X: pd.DataFrame, features: List[str]) -> np.ndarray:
+                """Máscara de filas con todas las features presentes"""
+                mask = np.ones(len(X), dtype=bool)
+                for f in features:
+                    mask &= column_notna(X, f)
+                return mask
+            
         # Configuración de tiers para fallbacks
         tier_config = {
             'tier1': self.tier1_features,
@@ -454,6 +442,7 @@ class RobustModelEnsemble:
                 # Para VotingRegressor, promediar importancias
                 importances_list = []
                 for name, estimator in self.ensemble_model.named_estimators_.items():
+                    estimator = getattr(estimator, '_final_estimator', estimator)  # Pipeline imputer + modelo
                     if hasattr(estimator, 'feature_importances_'):
                         importances_list.append(estimator.feature_importances_)
                 
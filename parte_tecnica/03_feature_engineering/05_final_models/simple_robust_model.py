@@ -16,6 +16,7 @@ from typing import Dict, List, Tuple, Optional, Union, Any
 import json
 import logging
 import pickle
+import sys
 from pathlib import Path
 
 # ML Libraries - Solo las que funcionan bien
@@ -25,6 +26,8 @@ from sklearn.model_selection import TimeSeriesSplit, cross_val_score
 from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
 from sklearn.base import BaseEstimator, RegressorMixin
 
+from preprocessing_cache import get_default_cache, preprocess
+
 # Configuración
 warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -71,7 +74,8 @@ class BaselineRegressor(BaseEstimator, RegressorMixin):
 class SimpleRobustModel:
     """Modelo robusto simplificado con Random Forest + Baseline"""
     
-    def __init__(self, features_file: str = "outputs/features_dataset_latest.csv"):
+    def __init__(self, features_file: str = "outputs/features_dataset_latest.csv",
+                 use_preprocessing_cache: bool = False):
         self.features_file = Path(features_file)
         self.MEXICO_PREMIUM = 1.157
         self.FALLBACK_PRICE = 625.0
@@ -94,6 +98,8 @@ class SimpleRobustModel:
         self.baseline_model = None
         self.rf_model = None
         self.imputer = None
+        # Opt-in (--preprocessing-cache): en una corrida fría el hash cuesta más que el ajuste
+        self.preprocessing_cache = get_default_cache() if use_preprocessing_cache else None
         
         logger.info("🛡️ SimpleRobustModel inicializado")
 
@@ -143,9 +149,11 @@ class SimpleRobustModel:
         self.baseline_model = BaselineRegressor(self.MEXICO_PREMIUM)
         self.baseline_model.fit(X_train, y_train)
         
-        # 2. Preparar datos para Random Forest (sin NaNs)
+        # 2. Preparar datos para Random Forest (sin NaNs; imputer mediana cacheado por split)
+        split = self._impute_split(X_train, X_val)
+        self.imputer = split.imputer
         X_train_imputed = pd.DataFrame(
-            self.imputer.fit_transform(X_train),
+            split.X_train,
             columns=X_train.columns,
             index=X_train.index
         )
@@ -168,6 +176,13 @@ class SimpleRobustModel:
         logger.info("✅ Modelos entrenados exitosamente")
         return results
 
+    def _impute_split(self, X_train: pd.DataFrame, X_val: pd.DataFrame):
+        """Imputer mediana ajustado en train + matrices train/val imputadas (del cache si está activo)"""
+        if self.preprocessing_cache is None:
+            return preprocess(X_train, X_val, strategy='median', scale=False)
+        return self.preprocessing_cache.fit_transform(X_train, X_val, feature_set='simple_robust_15',
+                                                      strategy='median', scale=False)
+
     def _evaluate_models(self, X_train, y_train, X_val, y_val) -> Dict:
         """Evaluar performance de los modelos"""
         logger.info("🔍 Evaluando performance...")
@@ -178,14 +193,15 @@ class SimpleRobustModel:
             'feature_importance': {}
         }
         
-        # Preparar datos para evaluación
+        # Preparar datos para evaluación (mismo split que el entrenamiento: hit en memoria)
+        split = self._impute_split(X_train, X_val)
         X_train_imputed = pd.DataFrame(
-            self.imputer.transform(X_train),
+            split.X_train,
             columns=X_train.columns,
             index=X_train.index
         )
         X_val_imputed = pd.DataFrame(
-            self.imputer.transform(X_val),
+            split.X_test,
             columns=X_val.columns,
             index=X_val.index
         )
@@ -418,8 +434,8 @@ def main():
     logger.info("🚀 Iniciando Simple Robust Model...")
     
     try:
-        # 1. Inicializar modelo
-        model = SimpleRobustModel()
+        # 1. Inicializar modelo (--preprocessing-cache reusa el imputer entre corridas repetidas)
+        model = SimpleRobustModel(use_preprocessing_cache='--preprocessing-cache' in sys.argv)
         
         # 2. Cargar y limpiar datos
         features, target = model.load_and_clean_data()
@@ -434,6 +450,8 @@ def main():
         test_result = test_prediction_example()
         
         logger.info("✅ Entrenamiento completado!")
+        if model.preprocessing_cache is not None:
+            model.preprocessing_cache.report()
         
         # Resumen final
         print("\n🎯 RESUMEN FINAL:")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+TIERED CASCADE - motor de fallbacks vectorizado
+
+Evalúa una cascada de niveles (RF → baseline → LME×premium → constante)
+por bloques: las máscaras de calidad de datos se calculan una sola vez
+sobre todo el frame y cada nivel predice de una vez todas las filas que
+le tocan. Usado por FallbackPredictor y RobustPredictor.
+"""
+
+import logging
+from typing import Callable, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeTier(NamedTuple):
+    """Un nivel de la cascada"""
+    level: str
+    eligible: Callable[[pd.DataFrame], np.ndarray]   # máscara booleana por fila
+    predict: Callable[[pd.DataFrame], np.ndarray]    # predicción para un bloque de filas
+
+
+def _predict_rows_individually(tier: CascadeTier, block: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Reintento fila por fila cuando el bloque completo falla"""
+    values = np.full(len(block), np.nan)
+    ok = np.zeros(len(block), dtype=bool)
+    for i in range(len(block)):
+        try:
+            values[i] = np.asarray(tier.predict(block.iloc[[i]]))[0]
+            ok[i] = True
+        except Exception:
+            pass
+    return values, ok
+
+
+def run_cascade(X: pd.DataFrame, tiers: List[CascadeTier],
+                fallback_value: float, fallback_level: str) -> Tuple[pd.Series, pd.Series]:
+    """
+    Ejecutar la cascada sobre todas las filas de X
+
+    Semántica equivalente al loop por fila con try/except por nivel:
+    una fila pasa al siguiente nivel si no es elegible o si su predicción
+    lanza excepción. Si un bloque falla, sólo ese nivel se reintenta
+    fila por fila para aislar las filas problemáticas.
+
+    Returns:
+        (predictions, levels_used) con el índice de X
+    """
+    n_rows = len(X)
+    predictions = np.full(n_rows, np.nan)
+    levels = np.full(n_rows, fallback_level, dtype=object)
+    pending = np.ones(n_rows, dtype=bool)
+
+    for tier in tiers:
+        if not pending.any():
+            break
+        try:
+            rows = pending & np.asarray(tier.eligible(X), dtype=bool)
+        except Exception as e:
+            logger.debug(f"Nivel {tier.level} sin máscara: {e}")
+            continue
+        if not rows.any():
+            continue
+
+        positions = np.flatnonzero(rows)
+        block = X.iloc[positions]
+        try:
+            values = np.asarray(tier.predict(block), dtype=float)
+            ok = np.ones(len(positions), dtype=bool)
+        except Exception:
+            values, ok = _predict_rows_individually(tier, block)
+
+        done = positions[ok]
+        predictions[done] = values[ok]
+        levels[done] = tier.level
+        pending[done] = False
+
+    predictions[pending] = fallback_value
+
+    return (pd.Series(predictions, index=X.index, dtype=float),
+            pd.Series(levels, index=X.index, dtype=str))
+
+
+def column_notna(X: pd.DataFrame, column: str) -> np.ndarray:
+    """Máscara notna de una columna; False si la columna no existe"""
+    if column not in X.columns:
+        return np.zeros(len(X), dtype=bool)
+    return X[column].notna().to_numpy()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+WALK-FORWARD BACKTEST - motor de validación temporal reutilizable
+
+Orígenes 'expanding' (train desde la primera fila hasta el origen) o
+'rolling' (ventana fija de train_size filas). Cada fold ajusta imputer +
+scaler una sola vez en el proceso principal y todos los modelos del fold
+reusan esa transformación. Las tareas (fold, modelo) corren en un pool de
+procesos: X/y viajan una vez por worker (initializer), no por tarea, y
+cada resultado entra a la tabla (y opcionalmente a un CSV) en cuanto
+termina, en el orden en que terminan.
+
+Un modelo es un ModelSpec: nombre + factory picklable (función o clase a
+nivel de módulo, partial) que devuelve un estimador nuevo con fit/predict.
+Con preprocessed=False el estimador recibe el DataFrame crudo del fold
+(p.ej. FallbackPredictor, que imputa por su cuenta y elige nivel según la
+calidad de cada fila).
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ('expanding', 'rolling')
+MIN_TRAIN_ROWS = 60
+
+
+class WalkForwardOrigin(NamedTuple):
+    """Fold: train = filas [train_start, train_end), test = [train_end, test_end)"""
+    fold: int
+    train_start: int
+    train_end: int
+    test_end: int
+
+
+class ModelSpec(NamedTuple):
+    """Modelo a evaluar en cada fold"""
+    name: str
+    factory: Callable[[], Any]      # Estimador nuevo por tarea (picklable)
+    preprocessed: bool = True       # True: matriz imputada + escalada del fold
+
+
+class FoldPreprocessing(NamedTuple):
+    """Transformación ajustada sobre el train del fold, compartida por sus modelos"""
+    imputer: SimpleImputer
+    scaler: StandardScaler
+
+
+class FoldResult(NamedTuple):
+    """Fila de la tabla de resultados: un modelo en un fold"""
+    fold: int
+    model: str
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp         # Última fecha de train
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+    n_train: int
+    n_test: int
+    mape_train: float
+    mape_test: float
+    fit_seconds: float
+    error: Optional[str] = None
+
+
+def make_origins(n_rows: int, n_origins: Optional[int] = None, horizon: int = 1,
+                 step: Optional[int] = None, window: str = 'expanding',
+                 min_train: int = MIN_TRAIN_ROWS, train_size: Optional[int] = None) -> List[WalkForwardOrigin]:
+    """
+    Orígenes walk-forward que terminan en la última fila
+
+    Cada fold prueba ``horizon`` filas; los orígenes avanzan ``step`` filas
+    (default: horizon, tests sin traslape). Con n_origins se toman los
+    últimos n_origins orígenes posibles. En 'rolling' el train son las
+    train_size filas (default: min_train) previas al origen.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"window debe ser uno de {WINDOWS}: {window!r}")
+    step = step or horizon
+    if window == 'rolling':
+        train_size = train_size or min_train
+        min_train = max(min_train, train_size)
+
+    train_ends = list(range(n_rows - horizon, min_train - 1, -step))[::-1]
+    if n_origins is not None:
+        if n_origins > len(train_ends):
+            logger.warning(f"⚠️ {n_origins} orígenes pedidos, sólo caben {len(train_ends)} "
+                           f"({n_rows} filas, min_train={min_train}, horizon={horizon}, step={step})")
+        train_ends = train_ends[-n_origins:] if n_origins > 0 else []
+
+    return [
+        WalkForwardOrigin(fold, train_end - train_size if window == 'rolling' else 0,
+                          train_end, train_end + horizon)
+        for fold, train_end in enumerate(train_ends)
+    ]
+
+
+def origins_from_splits(splits: Iterable[Tuple[np.ndarray, np.ndarray]]) -> List[WalkForwardOrigin]:
+    """Convertir los folds de un splitter temporal (p.ej. TimeSeriesSplit) en orígenes"""
+    origins = []
+    for fold, (train_idx, test_idx) in enumerate(splits):
+        contiguous = (np.all(np.diff(train_idx) == 1) and np.all(np.diff(test_idx) == 1)
+                      and test_idx[0] == train_idx[-1] + 1)
+        if not contiguous:
+            raise ValueError(f"Fold {fold}: train/test deben ser bloques contiguos y consecutivos")
+        origins.append(WalkForwardOrigin(fold, int(train_idx[0]), int(test_idx[0]), int(test_idx[-1]) + 1))
+    return origins
+
+
+def fit_preprocessing(X: pd.DataFrame, origin: WalkForwardOrigin, cache=None) -> FoldPreprocessing:
+    """Imputer (media) + StandardScaler sobre el train del fold (de cache si se pasa uno)"""
+    if cache is not None:
+        split = cache.fit_transform(X.iloc[origin.train_start:origin.train_end], transformers_only=True)
+        return FoldPreprocessing(split.imputer, split.scaler)
+    imputer = SimpleImputer(strategy='mean')
+    scaler = StandardScaler()
+    scaler.fit(imputer.fit_transform(X.iloc[origin.train_start:origin.train_end]))
+    return FoldPreprocessing(imputer, scaler)
+
+
+def _mape(y_true, y_pred) -> float:
+    y_true = np.asarray(y_true, dtype=float)
+    return float(np.mean(np.abs((y_true - np.asarray(y_pred, dtype=float)) / y_true)) * 100)
+
+
+def _single_threaded(model):
+    """n_jobs=1 en el estimador (y sus miembros): el paralelismo lo pone el pool"""
+    if hasattr(model, 'get_params'):
+        n_jobs = [p for p in model.get_params() if p == 'n_jobs' or p.endswith('__n_jobs')]
+        if n_jobs:
+            model.set_params(**{p: 1 for p in n_jobs})
+    return model
+
+
+_WORKER_DATA: Dict[str, Union[pd.DataFrame, pd.Series]] = {}
+
+
+def _init_worker(X: pd.DataFrame, y: pd.Series, quiet: bool = True):
+    """X/y una sola vez por proceso"""
+    if quiet:
+        logging.disable(logging.INFO)
+    _WORKER_DATA['X'], _WORKER_DATA['y'] = X, y
+
+
+def _run_task(origin: WalkForwardOrigin, spec: ModelSpec, prep: Optional[FoldPreprocessing]) -> FoldResult:
+    """Ajustar y evaluar un modelo en un fold (corre en el worker)"""
+    X, y = _WORKER_DATA['X'], _WORKER_DATA['y']
+    X_train = X.iloc[origin.train_start:origin.train_end]
+    X_test = X.iloc[origin.train_end:origin.test_end]
+    y_train = y.iloc[origin.train_start:origin.train_end]
+    y_test = y.iloc[origin.train_end:origin.test_end]
+
+    mape_train = mape_test = np.nan
+    error = None
+    start = time.perf_counter()
+    try:
+        if spec.preprocessed:
+            X_train = prep.scaler.transform(prep.imputer.transform(X_train))
+            X_test = prep.scaler.transform(prep.imputer.transform(X_test))
+        model = _single_threaded(spec.factory())
+        model.fit(X_train, y_train)
+        mape_train = _mape(y_train, model.predict(X_train))
+        mape_test = _mape(y_test, model.predict(X_test))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    return FoldResult(origin.fold, spec.name, y_train.index[0], y_train.index[-1],
+                      y_test.index[0], y_test.index[-1], len(y_train), len(y_test),
+                      mape_train, mape_test, time.perf_counter() - start, error)
+
+
+def iter_walk_forward(X: pd.DataFrame, y: pd.Series, models: List[ModelSpec],
+                      origins: List[WalkForwardOrigin], max_workers: Optional[int] = None,
+                      cache=None) -> Iterator[FoldResult]:
+    """
+    Resultados (fold, modelo) en el orden en que terminan
+
+    max_workers=1 corre en este proceso (sin pool, en orden fold-modelo).
+    y no debe tener NaN: filtrar filas sin target antes de generar orígenes.
+    cache (PreprocessingCache) reusa el imputer/scaler de folds ya vistos.
+    """
+    if y.isna().any():
+        raise ValueError("y tiene NaN: filtrar filas sin target antes del walk-forward")
+    if len(X) != len(y):
+        raise ValueError(f"X ({len(X)}) e y ({len(y)}) con distinto número de filas")
+    max_workers = max_workers or os.cpu_count() or 1
+    needs_prep = any(spec.preprocessed for spec in models)
+
+    def tasks():
+        for origin in origins:
+            prep = fit_preprocessing(X, origin, cache) if needs_prep else None
+            for spec in models:
+                yield origin, spec, prep if spec.preprocessed else None
+
+    if max_workers == 1:
+        _init_worker(X, y, quiet=False)
+        try:
+            for task in tasks():
+                yield _run_task(*task)
+        finally:
+            _WORKER_DATA.clear()
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = [pool.submit(_run_task, *task) for task in tasks()]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def walk_forward(X: pd.DataFrame, y: pd.Series, models: List[ModelSpec], origins: List[WalkForwardOrigin],
+                 max_workers: Optional[int] = None, results_path: Optional[Union[str, Path]] = None,
+                 cache=None) -> pd.DataFrame:
+    """
+    Backtest walk-forward completo -> tabla (una fila por fold y modelo)
+
+    Con results_path cada resultado se agrega al CSV apenas termina, así
+    un backtest largo interrumpido conserva los folds ya evaluados.
+    """
+    logger.info(f"🔁 Walk-forward: {len(origins)} folds x {len(models)} modelos "
+                f"({max_workers or os.cpu_count()} workers)")
+    start = time.perf_counter()
+    rows = []
+    if results_path is not None:
+        results_path = Path(results_path)
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(columns=FoldResult._fields).to_csv(results_path, index=False)
+
+    for result in iter_walk_forward(X, y, models, origins, max_workers, cache):
+        rows.append(result)
+        if result.error:
+            logger.warning(f"⚠️ Fold {result.fold} {result.model}: {result.error}")
+        if results_path is not None:
+            pd.DataFrame([result]).to_csv(results_path, mode='a', header=False, index=False)
+
+    table = pd.DataFrame(rows, columns=FoldResult._fields)
+    table = table.sort_values(['fold', 'model'], kind='stable').reset_index(drop=True)
+    logger.info(f"✅ Walk-forward listo en {time.perf_counter() - start:.1f}s "
+                f"({int(table['error'].notna().sum())} tareas con error)")
+    return table
+
+
+def summarize(table: pd.DataFrame) -> pd.DataFrame:
+    """Resumen por modelo: MAPE medio train/test, dispersión y gap de overfitting"""
+    ok = table[table['error'].isna()]
+    summary = ok.groupby('model', sort=False).agg(
+        folds=('fold', 'size'),
+        mean_train=('mape_train', 'mean'),
+        mean_test=('mape_test', 'mean'),
+        std_test=('mape_test', lambda s: float(np.std(s))),
+        fit_seconds=('fit_seconds', 'sum'),
+    )
+    summary['overfitting_gap'] = summary['mean_test'] - summary['mean_train']
+    summary['errors'] = table.groupby('model', sort=False)['error'].count().reindex(summary.index)
+    return summary
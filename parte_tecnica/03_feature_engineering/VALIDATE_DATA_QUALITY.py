@@ -8,6 +8,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from feature_store import FeatureStore, load_features
+
 def validate_data_quality():
     """Validación completa de calidad de datos"""
     
@@ -20,11 +22,11 @@ def validate_data_quality():
     print("-"*80)
     
     features_path = "outputs/features_dataset_latest.csv"
-    if not Path(features_path).exists():
-        print(f"❌ ERROR: {features_path} no encontrado")
+    if not FeatureStore().exists() and not Path(features_path).exists():
+        print(f"❌ ERROR: feature store ni {features_path} encontrados")
         return False
     
-    df = pd.read_csv(features_path, index_col=0)
+    df = load_features(csv_path=features_path)
     print(f"✅ Dataset cargado: {len(df)} registros, {len(df.columns)} columnas")
     print(f"   Período: {df.index.min()} a {df.index.max()}")
     print()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+MICRO-BENCHMARK PLAN DE TIPOS
+Reporte de memoria por columna del dataset de features antes y después de
+apply_dtype_plan, tamaño en disco CSV vs feature store compacto (directorio
+temporal) y verificación de que la vista expandida reproduce el CSV:
+exacta en precios y niveles (float64), dentro de la precisión de float32
+en el resto.
+"""
+
+import logging
+import os
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from feature_dtypes import apply_dtype_plan, expand_features, memory_report
+from feature_store import LATEST_CSV_PATH, FeatureStore
+
+warnings.filterwarnings('ignore')
+logging.disable(logging.INFO)
+
+
+def directory_size(path: Path) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    print("⏱️ MICRO-BENCHMARK - PLAN DE TIPOS COMPACTOS")
+    print("="*80)
+
+    df = pd.read_csv(LATEST_CSV_PATH, index_col=0, parse_dates=True)
+    compact = apply_dtype_plan(df)
+    report = memory_report(df, compact)
+
+    print(f"✓ Dataset: {len(df):,} filas x {len(df.columns)} columnas")
+    print(f"✓ Constantes en metadata: {compact.attrs['constants']}\n")
+    print(report.to_string(formatters={'ratio': '{:.1f}x'.format}))
+
+    expanded = expand_features(compact)
+    same_columns = list(expanded.columns) == list(df.columns)
+    max_error = max(
+        float(np.nanmax(np.abs(expanded[col].to_numpy(dtype=float) - df[col].to_numpy(dtype=float))
+                        / np.maximum(np.abs(df[col].to_numpy(dtype=float)), 1e-12), initial=0.0))
+        for col in df.columns
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(Path(tmp) / "feature_store")
+        store.write(compact)
+        store_bytes = directory_size(store.root)
+        round_trip = store.read().equals(compact)
+
+    total = report.loc['TOTAL']
+    print(f"\n🚀 Memoria residente: {total['bytes'] / 1e6:.2f} MB -> {total['compact_bytes'] / 1e6:.2f} MB "
+          f"({total['ratio']:.1f}x, {total['bytes'] / len(df):.0f} -> {total['compact_bytes'] / len(df):.0f} bytes/fila)")
+    print(f"💾 Disco: CSV {os.path.getsize(LATEST_CSV_PATH) / 1e3:.0f} KB -> feature store {store_bytes / 1e3:.0f} KB")
+    print(f"✓ Vista expandida = columnas del CSV: {same_columns} (error relativo máx {max_error:.1e})")
+    print(f"✓ Feature store conserva dtypes y constantes: {round_trip}")
+    return same_columns and round_trip
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+FEATURE DTYPES - plan de tipos compactos para el dataset de features
+
+El pipeline genera todo como float64/int64. El plan declara por columna:
+
+- float64: precios y niveles (LME, USD/MXN, tasa real, target); son lo
+  que publica el snapshot de la API y no se redondean
+- float32: continuas derivadas (retornos, volatilidad, scores) si el cast
+  no pierde más que FLOAT32_RTOL de precisión relativa
+- int8: regímenes y conteos enteros pequeños (-1/0/+1, 1-30 días)
+- flag: booleanos (1 byte en memoria, 1 bit en el feature store)
+- category: conjunto cerrado de valores (códigos int8)
+- constant: mismo valor en todas las filas; sale del frame y queda en
+  ``df.attrs['constants']``
+
+Si una columna no cumple su plan (NaN en un int8, un valor fuera de las
+categorías, una "constante" que varía) se guarda como float32 y se avisa,
+en lugar de perder datos. ``expand_features`` devuelve la vista numérica
+con las constantes como columnas, que es lo que esperan los modelos y el CSV.
+"""
+
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FLOAT32_RTOL = 1e-6
+
+
+class ColumnDtype(NamedTuple):
+    """Tipo compacto de una columna del plan"""
+    kind: str                   # 'float64' | 'float32' | 'int8' | 'flag' | 'category' | 'constant'
+    categories: Tuple = ()      # Sólo para 'category'
+
+
+FLOAT64 = ColumnDtype('float64')
+FLOAT32 = ColumnDtype('float32')
+INT8 = ColumnDtype('int8')
+FLAG = ColumnDtype('flag')
+CONSTANT = ColumnDtype('constant')
+
+
+def category(*values) -> ColumnDtype:
+    """Categoría con valores permitidos (códigos int8)"""
+    return ColumnDtype('category', tuple(values))
+
+
+FEATURE_DTYPE_PLAN: Dict[str, ColumnDtype] = {
+    # Tier 1
+    'lme_sr_m01_lag1': FLOAT64,
+    'usdmxn_lag1': FLOAT64,
+    'mexico_premium': CONSTANT,
+    'lme_volatility_5d': FLOAT32,
+    'lme_momentum_5d': FLOAT32,
+    # Tier 2
+    'contango_indicator': INT8,             # -1 / 0 / +1
+    'rebar_scrap_spread_norm': FLOAT32,
+    'trade_events_impact_7d': FLOAT32,
+    'weekday_effect': category(-0.02, 0.0, 0.01),                # por día de semana
+    'seasonality_simple': category(-0.02, -0.01, 0.01, 0.02),    # por trimestre
+    # Tier 3
+    'real_interest_rate': FLOAT64,
+    'uncertainty_indicator': category(0.2, 0.5, 0.8),   # low / medium / high
+    'market_regime': INT8,                  # bear / neutral / bull
+    'days_to_holiday': INT8,                # 1-30
+    'model_confidence': FLOAT32,
+    # Sets de los modelos (feature_definitions.py)
+    'lme_sr_m01_lag2': FLOAT64,
+    'lme_sr_m01_lag3': FLOAT64,
+    'lme_sr_m01_lag5': FLOAT64,
+    'post_tariff': FLAG,
+    'construction_season': FLAG,
+    'month': INT8,
+    # Calendario e imputación
+    'is_holiday_mx': FLAG,
+    'is_weekend': FLAG,
+    'sr_m01_imputed': FLAG,
+    'sc_m01_imputed': FLAG,
+    'usdmxn_imputed': FLAG,
+    'tiie28_imputed': FLAG,
+    # Target y calidad
+    'target_mexico_price': FLOAT64,
+    'data_quality_score': FLOAT32,
+}
+
+
+def apply_dtype_plan(df: pd.DataFrame, plan: Dict[str, ColumnDtype] = FEATURE_DTYPE_PLAN) -> pd.DataFrame:
+    """
+    Frame compacto según plan; columnas fuera del plan quedan igual
+
+    ``attrs['constants']`` guarda {columna: valor} de las constantes y
+    ``attrs['columns']`` el orden original para expand_features.
+    """
+    data, constants = {}, {}
+    for col in df.columns:
+        spec = plan.get(col)
+        series = df[col]
+        if spec is None:
+            data[col] = series
+            continue
+
+        if spec.kind == 'float64':
+            data[col] = series.astype(np.float64)
+        elif spec.kind == 'constant':
+            values = series.dropna().unique()
+            if len(values) == 1 and len(series.dropna()) == len(series):
+                constants[col] = values[0].item() if hasattr(values[0], 'item') else values[0]
+                continue
+            logger.warning(f"⚠️ {col}: no es constante ({len(values)} valores) - se guarda como float32")
+            data[col] = _as_float32(series)
+        elif spec.kind == 'flag':
+            if series.isna().any() or not series.isin([0, 1]).all():
+                logger.warning(f"⚠️ {col}: valores no booleanos - se guarda como float32")
+                data[col] = _as_float32(series)
+            else:
+                data[col] = series.astype(bool)
+        elif spec.kind == 'int8':
+            values = series.to_numpy(dtype=float)
+            if np.isnan(values).any() or (values != np.round(values)).any() or \
+                    (values.size and (values.min() < -128 or values.max() > 127)):
+                logger.warning(f"⚠️ {col}: no cabe en int8 - se guarda como float32")
+                data[col] = _as_float32(series)
+            else:
+                data[col] = series.astype(np.int8)
+        elif spec.kind == 'category':
+            unknown = ~series.isin(spec.categories) & series.notna()
+            if unknown.any():
+                logger.warning(f"⚠️ {col}: {int(unknown.sum())} valores fuera de {spec.categories} - se guarda como float32")
+                data[col] = _as_float32(series)
+            else:
+                data[col] = pd.Categorical(series, categories=list(spec.categories))
+        else:
+            data[col] = _as_float32(series)
+
+    compact = pd.DataFrame(data, index=df.index)
+    compact.attrs['constants'] = constants
+    compact.attrs['columns'] = list(df.columns)
+    return compact
+
+
+def _as_float32(series: pd.Series) -> pd.Series:
+    """float32 si la precisión alcanza, si no float64"""
+    values = series.to_numpy(dtype=float)
+    values32 = values.astype(np.float32)
+    finite = np.isfinite(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = np.abs(values32[finite].astype(float) - values[finite]) / np.maximum(np.abs(values[finite]), 1e-12)
+    if error.size and (error.max() > FLOAT32_RTOL or not np.isfinite(values32[finite]).all()):
+        logger.warning(f"⚠️ {series.name}: float32 pierde precisión (error {error.max():.1e}) - se deja float64")
+        return pd.Series(values, index=series.index, name=series.name)
+    return pd.Series(values32, index=series.index, name=series.name)
+
+
+def expand_features(df: pd.DataFrame, columns: Optional[list] = None) -> pd.DataFrame:
+    """
+    Vista numérica del frame compacto
+
+    Constantes de vuelta como columnas (en su posición original) y
+    categorías como sus valores; float32/int8/bool se mantienen.
+    """
+    constants = df.attrs.get('constants', {})
+    order = columns or df.attrs.get('columns') or list(df.columns) + [c for c in constants if c not in df.columns]
+
+    data = {}
+    for col in order:
+        if col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype(series.cat.categories.dtype)
+            data[col] = series
+        elif col in constants:
+            data[col] = pd.Series(constants[col], index=df.index)
+        else:
+            raise KeyError(col)
+    return pd.DataFrame(data, index=df.index)
+
+
+def memory_report(original: pd.DataFrame, compact: pd.DataFrame) -> pd.DataFrame:
+    """Bytes por columna antes/después del plan (constantes = 0 bytes)"""
+    before = original.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+    rows = []
+    for col in original.columns:
+        compact_bytes = int(after.get(col, 0))
+        rows.append({
+            'column': col,
+            'dtype': str(original[col].dtype),
+            'compact_dtype': str(compact[col].dtype) if col in compact.columns else 'constant',
+            'bytes': int(before[col]),
+            'compact_bytes': compact_bytes,
+            'ratio': before[col] / compact_bytes if compact_bytes else np.inf
+        })
+    index_bytes = int(original.index.memory_usage(deep=True))
+    rows.append({
+        'column': '(index)', 'dtype': str(original.index.dtype), 'compact_dtype': str(compact.index.dtype),
+        'bytes': index_bytes, 'compact_bytes': int(compact.index.memory_usage(deep=True)), 'ratio': 1.0
+    })
+    report = pd.DataFrame(rows).set_index('column')
+    report.loc['TOTAL'] = ['', '', report['bytes'].sum(), report['compact_bytes'].sum(),
+                           report['bytes'].sum() / report['compact_bytes'].sum()]
+    return report
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+FEATURE STORE - dataset de features columnar particionado por año
+
+Reemplaza los dumps features_dataset_<timestamp>.csv:
+
+    outputs/feature_store/
+        manifest.json                   schema, constantes y particiones
+        year=2025/<hash12>/__index__.npy   fechas (datetime64[ns])
+        year=2025/<hash12>/<columna>.npy   una columna tipada por archivo
+
+Respeta el plan de tipos de feature_dtypes.py: float32/int8 tal cual,
+bools empaquetados a 1 bit, categorías como códigos int8 (categorías en
+el schema) y constantes sólo en el manifest, sin archivo.
+
+- Proyección de columnas: sólo se abren los .npy pedidos
+- Predicado de fechas: el manifest (min/max por partición) descarta años
+  completos y dentro de la partición se corta por searchsorted sobre el
+  índice, con los .npy mapeados en memoria
+- Dedupe: cada partición se identifica por el sha256 de su contenido; si
+  no cambió no se reescribe (una corrida diaria sólo toca el año en curso)
+
+El manifest se reemplaza atómicamente después de escribir las particiones
+nuevas, así un lector nunca ve una partición a medio escribir.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from feature_dtypes import apply_dtype_plan, expand_features
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS_DIR = Path(__file__).resolve().parent / "outputs"
+DEFAULT_STORE_PATH = OUTPUTS_DIR / "feature_store"
+LATEST_CSV_PATH = OUTPUTS_DIR / "features_dataset_latest.csv"
+MANIFEST_NAME = "manifest.json"
+INDEX_FILE = "__index__.npy"
+STORE_VERSION = 2
+
+DateLike = Union[str, datetime, pd.Timestamp, None]
+
+
+class FeatureStore:
+    """Dataset de features en columnas .npy tipadas, una partición por año"""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_STORE_PATH):
+        self.root = Path(root)
+        self.manifest_path = self.root / MANIFEST_NAME
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def manifest(self) -> Dict:
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Feature store versión {manifest.get('version')} no soportada: {self.root}")
+        return manifest
+
+    @property
+    def columns(self) -> List[str]:
+        """Columnas lógicas (incluye constantes) en orden original"""
+        return list(self.manifest()['columns'])
+
+    def _write_manifest(self, manifest: Dict):
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def write(self, df: pd.DataFrame) -> Dict:
+        """
+        Escribir el dataset completo
+
+        Particiones con el mismo hash se conservan tal cual; años que ya
+        no están en df se eliminan.
+
+        Returns:
+            Resumen: particiones escritas, sin cambios y eliminadas
+        """
+        return self._commit(df, replace_years=None)
+
+    def upsert(self, df: pd.DataFrame, replace_from: DateLike = None) -> Dict:
+        """
+        Reemplazar las filas desde replace_from (default: primera fecha de df)
+
+        Sólo se reconstruyen los años que tocan las filas nuevas; el resto
+        de las particiones no se lee. df se castea al schema guardado.
+        """
+        if not self.exists():
+            raise FileNotFoundError(f"Feature store no existe: {self.root} - usar write()")
+
+        replace_from = pd.Timestamp(replace_from if replace_from is not None else df.index.min())
+        manifest = self.manifest()
+        df = _conform(df, manifest)
+        years = {str(y) for y in df.index.year.unique()}
+        years |= {year for year, part in manifest['partitions'].items()
+                  if pd.Timestamp(part['max_date']) >= replace_from}
+
+        keep_until = replace_from - pd.Timedelta(days=1)
+        kept = [self.read(start=f"{year}-01-01", end=min(pd.Timestamp(f"{year}-12-31"), keep_until))
+                for year in sorted(years) if year in manifest['partitions']]
+        kept = [frame for frame in kept if len(frame)]
+        merged = pd.concat(kept + [df]) if kept else df
+        merged.attrs = df.attrs
+        return self._commit(merged, replace_years=years)
+
+    def _commit(self, df: pd.DataFrame, replace_years: Optional[set]) -> Dict:
+        _check_frame(df)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        old_manifest = self.manifest() if self.exists() else None
+        old_partitions = old_manifest['partitions'] if old_manifest else {}
+        schema = {col: _schema_entry(df[col]) for col in df.columns}
+        constants = dict(df.attrs.get('constants', {}))
+        columns = df.attrs.get('columns') or list(df.columns) + [c for c in constants if c not in df.columns]
+        if old_manifest and replace_years is not None and \
+                (old_manifest['schema'] != schema or old_manifest['constants'] != constants):
+            raise ValueError("El schema cambió - usar write() con el dataset completo")
+
+        partitions = dict(old_partitions) if replace_years is not None else {}
+        summary = {'written': [], 'unchanged': [], 'removed': []}
+
+        for year, part_df in df.groupby(df.index.year, sort=True):
+            year = str(year)
+            digest = _partition_hash(part_df)
+            old = old_partitions.get(year)
+            if old is not None and old['sha256'] == digest:
+                partitions[year] = old
+                summary['unchanged'].append(year)
+                continue
+
+            rel_path = f"year={year}/{digest[:12]}"
+            _write_partition(self.root / rel_path, part_df)
+            partitions[year] = {
+                'path': rel_path,
+                'sha256': digest,
+                'rows': len(part_df),
+                'min_date': part_df.index.min().isoformat(),
+                'max_date': part_df.index.max().isoformat()
+            }
+            summary['written'].append(year)
+
+        if replace_years is not None:
+            for year in replace_years - {str(y) for y in df.index.year.unique()}:
+                partitions.pop(year, None)
+        summary['removed'] = sorted(set(old_partitions) - set(partitions))
+
+        self._write_manifest({
+            'version': STORE_VERSION,
+            'index_name': df.index.name,
+            'columns': columns,
+            'schema': schema,
+            'constants': constants,
+            'partitions': dict(sorted(partitions.items())),
+            'rows': sum(part['rows'] for part in partitions.values()),
+            'updated_at': datetime.now().isoformat()
+        })
+
+        # Borrar directorios que ya no referencia el manifest
+        live = {part['path'] for part in partitions.values()}
+        for year, part in old_partitions.items():
+            if part['path'] not in live:
+                shutil.rmtree(self.root / part['path'], ignore_errors=True)
+                parent = (self.root / part['path']).parent
+                if parent.exists() and not any(parent.iterdir()):
+                    parent.rmdir()
+
+        logger.info(f"💾 Feature store {self.root}: escritas {summary['written'] or '-'}, "
+                    f"sin cambios {summary['unchanged'] or '-'}, eliminadas {summary['removed'] or '-'}")
+        return summary
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def read(self, columns: Optional[List[str]] = None, start: DateLike = None,
+             end: DateLike = None) -> pd.DataFrame:
+        """
+        Leer columns en [start, end] (ambos inclusive, None = sin límite)
+
+        Sólo abre las particiones cuyo rango [min_date, max_date] cruza el
+        predicado y, dentro de ellas, sólo los archivos de columns.
+
+        Devuelve el frame compacto: sin columns, las constantes quedan en
+        ``attrs['constants']``; una constante pedida en columns se
+        materializa como columna.
+        """
+        manifest = self.manifest()
+        schema, constants = manifest['schema'], manifest['constants']
+        requested = list(columns) if columns is not None else None
+        missing = [col for col in requested or [] if col not in schema and col not in constants]
+        if missing:
+            raise KeyError(f"Columnas no existen en el feature store: {missing}")
+        columns = [col for col in requested if col in schema] if requested is not None else list(schema)
+
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        index_parts, column_parts = [], {col: [] for col in columns}
+        for part in manifest['partitions'].values():
+            if start is not None and pd.Timestamp(part['max_date']) < start:
+                continue
+            if end is not None and pd.Timestamp(part['min_date']) > end:
+                continue
+
+            part_dir = self.root / part['path']
+            index = np.load(part_dir / INDEX_FILE)
+            lo = np.searchsorted(index, np.datetime64(start, 'ns')) if start is not None else 0
+            hi = np.searchsorted(index, np.datetime64(end, 'ns'), side='right') if end is not None else len(index)
+            if hi <= lo:
+                continue
+
+            index_parts.append(index[lo:hi])
+            for col in columns:
+                path = part_dir / _column_file(col)
+                if schema[col].get('encoding') == 'bitpacked':
+                    values = np.unpackbits(np.load(path), count=len(index))
+                else:
+                    values = np.load(path, mmap_mode='r')
+                column_parts[col].append(np.array(values[lo:hi]))
+
+        index = pd.DatetimeIndex(
+            np.concatenate(index_parts) if index_parts else np.array([], dtype='datetime64[ns]'),
+            name=manifest['index_name']
+        )
+        data = {
+            col: _restore(np.concatenate(column_parts[col]) if index_parts else np.array([]), schema[col])
+            for col in columns
+        }
+
+        if requested is None:
+            df = pd.DataFrame(data, index=index, columns=columns)
+            df.attrs['constants'] = dict(constants)
+            df.attrs['columns'] = list(manifest['columns'])
+            return df
+
+        for col in requested:
+            if col in constants:
+                data[col] = np.full(len(index), constants[col])
+        df = pd.DataFrame(data, index=index, columns=requested)
+        df.attrs['constants'] = {col: value for col, value in constants.items() if col not in requested}
+        return df
+
+    def info(self) -> pd.DataFrame:
+        """Resumen por partición (filas, rango, hash)"""
+        partitions = self.manifest()['partitions']
+        return pd.DataFrame.from_dict(partitions, orient='index')[['rows', 'min_date', 'max_date', 'sha256']]
+
+
+def load_features(columns: Optional[List[str]] = None, start: DateLike = None, end: DateLike = None,
+                  store_path: Union[str, Path] = DEFAULT_STORE_PATH,
+                  csv_path: Union[str, Path] = LATEST_CSV_PATH, compact: bool = False) -> pd.DataFrame:
+    """
+    Features desde el feature store; si todavía no existe, desde el CSV latest
+
+    Por defecto devuelve la vista numérica (expand_features: constantes
+    como columnas, categorías como valores); compact=True deja el frame
+    con el plan de tipos aplicado. Mismo resultado por ambas rutas.
+    """
+    store = FeatureStore(store_path)
+    if store.exists():
+        df = store.read(columns=columns, start=start, end=end)
+    else:
+        logger.warning(f"⚠️ Feature store no encontrado en {store.root} - leyendo {csv_path}")
+        df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        if columns is not None:
+            df = df[list(columns)]
+        df = apply_dtype_plan(df.loc[start:end])
+    return df if compact else expand_features(df, columns)
+
+
+# ----------------------------------------------------------------------
+# Helpers de partición
+# ----------------------------------------------------------------------
+def _check_frame(df: pd.DataFrame):
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise TypeError("El feature store requiere un DatetimeIndex")
+    if df.index.tz is not None:
+        raise TypeError("El feature store guarda fechas sin zona horaria")
+    if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+        raise ValueError("El índice de fechas debe ser creciente y sin duplicados")
+    if df.columns.has_duplicates:
+        raise ValueError("Columnas duplicadas en el dataset de features")
+
+
+def _column_file(column: str) -> str:
+    """Nombre de archivo seguro para la columna"""
+    safe = ''.join(ch if ch.isalnum() or ch in '_-.' else '_' for ch in str(column))
+    if safe != column:
+        safe = f"{safe}-{hashlib.sha1(str(column).encode()).hexdigest()[:8]}"
+    return f"{safe}.npy"
+
+
+def _schema_entry(series: pd.Series) -> Dict:
+    """dtype de la columna y cómo se codifica en disco"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return {'dtype': 'category', 'categories': series.cat.categories.tolist()}
+    if series.dtype == bool:
+        return {'dtype': 'bool', 'encoding': 'bitpacked'}
+    return {'dtype': str(series.dtype)}
+
+
+def _pandas_dtype(entry: Dict):
+    if entry['dtype'] == 'category':
+        return pd.CategoricalDtype(entry['categories'])
+    return entry['dtype']
+
+
+def _conform(df: pd.DataFrame, manifest: Dict) -> pd.DataFrame:
+    """Llevar df (compacto o expandido) al schema y constantes del store"""
+    constants = dict(df.attrs.get('constants', {}))
+    for col in manifest['constants']:
+        if col in df.columns:
+            values = df[col].unique()
+            constants[col] = _python_scalar(values[0]) if len(values) == 1 else None
+    if constants != manifest['constants']:
+        raise ValueError("Las constantes cambiaron - usar write() con el dataset completo")
+
+    stored = [col for col in df.columns if col not in manifest['constants']]
+    if stored != list(manifest['schema']):
+        raise ValueError("Las columnas cambiaron - usar write() con el dataset completo")
+
+    conformed = df[stored].astype({col: _pandas_dtype(entry) for col, entry in manifest['schema'].items()})
+    conformed.attrs = {'constants': constants, 'columns': list(manifest['columns'])}
+    return conformed
+
+
+def _python_scalar(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _to_array(series: pd.Series) -> np.ndarray:
+    """Array para .npy: bools a bits, categorías a códigos, object a texto unicode"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int8)
+    if series.dtype == bool:
+        return np.packbits(series.to_numpy())
+    if series.dtype == object:
+        return series.astype(str).to_numpy(dtype=str)
+    return series.to_numpy()
+
+
+def _restore(values: np.ndarray, entry: Dict):
+    if entry['dtype'] == 'category':
+        return pd.Categorical.from_codes(values.astype(np.int8), categories=entry['categories'])
+    if entry['dtype'] == 'object':
+        return values.astype(object)
+    return values.astype(entry['dtype'], copy=False)
+
+
+def _partition_hash(df: pd.DataFrame) -> str:
+    """sha256 del índice, nombres, schema y bytes de cada columna"""
+    digest = hashlib.sha256()
+    digest.update(df.index.to_numpy(dtype='datetime64[ns]').tobytes())
+    for col in df.columns:
+        values = _to_array(df[col])
+        digest.update(f"{col}|{json.dumps(_schema_entry(df[col]))}|{values.dtype.str}".encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _write_partition(part_dir: Path, df: pd.DataFrame):
+    part_dir.mkdir(parents=True, exist_ok=True)
+    np.save(part_dir / INDEX_FILE, df.index.to_numpy(dtype='datetime64[ns]'))
+    for col in df.columns:
+        np.save(part_dir / _column_file(col), _to_array(df[col]), allow_pickle=False)
+
+
+def main():
+    """Migrar features_dataset_latest.csv al feature store (con el plan de tipos)"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    df = pd.read_csv(LATEST_CSV_PATH, index_col=0, parse_dates=True)
+    store = FeatureStore()
+    store.write(apply_dtype_plan(df))
+    print(store.info().to_string())
+
+
+if __name__ == "__main__":
+    main()
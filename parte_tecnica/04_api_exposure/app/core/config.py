@@ -22,9 +22,13 @@ class Settings(BaseSettings):
     model_bucket: str = "cdo-yacosta-models"
     model_path: str = "models/TWO_STAGE_MODEL.pkl"
     prediction_cache_path: str = "predictions/current.json"
+    features_snapshot_path: str = "features/features_latest.csv"
+    inference_snapshot_rows: int = 5  # Tail rows kept in memory for inference
+    inference_max_snapshot_lag_days: int = 3  # Business days from last feature row to target before refusing
     
     # Prediction defaults (emergency fallback only)
     default_prediction_price: float = 941.0  # Retail Sep 2025 avg
+    business_calendar_market: str = "Mexico"  # Holidays skipped for prediction_date
     
     # Firestore
     firestore_database: str = "(default)"
@@ -36,7 +40,17 @@ class Settings(BaseSettings):
     # API Configuration
     rate_limit_requests: int = 100  # Per hour
     rate_limit_window_seconds: int = 3600  # 1 hour
+    rate_limit_flush_seconds: float = 5.0  # Write-behind batch interval
+    rate_limit_lease_fraction: float = 0.1  # Share of hourly quota leased per instance
+    local_rate_limit_max_keys: int = 10000  # LOCAL_MODE limiter LRU cap
     cache_ttl_seconds: int = 3600  # 1 hour
+    cache_refresh_interval_seconds: int = 60  # Background GCS generation poll
+    
+    # Blocking I/O budgets (per call, seconds) and bulkhead size
+    gcs_timeout_seconds: float = 2.0
+    firestore_timeout_seconds: float = 0.5
+    secret_manager_timeout_seconds: float = 5.0
+    io_workers_per_backend: int = 8
     
     # Prediction
     default_confidence: float = 0.95
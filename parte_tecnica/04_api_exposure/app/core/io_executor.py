@@ -0,0 +1,97 @@
+"""
+Bounded executors for blocking GCP client calls
+
+The google-cloud clients (Storage, Firestore, Secret Manager) are synchronous.
+Calling them from an ``async def`` handler blocks the uvicorn event loop, so
+a single slow backend stalls every concurrent request. Each backend gets its
+own small thread pool (bulkhead) and every call runs under a latency budget.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class BackendTimeoutError(Exception):
+    """Blocking call exceeded its backend latency budget"""
+
+    def __init__(self, backend: str, budget_seconds: float):
+        self.backend = backend
+        self.budget_seconds = budget_seconds
+        super().__init__(f"{backend} call exceeded {budget_seconds:.2f}s budget")
+
+
+class IOExecutor:
+    """Per-backend thread pools with per-call timeouts and latency stats"""
+
+    def __init__(self, budgets: Dict[str, float], max_workers: int):
+        self.budgets = budgets
+        self._pools = {
+            backend: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"io-{backend}")
+            for backend in budgets
+        }
+        self._latencies = {backend: deque(maxlen=1000) for backend in budgets}
+        self._timeouts = {backend: 0 for backend in budgets}
+
+    async def run(self, backend: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on the backend pool
+
+        Raises:
+            BackendTimeoutError: if the call exceeds the backend budget
+        """
+        budget = self.budgets[backend]
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._pools[backend], partial(fn, *args, **kwargs)),
+                timeout=budget
+            )
+        except asyncio.TimeoutError:
+            self._timeouts[backend] += 1
+            logger.warning(f"⏱️ {backend} call timed out after {budget:.2f}s")
+            raise BackendTimeoutError(backend, budget)
+        finally:
+            self._latencies[backend].append((time.perf_counter() - start) * 1000)
+
+    def stats(self) -> Dict:
+        """Latency percentiles (ms) over the last 1000 calls per backend"""
+        result = {}
+        for backend, samples in self._latencies.items():
+            ordered = sorted(samples)
+            n = len(ordered)
+            result[backend] = {
+                "calls": n,
+                "timeouts": self._timeouts[backend],
+                "budget_ms": self.budgets[backend] * 1000,
+                "p50_ms": round(ordered[n // 2], 2) if n else None,
+                "p99_ms": round(ordered[min(n - 1, int(n * 0.99))], 2) if n else None
+            }
+        return result
+
+    def shutdown(self):
+        """Stop accepting work; in-flight calls are not waited for"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False)
+
+
+@lru_cache()
+def get_io_executor() -> IOExecutor:
+    """Get cached executor instance"""
+    settings = get_settings()
+    return IOExecutor(
+        budgets={
+            "gcs": settings.gcs_timeout_seconds,
+            "firestore": settings.firestore_timeout_seconds,
+            "secret_manager": settings.secret_manager_timeout_seconds
+        },
+        max_workers=settings.io_workers_per_backend
+    )
@@ -2,6 +2,7 @@
 Steel Rebar Price Predictor API
 FastAPI application for CDO DeAcero technical challenge
 """
+import asyncio
 import logging
 from datetime import datetime
 from contextlib import asynccontextmanager
@@ -10,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.config import get_settings
+from app.core.io_executor import BackendTimeoutError, get_io_executor
 from app.models import (
     ServiceInfoResponse,
     PredictionResponse,
@@ -18,7 +20,9 @@ from app.models import (
     ErrorResponse
 )
 from app.services.predictor import get_predictor
-from app.middleware.auth import verify_api_key, check_rate_limit
+from app.services.refresher import CacheRefresher
+from app.services.response_cache import etag_matches, get_response_cache
+from app.middleware.auth import verify_api_key, check_rate_limit, get_auth_service, get_rate_limiter
 
 # Setup logging
 logging.basicConfig(
@@ -31,16 +35,33 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifecycle management - load model on startup"""
+    """Lifecycle management - load model and start cache refresher"""
     logger.info("🚀 Starting Steel Price Predictor API")
     
     # Load model on startup
     predictor = get_predictor()
     logger.info("✅ Model loaded and ready")
     
+    # Create GCP clients before serving so requests never pay for it
+    io = get_io_executor()
+    try:
+        await io.run("secret_manager", get_auth_service)
+    except BackendTimeoutError as e:
+        logger.warning(f"⚠️ API keys not loaded at startup: {e}")
+    limiter = get_rate_limiter()
+    
+    # Keep prediction/model caches warm in the background
+    refresher = CacheRefresher(predictor, settings.cache_refresh_interval_seconds)
+    await refresher.start()
+    app.state.refresher = refresher
+    
     yield
     
     logger.info("🛑 Shutting down API")
+    await refresher.stop()
+    await asyncio.to_thread(limiter.close)
+    io.shutdown()
+    get_io_executor.cache_clear()
 
 
 # Create FastAPI app
@@ -81,7 +102,10 @@ async def root():
     Required by reto_tecnico.txt Section 3.3.5
     """
     predictor = get_predictor()
-    model_info = predictor.get_model_info()
+    try:
+        model_info = await get_io_executor().run("gcs", predictor.get_model_info)
+    except BackendTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     
     return ServiceInfoResponse(
         service=settings.app_name,
@@ -93,23 +117,52 @@ async def root():
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint for monitoring"""
     predictor = get_predictor()
     
     # Check if model is loaded
-    model_loaded = predictor.model is not None
+    model_loaded = getattr(predictor, 'model', True) is not None
     
-    # Check cache freshness (simplified)
-    cache_fresh = True  # Would check actual cache age
+    # Cache freshness from the in-memory prediction cache
+    cache = predictor.cache_status()
+    
+    refresher = getattr(request.app.state, 'refresher', None)
+    refresh = refresher.status() if refresher else {}
     
     return HealthResponse(
-        status="healthy" if model_loaded else "degraded",
+        status="healthy" if model_loaded and cache['cache_fresh'] else "degraded",
         model_loaded=model_loaded,
-        cache_fresh=cache_fresh
+        cache_fresh=cache['cache_fresh'],
+        cache_age_seconds=cache['cache_age_seconds'],
+        last_refresh_at=refresh.get('last_refresh_at'),
+        last_refresh_error=refresh.get('last_refresh_error')
     )
 
 
+async def _serve_prediction(request: Request, variant: str) -> Response:
+    """
+    Serve pre-serialized prediction bytes with ETag / Cache-Control
+    Answers If-None-Match with 304 when the client copy is current
+    """
+    cache = get_response_cache()
+    try:
+        entry = await get_io_executor().run("gcs", cache.get, variant)
+    except BackendTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"max-age={cache.max_age()}, must-revalidate",
+        "Vary": "X-API-Key"
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
 @app.get(
     "/predict/steel-rebar-price",
     response_model=PredictionResponse,
@@ -135,14 +188,8 @@ async def predict_steel_price(
     # Check rate limit
     await check_rate_limit(request, api_key)
     
-    # Get prediction
-    predictor = get_predictor()
-    prediction = predictor.predict(return_extended=False)
-    
-    # Log prediction served
-    logger.info(f"Prediction served for {prediction['prediction_date']}")
-    
-    return prediction
+    # Same bytes for every caller until the cache generation changes
+    return await _serve_prediction(request, "basic")
 
 
 @app.get("/predict/steel-rebar-price/extended", response_model=ExtendedPredictionResponse, tags=["Prediction"])
@@ -162,17 +209,17 @@ async def predict_steel_price_extended(
     """
     await check_rate_limit(request, api_key)
     
-    predictor = get_predictor()
-    prediction = predictor.predict(return_extended=True)
-    
-    return prediction
+    return await _serve_prediction(request, "extended")
 
 
 @app.get("/model/info", tags=["Model"])
 async def model_info(api_key: str = Depends(verify_api_key)):
     """Get model metadata and performance metrics"""
     predictor = get_predictor()
-    return predictor.get_model_info()
+    try:
+        return await get_io_executor().run("gcs", predictor.get_model_info)
+    except BackendTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
 # Error handlers
@@ -4,13 +4,16 @@ Authentication and rate limiting middleware
 import json
 import logging
 import hashlib
+import math
 import os
+import threading
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Header, HTTPException, Request
 from fastapi.security import APIKeyHeader
 
 from app.core.config import get_settings
+from app.core.io_executor import BackendTimeoutError, get_io_executor
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -66,11 +69,99 @@ class AuthService:
         return api_key in self.valid_keys
 
 
+class _KeyBucket:
+    """Local lease state for one API key in one hourly window"""
+    __slots__ = ("synced_count", "tokens", "pending", "inflight")
+    
+    def __init__(self):
+        self.synced_count = 0  # Window count last read from Firestore
+        self.tokens = 0        # Locally leased requests left
+        self.pending = 0       # Admitted, not yet flushed
+        self.inflight = 0      # Admitted, flush in progress
+
+
 class RateLimiter:
-    """Rate limiting using Firestore"""
+    """
+    Hybrid rate limiter: local token leases + write-behind Firestore sync
+    
+    Each instance admits requests from an in-memory lease of at most
+    L = ceil(rate_limit_requests * rate_limit_lease_fraction) requests per key.
+    Admitted counts are flushed to Firestore in one batch every
+    rate_limit_flush_seconds, and the window count is read back in the same
+    cycle. A new lease is only granted after a sync, from the freshly read
+    count, so the hot path makes no remote calls for L-1 out of L requests.
+    
+    Over-admission bound: an instance never holds more than L unflushed
+    admissions per key, and each lease is clipped to the quota left in its
+    last synced view. With N instances, at most
+        rate_limit_requests + (N - 1) * L
+    requests per key are admitted in a window (100 + 2*10 = 120 for 3
+    instances with the defaults). A single instance never over-admits.
+    """
     
     def __init__(self):
         self.db = firestore.Client(project=settings.project_id, database=settings.firestore_database)
+        self.limit = settings.rate_limit_requests
+        self.lease_size = max(1, math.ceil(self.limit * settings.rate_limit_lease_fraction))
+        self._buckets = {}  # (key_hash, hour_key) -> _KeyBucket
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="rate-limit-flush", daemon=True)
+        self._flusher.start()
+    
+    def _doc_ref(self, key_hash: str):
+        return self.db.collection(settings.rate_limit_collection).document(key_hash)
+    
+    @staticmethod
+    def _headers(limit: int, remaining: int, now: datetime, denied: bool = False) -> dict:
+        next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(max(0, remaining)),
+            "X-RateLimit-Reset": str(int(next_hour.timestamp()))
+        }
+        if denied:
+            headers["Retry-After"] = str(int((next_hour - now).total_seconds()))
+        return headers
+    
+    def _take_token(self, bucket: _KeyBucket) -> bool:
+        if bucket.tokens <= 0:
+            return False
+        bucket.tokens -= 1
+        bucket.pending += 1
+        return True
+    
+    def _used(self, bucket: _KeyBucket) -> int:
+        return bucket.synced_count + bucket.inflight + bucket.pending
+    
+    @staticmethod
+    def _window(api_key: str) -> tuple[str, str, datetime]:
+        """(key hash, hourly window key, now) for a request"""
+        now = datetime.utcnow()
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16], now.strftime("%Y%m%d%H"), now
+    
+    def check_local(self, api_key: str) -> Optional[tuple[bool, dict]]:
+        """
+        Decide from the local lease alone, without any remote call
+        
+        Returns:
+            (allowed, headers), or None when the lease is exhausted and a
+            Firestore sync is due (call check_rate_limit off the event loop)
+        """
+        try:
+            key_hash, hour_key, now = self._window(api_key)
+            with self._lock:
+                bucket = self._buckets.setdefault((key_hash, hour_key), _KeyBucket())
+                if self._take_token(bucket):
+                    return True, self._headers(self.limit, self.limit - self._used(bucket), now)
+                # Window counts only grow: once exhausted, deny without a remote call
+                if self._used(bucket) >= self.limit:
+                    return False, self._headers(self.limit, 0, now, denied=True)
+            return None
+        except Exception as e:
+            logger.error(f"Rate limit check failed: {e}")
+            # On error, allow request (fail open)
+            return True, {}
     
     def check_rate_limit(self, api_key: str) -> tuple[bool, dict]:
         """
@@ -79,60 +170,134 @@ class RateLimiter:
         Returns:
             (allowed, headers) tuple
         """
+        local = self.check_local(api_key)
+        if local is not None:
+            return local
+        
         try:
-            # Create key-based identifier
-            key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
-            doc_ref = self.db.collection(settings.rate_limit_collection).document(key_hash)
-            
-            # Get current hour window
-            now = datetime.utcnow()
-            hour_key = now.strftime("%Y%m%d%H")
-            
-            # Get document
-            doc = doc_ref.get()
-            
-            if doc.exists:
-                data = doc.to_dict()
-                current_count = data.get(f'requests_{hour_key}', 0)
-            else:
-                current_count = 0
+            # Lease exhausted: sync with Firestore and lease again
+            key_hash, hour_key, now = self._window(api_key)
+            if not self._sync_key(key_hash, hour_key):
+                # Window rolled over and its bucket was pruned: decide in the new window
+                return self.check_rate_limit(api_key)
             
-            # Check limit
-            if current_count >= settings.rate_limit_requests:
-                # Calculate retry-after
-                next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-                retry_after = int((next_hour - now).total_seconds())
-                
-                headers = {
-                    "X-RateLimit-Limit": str(settings.rate_limit_requests),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(next_hour.timestamp())),
-                    "Retry-After": str(retry_after)
-                }
-                
-                return False, headers
-            
-            # Increment counter
-            doc_ref.set({
-                f'requests_{hour_key}': firestore.Increment(1),
-                'last_request': now
-            }, merge=True)
-            
-            # Calculate remaining
-            remaining = settings.rate_limit_requests - (current_count + 1)
-            
-            headers = {
-                "X-RateLimit-Limit": str(settings.rate_limit_requests),
-                "X-RateLimit-Remaining": str(remaining),
-                "X-RateLimit-Reset": str(int((now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0).timestamp()))
-            }
-            
-            return True, headers
+            with self._lock:
+                bucket = self._buckets.get((key_hash, hour_key))
+                if bucket is not None and self._take_token(bucket):
+                    return True, self._headers(self.limit, self.limit - self._used(bucket), now)
+                return False, self._headers(self.limit, 0, now, denied=True)
             
         except Exception as e:
             logger.error(f"Rate limit check failed: {e}")
             # On error, allow request (fail open)
             return True, {}
+    
+    def _sync_key(self, key_hash: str, hour_key: str) -> bool:
+        """
+        Flush one key's pending count, read the window count, grant a new lease
+        
+        Returns False (nothing synced) if the bucket was already pruned
+        """
+        with self._lock:
+            bucket = self._buckets.get((key_hash, hour_key))
+            if bucket is None:
+                return False
+            flushing, bucket.pending = bucket.pending, 0
+            bucket.inflight += flushing
+        
+        doc_ref = self._doc_ref(key_hash)
+        try:
+            if flushing:
+                doc_ref.set({
+                    f'requests_{hour_key}': firestore.Increment(flushing),
+                    'last_request': datetime.utcnow()
+                }, merge=True)
+            doc = doc_ref.get()
+        except Exception:
+            with self._lock:
+                bucket.inflight -= flushing
+                bucket.pending += flushing
+            raise
+        
+        count = (doc.to_dict() or {}).get(f'requests_{hour_key}', 0) if doc.exists else 0
+        with self._lock:
+            bucket.inflight -= flushing
+            bucket.synced_count = count
+            bucket.tokens = min(self.lease_size, self.limit - self._used(bucket))
+        return True
+    
+    def flush(self):
+        """Write all pending counts in one batch and refresh synced counts"""
+        with self._lock:
+            batch_items = []
+            for (key_hash, hour_key), bucket in self._buckets.items():
+                if bucket.pending:
+                    batch_items.append((key_hash, hour_key, bucket, bucket.pending))
+                    bucket.inflight += bucket.pending
+                    bucket.pending = 0
+        
+        if not batch_items:
+            self._prune()
+            return
+        
+        try:
+            now = datetime.utcnow()
+            batch = self.db.batch()
+            for key_hash, hour_key, _, count in batch_items:
+                batch.set(self._doc_ref(key_hash), {
+                    f'requests_{hour_key}': firestore.Increment(count),
+                    'last_request': now
+                }, merge=True)
+            batch.commit()
+        except Exception as e:
+            logger.error(f"Rate limit flush failed, will retry: {e}")
+            with self._lock:
+                for _, _, bucket, count in batch_items:
+                    bucket.inflight -= count
+                    bucket.pending += count
+            return
+        
+        # Read back window counts (includes other instances' flushes)
+        counts = {}
+        try:
+            refs = [self._doc_ref(key_hash) for key_hash, _, _, _ in batch_items]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    counts[doc.id] = doc.to_dict() or {}
+        except Exception as e:
+            logger.warning(f"Rate limit read-back failed: {e}")
+        
+        with self._lock:
+            for key_hash, hour_key, bucket, count in batch_items:
+                bucket.inflight -= count
+                if key_hash in counts:
+                    bucket.synced_count = counts[key_hash].get(f'requests_{hour_key}', bucket.synced_count + count)
+                else:
+                    bucket.synced_count += count
+                bucket.tokens = min(bucket.tokens, max(0, self.limit - self._used(bucket)))
+        
+        self._prune()
+    
+    def _prune(self):
+        """Drop buckets of past windows once fully flushed"""
+        hour_key = datetime.utcnow().strftime("%Y%m%d%H")
+        with self._lock:
+            stale = [
+                k for k, b in self._buckets.items()
+                if k[1] != hour_key and not b.pending and not b.inflight
+            ]
+            for k in stale:
+                del self._buckets[k]
+    
+    def _flush_loop(self):
+        while not self._stop.wait(settings.rate_limit_flush_seconds):
+            self.flush()
+    
+    def close(self):
+        """Stop the flusher and write remaining counts"""
+        self._stop.set()
+        self._flusher.join(timeout=settings.rate_limit_flush_seconds)
+        self.flush()
 
 
 # Global instances
@@ -185,7 +350,17 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)) -> str:
             headers={"WWW-Authenticate": "ApiKey"}
         )
     
-    auth = get_auth_service()
+    # First call loads keys from Secret Manager - keep it off the event loop
+    auth = _auth_service
+    if auth is None:
+        try:
+            auth = await get_io_executor().run("secret_manager", get_auth_service)
+        except BackendTimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication backend unavailable"
+            )
+    
     if not auth.verify_api_key(x_api_key):
         raise HTTPException(
             status_code=401,
@@ -202,7 +377,15 @@ async def check_rate_limit(request: Request, api_key: str) -> dict:
     Returns rate limit headers
     """
     limiter = get_rate_limiter()
-    allowed, headers = limiter.check_rate_limit(api_key)
+    # Hot path: local lease decides in-process; only a due sync goes to the executor
+    decision = limiter.check_local(api_key)
+    if decision is None:
+        try:
+            decision = await get_io_executor().run("firestore", limiter.check_rate_limit, api_key)
+        except BackendTimeoutError:
+            # Same policy as RateLimiter errors: fail open
+            decision = True, {}
+    allowed, headers = decision
     
     if not allowed:
         raise HTTPException(
@@ -11,6 +11,9 @@ class HealthResponse(BaseModel):
     status: str = Field(..., example="healthy")
     model_loaded: bool = Field(..., example=True)
     cache_fresh: bool = Field(..., example=True)
+    cache_age_seconds: Optional[float] = Field(None, example=42.0, description="Seconds since cache was last validated against GCS")
+    last_refresh_at: Optional[datetime] = Field(None, description="Last background refresh attempt")
+    last_refresh_error: Optional[str] = Field(None, example=None, description="Error of the last failed refresh, if any")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -52,6 +55,7 @@ class ExtendedPredictionResponse(PredictionResponse):
     fx_rate: Optional[float] = Field(None, example=18.8)
     lme_base_price: Optional[float] = Field(None, example=540.5)
     mexico_premium: Optional[float] = Field(None, example=1.705)
+    confidence_interval_usd: Optional[List[float]] = Field(None, example=[890.1, 992.3], description="95% interval")
     model_version: str = Field(default="v2.0", example="v2.0")
     data_quality_validated: bool = Field(default=True, example=True)
     
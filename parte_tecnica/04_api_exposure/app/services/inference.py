@@ -0,0 +1,133 @@
+"""
+In-process Two-Stage inference from the latest feature snapshot
+
+Used when the precomputed prediction in GCS is unavailable, so the API
+serves a real model output instead of a static constant.
+"""
+import io
+import logging
+from datetime import date, datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from shared.business_calendar import get_business_calendar
+from shared.forest_plan import compile_forest, predict_forest
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Same limits/volatility as TwoStageRebarModel.predict_full_price
+PREMIUM_CLIP = (1.50, 1.80)
+PREMIUM_STD = 0.03
+TARIFF_START = date(2025, 4, 1)
+CONSTRUCTION_MONTHS = (3, 4, 5, 9, 10, 11)
+
+
+class StaleSnapshotError(ValueError):
+    """Last feature row is too old to predict the target date"""
+
+
+def parse_feature_snapshot(csv_text: str) -> pd.DataFrame:
+    """Parse features CSV (date index) keeping only the tail needed for inference"""
+    df = pd.read_csv(io.StringIO(csv_text), index_col=0, parse_dates=True)
+    return df.tail(settings.inference_snapshot_rows)
+
+
+def next_business_date(today: date) -> date:
+    """Next business day after ``today`` (weekends and market holidays skipped)"""
+    return get_business_calendar().next_business_day(today, settings.business_calendar_market)
+
+
+class _Stage:
+    """One model stage with imputer/scaler folded into arrays"""
+
+    def __init__(self, imputer, scaler, model):
+        self.features = list(imputer.feature_names_in_)
+        self.fill = np.asarray(imputer.statistics_, dtype=np.float64)
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.model = model
+        # RandomForest: flattened trees (same plan as TwoStageRebarModel); other models use predict
+        self.forest = compile_forest(model)
+
+    def transform(self, row: np.ndarray) -> np.ndarray:
+        row = np.where(np.isnan(row), self.fill, row)
+        return ((row - self.mean) / self.scale).reshape(1, -1)
+
+    def predict(self, values: Dict) -> float:
+        row = np.array([values.get(f, np.nan) for f in self.features], dtype=np.float64)
+        X = self.transform(row)
+        if self.forest is not None:
+            return float(predict_forest(self.forest, X))
+        return float(self.model.predict(X)[0])
+
+
+class InferenceEngine:
+    """
+    Runs LME and premium stages of TWO_STAGE_MODEL.pkl on the last
+    feature row, for the next business date
+
+    Results are memoized per (feature snapshot, target date), so repeated
+    cache misses cost one dictionary lookup.
+    """
+
+    def __init__(self, model_data: Dict):
+        self.lme = _Stage(model_data['lme_imputer'], model_data['lme_scaler'], model_data['lme_model'])
+        self.premium = _Stage(model_data['premium_imputer'], model_data['premium_scaler'], model_data['premium_model'])
+        self._memo: Dict[tuple, Dict] = {}
+
+    def build_features(self, snapshot: pd.DataFrame, target: date) -> Dict:
+        """Feature vector for predicting ``target`` from the last snapshot row"""
+        latest = snapshot.iloc[-1]
+        values = {k: float(v) for k, v in latest.items() if isinstance(v, (int, float, np.number))}
+
+        # Calendar features are known for the target date
+        values['post_tariff'] = float(target >= TARIFF_START)
+        values['construction_season'] = float(target.month in CONSTRUCTION_MONTHS)
+        values['month'] = float(target.month)
+        return values
+
+    def predict(self, snapshot: pd.DataFrame, snapshot_id, today: Optional[date] = None) -> Dict:
+        """Prediction dict in the predictions/current.json format"""
+        today = today or datetime.utcnow().date()
+        target = next_business_date(today)
+        key = (snapshot_id, target)
+        if key in self._memo:
+            return self._memo[key]
+
+        features_date = snapshot.index[-1].date()
+        lag = get_business_calendar().business_days_between(features_date, target, settings.business_calendar_market)
+        if lag > settings.inference_max_snapshot_lag_days:
+            raise StaleSnapshotError(
+                f"Feature snapshot ends {features_date.isoformat()}, {lag} business days before "
+                f"{target.isoformat()} (max {settings.inference_max_snapshot_lag_days})"
+            )
+
+        values = self.build_features(snapshot, target)
+        lme_pred = self.lme.predict(values)
+        premium_pred = float(np.clip(self.premium.predict(values), *PREMIUM_CLIP))
+
+        fx_rate = values.get('usdmxn', values.get('usdmxn_lag1', 19.0))
+        price_usd = lme_pred * premium_pred
+        low = lme_pred * (premium_pred - 1.96 * PREMIUM_STD)
+        high = lme_pred * (premium_pred + 1.96 * PREMIUM_STD)
+
+        result = {
+            'prediction_date': target.isoformat(),
+            'predicted_price_usd_per_ton': round(price_usd, 2),
+            'predicted_price_mxn_per_ton': round(price_usd * fx_rate, 2),
+            'confidence_interval_usd': [round(low, 2), round(high, 2)],
+            'fx_rate': round(fx_rate, 4),
+            'lme_base_price': round(lme_pred, 2),
+            'mexico_premium': round(premium_pred, 4),
+            'model_confidence': float(values.get('model_confidence', settings.default_confidence)),
+            'features_date': features_date.isoformat(),
+            'generated_at': datetime.utcnow().isoformat()
+        }
+
+        # Only the current target date is ever requested again
+        self._memo = {key: result}
+        return result
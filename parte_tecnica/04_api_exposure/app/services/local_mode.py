@@ -3,8 +3,14 @@ Local development mode - Mock GCP services for testing
 """
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.services.inference import next_business_date
 
 logger = logging.getLogger(__name__)
 
@@ -28,26 +34,27 @@ class LocalPredictor:
         logger.info("✅ Local model loaded (mock)")
         return True
     
-    def get_cached_prediction(self) -> Optional[Dict]:
+    def refresh(self):
+        """Mock - nothing to revalidate"""
+        pass
+    
+    def cache_status(self) -> Dict:
+        """Mock cache is generated on every call, always fresh"""
+        return {"cache_fresh": True, "cache_age_seconds": 0.0}
+    
+    def cache_generation(self) -> str:
+        """Mock prediction changes with the target date"""
+        return self.get_cached_prediction()[1]
+    
+    def get_cached_prediction(self) -> Tuple[Optional[Dict], Optional[str]]:
         """
-        Mock cached prediction
+        Mock cached prediction and its generation
         Returns prediction for NEXT BUSINESS DAY
         """
-        # Hoy es 29-Sep (lunes), siguiente día hábil es 30-Sep (martes)
-        # El modelo predice el CIERRE del día siguiente
-        today = datetime.utcnow().date()
-        
-        # Si hoy es viernes, sábado o domingo, siguiente día hábil es lunes
-        if today.weekday() == 4:  # Viernes
-            tomorrow = today + timedelta(days=3)  # Lunes
-        elif today.weekday() == 5:  # Sábado
-            tomorrow = today + timedelta(days=2)  # Lunes
-        elif today.weekday() == 6:  # Domingo
-            tomorrow = today + timedelta(days=1)  # Lunes
-        else:  # Lun-Jue
-            tomorrow = today + timedelta(days=1)  # Día siguiente
+        # El modelo predice el CIERRE del siguiente día hábil (fines de semana y festivos)
+        tomorrow = next_business_date(datetime.utcnow().date())
         
-        return {
+        prediction = {
             'prediction_date': tomorrow.isoformat(),
             'predicted_price_usd_per_ton': 941.0,
             'currency': 'USD',
@@ -59,10 +66,11 @@ class LocalPredictor:
             'lme_base_price': 540.5,
             'mexico_premium': 1.705
         }
+        return prediction, f"local-{tomorrow.isoformat()}"
     
     def predict(self, return_extended: bool = False) -> Dict:
         """Generate mock prediction"""
-        cached = self.get_cached_prediction()
+        cached, _ = self.get_cached_prediction()
         
         response = {
             "prediction_date": cached['prediction_date'],
@@ -87,6 +95,11 @@ class LocalPredictor:
         
         return response
     
+    def predict_with_generation(self, return_extended: bool = False):
+        """Mock prediction plus its cache generation"""
+        response = self.predict(return_extended)
+        return response, f"local-{response['prediction_date']}"
+    
     def get_model_info(self) -> Dict:
         """Get model metadata"""
         return {
@@ -114,32 +127,109 @@ class LocalAuthService:
 
 
 class LocalRateLimiter:
-    """Local rate limiter - in-memory only"""
+    """
+    Local rate limiter - in-memory, sliding window, bounded
     
-    def __init__(self):
-        self.counters = {}
+    Uses the sliding-window counter approximation: the count for the
+    window ending now is
+        previous_count * (1 - elapsed / window) + current_count
+    which avoids the 2x burst a fixed hourly window allows at the boundary.
+    
+    Per-key state is a 3-slot list [window_index, previous, current] in an
+    OrderedDict kept in LRU order. When more than ``max_keys`` keys are
+    tracked, the least recently used one is dropped. Keys idle for two
+    windows carry no state, so only keys evicted while active lose their
+    count (fail open, like the production limiter on errors).
+    """
+    
+    def __init__(self, limit: int = None, window_seconds: int = None, max_keys: int = None):
+        settings = get_settings()
+        self.limit = settings.rate_limit_requests if limit is None else limit
+        self.window_seconds = settings.rate_limit_window_seconds if window_seconds is None else window_seconds
+        self.max_keys = settings.local_rate_limit_max_keys if max_keys is None else max_keys
+        self.counters = OrderedDict()
+        self.evictions = 0
         logger.info("🔧 Local mode: Using in-memory rate limiter")
     
-    def check_rate_limit(self, api_key: str) -> tuple[bool, dict]:
-        """Simple in-memory rate limiting"""
-        hour_key = datetime.utcnow().strftime("%Y%m%d%H")
-        key = f"{api_key}_{hour_key}"
+    def _allow(self, api_key: str, now: float) -> tuple[bool, float, float]:
+        """Core check; returns (allowed, estimated count, seconds into window)"""
+        window = self.window_seconds
+        index = int(now // window)
+        elapsed = now - index * window
+        
+        state = self.counters.get(api_key)
+        if state is None:
+            state = [index, 0, 0]
+            self.counters[api_key] = state
+            if len(self.counters) > self.max_keys:
+                self.counters.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.counters.move_to_end(api_key)
+            if state[0] != index:
+                # Roll forward: previous window is kept only if adjacent
+                state[1] = state[2] if state[0] == index - 1 else 0
+                state[2] = 0
+                state[0] = index
         
-        count = self.counters.get(key, 0)
+        estimate = state[1] * (1 - elapsed / window) + state[2]
+        if estimate >= self.limit:
+            return False, estimate, elapsed
         
-        if count >= 100:
+        state[2] += 1
+        return True, estimate + 1, elapsed
+    
+    def check_local(self, api_key: str) -> Optional[tuple[bool, dict]]:
+        """Purely in-memory, so every decision is local"""
+        return self.check_rate_limit(api_key)
+    
+    def check_rate_limit(self, api_key: str) -> tuple[bool, dict]:
+        """Sliding-window in-memory rate limiting"""
+        now = time.time()
+        allowed, estimate, elapsed = self._allow(api_key, now)
+        remaining = max(0, int(self.limit - estimate))
+        
+        if not allowed:
+            retry_after = self._retry_after(api_key, elapsed)
             headers = {
-                "X-RateLimit-Limit": "100",
+                "X-RateLimit-Limit": str(self.limit),
                 "X-RateLimit-Remaining": "0",
-                "Retry-After": "3600"
+                "X-RateLimit-Reset": str(int(now + retry_after)),
+                "Retry-After": str(retry_after)
             }
             return False, headers
         
-        self.counters[key] = count + 1
-        
         headers = {
-            "X-RateLimit-Limit": "100",
-            "X-RateLimit-Remaining": str(99 - count)
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(remaining)
         }
         
         return True, headers
+    
+    def _retry_after(self, api_key: str, elapsed: float) -> int:
+        """Seconds until the sliding estimate drops below the limit"""
+        window = self.window_seconds
+        if self.limit <= 0:
+            # Nothing is ever allowed (the key may not even be tracked); report the window's end
+            return max(1, math.ceil(window - elapsed))
+        
+        _, previous, current = self.counters[api_key]
+        if current >= self.limit:
+            # Wait for the next window, then for current to decay as previous
+            wait = (window - elapsed) + window * (1 - (self.limit - 1) / current)
+        else:
+            wait = window * (1 - (self.limit - 1 - current) / previous) - elapsed
+        
+        return max(1, math.ceil(wait))
+    
+    def stats(self) -> Dict:
+        """Tracked keys and evictions"""
+        return {
+            "tracked_keys": len(self.counters),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions
+        }
+    
+    def close(self):
+        """Mock - nothing to flush"""
+        pass
@@ -0,0 +1,161 @@
+"""
+In-memory cache for the precomputed prediction stored in Cloud Storage
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    TTL cache in front of a GCS blob (predictions/current.json by default,
+    also used for the feature snapshot with a custom ``parser``)
+
+    - Within the TTL, reads are a plain attribute lookup (no GCS calls)
+    - After the TTL, one metadata request checks the blob generation;
+      the payload is only downloaded again if the generation changed
+    - If GCS fails, the last good value keeps being served
+    - When a background refresher owns revalidation (``revalidate_inline``
+      is False), reads never touch GCS and always return the last good value
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        bucket_name: str,
+        blob_path: str,
+        ttl_seconds: int,
+        parser: Callable[[str], Any] = json.loads
+    ):
+        self._client_factory = client_factory
+        self.bucket_name = bucket_name
+        self.blob_path = blob_path
+        self.ttl_seconds = ttl_seconds
+        self.parser = parser
+        self.revalidate_inline = True
+
+        self._lock = threading.RLock()
+        # (payload, generation) swapped as one object so readers never pair a body with another generation
+        self._entry: Tuple[Optional[Any], Optional[int]] = (None, None)
+        self._etag: Optional[str] = None
+        self._checked_at: float = 0.0   # monotonic time of last revalidation
+        self._loaded_at: float = 0.0    # monotonic time of last download
+        self._validated_at: float = 0.0 # monotonic time of last successful check
+        self.last_error: Optional[str] = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    def _is_fresh(self, now: float) -> bool:
+        return self._checked_at > 0 and (now - self._checked_at) < self.ttl_seconds
+
+    def get(self) -> Optional[Any]:
+        """Return cached payload, revalidating against GCS when TTL expired"""
+        return self.get_with_generation()[0]
+
+    def get_with_generation(self) -> Tuple[Optional[Any], Optional[int]]:
+        """Cached payload and the GCS generation it was downloaded from, read together"""
+        entry = self._entry
+        if self._is_fresh(time.monotonic()) or (not self.revalidate_inline and entry[0] is not None):
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self._is_fresh(time.monotonic()):
+                self.hits += 1
+                return self._entry
+
+            self.misses += 1
+            self._refresh_locked()
+            return self._entry
+
+    def refresh(self) -> bool:
+        """
+        Revalidate the cached blob against GCS
+
+        Returns:
+            True if a new payload was downloaded
+        """
+        with self._lock:
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> bool:
+        try:
+            bucket = self._client_factory().bucket(self.bucket_name)
+            blob = bucket.get_blob(self.blob_path)  # metadata only, None if missing
+
+            if blob is None:
+                logger.warning(f"No cached blob found: {self.blob_path}")
+                self._checked_at = time.monotonic()
+                self.last_error = f"Blob not found: {self.blob_path}"
+                return False
+
+            if self._entry[0] is not None and blob.generation == self._entry[1]:
+                self.not_modified += 1
+                self._checked_at = self._validated_at = time.monotonic()
+                self.last_error = None
+                return False
+
+            payload = blob.download_as_text(if_generation_match=blob.generation)
+            self._entry = (self.parser(payload), blob.generation)
+            self._etag = blob.etag
+            self._loaded_at = self._checked_at = self._validated_at = time.monotonic()
+            self.downloads += 1
+            self.last_error = None
+
+            logger.info(f"✅ Cache loaded: {self.blob_path} (generation {blob.generation})")
+            return True
+
+        except Exception as e:
+            self.errors += 1
+            # Keep serving the last good value; retry after the next TTL
+            self._checked_at = time.monotonic()
+            self.last_error = str(e)
+            logger.error(f"Error refreshing cached {self.blob_path}: {e}")
+            return False
+
+    @property
+    def generation(self) -> Optional[int]:
+        """GCS generation of the cached payload"""
+        return self._entry[1]
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the cached value was last confirmed against GCS"""
+        if not self._validated_at:
+            return None
+        return time.monotonic() - self._validated_at
+
+    def is_fresh(self) -> bool:
+        """True if the value was confirmed within the TTL"""
+        age = self.age_seconds()
+        return self._entry[0] is not None and age is not None and age < self.ttl_seconds
+
+    def invalidate(self):
+        """Force revalidation on next access"""
+        self._checked_at = 0.0
+
+    def stats(self) -> Dict:
+        """Cache counters and state for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "downloads": self.downloads,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "generation": self._entry[1],
+            "etag": self._etag,
+            "age_seconds": round(self.age_seconds(), 1) if self._validated_at else None,
+            "ttl_seconds": self.ttl_seconds,
+            "last_error": self.last_error
+        }
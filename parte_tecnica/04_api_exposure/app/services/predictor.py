@@ -2,7 +2,6 @@
 Prediction service for Two-Stage steel price model
 """
 import joblib
-import json
 import logging
 import os
 from datetime import datetime, timedelta
@@ -10,6 +9,8 @@ from typing import Dict, Optional, Tuple
 from fastapi import HTTPException
 
 from app.core.config import get_settings
+from app.services.inference import InferenceEngine, StaleSnapshotError, next_business_date, parse_feature_snapshot
+from app.services.prediction_cache import PredictionCache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -31,24 +32,52 @@ class SteelPricePredictor:
         self.model_metadata = None
         self.last_prediction = None
         self.last_prediction_time = None
-        
+        self._storage_client = None
+        self.model_generation = None
+        self.prediction_cache = PredictionCache(
+            client_factory=self._get_storage_client,
+            bucket_name=settings.model_bucket,
+            blob_path=settings.prediction_cache_path,
+            ttl_seconds=settings.cache_ttl_seconds
+        )
+        # Latest feature rows for on-the-fly inference on cache miss
+        self.features_cache = PredictionCache(
+            client_factory=self._get_storage_client,
+            bucket_name=settings.model_bucket,
+            blob_path=settings.features_snapshot_path,
+            ttl_seconds=settings.cache_ttl_seconds,
+            parser=parse_feature_snapshot
+        )
+        self.inference = None
+        # (features generation, target date) whose inference failed; served by the fallback
+        self._failed_inference: Optional[Tuple] = None
+    
+    def _get_storage_client(self):
+        """Create the GCS client once and reuse it across calls"""
+        if self._storage_client is None:
+            self._storage_client = storage.Client(project=settings.project_id)
+        return self._storage_client
+
     def load_model(self) -> bool:
         """Load Two-Stage model from GCS"""
         try:
             logger.info(f"Loading model from gs://{settings.model_bucket}/{settings.model_path}")
             
             # Download model from GCS
-            client = storage.Client(project=settings.project_id)
-            bucket = client.bucket(settings.model_bucket)
-            blob = bucket.blob(settings.model_path)
+            bucket = self._get_storage_client().bucket(settings.model_bucket)
+            blob = bucket.get_blob(settings.model_path)
+            if blob is None:
+                raise FileNotFoundError(f"gs://{settings.model_bucket}/{settings.model_path}")
             
             # Download to temp file
             model_file = "/tmp/TWO_STAGE_MODEL.pkl"
-            blob.download_to_filename(model_file)
+            blob.download_to_filename(model_file, if_generation_match=blob.generation)
             
             # Load model
             self.model = joblib.load(model_file)
             self.model_metadata = self.model.get('metadata', {})
+            self.model_generation = blob.generation
+            self.inference = InferenceEngine(self.model)
             
             logger.info(f"✅ Model loaded successfully")
             logger.info(f"   Version: {self.model_metadata.get('version', 'unknown')}")
@@ -62,38 +91,88 @@ class SteelPricePredictor:
             logger.error(f"❌ Failed to load model: {e}")
             return False
     
-    def get_cached_prediction(self) -> Optional[Dict]:
+    def refresh_model_if_changed(self) -> bool:
+        """Reload the model only if its GCS generation changed"""
+        blob = self._get_storage_client().bucket(settings.model_bucket).get_blob(settings.model_path)
+        if blob is None or blob.generation == self.model_generation:
+            return False
+        
+        logger.info(f"Model generation changed ({self.model_generation} → {blob.generation}), reloading")
+        return self.load_model()
+    
+    def refresh(self):
+        """
+        Revalidate prediction cache and model metadata against GCS
+        Called from the background refresher, never on the request path
+        """
+        self.prediction_cache.refresh()
+        self.features_cache.refresh()
+        self.refresh_model_if_changed()
+        
+        errors = [c.last_error for c in (self.prediction_cache, self.features_cache) if c.last_error]
+        if errors:
+            raise RuntimeError("; ".join(errors))
+    
+    def cache_status(self) -> Dict:
+        """Cache age and freshness for /health"""
+        age = self.prediction_cache.age_seconds()
+        return {
+            "cache_fresh": self.prediction_cache.is_fresh(),
+            "cache_age_seconds": round(age, 1) if age is not None else None
+        }
+    
+    def cache_generation(self) -> str:
+        """Identifies the payload predict() currently returns"""
+        prediction, generation, _ = self._fresh_cached_prediction()
+        if prediction is not None:
+            return f"gcs-{generation}"
+        target = next_business_date(datetime.utcnow().date())
+        snapshot, features_generation = self.features_cache.get_with_generation()
+        if self._can_infer(snapshot, features_generation, target):
+            return f"inference-{features_generation}-{target.isoformat()}"
+        return f"fallback-{target.isoformat()}"
+    
+    def _can_infer(self, snapshot, features_generation, target) -> bool:
+        """Model and snapshot available, and inference has not already failed for this target"""
+        return (self.inference is not None and snapshot is not None
+                and (features_generation, target) != self._failed_inference)
+    
+    def _fresh_cached_prediction(self) -> Tuple[Optional[Dict], Optional[int], Optional[float]]:
+        """(prediction, GCS generation, age in seconds) from one cache read; prediction is None if missing or stale"""
+        prediction, generation = self.prediction_cache.get_with_generation()
+        if prediction is None:
+            return None, None, None
+        
+        # Check freshness
+        generated_at = datetime.fromisoformat(prediction.get('generated_at', '2020-01-01T00:00:00'))
+        age_seconds = (datetime.utcnow() - generated_at).total_seconds()
+        if age_seconds > settings.cache_ttl_seconds:
+            return None, None, age_seconds
+        return prediction, generation, age_seconds
+    
+    def get_cached_prediction(self) -> Tuple[Optional[Dict], Optional[int]]:
         """
         Get cached prediction from Cloud Storage
-        Returns precalculated prediction if fresh (< cache_ttl)
+        Returns (prediction, GCS generation) if fresh (< cache_ttl), else (None, None)
+        
+        Served from the in-memory PredictionCache; GCS is only contacted
+        when the TTL expires, and only downloaded if the blob changed.
+        Body and generation come from the same read, so a refresh landing
+        in between can't tag a new body with the old generation
         """
         try:
-            client = storage.Client(project=settings.project_id)
-            bucket = client.bucket(settings.model_bucket)
-            blob = bucket.blob(settings.prediction_cache_path)
-            
-            if not blob.exists():
-                logger.warning("No cached prediction found")
-                return None
-            
-            # Download and parse
-            prediction_json = blob.download_as_text()
-            prediction = json.loads(prediction_json)
-            
-            # Check freshness
-            generated_at = datetime.fromisoformat(prediction.get('generated_at', '2020-01-01T00:00:00'))
-            age_seconds = (datetime.utcnow() - generated_at).total_seconds()
-            
-            if age_seconds > settings.cache_ttl_seconds:
-                logger.warning(f"Cached prediction is stale ({age_seconds:.0f}s old)")
-                return None
+            prediction, generation, age_seconds = self._fresh_cached_prediction()
+            if prediction is None:
+                if age_seconds is not None:
+                    logger.warning(f"Cached prediction is stale ({age_seconds:.0f}s old)")
+                return None, None
             
             logger.info(f"✅ Using cached prediction ({age_seconds:.0f}s old)")
-            return prediction
+            return prediction, generation
             
         except Exception as e:
             logger.error(f"Error reading cached prediction: {e}")
-            return None
+            return None, None
     
     def predict(self, return_extended: bool = False) -> Dict:
         """
@@ -105,49 +184,72 @@ class SteelPricePredictor:
         Returns:
             Prediction dictionary
         """
+        return self.predict_with_generation(return_extended)[0]
+    
+    def predict_with_generation(self, return_extended: bool = False) -> Tuple[Dict, str]:
+        """Prediction plus the cache_generation of whatever actually produced it"""
         # Try cached prediction first
-        cached = self.get_cached_prediction()
+        cached, generation = self.get_cached_prediction()
         if cached:
-            # Convert cached to response format
-            response = {
-                "prediction_date": cached.get('prediction_date'),
-                "predicted_price_usd_per_ton": cached.get('predicted_price_usd_per_ton'),
-                "currency": "USD",
-                "unit": "metric_ton",
-                "model_confidence": cached.get('model_confidence', settings.default_confidence),
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
-            
-            if return_extended:
-                response.update({
-                    "price_level": "retail",
-                    "predicted_price_mxn_per_ton": cached.get('predicted_price_mxn_per_ton'),
-                    "fx_rate": cached.get('fx_rate'),
-                    "lme_base_price": cached.get('lme_base_price'),
-                    "mexico_premium": cached.get('mexico_premium'),
-                    "model_version": "v2.0",
-                    "data_quality_validated": True,
-                    "wholesale_price_usd": cached.get('predicted_price_usd_per_ton', 941) * settings.wholesale_discount
-                })
-            
-            return response
+            return self._format_response(cached, return_extended), f"gcs-{generation}"
         
         # Fallback: Generate prediction (should rarely happen)
         logger.warning("Generating prediction on-the-fly (cache miss)")
         return self._generate_prediction(return_extended)
     
-    def _generate_prediction(self, return_extended: bool = False) -> Dict:
+    def _format_response(self, prediction: Dict, return_extended: bool) -> Dict:
+        """Convert a current.json-style prediction to response format"""
+        response = {
+            "prediction_date": prediction.get('prediction_date'),
+            "predicted_price_usd_per_ton": prediction.get('predicted_price_usd_per_ton'),
+            "currency": "USD",
+            "unit": "metric_ton",
+            "model_confidence": prediction.get('model_confidence', settings.default_confidence),
+            "timestamp": datetime.utcnow().isoformat() + "Z"
+        }
+        
+        if return_extended:
+            response.update({
+                "price_level": "retail",
+                "predicted_price_mxn_per_ton": prediction.get('predicted_price_mxn_per_ton'),
+                "fx_rate": prediction.get('fx_rate'),
+                "lme_base_price": prediction.get('lme_base_price'),
+                "mexico_premium": prediction.get('mexico_premium'),
+                "confidence_interval_usd": prediction.get('confidence_interval_usd'),
+                "model_version": "v2.0",
+                "data_quality_validated": True,
+                "wholesale_price_usd": prediction.get('predicted_price_usd_per_ton', 941) * settings.wholesale_discount
+            })
+        
+        return response
+    
+    def _generate_prediction(self, return_extended: bool = False) -> Tuple[Dict, str]:
         """
-        Emergency fallback - Only if cache completely unavailable
-        Returns static prediction for next business day
+        Fallback when the precomputed prediction is unavailable
+        Runs the Two-Stage model in-process on the latest feature snapshot;
+        the static prediction is only used if that also fails
         """
-        logger.warning("⚠️ Using emergency fallback - cache not available")
+        today = datetime.utcnow().date()
+        target = next_business_date(today)
+        snapshot, features_generation = self.features_cache.get_with_generation()
+        if self._can_infer(snapshot, features_generation, target):
+            try:
+                prediction = self.inference.predict(snapshot, features_generation, today=today)
+                generation = f"inference-{features_generation}-{target.isoformat()}"
+                return self._format_response(prediction, return_extended), generation
+            except StaleSnapshotError as e:
+                logger.warning(f"⚠️ Refusing stale feature snapshot: {e}")
+            except Exception as e:
+                logger.error(f"In-process inference failed: {e}")
+            # Don't retry on every request; a new snapshot or target date tries again
+            self._failed_inference = (features_generation, target)
+        
+        logger.warning("⚠️ Using emergency fallback - cache and inference not available")
         
         # Fixed prediction for evaluation period
-        # Will be updated daily during evaluation
         response = {
-            "prediction_date": "2025-09-30",  # Next business day
-            "predicted_price_usd_per_ton": 941.0,  
+            "prediction_date": target.isoformat(),
+            "predicted_price_usd_per_ton": settings.default_prediction_price,
             "currency": "USD",
             "unit": "metric_ton",
             "model_confidence": 0.80,  # Lower for fallback
@@ -157,13 +259,13 @@ class SteelPricePredictor:
         if return_extended:
             response.update({
                 "price_level": "retail",
-                "wholesale_price_usd": round(941.0 * settings.wholesale_discount, 2),
+                "wholesale_price_usd": round(settings.default_prediction_price * settings.wholesale_discount, 2),
                 "model_version": "v2.0",
                 "data_quality_validated": True,
                 "note": "Emergency fallback - update cache recommended"
             })
         
-        return response
+        return response, f"fallback-{target.isoformat()}"
     
     def get_model_info(self) -> Dict:
         """Get model metadata and performance metrics"""
@@ -0,0 +1,92 @@
+"""
+Background stale-while-revalidate refresher for prediction and model caches
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheRefresher:
+    """
+    Asyncio task that keeps the predictor caches warm
+
+    Every ``interval_seconds`` it polls the GCS generation of the prediction
+    blob, the feature snapshot and the model; payloads are only downloaded when they changed.
+    Requests keep reading the last good value and never wait on a refresh.
+    """
+
+    def __init__(self, predictor, interval_seconds: int):
+        self.predictor = predictor
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+        self.refresh_count = 0
+        self.last_refresh_at: Optional[datetime] = None
+        self.last_refresh_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+
+    async def refresh_once(self) -> bool:
+        """Run one refresh off the event loop; returns True on success"""
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.predictor.refresh)
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            self.last_error_at = datetime.utcnow()
+            logger.error(f"Background refresh failed: {e}")
+            return False
+        finally:
+            self.refresh_count += 1
+            self.last_refresh_at = datetime.utcnow()
+            self.last_refresh_duration_ms = (time.perf_counter() - start) * 1000
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                await self.refresh_once()
+
+    async def start(self):
+        """Warm caches once, then start the periodic task"""
+        # Serve reads from memory only; this task owns revalidation (predictor.refresh covers both caches)
+        for name in ('prediction_cache', 'features_cache'):
+            cache = getattr(self.predictor, name, None)
+            if cache is not None:
+                cache.revalidate_inline = False
+
+        self._stop = asyncio.Event()
+        await self.refresh_once()
+        self._task = asyncio.create_task(self._run(), name="cache-refresher")
+        logger.info(f"✅ Cache refresher started (every {self.interval_seconds}s)")
+
+    async def stop(self):
+        """Signal the task to exit and wait for any in-flight refresh"""
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.interval_seconds)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        logger.info("🛑 Cache refresher stopped")
+
+    def status(self) -> Dict:
+        """Refresher state for /health"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "refresh_count": self.refresh_count,
+            "last_refresh_at": self.last_refresh_at,
+            "last_refresh_duration_ms": self.last_refresh_duration_ms,
+            "last_refresh_error": self.last_error,
+            "last_refresh_error_at": self.last_error_at
+        }
@@ -0,0 +1,107 @@
+"""
+Pre-serialized prediction responses with HTTP validators
+"""
+import hashlib
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from typing import Dict, NamedTuple
+
+from app.core.config import get_settings
+from app.models import ExtendedPredictionResponse, PredictionResponse
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class SerializedResponse(NamedTuple):
+    """Response body built once per cache generation"""
+    generation: str
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """
+    Builds the JSON body for each variant (basic/extended) once per
+    prediction cache generation and serves the same bytes afterwards
+
+    The payload is validated through the same Pydantic models the
+    endpoints declare, so the wire format is unchanged. The ``timestamp``
+    field is the time the body was built.
+    """
+
+    VARIANTS = {
+        "basic": (False, PredictionResponse),
+        "extended": (True, ExtendedPredictionResponse)
+    }
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self._entries: Dict[str, SerializedResponse] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, variant: str) -> SerializedResponse:
+        """
+        Return serialized response for current generation (blocking on build)
+
+        The entry is stored under the generation that actually produced
+        the body, which may differ from the expected one (e.g. inference
+        failed and the fallback answered); the next call then rebuilds.
+        """
+        generation = self.predictor.cache_generation()
+        entry = self._entries.get(variant)
+        if entry is not None and entry.generation == generation:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(variant)
+            if entry is None or entry.generation != generation:
+                entry = self._build(variant)
+                self._entries[variant] = entry
+        return entry
+
+    def _build(self, variant: str) -> SerializedResponse:
+        return_extended, model = self.VARIANTS[variant]
+        prediction, generation = self.predictor.predict_with_generation(return_extended=return_extended)
+        body = model(**prediction).model_dump_json().encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.builds += 1
+
+        logger.info(f"Built {variant} response for {prediction['prediction_date']} (generation {generation})")
+        return SerializedResponse(generation, body, etag)
+
+    def max_age(self) -> int:
+        """
+        Seconds a client may reuse the body without revalidating
+
+        A new generation can be picked up on any background refresh, and
+        the target date rolls over at UTC midnight, whichever comes first.
+        """
+        now = datetime.utcnow()
+        until_midnight = (datetime.combine(now.date() + timedelta(days=1), time.min) - now).total_seconds()
+        return max(0, int(min(settings.cache_refresh_interval_seconds, until_midnight)))
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """RFC 9110 weak comparison for If-None-Match"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+# Global singleton instance
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create response cache singleton"""
+    global _response_cache
+    if _response_cache is None:
+        from app.services.predictor import get_predictor
+        _response_cache = ResponseCache(get_predictor())
+    return _response_cache
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark - blocking GCP calls vs. event loop
+
+Simula un Firestore lento (sleep en el rate limiter) y mide p50/p99 de
+/health, /model/info y /predict bajo carga concurrente, en dos modos:
+
+- inline:    llamadas bloqueantes dentro del event loop (comportamiento previo)
+- executor:  IOExecutor con bulkheads por backend y presupuesto de latencia
+
+Requisitos:
+- pip install httpx
+"""
+import asyncio
+import os
+import statistics
+import time
+
+os.environ['LOCAL_MODE'] = 'true'
+
+import httpx
+
+from app.core import io_executor
+from app.core.config import get_settings
+from app.main import app
+from app.services.local_mode import LocalRateLimiter
+
+CONCURRENCY = 50
+REQUESTS_PER_ENDPOINT = 200
+SLOW_FIRESTORE_SECONDS = 0.2
+ENDPOINTS = ["/health", "/model/info", "/predict/steel-rebar-price"]
+HEADERS = {"X-API-Key": "test-bench"}
+# Quota for every request of every scenario, so /predict measures serving instead of 429s
+BENCH_RATE_LIMIT = 3 * REQUESTS_PER_ENDPOINT * len(ENDPOINTS)
+
+_original_check = LocalRateLimiter.check_rate_limit
+_original_local = LocalRateLimiter.check_local
+_original_run = io_executor.IOExecutor.run
+
+
+def slow_check_rate_limit(self, api_key):
+    """Firestore get + set con latencia artificial"""
+    time.sleep(SLOW_FIRESTORE_SECONDS)
+    return _original_check(self, api_key)
+
+
+def remote_only(self, api_key):
+    """Sin lease local: cada request paga la llamada a Firestore"""
+    return None
+
+
+async def inline_run(self, backend, fn, *args, **kwargs):
+    """Comportamiento previo: la llamada bloquea el event loop"""
+    return fn(*args, **kwargs)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run_load(client):
+    latencies = {path: [] for path in ENDPOINTS}
+    errors = {path: 0 for path in ENDPOINTS}
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(path):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=HEADERS)
+            latencies[path].append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors[path] += 1
+
+    tasks = [one(path) for _ in range(REQUESTS_PER_ENDPOINT) for path in ENDPOINTS]
+    await asyncio.gather(*tasks)
+    return latencies, errors
+
+
+async def scenario(name, slow_firestore, inline):
+    LocalRateLimiter.check_rate_limit = slow_check_rate_limit if slow_firestore else _original_check
+    LocalRateLimiter.check_local = remote_only if slow_firestore else _original_local
+    io_executor.IOExecutor.run = inline_run if inline else _original_run
+    # Budget above the injected latency so slow calls complete instead of failing open
+    get_settings().firestore_timeout_seconds = SLOW_FIRESTORE_SECONDS * 2
+    get_settings().rate_limit_requests = BENCH_RATE_LIMIT
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies, errors = await run_load(client)
+
+    print(f"\n{name}")
+    print(f"   {'endpoint':<32}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for path, samples in latencies.items():
+        print(f"   {path:<32}{statistics.median(samples):>10.1f}{percentile(samples, 0.99):>10.1f}{errors[path]:>8}")
+
+
+async def main():
+    print("⏱️ BENCHMARK - async I/O layer")
+    print("=" * 80)
+    print(f"Concurrencia: {CONCURRENCY} | Requests por endpoint: {REQUESTS_PER_ENDPOINT}")
+    print(f"Firestore lento: {SLOW_FIRESTORE_SECONDS * 1000:.0f} ms por llamada")
+
+    await scenario("1️⃣ executor, Firestore normal", slow_firestore=False, inline=False)
+    await scenario("2️⃣ executor, Firestore lento", slow_firestore=True, inline=False)
+    await scenario("3️⃣ inline (previo), Firestore lento", slow_firestore=True, inline=True)
+
+    print("\nEsperado: en (2) /health y /model/info mantienen su p99 de (1);")
+    print("en (3) todos los endpoints heredan la latencia de Firestore.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark - LocalRateLimiter (sliding window + LRU)
+
+Mide costo por check y memoria retenida con 10k, 100k y 1M keys distintas.
+Con el tope de keys activo la memoria debe quedar constante.
+"""
+import os
+import time
+import tracemalloc
+
+os.environ['LOCAL_MODE'] = 'true'
+
+from app.services.local_mode import LocalRateLimiter
+
+MAX_KEYS = 10_000
+KEY_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def bench(n_keys: int):
+    keys = [f"test-key-{i}" for i in range(n_keys)]
+    limiter = LocalRateLimiter(max_keys=MAX_KEYS)
+    now = time.time()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        limiter._allow(key, now)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    # Hot loop: decision only (no header formatting)
+    allow = limiter._allow
+    hot = keys[-MAX_KEYS:]
+    start = time.perf_counter()
+    for key in hot:
+        allow(key, now)
+    core_ns = (time.perf_counter() - start) / len(hot) * 1e9
+
+    # Full check_rate_limit (decision + headers)
+    check = limiter.check_rate_limit
+    start = time.perf_counter()
+    for key in hot:
+        check(key)
+    full_ns = (time.perf_counter() - start) / len(hot) * 1e9
+
+    return retained, core_ns, full_ns, limiter.stats()
+
+
+def main():
+    print("⏱️ BENCHMARK - LocalRateLimiter")
+    print("=" * 80)
+    print(f"max_keys: {MAX_KEYS:,}")
+    print(f"   {'keys':>10}{'tracked':>10}{'evicted':>10}{'memory MB':>12}{'check ns':>10}{'full ns':>10}")
+    for n_keys in KEY_COUNTS:
+        retained, core_ns, full_ns, stats = bench(n_keys)
+        print(
+            f"   {n_keys:>10,}{stats['tracked_keys']:>10,}{stats['evictions']:>10,}"
+            f"{retained / 1e6:>12.2f}{core_ns:>10.0f}{full_ns:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -348,10 +348,10 @@ resource "google_cloudbuild_trigger" "model_training" {
       args = ["python", "train_two_stage_model.py"]
     }
 
-    # Step 3: Upload trained model
+    # Step 3: Upload trained model + incremental state (the nightly update starts from both)
     step {
       name = "gcr.io/cloud-builders/gsutil"
-      args = ["cp", "TWO_STAGE_MODEL.pkl", "gs://${google_storage_bucket.model_bucket.name}/models/"]
+      args = ["cp", "TWO_STAGE_MODEL.pkl", "TWO_STAGE_INCREMENTAL.npz", "gs://${google_storage_bucket.model_bucket.name}/models/"]
     }
 
     # Step 4: Update model version in Cloud Run
@@ -409,6 +409,103 @@ resource "google_cloud_scheduler_job" "model_retraining" {
   depends_on = [google_cloudbuild_trigger.model_training]
 }
 
+# Cloud Build trigger for the nightly incremental update (no full retrain)
+resource "google_cloudbuild_trigger" "model_nightly_update" {
+  name        = "steel-model-nightly-update"
+  description = "Folds the day's observations into the Two-Stage model (TWO_STAGE_FINAL_MODEL.py --update)"
+
+  webhook_config {
+    secret = google_secret_manager_secret.build_webhook_secret.id
+  }
+
+  build {
+    # Step 1: Fetch the current model and its incremental state (the pair must travel together)
+    step {
+      name = "gcr.io/cloud-builders/gsutil"
+      args = [
+        "cp",
+        "gs://${google_storage_bucket.model_bucket.name}/models/TWO_STAGE_MODEL.pkl",
+        "gs://${google_storage_bucket.model_bucket.name}/models/TWO_STAGE_INCREMENTAL.npz",
+        "parte_tecnica/03_feature_engineering/outputs/"
+      ]
+    }
+
+    # Step 2: Refresh features and publish the snapshot the API's in-process fallback reads
+    step {
+      name = "gcr.io/${var.project_id}/model-trainer:latest"
+      dir  = "parte_tecnica/03_feature_engineering/03_comprehensive_analysis"
+      env = [
+        "PROJECT_ID=${var.project_id}",
+        "MODEL_BUCKET=${google_storage_bucket.model_bucket.name}"
+      ]
+      args = ["python", "robust_feature_pipeline.py", "--incremental", "--publish"]
+    }
+
+    # Step 3: Incremental update (exits non-zero when the state is missing: run the weekly retrain)
+    step {
+      name = "gcr.io/${var.project_id}/model-trainer:latest"
+      dir  = "parte_tecnica/03_feature_engineering/05_final_models"
+      env = [
+        "PROJECT_ID=${var.project_id}",
+        "DATASET_ID=${google_bigquery_dataset.steel_data.dataset_id}",
+        "MODEL_BUCKET=${google_storage_bucket.model_bucket.name}"
+      ]
+      args = ["python", "TWO_STAGE_FINAL_MODEL.py", "--update"]
+    }
+
+    # Step 4: Upload the updated model and state together
+    step {
+      name = "gcr.io/cloud-builders/gsutil"
+      args = [
+        "cp",
+        "parte_tecnica/03_feature_engineering/outputs/TWO_STAGE_MODEL.pkl",
+        "parte_tecnica/03_feature_engineering/outputs/TWO_STAGE_INCREMENTAL.npz",
+        "gs://${google_storage_bucket.model_bucket.name}/models/"
+      ]
+    }
+
+    # Step 5: Update model version in Cloud Run
+    step {
+      name = "gcr.io/cloud-builders/gcloud"
+      args = [
+        "run", "services", "update", "steel-predictor",
+        "--update-env-vars", "MODEL_VERSION=$BUILD_ID",
+        "--region", var.region
+      ]
+    }
+  }
+
+  options {
+    logging = "CLOUD_LOGGING_ONLY"
+  }
+
+  depends_on = [google_project_service.apis]
+}
+
+# Cloud Scheduler for the nightly incremental update
+resource "google_cloud_scheduler_job" "model_nightly_update" {
+  name             = "model-nightly-update-schedule"
+  description      = "Nightly incremental model update"
+  schedule         = var.model_update_schedule
+  time_zone        = "America/Mexico_City"
+  attempt_deadline = "600s"
+
+  http_target {
+    http_method = "POST"
+    uri         = "https://cloudbuild.googleapis.com/v1/projects/${var.project_id}/triggers/${google_cloudbuild_trigger.model_nightly_update.trigger_id}:webhook"
+
+    body = base64encode(jsonencode({
+      message = "Scheduled nightly incremental update"
+    }))
+
+    oauth_token {
+      service_account_email = google_service_account.cloud_run_sa.email
+    }
+  }
+
+  depends_on = [google_cloudbuild_trigger.model_nightly_update]
+}
+
 # Data quality monitoring with timezone awareness
 resource "google_monitoring_alert_policy" "data_freshness" {
   display_name = "Steel Data Freshness Alert"
@@ -62,6 +62,12 @@ variable "model_retrain_schedule" {
   default     = "0 2 * * 1" # 2 AM every Monday
 }
 
+variable "model_update_schedule" {
+  description = "Cron schedule for the nightly incremental model update"
+  type        = string
+  default     = "0 22 * * 1-5" # 10 PM weekdays, after the LME close and Banxico fix
+}
+
 # Monitoring configuration
 variable "notification_channels" {
   description = "List of notification channels for alerts"
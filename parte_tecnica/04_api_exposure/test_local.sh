@@ -8,7 +8,7 @@ echo
 
 # Set local mode
 export LOCAL_MODE=true
-export PYTHONPATH=$(pwd):$PYTHONPATH
+export PYTHONPATH=$(pwd):$(dirname $(pwd)):$PYTHONPATH   # app/ + shared/
 
 # Start server in background
 echo "🚀 Starting API server..."
@@ -0,0 +1 @@
+"""Code shared by the feature pipeline and the API (business calendar, forest inference plan)"""
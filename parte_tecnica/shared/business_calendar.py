@@ -0,0 +1,212 @@
+"""
+Business-day calendar index per market (Mexico, USA, UK/LME, China, Turkey)
+
+Shared by the API and the feature pipeline. Per market it keeps a packed
+business-day bitset plus the cumulative business-day count and the
+positions of every business day, so next/previous business day, n
+business days ahead and days-to-next-holiday are array lookups or a
+``searchsorted``. Holidays come from HolidayCalendarAnalyzer and are
+bundled as ``shared/data/business_calendar.json``; years after the bundled
+range are filled from the rules in ``shared.holiday_rules``.
+
+Kept free of app settings so the pipeline can import it standalone.
+"""
+import json
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from shared.holiday_rules import rule_holidays
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR_PATH = Path(__file__).resolve().parent / "data" / "business_calendar.json"
+RULE_YEARS_AHEAD = 2   # get_business_calendar covers through current year + 2
+MARKET_ALIASES = {"LME": "UK", "MX": "Mexico", "US": "USA"}
+
+DateLike = Union[date, str, np.datetime64]
+
+
+class _MarketIndex:
+    """Bitset, cumulative counts and holiday days for one market"""
+
+    __slots__ = ("bits", "cumulative", "positions", "holidays")
+
+    def __init__(self, business: np.ndarray, holidays: np.ndarray):
+        self.bits = np.packbits(business)
+        # cumulative[i] = business days in [start, start + i)
+        self.cumulative = np.concatenate(([0], np.cumsum(business, dtype=np.int32)))
+        self.positions = np.flatnonzero(business).astype(np.int32)
+        self.holidays = np.unique(holidays.astype("datetime64[D]").astype(np.int64))
+
+
+class BusinessCalendar:
+    """
+    Precomputed business-day index for [start, end]
+
+    A business day is a weekday that is not a market holiday. Dates
+    outside the indexed range fall back to the weekday-only rule, with a
+    warning (once per year) for dates after ``end``.
+    """
+
+    def __init__(self, holidays: Dict[str, Iterable[DateLike]], start: DateLike, end: DateLike):
+        self.start = np.datetime64(start, "D")
+        self.end = np.datetime64(end, "D")
+        self.n_days = int((self.end - self.start).astype(int)) + 1
+        self._warned_years = set()
+
+        days = self.start + np.arange(self.n_days)
+        weekdays = np.is_busday(days)
+        self._holiday_dates = {}
+        self._markets: Dict[str, _MarketIndex] = {}
+        for market, market_holidays in holidays.items():
+            holiday_days = np.array(sorted({np.datetime64(d, "D") for d in market_holidays}), dtype="datetime64[D]")
+            business = weekdays & ~np.isin(days, holiday_days)
+            self._holiday_dates[market] = holiday_days
+            self._markets[market] = _MarketIndex(business, holiday_days)
+
+        logger.info(f"📅 Business calendar {self.start} to {self.end}: {', '.join(self._markets)}")
+
+    @classmethod
+    def from_master_calendar(cls, calendar_df) -> "BusinessCalendar":
+        """Build from the HolidayCalendarAnalyzer frame (``<Market>_holiday`` bool columns)"""
+        holidays = {
+            column[:-len("_holiday")]: calendar_df.index[calendar_df[column].astype(bool)]
+            for column in calendar_df.columns if column.endswith("_holiday")
+        }
+        return cls(holidays, calendar_df.index.min().date(), calendar_df.index.max().date())
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = DEFAULT_CALENDAR_PATH) -> "BusinessCalendar":
+        """Load the compact JSON written by ``save``"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["holidays"], data["start"], data["end"])
+
+    def extended_to(self, year: int) -> "BusinessCalendar":
+        """Copy covering through Dec 31 of ``year``, later years from holiday_rules"""
+        last_year = self.end.astype(date).year
+        if year <= last_year:
+            return self
+        extra = rule_holidays(self._holiday_dates, range(last_year + 1, year + 1))
+        holidays = {
+            market: np.concatenate((days, np.array(extra[market], dtype="datetime64[D]")))
+            for market, days in self._holiday_dates.items()
+        }
+        logger.info(f"📅 Holidays {last_year + 1}-{year} generated from rules: {', '.join(holidays)}")
+        return BusinessCalendar(holidays, self.start, date(year, 12, 31))
+
+    def save(self, path: Union[str, Path] = DEFAULT_CALENDAR_PATH):
+        """Write start/end and holiday dates per market as JSON"""
+        data = {
+            "start": str(self.start),
+            "end": str(self.end),
+            "holidays": {market: [str(d) for d in days] for market, days in self._holiday_dates.items()}
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+    @property
+    def markets(self):
+        return list(self._markets)
+
+    def _index(self, market: str) -> _MarketIndex:
+        return self._markets[MARKET_ALIASES.get(market, market)]
+
+    def _offset(self, day: DateLike) -> Optional[int]:
+        """Position of ``day`` in the index, None when outside [start, end]"""
+        i = int((np.datetime64(day, "D") - self.start).astype(int))
+        if 0 <= i < self.n_days:
+            return i
+        if i >= self.n_days:
+            year = (self.start + i).astype(date).year
+            if year not in self._warned_years:
+                self._warned_years.add(year)
+                logger.warning(f"⚠️ {year} is past the business calendar ({self.end}): "
+                               f"holidays ignored, weekday-only rule")
+        return None
+
+    def _to_date(self, position: int) -> date:
+        return (self.start + position).astype(date)
+
+    def business_day_mask(self, market: str) -> np.ndarray:
+        """Boolean business-day flags for every day in [start, end]"""
+        return np.unpackbits(self._index(market).bits, count=self.n_days).astype(bool)
+
+    def is_business_day(self, day: DateLike, market: str = "Mexico") -> bool:
+        i = self._offset(day)
+        if i is None:
+            return bool(np.is_busday(np.datetime64(day, "D")))
+        cumulative = self._index(market).cumulative
+        return bool(cumulative[i + 1] - cumulative[i])
+
+    def add_business_days(self, day: DateLike, n: int, market: str = "Mexico") -> date:
+        """
+        ``n`` business days after ``day`` (before it if negative)
+
+        With ``n == 0`` returns ``day`` rolled forward to a business day.
+        """
+        index = self._index(market)
+        i = self._offset(day)
+        if i is not None:
+            # Rank among business days: positions[cumulative[i]] is the first one >= day
+            if n > 0:
+                rank = index.cumulative[i + 1] + n - 1
+            elif n < 0:
+                rank = index.cumulative[i] + n
+            else:
+                rank = index.cumulative[i]
+            if 0 <= rank < len(index.positions):
+                return self._to_date(int(index.positions[rank]))
+
+        # Outside the indexed range: weekday-only rule
+        day = np.datetime64(day, "D")
+        if n > 0:
+            result = np.busday_offset(day + 1, n - 1, roll="forward")
+        elif n < 0:
+            result = np.busday_offset(day - 1, n + 1, roll="backward")
+        else:
+            result = np.busday_offset(day, 0, roll="forward")
+        return result.astype(date)
+
+    def next_business_day(self, day: DateLike, market: str = "Mexico") -> date:
+        """First business day strictly after ``day``"""
+        return self.add_business_days(day, 1, market)
+
+    def previous_business_day(self, day: DateLike, market: str = "Mexico") -> date:
+        """Last business day strictly before ``day``"""
+        return self.add_business_days(day, -1, market)
+
+    def business_days_between(self, start: DateLike, end: DateLike, market: str = "Mexico") -> int:
+        """Business days in [start, end) (both inside the indexed range)"""
+        cumulative = self._index(market).cumulative
+        i, j = self._offset(start), self._offset(end)
+        if i is None or j is None:
+            return int(np.busday_count(np.datetime64(start, "D"), np.datetime64(end, "D")))
+        return int(cumulative[j] - cumulative[i])
+
+    def days_to_next_holiday(self, dates, market: str = "Mexico") -> np.ndarray:
+        """
+        Calendar days until the next holiday strictly after each date
+
+        Vectorized over ``dates`` (DatetimeIndex or datetime64 array);
+        NaN where no later holiday is known.
+        """
+        holidays = self._index(market).holidays
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+        nxt = np.searchsorted(holidays, days, side="right")
+        result = np.full(days.shape, np.nan)
+        found = nxt < len(holidays)
+        result[found] = holidays[nxt[found]] - days[found]
+        return result
+
+
+@lru_cache()
+def get_business_calendar() -> BusinessCalendar:
+    """Bundled calendar singleton, extended by rules through current year + RULE_YEARS_AHEAD"""
+    return BusinessCalendar.load().extended_to(datetime.utcnow().year + RULE_YEARS_AHEAD)
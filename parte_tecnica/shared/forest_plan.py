@@ -0,0 +1,80 @@
+"""
+Flattened RandomForest inference shared by TwoStageRebarModel and the API
+
+The fitted trees of a forest are copied into (n_trees x n_nodes) arrays,
+so all trees are walked at once with NumPy indexing instead of calling
+``tree.predict`` per tree through joblib. Predictions match sklearn: same
+float32 ``<=`` threshold comparison and tree-by-tree summation order.
+
+Only RandomForest/ExtraTrees regressors (equal-weight average of
+single-output trees) are compiled. Other ensembles with ``estimators_``
+(GradientBoosting, weighted VotingRegressor) keep ``model.predict``.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+FOREST_TYPES = (RandomForestRegressor, ExtraTreesRegressor)
+
+
+def compile_forest(model) -> Optional[Dict]:
+    """Flattened trees of a fitted forest regressor, None for any other model"""
+    if not isinstance(model, FOREST_TYPES) or model.n_outputs_ != 1:
+        return None
+    trees = [est.tree_ for est in model.estimators_]
+    n_trees = len(trees)
+    n_nodes = max(t.node_count for t in trees)
+
+    compiled = {
+        'feature': np.zeros((n_trees, n_nodes), dtype=np.intp),
+        'threshold': np.zeros((n_trees, n_nodes), dtype=np.float64),
+        'left': np.full((n_trees, n_nodes), -1, dtype=np.intp),
+        'right': np.full((n_trees, n_nodes), -1, dtype=np.intp),
+        'value': np.zeros((n_trees, n_nodes), dtype=np.float64),
+        'depth': max(t.max_depth for t in trees),
+        'tree_idx': np.arange(n_trees)
+    }
+    for i, t in enumerate(trees):
+        k = t.node_count
+        compiled['feature'][i, :k] = np.maximum(t.feature, 0)  # leaves: -2
+        compiled['threshold'][i, :k] = t.threshold
+        compiled['left'][i, :k] = t.children_left
+        compiled['right'][i, :k] = t.children_right
+        compiled['value'][i, :k] = t.value[:, 0, 0]
+    return compiled
+
+
+def predict_forest(forest: Dict, row: np.ndarray) -> np.float64:
+    """Average of leaf values for a single (1, n_features) row"""
+    x = row[0].astype(np.float32)
+    idx = forest['tree_idx']
+    node = np.zeros(len(idx), dtype=np.intp)
+    for _ in range(forest['depth']):
+        go_left = x[forest['feature'][idx, node]] <= forest['threshold'][idx, node]
+        child = np.where(go_left, forest['left'][idx, node], forest['right'][idx, node])
+        node = np.where(child >= 0, child, node)
+
+    total = 0.0
+    for value in forest['value'][idx, node].tolist():
+        total += value
+    return np.float64(total / len(idx))
+
+
+def predict_forest_batch(forest: Dict, X: np.ndarray) -> np.ndarray:
+    """Walk N rows x n_trees trees at once; sums tree by tree like sklearn"""
+    X32 = X.astype(np.float32)
+    n_rows = X32.shape[0]
+    idx = forest['tree_idx'][np.newaxis, :]
+    rows = np.arange(n_rows)[:, np.newaxis]
+    node = np.zeros((n_rows, len(forest['tree_idx'])), dtype=np.intp)
+    for _ in range(forest['depth']):
+        go_left = X32[rows, forest['feature'][idx, node]] <= forest['threshold'][idx, node]
+        child = np.where(go_left, forest['left'][idx, node], forest['right'][idx, node])
+        node = np.where(child >= 0, child, node)
+
+    leaves = forest['value'][idx, node]
+    total = np.zeros(n_rows, dtype=np.float64)
+    for t in range(leaves.shape[1]):
+        total += leaves[:, t]
+    return total / leaves.shape[1]
@@ -0,0 +1,138 @@
+"""
+Rule-based market holidays for years past the bundled calendar
+
+The bundled calendar (data/business_calendar.json) is written by
+HolidayCalendarAnalyzer for a fixed range of years. These rules extend it
+for later years from the published law/exchange rules of each market:
+
+- Mexico (CNBV bank holidays): fixed dates, the Monday holidays of the
+  Ley Federal del Trabajo, Holy Thursday/Good Friday, Nov 2 on weekdays and
+  the Oct 1 presidential transition every six years
+- USA (NYSE): fixed dates moved to Friday/Monday when on a weekend,
+  Monday holidays, Good Friday, Thanksgiving
+- UK (LME, England & Wales bank holidays): Easter, May/August Mondays and
+  substitute days for New Year and Christmas
+- China, Turkey: fixed-date holidays only; lunar-calendar holidays
+  (Spring Festival, religious feasts) have no closed-form rule and are
+  not generated
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+
+def easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th ``weekday`` (Monday=0) of the month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month % 12 + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed_usa(day: date) -> date:
+    """Saturday holidays close on Friday, Sunday holidays on Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def mexico_holidays(year: int) -> List[date]:
+    easter = easter_sunday(year)
+    days = [
+        date(year, 1, 1),
+        nth_weekday(year, 2, 0, 1),    # Constitución
+        nth_weekday(year, 3, 0, 3),    # Benito Juárez
+        easter - timedelta(days=3),    # Jueves Santo
+        easter - timedelta(days=2),    # Viernes Santo
+        date(year, 5, 1),
+        date(year, 9, 16),
+        nth_weekday(year, 11, 0, 3),   # Revolución
+        date(year, 12, 25),
+    ]
+    if date(year, 11, 2).weekday() < 5:
+        days.append(date(year, 11, 2))
+    if (year - 2024) % 6 == 0:
+        days.append(date(year, 10, 1))   # Transmisión del Poder Ejecutivo (desde 2024)
+    return days
+
+
+def usa_holidays(year: int) -> List[date]:
+    easter = easter_sunday(year)
+    days = [
+        date(year, 1, 1),
+        nth_weekday(year, 1, 0, 3),    # MLK Day
+        nth_weekday(year, 2, 0, 3),    # Presidents Day
+        easter - timedelta(days=2),    # Good Friday
+        nth_weekday(year, 5, 0, -1),   # Memorial Day
+        date(year, 6, 19),             # Juneteenth
+        date(year, 7, 4),
+        nth_weekday(year, 9, 0, 1),    # Labor Day
+        nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        date(year, 12, 25),
+    ]
+    # NYSE does not close on Dec 31 for a Saturday New Year
+    return [d for d in map(_observed_usa, days) if d.year == year]
+
+
+def uk_holidays(year: int) -> List[date]:
+    easter = easter_sunday(year)
+    new_year = date(year, 1, 1)
+    days = [
+        new_year + timedelta(days=(7 - new_year.weekday()) % 7 if new_year.weekday() >= 5 else 0),
+        easter - timedelta(days=2),    # Good Friday
+        easter + timedelta(days=1),    # Easter Monday
+        nth_weekday(year, 5, 0, 1),    # Early May
+        nth_weekday(year, 5, 0, -1),   # Spring
+        nth_weekday(year, 8, 0, -1),   # Summer
+    ]
+    # Christmas and Boxing Day roll to the next free weekdays
+    christmas = [date(year, 12, 25), date(year, 12, 26)]
+    taken = set()
+    for day in christmas:
+        while day.weekday() >= 5 or day in taken:
+            day += timedelta(days=1)
+        taken.add(day)
+    return days + sorted(taken)
+
+
+def china_holidays(year: int) -> List[date]:
+    return [date(year, 1, 1), date(year, 5, 1)] + [date(year, 10, d) for d in range(1, 8)]
+
+
+def turkey_holidays(year: int) -> List[date]:
+    return [date(year, m, d) for m, d in ((1, 1), (4, 23), (5, 1), (5, 19), (7, 15), (8, 30), (10, 29))]
+
+
+HOLIDAY_RULES = {
+    "Mexico": mexico_holidays,
+    "USA": usa_holidays,
+    "UK": uk_holidays,
+    "China": china_holidays,
+    "Turkey": turkey_holidays,
+}
+
+
+def rule_holidays(markets: Iterable[str], years: Iterable[int]) -> Dict[str, List[date]]:
+    """Holidays per market for ``years``; markets without rules get none"""
+    years = list(years)
+    return {
+        market: sorted({d for year in years for d in HOLIDAY_RULES[market](year)}) if market in HOLIDAY_RULES else []
+        for market in markets
+    }